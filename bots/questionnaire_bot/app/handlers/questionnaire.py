@@ -61,7 +61,8 @@ async def finish(message: Message, state: FSMContext) -> None:
     )
 
 
-async def get_current(state: FSMContext) -> SkippableState:
+async def get_current(state: FSMContext) -> SkippableState | None:
+    # None — анкета уже закончена, отменена или истекла по TTL, а кнопка старая
     return Form.from_value(await state.get_state())
 
 
@@ -113,7 +114,7 @@ async def cb_cancel(cb: CallbackQuery, state: FSMContext) -> None:
 
 async def cb_back(cb: CallbackQuery, state: FSMContext) -> None:
     current = await get_current(state)
-    if current.previous is None:
+    if current is None or current.previous is None:
         await cb.answer()
         return
     msg = _cb_message_or_none(cb)
@@ -127,7 +128,7 @@ async def cb_back(cb: CallbackQuery, state: FSMContext) -> None:
 async def cb_skip(cb: CallbackQuery, state: FSMContext) -> None:
     current = await get_current(state)
     msg = _cb_message_or_none(cb)
-    if not msg:
+    if current is None or not msg:
         await cb.answer()
         return
     if current.next is None:
@@ -139,6 +140,9 @@ async def cb_skip(cb: CallbackQuery, state: FSMContext) -> None:
 
 async def cb_hint_show(cb: CallbackQuery, state: FSMContext, callback_data: QCb) -> None:
     current = await get_current(state)
+    if current is None:
+        await cb.answer()
+        return
     base = text_by_state(current)
     title = _("hint.title")
     hint = _(f"hint.{callback_data.hint_key or ''}")
@@ -153,7 +157,7 @@ async def cb_hint_show(cb: CallbackQuery, state: FSMContext, callback_data: QCb)
 async def cb_hint_hide(cb: CallbackQuery, state: FSMContext, callback_data: QCb) -> None:
     current = await get_current(state)
     msg = _cb_message_or_none(cb)
-    if not msg:
+    if current is None or not msg:
         await cb.answer()
         return
     await control_hint(msg, f"<b>{text_by_state(current)}</b>", callback_data, current)
@@ -2,8 +2,21 @@ import asyncio
 
 from aiogram import Bot, Dispatcher
 
+from libs.common.aiogram.adaptive_limit import setup_adaptive_rate_limit
+from libs.common.aiogram.callback_answer import setup_callback_answers
+from libs.common.aiogram.callback_dedup import setup_callback_dedup
 from libs.common.aiogram.error_handler import setup_error_handlers
+from libs.common.aiogram.flight_recorder import setup_flight_recorder
+from libs.common.aiogram.fsm_storage import memory_storage
 from libs.common.aiogram.i18n import create_i18n
+from libs.common.aiogram.loop_monitor import setup_loop_monitor
+from libs.common.aiogram.memory import setup_memory_accounting
+from libs.common.aiogram.metrics import setup_metrics
+from libs.common.aiogram.priority import setup_update_priority
+from libs.common.aiogram.profiler import setup_profiler
+from libs.common.aiogram.tracing import setup_tracing
+from libs.common.aiogram.update_recorder import setup_update_recorder
+from libs.common.clock import SYSTEM_CLOCK, Clock
 from libs.common.config import get_settings
 from libs.common.logger import setup_logging
 from libs.common.middleware.keyboard_cleanup_middleware import keyboard_cleanup_middleware
@@ -20,20 +33,52 @@ def on_startup() -> None:
     log.info("Questionnaire bot started.")
 
 
-async def start_bot() -> None:
-    bot = Bot(token=get_settings(bot_name=BOT_NAME).bot_token)
-    dp = Dispatcher()
+def build_dispatcher(bot: Bot, clock: Clock = SYSTEM_CLOCK) -> Dispatcher:
+    settings = get_settings(bot_name=BOT_NAME)
+    dp = Dispatcher(storage=memory_storage(bot_name=BOT_NAME, clock=clock))
+
+    server = setup_metrics(bot_name=BOT_NAME, dp=dp, bot=bot)
+    setup_update_priority(bot_name=BOT_NAME, dp=dp, clock=clock)
+    monitor = setup_loop_monitor(bot_name=BOT_NAME, dp=dp, server=server)
+    setup_flight_recorder(bot_name=BOT_NAME, dp=dp, server=server)
+    setup_profiler(bot_name=BOT_NAME, dp=dp, server=server)
+    setup_update_recorder(bot_name=BOT_NAME, dp=dp)
 
-    dp.update.middleware(create_i18n(bot_name=BOT_NAME))
-    dp.update.middleware(rate_limit_middleware(bot_name=BOT_NAME))
+    i18n = create_i18n(bot_name=BOT_NAME, reload_interval=settings.i18n_reload_sec)
+    limiter = rate_limit_middleware(bot_name=BOT_NAME, clock=clock)
+    dp.update.middleware(i18n)
+    dp.update.middleware(limiter)
+    dp.shutdown.register(limiter.backend.aclose)
+    setup_adaptive_rate_limit(
+        bot_name=BOT_NAME, dp=dp, bot=bot, limiter=limiter, monitor=monitor, server=server
+    )
+    setup_callback_dedup(bot_name=BOT_NAME, dp=dp, clock=clock)
+    setup_callback_answers(bot_name=BOT_NAME, dp=dp, bot=bot)
     dp.message.middleware(keyboard_cleanup_middleware(bot_name=BOT_NAME))
     dp.callback_query.middleware(keyboard_cleanup_middleware(bot_name=BOT_NAME))
 
+    setup_memory_accounting(
+        bot_name=BOT_NAME,
+        dp=dp,
+        server=server,
+        user_structures={"rate_limit.bucket": lambda: limiter.bucket},
+        caches={"i18n.locales": lambda: i18n.i18n.locales},
+    )
+
     setup_error_handlers(bot_name=BOT_NAME, dp=dp)
 
     questionnaire.register(dp)
 
+    setup_tracing(bot_name=BOT_NAME, dp=dp, bot=bot)
+
     dp.startup.register(on_startup)
+    return dp
+
+
+async def start_bot() -> None:
+    settings = get_settings(bot_name=BOT_NAME)
+    bot = Bot(token=settings.bot_token)
+    dp = build_dispatcher(bot)
     await dp.start_polling(bot, allowed_updates=dp.resolve_used_update_types())
 
 
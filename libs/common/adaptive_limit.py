@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+
+from libs.common.clock import SYSTEM_CLOCK, Clock
+from libs.common.metrics import REGISTRY, Registry
+from libs.common.middleware.api_pressure_middleware import ApiPressureMiddleware
+
+
+# Шаг контроллера: сигналы собираются за шаг, множитель меняется не чаще раза за шаг
+STEP = 1.0
+
+# Перегрузка — множитель умножается на DECREASE; спокойный шаг — растёт на INCREASE
+DECREASE = 0.5
+INCREASE = 0.1
+
+
+class AimdController:
+    """
+    AIMD (additive increase, multiplicative decrease) над лимитом на пользователя.
+
+    Раз в STEP секунд смотрит на три сигнала перегрузки: пик очереди исходящих
+    вызовов Bot API, ответы 429 и худший лаг event loop за шаг. Если любой
+    превысил порог, множитель лимита падает вдвое (не ниже min_factor),
+    иначе поднимается на INCREASE до 1.0 — как окно TCP: зажимаемся сразу,
+    отпускаем постепенно, и колебаний вокруг границы перегрузки меньше.
+
+    Сам контроллер ничего не ограничивает: RateLimitMiddleware применяет
+    factor к лимиту бэкенда и политики, когда update() сменил шаг.
+    """
+
+    def __init__(
+        self,
+        base_limit: int,
+        pressure: ApiPressureMiddleware,
+        lag: Callable[[float], float] | None = None,
+        *,
+        backlog: int = 100,
+        retry_after: int = 1,
+        lag_threshold: float = 0.1,
+        min_factor: float = 0.25,
+        clock: Clock = SYSTEM_CLOCK,
+        registry: Registry = REGISTRY,
+    ) -> None:
+        if not 0 < min_factor <= 1:
+            raise ValueError(f"min_factor must be in (0, 1], got {min_factor}")
+        self.base_limit = base_limit
+        self.pressure = pressure
+        self.lag = lag
+        self.thresholds = {"backlog": backlog, "retry_after": retry_after, "lag": lag_threshold}
+        self.min_factor = min_factor
+        self.factor = 1.0
+        self.limit = base_limit
+        self.lowest = 1.0
+        self.signals: dict[str, float] = {"backlog": 0, "retry_after": 0, "lag": 0.0}
+        self.reasons: list[str] = []
+        self.next_update = clock.monotonic() + STEP
+
+        self._decreases = registry.counter(
+            "rate_limit_adaptive_decreases", "Limit cuts by overload signal", ("signal",)
+        )
+        registry.gauge(
+            "rate_limit_adaptive_factor", "Share of the base per-user limit in effect"
+        ).set_function(lambda: self.factor)
+        registry.gauge("rate_limit_effective_limit", "Per-user limit in effect").set_function(
+            lambda: self.limit
+        )
+        registry.gauge(
+            "bot_api_requests_in_flight", "Bot API requests awaiting a reply"
+        ).set_function(lambda: self.pressure.in_flight)
+
+    def update(self, now: float) -> float:
+        """Закрывает шаг: снимает сигналы, двигает множитель и возвращает его."""
+        backlog, retry_after = self.pressure.take()
+        lag = self.lag(STEP) if self.lag is not None else 0.0
+        self.signals = {"backlog": backlog, "retry_after": retry_after, "lag": lag}
+        self.reasons = [
+            name for name, value in self.signals.items() if value >= self.thresholds[name] > 0
+        ]
+        if self.reasons:
+            self.factor = max(self.min_factor, self.factor * DECREASE)
+            for name in self.reasons:
+                self._decreases.labels(name).inc()
+        else:
+            self.factor = min(1.0, self.factor + INCREASE)
+        self.lowest = min(self.lowest, self.factor)
+        self.limit = max(1, round(self.base_limit * self.factor))
+        self.next_update = now + STEP
+        return self.factor
+
+    def state(self) -> dict[str, object]:
+        return {
+            "base_limit": self.base_limit,
+            "limit": self.limit,
+            "factor": round(self.factor, 3),
+            "lowest_factor": round(self.lowest, 3),
+            "overloaded_by": self.reasons,
+            "signals": {
+                "backlog": self.signals["backlog"],
+                "retry_after": self.signals["retry_after"],
+                "lag_ms": round(self.signals["lag"] * 1000, 3),
+            },
+            "thresholds": {
+                "backlog": self.thresholds["backlog"],
+                "retry_after": self.thresholds["retry_after"],
+                "lag_ms": round(self.thresholds["lag"] * 1000, 3),
+            },
+            "in_flight": self.pressure.in_flight,
+        }
+
+
+__all__ = ["AimdController"]
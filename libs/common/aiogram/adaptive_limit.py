@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import json
+
+from aiogram import Bot, Dispatcher
+
+from libs.common.adaptive_limit import AimdController
+from libs.common.config import get_settings
+from libs.common.loop_monitor import LoopMonitor
+from libs.common.metrics import REGISTRY, MetricsServer, Registry
+from libs.common.middleware.api_pressure_middleware import ApiPressureMiddleware
+from libs.common.middleware.rate_limit_middleware import RateLimitMiddleware
+
+
+def setup_adaptive_rate_limit(
+    bot_name: str,
+    dp: Dispatcher,
+    bot: Bot,
+    limiter: RateLimitMiddleware,
+    monitor: LoopMonitor | None = None,
+    server: MetricsServer | None = None,
+    registry: Registry = REGISTRY,
+) -> AimdController | None:
+    """
+    Адаптивный лимит для limiter по давлению на Bot API и лагу loop;
+    RATE_LIMIT_ADAPTIVE=false — выключено.
+
+    Без monitor лаг не учитывается. При переданном server добавляет /rate-limit
+    с текущим лимитом и сигналами; контроллер кладётся в dp["rate_limit_adaptive"].
+    """
+    settings = get_settings(bot_name=bot_name)
+    if not settings.rate_limit_adaptive:
+        return None
+
+    pressure = ApiPressureMiddleware()
+    bot.session.middleware(pressure)
+    controller = AimdController(
+        limiter.limit,
+        pressure,
+        monitor.recent if monitor is not None else None,
+        backlog=settings.rate_limit_adaptive_backlog,
+        retry_after=settings.rate_limit_adaptive_retry_after,
+        lag_threshold=settings.rate_limit_adaptive_lag_ms / 1000,
+        min_factor=settings.rate_limit_adaptive_min_factor,
+        clock=limiter.clock,
+        registry=registry,
+    )
+    limiter.adaptive = controller
+    dp["rate_limit_adaptive"] = controller
+    if server is not None:
+        server.routes["/rate-limit"] = lambda: (
+            "application/json",
+            json.dumps(controller.state()),
+        )
+    return controller
+
+
+__all__ = ["setup_adaptive_rate_limit"]
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from aiogram import Bot, Dispatcher
+
+from libs.common.config import get_settings
+from libs.common.logger import setup_logging
+from libs.common.metrics import REGISTRY, Registry
+from libs.common.middleware.callback_answer_middleware import CallbackAnswerMiddleware
+
+
+def setup_callback_answers(
+    bot_name: str, dp: Dispatcher, bot: Bot, registry: Registry = REGISTRY
+) -> CallbackAnswerMiddleware | None:
+    """
+    Ранний answerCallbackQuery и подавление повторных ответов;
+    CALLBACK_ANSWER_DEADLINE_MS < 0 — выключено.
+
+    Вызывать до остальных middleware на dp.callback_query: тогда срок отсчитывается
+    до их работы с хранилищем.
+    """
+    settings = get_settings(bot_name=bot_name)
+    if settings.callback_answer_deadline_ms < 0:
+        return None
+
+    answers = CallbackAnswerMiddleware(
+        deadline=settings.callback_answer_deadline_ms / 1000,
+        log=setup_logging(bot_name),
+        registry=registry,
+    )
+    dp.callback_query.middleware(answers)
+    bot.session.middleware(answers.requests)
+    return answers
+
+
+__all__ = ["setup_callback_answers"]
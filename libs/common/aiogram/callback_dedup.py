@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from aiogram import Dispatcher
+
+from libs.common.clock import SYSTEM_CLOCK, Clock
+from libs.common.config import get_settings
+from libs.common.logger import setup_logging
+from libs.common.metrics import REGISTRY, Registry
+from libs.common.middleware.callback_dedup_middleware import CallbackDedupMiddleware
+
+
+def setup_callback_dedup(
+    bot_name: str, dp: Dispatcher, clock: Clock = SYSTEM_CLOCK, registry: Registry = REGISTRY
+) -> CallbackDedupMiddleware | None:
+    """Отбрасывает повторные нажатия inline-кнопок; CALLBACK_DEDUP_TTL_MS=0 — выключено."""
+    settings = get_settings(bot_name=bot_name)
+    if settings.callback_dedup_ttl_ms <= 0:
+        return None
+
+    dedup = CallbackDedupMiddleware(
+        ttl=settings.callback_dedup_ttl_ms / 1000,
+        clock=clock,
+        log=setup_logging(bot_name),
+        registry=registry,
+    )
+    dp.callback_query.outer_middleware(dedup)
+    return dedup
+
+
+__all__ = ["setup_callback_dedup"]
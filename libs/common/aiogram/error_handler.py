@@ -13,12 +13,18 @@ from aiogram.exceptions import (
 from aiogram.types import CallbackQuery, ErrorEvent, Message
 
 from libs.common.aiogram.i18n import _
+from libs.common.flight_recorder import get_flight_recorder
 from libs.common.logger import setup_logging
 
 
+# Не чаще одного снимка flight recorder за столько секунд при шквале ошибок
+ERROR_DUMP_INTERVAL = 10.0
+
+
 def setup_error_handlers(bot_name: str, dp: Dispatcher) -> None:
 
     log = setup_logging(bot_name)
+    recorder = get_flight_recorder(bot_name)
 
     def _minimal_update_info(event: ErrorEvent) -> dict[str, Any]:
         upd = getattr(event, "update", None)
@@ -76,7 +82,10 @@ def setup_error_handlers(bot_name: str, dp: Dispatcher) -> None:
         return all(m not in text for m in chat_missing_markers)
 
     @dp.errors()
-    async def on_error(event: ErrorEvent, exception: Exception) -> bool:
+    async def on_error(event: ErrorEvent, exception: Exception | None = None) -> bool:
+        # aiogram передаёт исключение только внутри ErrorEvent
+        if exception is None:
+            exception = event.exception
         info = _minimal_update_info(event)
 
         match exception:
@@ -97,6 +106,18 @@ def setup_error_handlers(bot_name: str, dp: Dispatcher) -> None:
             case _:
                 log.exception("Unhandled error while processing update %s", info)
 
+                if recorder is not None:
+                    with suppress(Exception):
+                        # json.dumps всего кольца и запись файла — не в loop, он и так нездоров
+                        path = await asyncio.to_thread(recorder.dump, "error", ERROR_DUMP_INTERVAL)
+                        if path is None:
+                            log.warning(
+                                "Flight recorder snapshot skipped: one was taken < %ss ago",
+                                ERROR_DUMP_INTERVAL,
+                            )
+                        else:
+                            log.error("Flight recorder snapshot: %s", path)
+
                 if _should_send_fallback(exception):
                     target = await _resolve_answer_target(event)
                     if target:
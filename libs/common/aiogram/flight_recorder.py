@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import signal
+import sys
+import threading
+from contextlib import suppress
+from types import TracebackType
+
+from aiogram import Dispatcher
+
+from libs.common.flight_recorder import FlightRecorder, get_flight_recorder
+from libs.common.logger import setup_logging
+from libs.common.metrics import MetricsServer
+
+
+DUMP_SIGNAL = getattr(signal, "SIGUSR1", None)
+
+
+def _install_crash_hooks(recorder: FlightRecorder) -> None:
+    prev_hook = sys.excepthook
+    prev_thread_hook = threading.excepthook
+
+    def excepthook(
+        exc_type: type[BaseException], exc: BaseException, tb: TracebackType | None
+    ) -> None:
+        with suppress(Exception):
+            recorder.dump(reason="crash")
+        prev_hook(exc_type, exc, tb)
+
+    def thread_excepthook(args: threading.ExceptHookArgs) -> None:
+        with suppress(Exception):
+            recorder.dump(reason="thread-crash")
+        prev_thread_hook(args)
+
+    sys.excepthook = excepthook
+    threading.excepthook = thread_excepthook
+
+
+def setup_flight_recorder(
+    bot_name: str, dp: Dispatcher, server: MetricsServer | None = None
+) -> FlightRecorder | None:
+    """
+    Дампы flight recorder: по SIGUSR1, при падении процесса или потока и по
+    запросу /debug/flight на metrics-сервере. Запись наполняют middleware из
+    setup_metrics, снимки на ошибках — setup_error_handlers.
+    """
+    recorder = get_flight_recorder(bot_name)
+    if recorder is None:
+        return None
+
+    log = setup_logging(bot_name)
+    _install_crash_hooks(recorder)
+
+    if server is not None:
+        server.routes["/debug/flight"] = lambda: (
+            "application/json",
+            json.dumps(recorder.snapshot(), ensure_ascii=False),
+        )
+
+    # Ссылки на задачи дампа, чтобы их не собрал GC до завершения
+    dumps: set[asyncio.Task[None]] = set()
+
+    async def _dump_on_signal() -> None:
+        # json.dumps всего кольца и запись файла — в потоке, loop продолжает работу
+        path = await asyncio.to_thread(recorder.dump, "signal")
+        log.warning("Flight recorder dumped to %s", path)
+
+    def _on_signal() -> None:
+        task = asyncio.get_running_loop().create_task(_dump_on_signal())
+        dumps.add(task)
+        task.add_done_callback(dumps.discard)
+
+    async def _start() -> None:
+        if DUMP_SIGNAL is not None:
+            with suppress(NotImplementedError, RuntimeError):
+                asyncio.get_running_loop().add_signal_handler(DUMP_SIGNAL, _on_signal)
+
+    async def _stop() -> None:
+        if DUMP_SIGNAL is not None:
+            with suppress(NotImplementedError, RuntimeError):
+                asyncio.get_running_loop().remove_signal_handler(DUMP_SIGNAL)
+
+    dp.startup.register(_start)
+    dp.shutdown.register(_stop)
+    return recorder
+
+
+__all__ = ["setup_flight_recorder"]
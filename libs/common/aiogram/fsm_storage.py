@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+from collections.abc import Mapping
+from copy import copy
+from typing import Any
+
+from aiogram.fsm.storage.base import StateType, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from libs.common.clock import SYSTEM_CLOCK, Clock
+from libs.common.config import get_settings
+
+
+# Чаще раза в столько секунд просроченные записи не ищем: обход — O(записей)
+SWEEP_INTERVAL = 60.0
+
+
+class ExpiringMemoryStorage(MemoryStorage):
+    """
+    MemoryStorage, который не копит записи навсегда.
+
+    - чтение отсутствующего ключа не создаёт запись (в MemoryStorage это
+      defaultdict, и любой get_state/get_data оставляет след от пользователя);
+    - запись без состояния и данных (FSMContext.clear()) удаляется сразу;
+    - записи, к которым не обращались ttl секунд, удаляются.
+    """
+
+    def __init__(self, ttl: float, clock: Clock = SYSTEM_CLOCK) -> None:
+        super().__init__()
+        self.ttl = ttl
+        self.clock = clock
+        self._touched: dict[StorageKey, float] = {}
+        self._next_sweep = clock.monotonic() + min(ttl, SWEEP_INTERVAL)
+
+    def _alive(self, key: StorageKey) -> bool:
+        now = self.clock.monotonic()
+        if now >= self._next_sweep:
+            self.sweep(now)
+        touched = self._touched.get(key)
+        if touched is None:
+            return False
+        if now - touched > self.ttl:
+            self._forget(key)
+            return False
+        self._touched[key] = now
+        return True
+
+    def _forget(self, key: StorageKey) -> None:
+        self.storage.pop(key, None)
+        self._touched.pop(key, None)
+
+    def _written(self, key: StorageKey) -> None:
+        record = self.storage[key]
+        if record.state is None and not record.data:
+            self._forget(key)
+        else:
+            self._touched[key] = self.clock.monotonic()
+
+    def sweep(self, now: float | None = None) -> int:
+        """Удаляет просроченные записи; возвращает их число."""
+        now = self.clock.monotonic() if now is None else now
+        expired = [key for key, ts in self._touched.items() if now - ts > self.ttl]
+        for key in expired:
+            self._forget(key)
+        self._next_sweep = now + min(self.ttl, SWEEP_INTERVAL)
+        return len(expired)
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        self._alive(key)
+        await super().set_state(key, state)
+        self._written(key)
+
+    async def get_state(self, key: StorageKey) -> str | None:
+        return self.storage[key].state if self._alive(key) else None
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        self._alive(key)
+        await super().set_data(key, data)
+        self._written(key)
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        return self.storage[key].data.copy() if self._alive(key) else {}
+
+    async def get_value(
+        self, storage_key: StorageKey, dict_key: str, default: Any | None = None  # noqa: ANN401
+    ) -> Any | None:  # noqa: ANN401
+        if not self._alive(storage_key):
+            return default
+        return copy(self.storage[storage_key].data.get(dict_key, default))
+
+
+def memory_storage(bot_name: str, clock: Clock = SYSTEM_CLOCK) -> MemoryStorage:
+    """FSM storage бота: с TTL по FSM_TTL_SEC, при 0 — обычный MemoryStorage."""
+    ttl = get_settings(bot_name=bot_name).fsm_ttl_sec
+    return ExpiringMemoryStorage(ttl, clock) if ttl > 0 else MemoryStorage()
+
+
+__all__ = ["ExpiringMemoryStorage", "memory_storage"]
@@ -1,20 +1,132 @@
 from __future__ import annotations
 
-from functools import cache
+import asyncio
+import gettext
+import io
+import logging
+import threading
+import time
+from collections.abc import Awaitable, Callable, Generator
+from contextlib import contextmanager
+from functools import cache, lru_cache
 from pathlib import Path
+from typing import Any
 
 from aiogram.types import TelegramObject
 from aiogram.utils.i18n import I18n, gettext as _
 from aiogram.utils.i18n.middleware import I18nMiddleware
 
 from libs.common.logger import setup_logging
+from libs.common.po_catalog import compile_layer
 from libs.common.root_resolver import resolve_root
 
 
+SHARED_LAYER = "global"
+# compile_locales пишет манифест последним — по его mtime видно, что слой обновился
+MANIFEST = "manifest.json"
+
+
+def _cache_locales_dir(project_root: Path, layer: str) -> Path:
+    return project_root / ".i18n_cache" / layer / "locales"
+
+
+def _shared_locales_dir(project_root: Path) -> Path:
+    return _cache_locales_dir(project_root, SHARED_LAYER)
+
+
+def _read_mo_dir(path: Path, domain: str) -> dict[str, gettext.GNUTranslations]:
+    translations: dict[str, gettext.GNUTranslations] = {}
+    if not path.is_dir():
+        return translations
+    for name in path.iterdir():
+        mo_path = name / "LC_MESSAGES" / f"{domain}.mo"
+        if mo_path.is_file():
+            with mo_path.open("rb") as fp:
+                translations[name.name] = gettext.GNUTranslations(fp)
+    return translations
+
+
+def _manifest_mtime(locales_dir: Path | None) -> int | None:
+    if locales_dir is None:
+        return None
+    try:
+        return (locales_dir.parent / MANIFEST).stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+@lru_cache(maxsize=8)
+def _load_shared(
+    path: Path, domain: str, version: int | None = None
+) -> dict[str, gettext.GNUTranslations]:
+    """
+    Общий слой грузится один раз на процесс и переиспользуется всеми ботами.
+
+    version — mtime манифеста слоя: после пересборки все боты процесса
+    получают одну и ту же новую копию.
+    """
+    return _read_mo_dir(path, domain)
+
+
+def _stack_layers(
+    shared: dict[str, gettext.GNUTranslations], overlays: dict[str, gettext.GNUTranslations]
+) -> dict[str, gettext.GNUTranslations]:
+    translations = dict(shared)
+    for lang, overlay in overlays.items():
+        base = shared.get(lang)
+        if base is not None:
+            overlay.add_fallback(base)
+        translations[lang] = overlay
+    return translations
+
+
+def _po_by_lang(locales_dir: Path) -> dict[str, list[Path]]:
+    if not locales_dir.is_dir():
+        return {}
+    by_lang = {p.name: sorted(p.rglob("*.po")) for p in sorted(locales_dir.iterdir()) if p.is_dir()}
+    return {lang: files for lang, files in by_lang.items() if files}
+
+
+def _compile_po_dir(locales_dir: Path, langs: set[str]) -> dict[str, gettext.GNUTranslations]:
+    by_lang = _po_by_lang(locales_dir)
+    return {
+        lang: gettext.GNUTranslations(io.BytesIO(compile_layer(lang, by_lang.get(lang, []))))
+        for lang in sorted(langs | by_lang.keys())
+    }
+
+
+def _compile_from_sources(project_root: Path, bot_name: str) -> dict[str, gettext.GNUTranslations]:
+    """Та же сборка global + bot, что делает compile_locales, но в памяти."""
+    shared_dir = project_root / "locales"
+    shared = _compile_po_dir(shared_dir, set())
+    overlays = _compile_po_dir(project_root / "bots" / bot_name / "locales", set(shared))
+    return _stack_layers(shared, overlays)
+
+
+def _cache_is_stale(project_root: Path, bot_name: str) -> bool:
+    """
+    Кэш отсутствует или старше исходников: самый свежий .po новее манифеста слоя.
+
+    Только stat(), без чтения файлов. Если .po нет вовсе — собирать нечего.
+    """
+    layers = [
+        (project_root / "locales", _shared_locales_dir(project_root)),
+        (project_root / "bots" / bot_name / "locales", _cache_locales_dir(project_root, bot_name)),
+    ]
+    for src_dir, cache_dir in layers:
+        sources = [po for files in _po_by_lang(src_dir).values() for po in files]
+        if not sources:
+            continue
+        built = _manifest_mtime(cache_dir)
+        if built is None or max(po.stat().st_mtime_ns for po in sources) > built:
+            return True
+    return False
+
+
 def _resolve_locales_dir(project_root: Path, bot_name: str) -> Path:
     log = setup_logging(bot_name)
 
-    cache_dir = project_root / ".i18n_cache" / bot_name / "locales"
+    cache_dir = _cache_locales_dir(project_root, bot_name)
     bot_dir = project_root / "bots" / bot_name / "locales"
     global_dir = project_root / "locales"
 
@@ -38,7 +150,136 @@ def _resolve_locales_dir(project_root: Path, bot_name: str) -> Path:
     raise FileNotFoundError(error)
 
 
+class LayeredI18n(I18n):
+    """
+    I18n поверх слоёв .i18n_cache: оверлей бота + общий каталог.
+
+    Каталоги оверлея получают общий слой как gettext-fallback, поэтому
+    строки, которых нет у бота, берутся из единственной копии общего слоя.
+
+    reload_if_changed() перечитывает слои, если compile_locales обновил их
+    манифесты, и подменяет self.locales одним присваиванием: горячий путь
+    gettext читает ссылку один раз и блокировок не берёт.
+    """
+
+    def __init__(
+        self,
+        *,
+        path: str | Path,
+        shared_path: Path | None = None,
+        sources: tuple[Path, str] | None = None,
+        default_locale: str = "en",
+        domain: str = "messages",
+    ) -> None:
+        # sources=(project_root, bot_name): кэша нет или он устарел — каталоги
+        # собираются из .po в памяти через compile_sources() в фоновом потоке
+        self.sources = sources
+        self.ready = threading.Event()
+        if sources is None:
+            self.ready.set()
+        self.shared_path = shared_path.resolve() if shared_path is not None else None
+        self.overlay_path = Path(path).resolve()
+        self.stamp = self._layers_stamp()
+        super().__init__(path=path, default_locale=default_locale, domain=domain)
+
+    @contextmanager
+    def context(self) -> Generator[I18n, None, None]:
+        # ContextInstanceMixin заводит свою ContextVar на каждый подкласс, а
+        # aiogram.utils.i18n.gettext читает I18n.get_current() — ставим базовую
+        token = I18n.set_current(self)
+        try:
+            yield self
+        finally:
+            I18n.reset_current(token)
+
+    def _layers_stamp(self) -> tuple[int | None, int | None]:
+        return _manifest_mtime(self.overlay_path), _manifest_mtime(self.shared_path)
+
+    def reload_if_changed(self) -> bool:
+        stamp = self._layers_stamp()
+        if stamp == self.stamp:
+            return False
+        locales = self.find_locales(stamp)
+        self.locales = locales
+        self.stamp = stamp
+        return True
+
+    def find_locales(
+        self, stamp: tuple[int | None, int | None] | None = None
+    ) -> dict[str, gettext.GNUTranslations]:
+        if self.sources is not None:
+            # до первой сборки в памяти каталогов нет — gettext отдаёт ключи
+            return _compile_from_sources(*self.sources) if self.ready.is_set() else {}
+        if self.shared_path is None:
+            return super().find_locales()
+
+        shared_version = (stamp or self.stamp)[1]
+        shared = _load_shared(self.shared_path, self.domain, shared_version)
+        if Path(self.path).resolve() == self.shared_path:
+            return dict(shared)
+
+        return _stack_layers(shared, _read_mo_dir(Path(self.path), self.domain))
+
+    def compile_sources(self, log: logging.Logger) -> None:
+        started = time.perf_counter()
+        try:
+            self.locales = _compile_from_sources(*self.sources)
+            log.info(
+                "I18n compiled in memory in %.1f ms: %s",
+                (time.perf_counter() - started) * 1000,
+                ", ".join(self.locales),
+            )
+        except Exception:
+            log.exception("In-memory i18n compilation failed, serving untranslated keys")
+        finally:
+            self.ready.set()
+
+    def gettext(
+        self,
+        singular: str,
+        plural: str | None = None,
+        n: int = 1,
+        locale: str | None = None,
+    ) -> str:
+        # одно чтение self.locales — перезагрузка из другого потока не рвёт lookup
+        translator = self.locales.get(locale or self.current_locale)
+        if translator is None:
+            return singular if n == 1 else plural or singular
+        if plural is None:
+            return translator.gettext(singular)
+        return translator.ngettext(singular, plural, n)
+
+
+def _watch_locales(i18n: LayeredI18n, interval: float, log: logging.Logger) -> threading.Thread:
+    """Фоновый опрос манифестов .i18n_cache: пара stat() раз в interval секунд."""
+
+    def loop() -> None:
+        while True:
+            time.sleep(interval)
+            try:
+                if i18n.reload_if_changed():
+                    log.info("I18n catalogs reloaded: %s", ", ".join(i18n.available_locales))
+            except Exception:
+                log.exception("I18n reload failed, keeping previous catalogs")
+
+    thread = threading.Thread(target=loop, name="i18n-reload", daemon=True)
+    thread.start()
+    return thread
+
+
 class SimpleI18nMiddleware(I18nMiddleware):
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:  # noqa: ANN401
+        # пока каталоги собираются в памяти, первые апдейты ждут их вне event loop
+        ready: threading.Event | None = getattr(self.i18n, "ready", None)
+        if ready is not None and not ready.is_set():
+            await asyncio.to_thread(ready.wait)
+        return await super().__call__(handler, event, data)
+
     async def get_locale(self, event: TelegramObject, data: dict) -> str:
         user = data.get("event_from_user")
         code = getattr(user, "language_code", None) if user else None
@@ -46,17 +287,48 @@ class SimpleI18nMiddleware(I18nMiddleware):
 
 
 @cache
-def create_i18n(bot_name: str, project_root: Path | None) -> SimpleI18nMiddleware:
+def create_i18n(
+    bot_name: str, project_root: Path | None = None, reload_interval: float = 0
+) -> SimpleI18nMiddleware:
+    """
+    Middleware с каталогами бота.
+
+    reload_interval > 0 включает hot reload: фоновый поток раз в interval секунд
+    проверяет манифесты .i18n_cache и подхватывает пересобранные каталоги
+    (например, от `compile_locales.py --watch`) без рестарта бота.
+    """
     log = setup_logging(bot_name)
     log.debug(f"Creating locales for {bot_name}")
 
     root = project_root or resolve_root()
     log.debug(f"App root {root}")
 
-    i18n_dir = _resolve_locales_dir(root, bot_name)
-    i18n = I18n(path=str(i18n_dir), default_locale="en", domain="messages")
+    if _cache_is_stale(root, bot_name):
+        log.warning("I18n cache is missing or stale. Compiling *.po in memory")
+        i18n = LayeredI18n(
+            path=str(_cache_locales_dir(root, bot_name)),
+            sources=(root, bot_name),
+            default_locale="en",
+            domain="messages",
+        )
+        threading.Thread(
+            target=i18n.compile_sources, args=(log,), name="i18n-compile", daemon=True
+        ).start()
+    else:
+        i18n_dir = _resolve_locales_dir(root, bot_name)
+        shared_dir = _shared_locales_dir(root)
+        i18n = LayeredI18n(
+            path=str(i18n_dir),
+            shared_path=shared_dir if shared_dir.is_dir() else None,
+            default_locale="en",
+            domain="messages",
+        )
     log.debug("I18n created")
 
+    if reload_interval > 0:
+        _watch_locales(i18n, reload_interval, log)
+        log.debug(f"I18n hot reload every {reload_interval}s")
+
     return SimpleI18nMiddleware(i18n)
 
 
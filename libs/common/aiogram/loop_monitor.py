@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import json
+
+from aiogram import Dispatcher
+
+from libs.common.config import get_settings
+from libs.common.logger import setup_logging
+from libs.common.loop_monitor import LoopMonitor
+from libs.common.metrics import MetricsServer
+
+
+def setup_loop_monitor(
+    bot_name: str, dp: Dispatcher, server: MetricsServer | None = None
+) -> LoopMonitor | None:
+    """
+    Мониторинг лага event loop на время polling; LOOP_LAG_INTERVAL_MS=0 — выключено.
+
+    При переданном server добавляет /health с перцентилями лага.
+    """
+    settings = get_settings(bot_name=bot_name)
+    if settings.loop_lag_interval_ms <= 0:
+        return None
+
+    monitor = LoopMonitor(
+        setup_logging(bot_name),
+        interval=settings.loop_lag_interval_ms / 1000,
+        threshold=settings.loop_lag_threshold_ms / 1000,
+    )
+    if server is not None:
+        server.routes["/health"] = lambda: ("application/json", json.dumps(monitor.health()))
+
+    dp.startup.register(monitor.start)
+    dp.shutdown.register(monitor.stop)
+    return monitor
+
+
+__all__ = ["setup_loop_monitor"]
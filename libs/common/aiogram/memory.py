@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from collections.abc import Mapping
+from typing import Any
+
+from aiogram import Dispatcher
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from libs.common.aiogram.tracing import TracedStorage
+from libs.common.config import get_settings
+from libs.common.memory import MemoryInspector, Source
+from libs.common.metrics import MetricsServer
+
+
+def _fsm_records(dp: Dispatcher) -> Mapping[Any, Any]:
+    storage = dp.fsm.storage
+    while isinstance(storage, TracedStorage):
+        storage = storage.storage
+    return storage.storage if isinstance(storage, MemoryStorage) else {}
+
+
+def _json(data: object) -> tuple[str, str]:
+    return "application/json", json.dumps(data, ensure_ascii=False)
+
+
+def setup_memory_accounting(
+    bot_name: str,
+    dp: Dispatcher,
+    server: MetricsServer | None = None,
+    user_structures: Mapping[str, Source] | None = None,
+    caches: Mapping[str, Source] | None = None,
+) -> MemoryInspector | None:
+    """
+    Учёт памяти по структурам: FSM storage (если в памяти), переданные
+    пер-пользовательские структуры и общие кэши. MEMORY_SAMPLE=0 — выключено.
+
+    Числа уходят в метрики (считаются при scrape), а на metrics-сервере
+    появляются /debug/memory и /debug/tracemalloc/{start,diff,stop}. Снимки
+    tracemalloc и обход структур на большой куче занимают секунды — маршруты
+    выполняют их в потоке, чтобы не останавливать обработку апдейтов.
+    """
+    settings = get_settings(bot_name=bot_name)
+    if settings.memory_sample <= 0:
+        return None
+
+    inspector = MemoryInspector(sample=settings.memory_sample)
+    inspector.register("fsm.storage", lambda: _fsm_records(dp))
+    for name, source in (user_structures or {}).items():
+        inspector.register(name, source)
+    for name, source in (caches or {}).items():
+        inspector.register(name, source, per_user=False)
+    inspector.export_metrics()
+
+    if server is not None:
+
+        async def _memory() -> tuple[str, str]:
+            return _json(await asyncio.to_thread(inspector.summary))
+
+        async def _start() -> tuple[str, str]:
+            await asyncio.to_thread(inspector.tracemalloc_start)
+            return _json({"tracing": True})
+
+        async def _stop() -> tuple[str, str]:
+            await asyncio.to_thread(inspector.tracemalloc_stop)
+            return _json({"tracing": False})
+
+        async def _diff() -> tuple[str, str]:
+            try:
+                return _json(await asyncio.to_thread(inspector.tracemalloc_diff))
+            except RuntimeError as e:
+                return _json({"error": str(e)})
+
+        server.routes["/debug/memory"] = _memory
+        server.routes["/debug/tracemalloc/start"] = _start
+        server.routes["/debug/tracemalloc/diff"] = _diff
+        server.routes["/debug/tracemalloc/stop"] = _stop
+
+    return inspector
+
+
+__all__ = ["setup_memory_accounting"]
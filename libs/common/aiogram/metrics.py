@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+from aiogram import Bot, Dispatcher
+
+from libs.common.config import get_settings
+from libs.common.flight_recorder import get_flight_recorder
+from libs.common.logger import setup_logging
+from libs.common.metrics import REGISTRY, MetricsServer, Registry
+from libs.common.middleware.metrics_middleware import (
+    ApiMetricsMiddleware,
+    HandlerMetricsMiddleware,
+    UpdateMetricsMiddleware,
+)
+
+
+# Observers, у которых нет пользовательских хэндлеров событий
+_SKIP_OBSERVERS = frozenset({"update", "error"})
+
+
+def setup_metrics(
+    bot_name: str, dp: Dispatcher, bot: Bot, registry: Registry = REGISTRY
+) -> MetricsServer | None:
+    """
+    Подключает сбор метрик к dp и сессии bot; при METRICS_PORT > 0 поднимает
+    локальный /metrics на старте polling и гасит его на остановке.
+
+    Вызывать до регистрации остальных update-middleware — тогда латентность
+    включает i18n, rate limit и т.д. Те же middleware пишут апдейты и вызовы
+    API во flight recorder бота, если он включён.
+    """
+    settings = get_settings(bot_name=bot_name)
+    log = setup_logging(bot_name)
+
+    recorder = get_flight_recorder(bot_name)
+    dp.update.outer_middleware(UpdateMetricsMiddleware(registry, recorder))
+    handler_mw = HandlerMetricsMiddleware()
+    for name, observer in dp.observers.items():
+        if name not in _SKIP_OBSERVERS:
+            observer.middleware(handler_mw)
+    bot.session.middleware(ApiMetricsMiddleware(registry, recorder))
+
+    if settings.metrics_port <= 0:
+        return None
+
+    server = MetricsServer(settings.metrics_host, settings.metrics_port, registry)
+
+    async def _start() -> None:
+        await server.start()
+        log.info("Metrics: http://%s:%s/metrics", server.host, server.port)
+
+    dp.startup.register(_start)
+    dp.shutdown.register(server.stop)
+    return server
+
+
+__all__ = ["setup_metrics"]
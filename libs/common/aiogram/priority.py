@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from aiogram import Dispatcher
+
+from libs.common.clock import SYSTEM_CLOCK, Clock
+from libs.common.config import get_settings
+from libs.common.metrics import REGISTRY, Registry
+from libs.common.middleware.priority_middleware import PriorityMiddleware
+
+
+def setup_update_priority(
+    bot_name: str, dp: Dispatcher, clock: Clock = SYSTEM_CLOCK, registry: Registry = REGISTRY
+) -> PriorityMiddleware | None:
+    """
+    Очередь апдейтов с приоритетом для callback и команд; UPDATE_CONCURRENCY=0 — выключено.
+
+    Вызывать после setup_metrics: тогда латентность апдейта включает ожидание в очереди.
+    """
+    settings = get_settings(bot_name=bot_name)
+    if settings.update_concurrency <= 0:
+        return None
+
+    gate = PriorityMiddleware(
+        settings.update_concurrency,
+        aging=settings.update_priority_aging_ms / 1000,
+        clock=clock,
+        registry=registry,
+    )
+    dp.update.outer_middleware(gate)
+    return gate
+
+
+__all__ = ["setup_update_priority"]
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import signal
+from contextlib import suppress
+from pathlib import Path
+
+from aiogram import Dispatcher
+
+from libs.common.config import get_settings
+from libs.common.logger import setup_logging
+from libs.common.metrics import MetricsServer
+from libs.common.profiler import SamplingProfiler
+
+
+PROFILE_SIGNAL = getattr(signal, "SIGUSR2", None)
+
+
+def setup_profiler(
+    bot_name: str, dp: Dispatcher, server: MetricsServer | None = None
+) -> SamplingProfiler | None:
+    """
+    Профилирование по требованию: SIGUSR2 или /debug/profile на metrics-сервере
+    запускают сессию на PROFILE_SECONDS; результат — в каталог логов.
+    PROFILE_HZ=0 — выключено.
+    """
+    settings = get_settings(bot_name=bot_name)
+    if settings.profile_hz <= 0:
+        return None
+
+    log = setup_logging(bot_name)
+    profiler = SamplingProfiler(
+        Path(os.getenv("LOG_FILE", "logs/bot.log")).parent,
+        name=bot_name,
+        hz=settings.profile_hz,
+        duration=settings.profile_seconds,
+        fmt=settings.profile_format,
+    )
+
+    def _done(path: Path) -> None:
+        log.warning("Profile written to %s", path)
+
+    def _trigger() -> bool:
+        started = profiler.start(on_done=_done)
+        if started:
+            log.warning(
+                "Profiling %s s at %s Hz (%s)", profiler.duration, profiler.hz, profiler.fmt
+            )
+        return started
+
+    if server is not None:
+        server.routes["/debug/profile"] = lambda: (
+            "application/json",
+            json.dumps({"started": _trigger(), "seconds": profiler.duration}),
+        )
+
+    async def _start() -> None:
+        if PROFILE_SIGNAL is not None:
+            with suppress(NotImplementedError, RuntimeError):
+                asyncio.get_running_loop().add_signal_handler(PROFILE_SIGNAL, _trigger)
+
+    async def _stop() -> None:
+        if PROFILE_SIGNAL is not None:
+            with suppress(NotImplementedError, RuntimeError):
+                asyncio.get_running_loop().remove_signal_handler(PROFILE_SIGNAL)
+
+    dp.startup.register(_start)
+    dp.shutdown.register(_stop)
+    return profiler
+
+
+__all__ = ["setup_profiler"]
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any
+
+from aiogram import Bot, Dispatcher
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StorageKey
+
+from libs.common.config import get_settings
+from libs.common.logger import setup_logging
+from libs.common.middleware.metrics_middleware import HandlerMetricsMiddleware
+from libs.common.middleware.tracing_middleware import (
+    ApiTracingMiddleware,
+    HandlerTracingMiddleware,
+    TracedMiddleware,
+    TracingMiddleware,
+)
+from libs.common.tracing import FileExporter, Tracer
+
+
+# Служебные middleware, которые не нужно заворачивать в спаны
+_UNTRACED = (HandlerMetricsMiddleware, TracedMiddleware, HandlerTracingMiddleware)
+
+
+class TracedStorage(BaseStorage):
+    """Прокси FSM storage: спан на каждую операцию хранилища."""
+
+    def __init__(self, tracer: Tracer, storage: BaseStorage) -> None:
+        self.tracer = tracer
+        self.storage = storage
+
+    async def set_state(self, key: StorageKey, state: str | State | None = None) -> None:
+        with self.tracer.span("storage set_state"):
+            await self.storage.set_state(key, state)
+
+    async def get_state(self, key: StorageKey) -> str | None:
+        with self.tracer.span("storage get_state"):
+            return await self.storage.get_state(key)
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        with self.tracer.span("storage set_data"):
+            await self.storage.set_data(key, data)
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        with self.tracer.span("storage get_data"):
+            return await self.storage.get_data(key)
+
+    async def update_data(self, key: StorageKey, data: Mapping[str, Any]) -> dict[str, Any]:
+        with self.tracer.span("storage update_data"):
+            return await self.storage.update_data(key, data)
+
+    async def close(self) -> None:
+        await self.storage.close()
+
+
+def setup_tracing(bot_name: str, dp: Dispatcher, bot: Bot) -> Tracer | None:
+    """
+    Трассировка апдейтов в TRACE_FILE (OTLP/JSON Lines); пустой TRACE_FILE — выключено.
+
+    Вызывать после регистрации всех middleware и хэндлеров: уже подключённые
+    event-middleware заворачиваются в спаны, спан хэндлера ставится последним.
+    """
+    settings = get_settings(bot_name=bot_name)
+    if not settings.trace_file:
+        return None
+
+    path = Path(settings.trace_file)
+    exporter = FileExporter(path, service=bot_name)
+    tracer = Tracer(
+        exporter.export,
+        sample_rate=settings.trace_sample_rate,
+        slow_sec=settings.trace_slow_ms / 1000,
+    )
+
+    dp.update.outer_middleware(TracingMiddleware(tracer))
+    handler_mw = HandlerTracingMiddleware(tracer)
+    for observer in dp.observers.values():
+        manager = observer.middleware
+        registered = list(manager)
+        for mw in registered:
+            manager.unregister(mw)
+        for mw in registered:
+            manager.register(mw if isinstance(mw, _UNTRACED) else TracedMiddleware(tracer, mw))
+        if observer.event_name not in ("update", "error"):
+            manager.register(handler_mw)
+
+    dp.fsm.storage = TracedStorage(tracer, dp.fsm.storage)
+    bot.session.middleware(ApiTracingMiddleware(tracer))
+    dp.shutdown.register(exporter.close)
+
+    setup_logging(bot_name).info(
+        "Tracing: %s (sample=%s, slow>=%sms)",
+        path,
+        settings.trace_sample_rate,
+        settings.trace_slow_ms,
+    )
+    return tracer
+
+
+__all__ = ["TracedStorage", "setup_tracing"]
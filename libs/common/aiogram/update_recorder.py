@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+from aiogram import Dispatcher
+
+from libs.common.config import get_settings
+from libs.common.logger import setup_logging
+from libs.common.middleware.update_recorder_middleware import UpdateRecorderMiddleware
+from libs.common.update_log import UpdateLogWriter
+
+
+def setup_update_recorder(bot_name: str, dp: Dispatcher) -> UpdateLogWriter | None:
+    """
+    Журнал входящих апдейтов для реплея (scripts/bench/replay.py).
+    Пустой UPDATE_LOG_FILE — выключено; UPDATE_LOG_ANONYMIZE=0 — писать как есть.
+    """
+    settings = get_settings(bot_name=bot_name)
+    if not settings.update_log_file:
+        return None
+
+    writer = UpdateLogWriter(settings.update_log_file, anonymized=settings.update_log_anonymize)
+    dp.update.outer_middleware(UpdateRecorderMiddleware(writer))
+    dp.shutdown.register(writer.close)
+    setup_logging(bot_name).info(
+        "Recording updates to %s (anonymized=%s)", writer.path, writer.anonymized
+    )
+    return writer
+
+
+__all__ = ["setup_update_recorder"]
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import time
+
+
+class Clock:
+    """
+    Источник времени для компонентов с окнами и TTL.
+
+    По умолчанию — системные часы; в soak-тестах подменяется VirtualClock,
+    чтобы прогнать сутки трафика за минуты.
+    """
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    def time(self) -> float:
+        return time.time()
+
+
+SYSTEM_CLOCK = Clock()
+
+
+class VirtualClock(Clock):
+    """Часы, которые идут только по advance()/set(); назад не ходят."""
+
+    def __init__(self, start: float = 0.0, wall: float | None = None) -> None:
+        self._now = start
+        self._wall_offset = (time.time() if wall is None else wall) - start
+
+    def monotonic(self) -> float:
+        return self._now
+
+    def time(self) -> float:
+        return self._wall_offset + self._now
+
+    def advance(self, seconds: float) -> None:
+        if seconds < 0:
+            raise ValueError(f"VirtualClock cannot go backwards: {seconds}")
+        self._now += seconds
+
+    def set(self, now: float) -> None:
+        self.advance(now - self._now)
+
+
+__all__ = ["SYSTEM_CLOCK", "Clock", "VirtualClock"]
@@ -53,6 +53,52 @@ class Settings(Protocol):
 
     rate_limit_per_user: int
     rate_limit_window_sec: int
+    rate_limit_shm_path: str
+    rate_limit_shm_slots: int
+    rate_limit_redis_url: str
+    rate_limit_lease_max: int
+    rate_limit_redis_timeout_ms: float
+    rate_limit_redis_backoff_ms: float
+    rate_limit_sketch_width: int
+    rate_limit_sketch_depth: int
+    rate_limit_policy: str
+    rate_limit_costs: str
+    rate_limit_adaptive: bool
+    rate_limit_adaptive_backlog: int
+    rate_limit_adaptive_retry_after: int
+    rate_limit_adaptive_lag_ms: float
+    rate_limit_adaptive_min_factor: float
+
+    fsm_ttl_sec: float
+
+    update_concurrency: int
+    update_priority_aging_ms: float
+
+    callback_answer_deadline_ms: float
+    callback_dedup_ttl_ms: float
+
+    i18n_reload_sec: float
+
+    metrics_host: str
+    metrics_port: int
+
+    trace_file: str
+    trace_sample_rate: float
+    trace_slow_ms: float
+
+    loop_lag_interval_ms: float
+    loop_lag_threshold_ms: float
+
+    flight_recorder_size: int
+
+    profile_hz: float
+    profile_seconds: float
+    profile_format: str
+
+    memory_sample: int
+
+    update_log_file: str
+    update_log_anonymize: bool
 
     def validate_token(self) -> None: ...
 
@@ -70,6 +116,79 @@ class AppSettings(BaseSettings):
 
     rate_limit_per_user: int = Field(default=3, alias="RATE_LIMIT_PER_USER")
     rate_limit_window_sec: int = Field(default=1, alias="RATE_LIMIT_WINDOW_SEC")
+    # Файл таблицы лимитера в общей памяти для нескольких воркеров (пусто — bucket в процессе)
+    rate_limit_shm_path: str = Field(default="", alias="RATE_LIMIT_SHM_PATH")
+    rate_limit_shm_slots: int = Field(default=65536, alias="RATE_LIMIT_SHM_SLOTS")
+    # Счётчики на Redis-совместимом сервере — общий лимит для всех узлов (пусто — выключено)
+    rate_limit_redis_url: str = Field(default="", alias="RATE_LIMIT_REDIS_URL")
+    rate_limit_lease_max: int = Field(default=8, alias="RATE_LIMIT_LEASE_MAX")
+    rate_limit_redis_timeout_ms: float = Field(default=50, alias="RATE_LIMIT_REDIS_TIMEOUT_MS")
+    # После сбоя сервера столько мс апдейты пропускаются без попыток соединиться
+    rate_limit_redis_backoff_ms: float = Field(default=1000, alias="RATE_LIMIT_REDIS_BACKOFF_MS")
+    # > 0 — count-min sketch шириной в столько ячеек (степень двойки) отсеивает
+    # не флудящих пользователей без пер-пользовательского состояния (0 — выключено)
+    rate_limit_sketch_width: int = Field(default=0, alias="RATE_LIMIT_SKETCH_WIDTH")
+    rate_limit_sketch_depth: int = Field(default=4, alias="RATE_LIMIT_SKETCH_DEPTH")
+    # Взвешенные лимиты в процессе: «user=5/1s, chat=20/1m, type=100/1s, global=30/1s»
+    # и стоимость апдейтов «/form=3, q:hint=0.5, callback_query=1» (пусто — выключено)
+    rate_limit_policy: str = Field(default="", alias="RATE_LIMIT_POLICY")
+    rate_limit_costs: str = Field(default="", alias="RATE_LIMIT_COSTS")
+    # AIMD: лимиты сжимаются, когда вызовов Bot API в полёте, ответов 429 за секунду
+    # или лага loop не меньше порога (порог 0 — сигнал не учитывается), и отпускаются,
+    # когда нагрузка спала; множитель не опускается ниже MIN_FACTOR
+    rate_limit_adaptive: bool = Field(default=False, alias="RATE_LIMIT_ADAPTIVE")
+    rate_limit_adaptive_backlog: int = Field(default=100, alias="RATE_LIMIT_ADAPTIVE_BACKLOG")
+    rate_limit_adaptive_retry_after: int = Field(default=1, alias="RATE_LIMIT_ADAPTIVE_RETRY_AFTER")
+    rate_limit_adaptive_lag_ms: float = Field(default=100, alias="RATE_LIMIT_ADAPTIVE_LAG_MS")
+    rate_limit_adaptive_min_factor: float = Field(
+        default=0.25, alias="RATE_LIMIT_ADAPTIVE_MIN_FACTOR"
+    )
+
+    # FSM-записи без обращений дольше TTL удаляются (0 — хранить вечно)
+    fsm_ttl_sec: float = Field(default=86400, alias="FSM_TTL_SEC")
+
+    # > 0 — не больше стольких апдейтов в обработке, остальные ждут в очереди:
+    # callback и команды раньше текста, текст после AGING_MS ожидания — наравне (0 — выключено)
+    update_concurrency: int = Field(default=0, alias="UPDATE_CONCURRENCY")
+    update_priority_aging_ms: float = Field(default=500, alias="UPDATE_PRIORITY_AGING_MS")
+
+    # Не ответивший за столько мс хэндлер callback получает пустой answerCallbackQuery
+    # параллельно со своей работой (0 — сразу, < 0 — выключено); повторные ответы подавляются
+    callback_answer_deadline_ms: float = Field(default=100, alias="CALLBACK_ANSWER_DEADLINE_MS")
+    # Повторное нажатие той же кнопки во время обработки первого и столько мс после
+    # отбрасывается (0 — выключено)
+    callback_dedup_ttl_ms: float = Field(default=1000, alias="CALLBACK_DEDUP_TTL_MS")
+
+    # 0 — выключено; > 0 — период опроса .i18n_cache для hot reload каталогов
+    i18n_reload_sec: float = Field(default=0, alias="I18N_RELOAD_SEC")
+
+    # 0 — выключено; > 0 — порт локального /metrics (OpenMetrics)
+    metrics_host: str = Field(default="127.0.0.1", alias="METRICS_HOST")
+    metrics_port: int = Field(default=0, alias="METRICS_PORT")
+
+    # Пустой TRACE_FILE — трассировка выключена
+    trace_file: str = Field(default="", alias="TRACE_FILE")
+    trace_sample_rate: float = Field(default=0.01, alias="TRACE_SAMPLE_RATE")
+    trace_slow_ms: float = Field(default=500, alias="TRACE_SLOW_MS")
+
+    # 0 — выключено; порог — после него watchdog логирует стек блокирующего вызова
+    loop_lag_interval_ms: float = Field(default=100, alias="LOOP_LAG_INTERVAL_MS")
+    loop_lag_threshold_ms: float = Field(default=250, alias="LOOP_LAG_THRESHOLD_MS")
+
+    # Сколько последних апдейтов и вызовов API держать в памяти (0 — выключено)
+    flight_recorder_size: int = Field(default=256, alias="FLIGHT_RECORDER_SIZE")
+
+    # Сессия профайлера по SIGUSR2 (PROFILE_HZ=0 — выключено); формат speedscope | collapsed
+    profile_hz: float = Field(default=100, alias="PROFILE_HZ")
+    profile_seconds: float = Field(default=10, alias="PROFILE_SECONDS")
+    profile_format: str = Field(default="speedscope", alias="PROFILE_FORMAT")
+
+    # Сколько записей структуры измерять глубоко при учёте памяти (0 — выключено)
+    memory_sample: int = Field(default=64, alias="MEMORY_SAMPLE")
+
+    # Журнал входящих апдейтов для реплея (пусто — выключено), gzip JSON Lines
+    update_log_file: str = Field(default="", alias="UPDATE_LOG_FILE")
+    update_log_anonymize: bool = Field(default=True, alias="UPDATE_LOG_ANONYMIZE")
 
     @model_validator(mode="after")
     def _fill_i18n_bot(self) -> AppSettings:
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import math
+from array import array
+
+
+# Fibonacci hashing: множитель — 2^64 / золотое сечение
+_GOLDEN = 0x9E3779B97F4A7C15
+_MASK = 0xFFFFFFFFFFFFFFFF
+
+# Во сколько постоянных времени накапливается масштаб, прежде чем ячейки пересчитываются
+_RESCALE_AFTER = 30.0
+
+
+class CountMinSketch:
+    """
+    Count-min sketch с экспоненциальным затуханием: оценка частоты ключа
+    за последние ~horizon секунд в фиксированной памяти (width * depth float).
+
+    Оценка никогда не меньше настоящего затухшего счёта — коллизии её
+    только завышают. Обновление консервативное (conservative update):
+    ячейки поднимаются только до min + amount, а не все на amount, — завышение меньше.
+
+    Затухание без обхода таблицы: вклад события в момент t пишется с весом
+    e^((t - t0) / horizon), а при чтении умножается на e^(-(now - t0) / horizon).
+    Раз в _RESCALE_AFTER постоянных времени ячейки пересчитываются к новому t0,
+    чтобы веса не переполнили double.
+    """
+
+    def __init__(self, width: int = 2048, depth: int = 4, horizon: float = 1.0) -> None:
+        if width < 2 or width & (width - 1):
+            raise ValueError(f"width must be a power of two, got {width}")
+        if depth < 1:
+            raise ValueError(f"depth must be >= 1, got {depth}")
+        if horizon <= 0:
+            raise ValueError(f"horizon must be > 0, got {horizon}")
+        self.width = width
+        self.depth = depth
+        self.horizon = float(horizon)
+        self.cells = array("d", bytes(8 * width * depth))
+        self._rows = [(row * width, row) for row in range(depth)]
+        self._t0: float | None = None
+
+    def _slots(self, key: int) -> list[int]:
+        # Двойное хэширование (Kirsch–Mitzenmacher): строки i — h1 + i * h2 из одного
+        # 64-битного хэша, вместо depth независимых умножений длинных чисел
+        h = (key * _GOLDEN) & _MASK
+        h1, h2 = h >> 32, (h & 0xFFFFFFFF) | 1
+        mask = self.width - 1
+        return [base + ((h1 + row * h2) & mask) for base, row in self._rows]
+
+    def _scale(self, now: float) -> float:
+        if self._t0 is None:
+            self._t0 = now
+        age = (now - self._t0) / self.horizon
+        if age > _RESCALE_AFTER:
+            factor = math.exp(-age)
+            cells = self.cells
+            for i in range(len(cells)):
+                cells[i] *= factor
+            self._t0, age = now, 0.0
+        return math.exp(age)
+
+    def add(self, key: int, now: float, amount: float = 1.0) -> float:
+        """Учитывает событие и возвращает новую оценку затухшего счёта ключа."""
+        scale = self._scale(now)
+        cells = self.cells
+        slots = self._slots(key)
+        values = [cells[i] for i in slots]
+        target = min(values) + amount * scale
+        for i, value in zip(slots, values, strict=True):
+            if value < target:
+                cells[i] = target
+        return target / scale
+
+    def estimate(self, key: int, now: float) -> float:
+        scale = self._scale(now)
+        cells = self.cells
+        return min([cells[i] for i in self._slots(key)]) / scale
+
+    @property
+    def nbytes(self) -> int:
+        return self.cells.itemsize * len(self.cells)
+
+
+__all__ = ["CountMinSketch"]
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from array import array
+from functools import cache
+from pathlib import Path
+from typing import Any
+
+from libs.common.config import get_settings
+
+
+# Тип колонки "s" — строка, хранится индексом в таблице интернированных строк
+_STR = "s"
+
+
+class Ring:
+    """
+    Кольцевой буфер фиксированного размера в колоночном виде.
+
+    Колонки — заранее выделенные array нужного типа; строки (тип апдейта, имя
+    хэндлера, метод API) интернируются в общую таблицу и хранятся индексом,
+    так что запись не создаёт объектов и не растит память.
+    """
+
+    def __init__(self, size: int, fields: tuple[tuple[str, str], ...]) -> None:
+        self.size = size
+        self.names = tuple(name for name, _ in fields)
+        self._strings = tuple(code == _STR for _, code in fields)
+        self.columns: list[array[Any]] = [
+            array("I" if code == _STR else code, [0]) * size for _, code in fields
+        ]
+        self._interned: dict[str, int] = {}
+        self._table: list[str] = []
+        self.written = 0
+
+    def intern(self, value: str) -> int:
+        idx = self._interned.get(value)
+        if idx is None:
+            idx = self._interned[value] = len(self._table)
+            self._table.append(value)
+        return idx
+
+    def slot(self) -> int:
+        """Позиция под следующую запись; вызывающий пишет в columns[i][pos] сам."""
+        pos = self.written % self.size
+        self.written += 1
+        return pos
+
+    def record(self, *values: Any) -> None:  # noqa: ANN401
+        pos = self.slot()
+        for column, is_str, value in zip(self.columns, self._strings, values, strict=True):
+            column[pos] = self.intern(value) if is_str else value
+
+    def __len__(self) -> int:
+        return min(self.written, self.size)
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        """Записи от старых к новым."""
+        count = len(self)
+        start = self.written - count
+        rows = []
+        for n in range(start, self.written):
+            pos = n % self.size
+            row = {}
+            for name, column, is_str in zip(self.names, self.columns, self._strings, strict=True):
+                value = column[pos]
+                row[name] = self._table[value] if is_str else value
+            rows.append(row)
+        return rows
+
+
+class FlightRecorder:
+    """Последние N апдейтов и N вызовов Bot API; дамп в JSON по сигналу, падению или ошибке."""
+
+    def __init__(self, bot_name: str, size: int, dump_dir: str | Path) -> None:
+        self.bot_name = bot_name
+        self.dump_dir = Path(dump_dir)
+        self.updates = Ring(
+            size,
+            (
+                ("ts", "d"),
+                ("update_id", "q"),
+                ("type", _STR),
+                ("handler", _STR),
+                ("latency_ms", "f"),
+                ("outcome", _STR),
+            ),
+        )
+        self.api_calls = Ring(
+            size,
+            (
+                ("ts", "d"),
+                ("method", _STR),
+                ("chat_id", "q"),
+                ("status", _STR),
+                ("duration_ms", "f"),
+            ),
+        )
+        # Причина дампа → когда был последний: ручной дамп не глушит снимок ошибки
+        self._last_dump: dict[str, float] = {}
+        self._dump_lock = threading.Lock()
+
+    # Горячий путь: запись прямо в колонки, без распаковки *values
+    def record_update(
+        self, update_id: int, update_type: str, handler: str, latency: float, outcome: str
+    ) -> None:
+        ring = self.updates
+        ts, uid, kind, name, lat, out = ring.columns
+        pos = ring.slot()
+        ts[pos] = time.time()
+        uid[pos] = update_id
+        kind[pos] = ring.intern(update_type)
+        name[pos] = ring.intern(handler)
+        lat[pos] = latency * 1000
+        out[pos] = ring.intern(outcome)
+
+    def record_api_call(self, method: str, chat_id: int, status: str, duration: float) -> None:
+        ring = self.api_calls
+        ts, meth, chat, st, dur = ring.columns
+        pos = ring.slot()
+        ts[pos] = time.time()
+        meth[pos] = ring.intern(method)
+        chat[pos] = chat_id
+        st[pos] = ring.intern(status)
+        dur[pos] = duration * 1000
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "bot": self.bot_name,
+            "pid": os.getpid(),
+            "taken_at": time.time(),
+            "updates": self.updates.snapshot(),
+            "api_calls": self.api_calls.snapshot(),
+        }
+
+    def dump(self, reason: str, min_interval: float = 0.0) -> Path | None:
+        """
+        Пишет снимок в dump_dir и возвращает путь.
+
+        min_interval — не чаще раза в столько секунд для одной reason: при шквале
+        ошибок лишние вызовы ничего не пишут и возвращают None. Можно звать из
+        потока (asyncio.to_thread): слот под снимок занимается под замком.
+        """
+        now = time.monotonic()
+        with self._dump_lock:
+            last = self._last_dump.get(reason)
+            if last is not None and now - last < min_interval:
+                return None
+            self._last_dump[reason] = now
+
+        stamp = time.strftime("%Y%m%d-%H%M%S") + f".{int(time.time() * 1000) % 1000:03d}"
+        path = self.dump_dir / f"flight-{self.bot_name}-{stamp}-{reason}-{os.getpid()}.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = self.snapshot()
+        data["reason"] = reason
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(data, ensure_ascii=False, indent=1), encoding="utf-8")
+        os.replace(tmp, path)
+        return path
+
+
+@cache
+def get_flight_recorder(bot_name: str) -> FlightRecorder | None:
+    """Общий на процесс recorder бота; FLIGHT_RECORDER_SIZE=0 — выключен (None)."""
+    settings = get_settings(bot_name=bot_name, strict=False)
+    if settings.flight_recorder_size <= 0:
+        return None
+    dump_dir = Path(os.getenv("LOG_FILE", "logs/bot.log")).parent
+    return FlightRecorder(bot_name, settings.flight_recorder_size, dump_dir)
+
+
+__all__ = ["FlightRecorder", "Ring", "get_flight_recorder"]
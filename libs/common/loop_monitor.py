@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from contextlib import suppress
+from functools import partial
+from itertools import islice
+
+from libs.common.metrics import REGISTRY, Registry
+
+
+# Окно для перцентилей: при интервале 100 мс — последние ~1.5 минуты
+LAG_WINDOW = 1024
+
+
+def _percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(q * len(sorted_values)))
+    return sorted_values[idx]
+
+
+class LoopMonitor:
+    """
+    Лаг планирования event loop и детектор блокирующих вызовов.
+
+    Корутина-тикер засыпает на interval и меряет, насколько позже проснулась —
+    это и есть лаг. Каждый тик обновляет heartbeat; watchdog-поток, не зависящий
+    от loop, замечает, что heartbeat застыл дольше threshold, и снимает стек
+    потока loop — то есть стек того самого блокирующего вызова.
+    """
+
+    def __init__(
+        self,
+        log: logging.Logger,
+        interval: float = 0.1,
+        threshold: float = 0.25,
+        registry: Registry = REGISTRY,
+    ) -> None:
+        self.log = log
+        self.interval = interval
+        self.threshold = threshold
+        self.samples: deque[float] = deque(maxlen=LAG_WINDOW)
+        self.stalls = 0
+        self.last_stack: str | None = None
+
+        self._beat = time.monotonic()
+        self._loop_thread: int | None = None
+        self._task: asyncio.Task[None] | None = None
+        self._watchdog: threading.Thread | None = None
+        self._stop = threading.Event()
+
+        self._lag = registry.histogram("event_loop_lag_seconds", "Event loop scheduling lag")
+        self._slow = registry.counter(
+            "event_loop_slow_callbacks", "Ticks delayed by more than the lag threshold"
+        )
+        quantiles = registry.gauge(
+            "event_loop_lag_quantile_seconds", "Event loop lag over recent ticks", ("quantile",)
+        )
+        for q in (0.5, 0.99):
+            quantiles.labels(str(q)).set_function(partial(self.quantile, q))
+
+    def quantile(self, q: float) -> float:
+        return _percentile(sorted(self.samples), q)
+
+    def recent(self, seconds: float) -> float:
+        """Худший лаг за последние seconds — p99 по всему окну для контроллеров слишком инертен."""
+        ticks = max(1, int(seconds / self.interval))
+        return max(islice(reversed(self.samples), ticks), default=0.0)
+
+    def percentiles(self) -> dict[float, float]:
+        values = sorted(self.samples)
+        return {q: _percentile(values, q) for q in (0.5, 0.9, 0.99, 1.0)}
+
+    def health(self) -> dict[str, object]:
+        p = self.percentiles()
+        return {
+            "status": "degraded" if p[0.99] > self.threshold else "ok",
+            "loop_lag_ms": {
+                "p50": round(p[0.5] * 1000, 3),
+                "p90": round(p[0.9] * 1000, 3),
+                "p99": round(p[0.99] * 1000, 3),
+                "max": round(p[1.0] * 1000, 3),
+            },
+            "stalls": self.stalls,
+        }
+
+    async def _tick(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - started - self.interval)
+            self._beat = time.monotonic()
+            self.samples.append(lag)
+            self._lag.observe(lag)
+            if lag > self.threshold:
+                self._slow.inc()
+
+    def _capture(self) -> str | None:
+        frame = sys._current_frames().get(self._loop_thread or -1)
+        return "".join(traceback.format_stack(frame)) if frame is not None else None
+
+    def _watch(self) -> None:
+        reported = 0.0
+        while not self._stop.wait(self.threshold / 2):
+            beat = self._beat
+            # heartbeat штатно отстаёт на interval — его не считаем
+            stalled = time.monotonic() - beat - self.interval
+            if stalled <= self.threshold or beat == reported:
+                continue
+            # Один отчёт на одно зависание: ждём следующего heartbeat
+            reported = beat
+            self.stalls += 1
+            self.last_stack = self._capture()
+            self.log.warning(
+                "Event loop blocked for %.0f ms, loop thread stack:\n%s",
+                stalled * 1000,
+                self.last_stack or "<unavailable>",
+            )
+
+    async def start(self) -> None:
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._tick(), name="loop-monitor")
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1)
+            self._watchdog = None
+
+
+__all__ = ["LoopMonitor"]
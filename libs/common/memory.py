@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import random
+import sys
+import tracemalloc
+from collections import deque
+from collections.abc import Callable, Iterable, Mapping
+from dataclasses import dataclass
+from functools import partial
+from itertools import islice
+from typing import Any
+
+from libs.common.metrics import REGISTRY, Registry
+
+
+# Сколько записей структуры измерять глубоко; остальное — экстраполяция
+DEFAULT_SAMPLE = 64
+
+# Защита от циклов и «бесконечных» графов объектов
+_MAX_DEPTH = 16
+
+_ATOMIC = (str, bytes, bytearray, int, float, bool, complex, type(None))
+
+
+def deep_sizeof(obj: object, seen: set[int] | None = None, depth: int = 0) -> int:
+    """
+    Оценка памяти объекта вместе с содержимым: контейнеры, __dict__, __slots__.
+
+    Общие объекты (интернированные строки, маленькие int) считаются в каждом
+    владельце, поэтому результат — верхняя оценка. Контейнеры копируются
+    перед обходом: отчёт строится в потоке, пока loop их меняет.
+    """
+    if seen is None:
+        seen = set()
+    oid = id(obj)
+    if oid in seen or depth > _MAX_DEPTH:
+        return 0
+    seen.add(oid)
+    size = sys.getsizeof(obj)
+    if isinstance(obj, _ATOMIC):
+        return size
+
+    children: Iterable[object] = ()
+    if isinstance(obj, Mapping):
+        children = [x for kv in _copy(obj.items) for x in kv]
+    elif isinstance(obj, list | tuple | set | frozenset | deque):
+        children = _copy(lambda: obj)
+    for child in children:
+        size += deep_sizeof(child, seen, depth + 1)
+
+    attrs = getattr(obj, "__dict__", None)
+    if attrs is not None:
+        size += deep_sizeof(attrs, seen, depth + 1)
+    for slot in getattr(type(obj), "__slots__", ()):
+        if hasattr(obj, slot):
+            size += deep_sizeof(getattr(obj, slot), seen, depth + 1)
+    return size
+
+
+def _copy(items: Callable[[], Iterable[Any]]) -> tuple[Any, ...]:
+    """Снимок содержимого; изменение контейнера другим потоком посреди копии — ещё попытка."""
+    for _ in range(3):
+        try:
+            return tuple(items())
+        except RuntimeError:  # changed size during iteration
+            continue
+    return ()
+
+
+@dataclass(frozen=True)
+class StructureReport:
+    name: str
+    entries: int
+    sampled: int
+    bytes_per_entry: float
+    estimated_bytes: int
+    per_user: bool
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "entries": self.entries,
+            "sampled": self.sampled,
+            "bytes_per_entry": round(self.bytes_per_entry, 1),
+            "estimated_bytes": self.estimated_bytes,
+            "per_user": self.per_user,
+        }
+
+
+def measure(
+    name: str, mapping: Mapping[Any, Any], sample: int = DEFAULT_SAMPLE, per_user: bool = True
+) -> StructureReport:
+    """
+    Число записей и оценка размера структуры по случайной выборке из sample записей.
+
+    Для больших структур ключи выбираются из первых 16·sample — так выборка
+    не требует копировать все ключи на каждом вызове.
+    """
+    entries = len(mapping)
+    keys = _copy(lambda: islice(iter(mapping), sample * 16))
+    picked = random.sample(keys, min(sample, len(keys)))
+    # Запись могли удалить, пока считаем: get вместо [] — отчёт не падает
+    sampled_bytes = sum(deep_sizeof(k) + deep_sizeof(mapping.get(k)) for k in picked)
+    per_entry = sampled_bytes / len(picked) if picked else 0.0
+    total = sys.getsizeof(mapping) + int(per_entry * entries)
+    return StructureReport(name, entries, len(picked), per_entry, total, per_user)
+
+
+Source = Callable[[], Mapping[Any, Any]]
+
+
+class MemoryInspector:
+    """
+    Реестр структур, растущих с числом пользователей, и их учёт.
+
+    Источник — функция, возвращающая текущий mapping (лимитер, FSM storage, кэш);
+    структура берётся в момент отчёта, поэтому подменённые объекты не теряются.
+    """
+
+    def __init__(self, sample: int = DEFAULT_SAMPLE) -> None:
+        self.sample = sample
+        self._sources: dict[str, tuple[Source, bool]] = {}
+        self._baseline: tracemalloc.Snapshot | None = None
+
+    def register(self, name: str, source: Source, per_user: bool = True) -> None:
+        self._sources[name] = (source, per_user)
+
+    def report(self) -> list[StructureReport]:
+        return [
+            measure(name, source(), self.sample, per_user)
+            for name, (source, per_user) in self._sources.items()
+        ]
+
+    def summary(self) -> dict[str, Any]:
+        reports = self.report()
+        per_user = [r for r in reports if r.per_user]
+        return {
+            "structures": [r.as_dict() for r in reports],
+            "bytes_per_active_user": round(sum(r.bytes_per_entry for r in per_user), 1),
+            "estimated_bytes": sum(r.estimated_bytes for r in reports),
+        }
+
+    def export_metrics(self, registry: Registry = REGISTRY) -> None:
+        """Gauges по структурам; считаются при scrape, а не на горячем пути."""
+        entries = registry.gauge("memory_structure_entries", "Entries per structure", ("name",))
+        size = registry.gauge(
+            "memory_structure_bytes", "Estimated deep size per structure", ("name",)
+        )
+        for name in self._sources:
+            entries.labels(name).set_function(partial(self._entries, name))
+            size.labels(name).set_function(partial(self._estimated_bytes, name))
+
+    def _entries(self, name: str) -> float:
+        return len(self._sources[name][0]())
+
+    def _estimated_bytes(self, name: str) -> float:
+        source, per_user = self._sources[name]
+        return measure(name, source(), self.sample, per_user).estimated_bytes
+
+    # --- tracemalloc diff ---------------------------------------------------
+
+    def tracemalloc_start(self, frames: int = 10) -> None:
+        """Включает tracemalloc и фиксирует базовый снимок."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        self._baseline = tracemalloc.take_snapshot()
+
+    def tracemalloc_diff(self, top: int = 20, key_type: str = "lineno") -> list[dict[str, Any]]:
+        """Места аллокаций, выросшие с базового снимка (больше всего — первыми)."""
+        if self._baseline is None:
+            raise RuntimeError("tracemalloc baseline is not set, call tracemalloc_start() first")
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            (tracemalloc.Filter(False, tracemalloc.__file__),)
+        )
+        stats = snapshot.compare_to(self._baseline, key_type)
+        return [
+            {
+                "site": str(stat.traceback[0]) if stat.traceback else "?",
+                "size_diff": stat.size_diff,
+                "count_diff": stat.count_diff,
+                "size": stat.size,
+            }
+            for stat in stats[:top]
+        ]
+
+    def tracemalloc_stop(self) -> None:
+        self._baseline = None
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+__all__ = ["MemoryInspector", "StructureReport", "deep_sizeof", "measure"]
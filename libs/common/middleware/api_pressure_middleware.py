@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+from typing import Any
+
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import Response, TelegramType
+
+
+class ApiPressureMiddleware(BaseRequestMiddleware):
+    """
+    Request middleware сессии Bot: давление на Bot API для адаптивного лимитера.
+
+    in_flight — вызовы, ушедшие в API и ещё не вернувшиеся: это и есть
+    очередь исходящих запросов (своей очереди у сессии нет, ждут в aiohttp).
+    Между снятиями take() копятся пик in_flight и число ответов 429.
+    """
+
+    def __init__(self) -> None:
+        self.in_flight = 0
+        self.peak = 0
+        self.retry_after = 0
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Any,  # noqa: ANN401
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        self.in_flight += 1
+        if self.in_flight > self.peak:
+            self.peak = self.in_flight
+        try:
+            return await make_request(bot, method)
+        except TelegramRetryAfter:
+            self.retry_after += 1
+            raise
+        finally:
+            self.in_flight -= 1
+
+    def take(self) -> tuple[int, int]:
+        """Пик очереди и число 429 с прошлого снятия; счёт начинается заново."""
+        peak, retry_after = self.peak, self.retry_after
+        self.peak, self.retry_after = self.in_flight, 0
+        return peak, retry_after
+
+
+api_pressure_middleware = ApiPressureMiddleware
+
+__all__ = ["ApiPressureMiddleware", "api_pressure_middleware"]
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from typing import Any, cast
+
+from aiogram import BaseMiddleware
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.dispatcher.flags import get_flag
+from aiogram.exceptions import TelegramAPIError
+from aiogram.methods import AnswerCallbackQuery, TelegramMethod
+from aiogram.methods.base import Response, TelegramType
+from aiogram.types import CallbackQuery, TelegramObject
+
+from libs.common.metrics import REGISTRY, Registry
+
+
+# Флаг хэндлера: flags={"early_answer": False} — не отвечать раньше хэндлера (нужен alert после
+# долгой работы)
+FLAG = "early_answer"
+
+
+class AnswerDedupMiddleware(BaseRequestMiddleware):
+    """
+    Request middleware сессии Bot: на callback, который сейчас обрабатывается,
+    в Bot API уходит только первый answerCallbackQuery, остальные не отправляются.
+
+    pending — id callback → уже отвечен ли; заполняет CallbackAnswerMiddleware.
+    """
+
+    def __init__(self, pending: dict[str, bool], suppressed: Callable[[], None]) -> None:
+        self.pending = pending
+        self.suppressed = suppressed
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Any,  # noqa: ANN401
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        # callback_query_id есть только у answerCallbackQuery
+        query_id: str | None = getattr(method, "callback_query_id", None)
+        answered = self.pending.get(query_id) if query_id is not None else None
+        if query_id is None or answered is None:
+            return await make_request(bot, method)
+        if answered:
+            self.suppressed()
+            # Повторный ответ Telegram всё равно отклонил бы; для хэндлера — успех
+            return cast("Response[TelegramType]", True)
+        # Отмечаем до запроса: второй ответ, пришедший, пока первый в полёте, — тоже дубль
+        self.pending[query_id] = True
+        try:
+            return await make_request(bot, method)
+        except BaseException:
+            self.pending[query_id] = False
+            raise
+
+
+class CallbackAnswerMiddleware(BaseMiddleware):
+    """
+    Inner middleware на dp.callback_query: спиннер на кнопке гасится, не дожидаясь
+    конца хэндлера.
+
+    Если хэндлер не ответил сам за deadline секунд, пустой answerCallbackQuery
+    уходит параллельно с его работой (deadline=0 — сразу). Не ответивший вовсе
+    хэндлер получает ответ после завершения. Успевший до срока ответ хэндлера —
+    с текстом или alert — уходит как есть; опоздавший подавляется
+    AnswerDedupMiddleware и считается в bot_callback_answers{source="suppressed"}.
+    Хэндлерам, которым alert нужен после долгой работы, — флаг early_answer=False.
+
+    requests должен стоять на bot.session: по нему видно, что хэндлер уже ответил.
+    """
+
+    def __init__(
+        self,
+        deadline: float = 0.1,
+        log: logging.Logger | None = None,
+        registry: Registry = REGISTRY,
+    ) -> None:
+        super().__init__()
+        self.deadline = deadline
+        self.log = log or logging.getLogger(__name__)
+        self.pending: dict[str, bool] = {}
+        answers = registry.counter(
+            "bot_callback_answers", "answerCallbackQuery by who sent it", ("source",)
+        )
+        self._early = answers.labels("early")
+        self._after = answers.labels("after_handler")
+        self._suppressed = answers.labels("suppressed")
+        self.requests = AnswerDedupMiddleware(self.pending, self._suppressed.inc)
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:  # noqa: ANN401
+        if not isinstance(event, CallbackQuery) or event.id in self.pending:
+            return await handler(event, data)
+        if not get_flag(data, FLAG, default=True):
+            return await handler(event, data)
+
+        bot = data["bot"]
+        pending = self.pending
+        pending[event.id] = False
+        early: asyncio.Task[None] | None = None
+
+        def fire() -> None:
+            nonlocal early
+            early = asyncio.create_task(self._answer(bot, event.id, self._early.inc))
+
+        timer = asyncio.get_running_loop().call_later(self.deadline, fire)
+        try:
+            return await handler(event, data)
+        finally:
+            timer.cancel()
+            if not pending[event.id]:
+                await self._answer(bot, event.id, self._after.inc)
+            if early is not None:
+                await early
+            del pending[event.id]
+
+    async def _answer(
+        self, bot: Any, query_id: str, count: Callable[[], None]  # noqa: ANN401
+    ) -> None:
+        if self.pending.get(query_id, True):
+            return  # хэндлер успел ответить сам
+        count()
+        try:
+            await bot(AnswerCallbackQuery(callback_query_id=query_id))
+        except TelegramAPIError as e:
+            # Подтверждение — не часть хэндлера: его ошибка не должна ронять апдейт
+            self.log.warning("callback %s: answer failed: %r", query_id, e)
+
+
+callback_answer_middleware = CallbackAnswerMiddleware
+
+__all__ = [
+    "FLAG",
+    "AnswerDedupMiddleware",
+    "CallbackAnswerMiddleware",
+    "callback_answer_middleware",
+]
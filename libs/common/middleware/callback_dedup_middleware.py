@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import logging
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any
+
+from aiogram import BaseMiddleware
+from aiogram.exceptions import TelegramAPIError
+from aiogram.methods import AnswerCallbackQuery
+from aiogram.types import CallbackQuery, TelegramObject
+
+from libs.common.clock import SYSTEM_CLOCK, Clock
+from libs.common.metrics import REGISTRY, Registry
+
+
+# Сколько недавних нажатий помнить; дальше самые старые забываются раньше TTL
+MAX_RECENT = 10_000
+
+
+def press_key(event: CallbackQuery) -> Hashable | None:
+    """Кто, на какой кнопке какого сообщения; None — сообщение недоступно, сравнивать не с чем."""
+    if event.message is not None:
+        return event.from_user.id, event.message.chat.id, event.message.message_id, event.data
+    if event.inline_message_id is not None:
+        return event.from_user.id, event.inline_message_id, event.data
+    return None
+
+
+class CallbackDedupMiddleware(BaseMiddleware):
+    """
+    Outer middleware на dp.callback_query: повторное нажатие той же кнопки того же
+    сообщения, пока первое обрабатывается или в течение ttl после, не доходит
+    до фильтров и хэндлера — только гасится спиннер.
+
+    Двойной тап по «Назад» иначе давал два перехода FSM, два edit_message_reply_markup
+    и два новых вопроса. Нажатия разных пользователей на одну кнопку в группе —
+    разные ключи: id пользователя входит в ключ.
+
+    in_flight — множество обрабатываемых ключей (не больше, чем апдейтов
+    в обработке). recent — ключ → срок, в порядке добавления; ttl у всех один,
+    поэтому истёкшие всегда в начале и вычищаются с головы, а сверх MAX_RECENT
+    вытесняются самые старые. Подавленные — bot_callback_duplicates{state}.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 1.0,
+        clock: Clock = SYSTEM_CLOCK,
+        log: logging.Logger | None = None,
+        registry: Registry = REGISTRY,
+    ) -> None:
+        super().__init__()
+        self.ttl = ttl
+        self.clock = clock
+        self.log = log or logging.getLogger(__name__)
+        self.in_flight: set[Hashable] = set()
+        self.recent: OrderedDict[Hashable, float] = OrderedDict()
+        duplicates = registry.counter(
+            "bot_callback_duplicates", "Repeated button presses dropped", ("state",)
+        )
+        self._in_flight_dup = duplicates.labels("in_flight")
+        self._recent_dup = duplicates.labels("recent")
+        registry.gauge(
+            "bot_callback_dedup_entries", "Button presses remembered for deduplication"
+        ).set_function(lambda: len(self.in_flight) + len(self.recent))
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:  # noqa: ANN401
+        if not isinstance(event, CallbackQuery) or (key := press_key(event)) is None:
+            return await handler(event, data)
+
+        self._expire(self.clock.monotonic())
+        if key in self.in_flight or key in self.recent:
+            (self._in_flight_dup if key in self.in_flight else self._recent_dup).inc()
+            return await self._drop(data["bot"], event.id)
+
+        self.in_flight.add(key)
+        try:
+            return await handler(event, data)
+        finally:
+            self.in_flight.discard(key)
+            self.recent[key] = self.clock.monotonic() + self.ttl
+            if len(self.recent) > MAX_RECENT:
+                self.recent.popitem(last=False)
+
+    def _expire(self, now: float) -> None:
+        recent = self.recent
+        while recent:
+            key, until = next(iter(recent.items()))
+            if until > now:
+                return
+            del recent[key]
+
+    async def _drop(self, bot: Any, query_id: str) -> None:  # noqa: ANN401
+        try:
+            await bot(AnswerCallbackQuery(callback_query_id=query_id))
+        except TelegramAPIError as e:
+            self.log.warning("callback %s: answer to duplicate failed: %r", query_id, e)
+
+
+callback_dedup_middleware = CallbackDedupMiddleware
+
+__all__ = ["CallbackDedupMiddleware", "callback_dedup_middleware", "press_key"]
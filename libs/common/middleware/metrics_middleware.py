@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from aiogram import BaseMiddleware
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.dispatcher.event.bases import SkipHandler
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import Response, TelegramType
+from aiogram.types import TelegramObject
+
+from libs.common.flight_recorder import FlightRecorder
+from libs.common.metrics import REGISTRY, Registry
+
+
+SAMPLE_KEY = "metrics_sample"
+
+
+class UpdateSample:
+    """Общий для outer и inner middleware слот: inner дописывает имя хэндлера и исход."""
+
+    __slots__ = ("handler", "outcome")
+
+    def __init__(self) -> None:
+        self.handler = "unhandled"
+        self.outcome = "unhandled"
+
+
+class UpdateMetricsMiddleware(BaseMiddleware):
+    """
+    Outer middleware на dp.update: e2e латентность апдейта по типу и хэндлеру.
+
+    Ошибки хэндлеров перехватывает ErrorsMiddleware aiogram (он снаружи), поэтому
+    исход фиксирует HandlerMetricsMiddleware на уровне событий.
+    """
+
+    def __init__(
+        self, registry: Registry = REGISTRY, recorder: FlightRecorder | None = None
+    ) -> None:
+        super().__init__()
+        self.recorder = recorder
+        self.updates = registry.counter(
+            "bot_updates", "Processed updates", ("type", "handler", "outcome")
+        )
+        self.latency = registry.histogram(
+            "bot_update_duration_seconds", "Update processing latency", ("type", "handler")
+        )
+        self.in_flight = registry.gauge("bot_updates_in_flight", "Updates being processed")
+        self._in_flight = self.in_flight.labels()
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:  # noqa: ANN401
+        sample = data[SAMPLE_KEY] = UpdateSample()
+        update_type = getattr(event, "event_type", None) or "unknown"
+        self._in_flight.inc()
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            elapsed = time.perf_counter() - started
+            self._in_flight.dec()
+            self.latency.labels(update_type, sample.handler).observe(elapsed)
+            self.updates.labels(update_type, sample.handler, sample.outcome).inc()
+            if self.recorder is not None:
+                update_id = getattr(event, "update_id", 0)
+                self.recorder.record_update(
+                    update_id, update_type, sample.handler, elapsed, sample.outcome
+                )
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """Inner middleware на observers событий: имя сработавшего хэндлера и исход ok/error."""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:  # noqa: ANN401
+        sample: UpdateSample | None = data.get(SAMPLE_KEY)
+        if sample is None:
+            return await handler(event, data)
+
+        handler_obj = data.get("handler")
+        callback = getattr(handler_obj, "callback", None)
+        sample.handler = getattr(callback, "__name__", None) or "unknown"
+        try:
+            result = await handler(event, data)
+        except SkipHandler:
+            sample.handler = "unhandled"
+            raise
+        except Exception:
+            sample.outcome = "error"
+            raise
+        sample.outcome = "ok"
+        return result
+
+
+class ApiMetricsMiddleware(BaseRequestMiddleware):
+    """Request middleware сессии Bot: длительность и ошибки каждого метода Bot API."""
+
+    def __init__(
+        self, registry: Registry = REGISTRY, recorder: FlightRecorder | None = None
+    ) -> None:
+        self.recorder = recorder
+        self.duration = registry.histogram(
+            "bot_api_request_duration_seconds", "Bot API request latency", ("method",)
+        )
+        self.errors = registry.counter(
+            "bot_api_errors", "Failed Bot API requests", ("method", "error")
+        )
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Any,  # noqa: ANN401
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        name = getattr(method, "__api_method__", type(method).__name__)
+        status = "ok"
+        started = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        except Exception as e:
+            status = type(e).__name__
+            self.errors.labels(name, status).inc()
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            self.duration.labels(name).observe(elapsed)
+            if self.recorder is not None:
+                chat_id = getattr(method, "chat_id", None)
+                self.recorder.record_api_call(
+                    name, chat_id if isinstance(chat_id, int) else 0, status, elapsed
+                )
+
+
+metrics_middleware = UpdateMetricsMiddleware
+
+__all__ = [
+    "ApiMetricsMiddleware",
+    "HandlerMetricsMiddleware",
+    "UpdateMetricsMiddleware",
+    "metrics_middleware",
+]
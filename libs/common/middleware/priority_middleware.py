@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+from libs.common.clock import SYSTEM_CLOCK, Clock
+from libs.common.metrics import REGISTRY, Registry
+
+
+# Классы апдейтов: срочные ждут спиннер на кнопке или ответ на команду
+CLASSES = ("callback", "command", "text")
+URGENT = frozenset({"callback", "command"})
+
+
+def priority_class(event: TelegramObject) -> str:
+    """callback — нажатие inline-кнопки, command — текст с «/», text — всё остальное."""
+    if isinstance(event, Update):
+        if event.callback_query is not None:
+            return "callback"
+        text = event.message.text if event.message is not None else None
+        if text and text[0] == "/":
+            return "command"
+    return "text"
+
+
+class PriorityMiddleware(BaseMiddleware):
+    """
+    Outer middleware на dp.update: не больше concurrency апдейтов в обработке,
+    остальные ждут в очереди, где нажатия кнопок и команды идут раньше текста.
+
+    Очередь — одна куча по «сроку»: срочный апдейт получает срок now,
+    обычный — now + aging. Поэтому текст, прождавший дольше aging, обгоняет
+    только что пришедший callback — голодание ограничено aging (старение
+    вместо строгих приоритетов). aging=0 — обычная FIFO.
+
+    Освободившийся слот передаётся следующему в очереди напрямую, без
+    повторной конкуренции. Ожидание по классам — bot_update_queue_wait_seconds.
+    """
+
+    def __init__(
+        self,
+        concurrency: int,
+        aging: float = 0.5,
+        clock: Clock = SYSTEM_CLOCK,
+        registry: Registry = REGISTRY,
+    ) -> None:
+        if concurrency < 1:
+            raise ValueError(f"concurrency must be >= 1, got {concurrency}")
+        super().__init__()
+        self.concurrency = concurrency
+        self.aging = aging
+        self.clock = clock
+        self.active = 0
+        self.queue: list[tuple[float, int, asyncio.Future[None]]] = []
+        self._seq = itertools.count()
+        wait = registry.histogram(
+            "bot_update_queue_wait_seconds",
+            "Time an update waited for a processing slot",
+            ("class",),
+        )
+        self._wait = {name: wait.labels(name) for name in CLASSES}
+        registry.gauge(
+            "bot_update_queue_depth", "Updates waiting for a processing slot"
+        ).set_function(lambda: len(self.queue))
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:  # noqa: ANN401
+        kind = priority_class(event)
+        if self.active < self.concurrency and not self.queue:
+            self.active += 1
+            self._wait[kind].observe(0.0)
+        else:
+            await self._enqueue(kind)
+        try:
+            return await handler(event, data)
+        finally:
+            self._release()
+
+    async def _enqueue(self, kind: str) -> None:
+        started = self.clock.monotonic()
+        due = started if kind in URGENT else started + self.aging
+        slot = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.queue, (due, next(self._seq), slot))
+        try:
+            await slot
+        except asyncio.CancelledError:
+            # Слот могли передать в тот же тик, когда ожидание отменили, — вернуть его
+            if slot.done() and not slot.cancelled():
+                self._release()
+            raise
+        self._wait[kind].observe(self.clock.monotonic() - started)
+
+    def _release(self) -> None:
+        queue = self.queue
+        while queue:
+            slot = heapq.heappop(queue)[2]
+            if not slot.done():
+                slot.set_result(None)
+                return
+        self.active -= 1
+
+
+priority_middleware = PriorityMiddleware
+
+__all__ = ["CLASSES", "PriorityMiddleware", "priority_class", "priority_middleware"]
@@ -1,27 +1,65 @@
 from __future__ import annotations
 
-import time
-from collections import defaultdict, deque
-from collections.abc import Awaitable, Callable
+import math
+from collections.abc import Awaitable, Callable, Mapping
 from typing import Any
 
 from aiogram import BaseMiddleware
-from aiogram.types import CallbackQuery, Message, TelegramObject
+from aiogram.types import CallbackQuery, Chat, Message, TelegramObject, Update
 
+from libs.common.adaptive_limit import AimdController
 from libs.common.aiogram.i18n import _
+from libs.common.clock import SYSTEM_CLOCK, Clock
 from libs.common.config import get_settings
 from libs.common.logger import setup_logging
+from libs.common.metrics import REGISTRY, Registry
+from libs.common.rate_limit import SWEEP_INTERVAL, RateLimitBackend, rate_limit_backend
+from libs.common.rate_limit_policy import GROUP_CHATS, rate_limit_policy
 
 
 class RateLimitMiddleware(BaseMiddleware):
 
-    def __init__(self, bot_name: str) -> None:
+    def __init__(
+        self,
+        bot_name: str,
+        clock: Clock = SYSTEM_CLOCK,
+        backend: RateLimitBackend | None = None,
+        registry: Registry = REGISTRY,
+    ) -> None:
         super().__init__()
         setting = get_settings(bot_name=bot_name)
         self.limit = setting.rate_limit_per_user
         self.window = setting.rate_limit_window_sec
         self.log = setup_logging(bot_name)
-        self.bucket: dict[int, deque[float]] = defaultdict(deque)
+        self.clock = clock
+        # Где считается лимит — в процессе, в общей памяти воркеров или на сервере для всех узлов
+        self.backend = backend or rate_limit_backend(bot_name, clock, self.log)
+        # Взвешенные лимиты на пользователя, групповой чат, тип апдейта и бот целиком
+        self.policy = rate_limit_policy(
+            setting.rate_limit_policy, setting.rate_limit_costs, clock=clock
+        )
+        # AIMD-контроллер лимита под нагрузкой; подключает setup_adaptive_rate_limit
+        self.adaptive: AimdController | None = None
+        # Пользователь → до какого момента длится эпизод троттлинга (см. notify)
+        self.episodes: dict[int, float] = {}
+        self.next_sweep = clock.monotonic() + SWEEP_INTERVAL
+        self.suppressed = registry.counter(
+            "rate_limit_notices_suppressed",
+            "Throttled updates dropped without a notice",
+            ("type",),
+        )
+
+    def adapt(self, adaptive: AimdController, now: float) -> None:
+        """Закрывает шаг контроллера и применяет множитель к бэкенду и политике."""
+        factor = adaptive.update(now)
+        self.backend.limit = adaptive.limit
+        if self.policy is not None:
+            self.policy.scale = factor
+
+    @property
+    def bucket(self) -> Mapping[int, Any]:
+        """Пер-пользовательское состояние лимитера в этом процессе."""
+        return self.backend.local_state()
 
     async def __call__(
         self,
@@ -34,25 +72,93 @@ class RateLimitMiddleware(BaseMiddleware):
         else:
             user_id = data.get("event_from_user").id if data.get("event_from_user") else None
 
-        if user_id is None:
-            return await handler(event, data)
+        if self.adaptive is not None:
+            now = self.clock.monotonic()
+            if now >= self.adaptive.next_update:
+                self.adapt(self.adaptive, now)
 
-        now = time.monotonic()
-        q = self.bucket[user_id]
+        allowed = True
+        policy = self.policy
+        if policy is not None:
+            event_type, chat_id, text, callback_data = _policy_context(event, data)
+            cost = policy.cost(event_type, text, callback_data)
+            allowed = policy.allow(user_id, chat_id, event_type, cost, self.clock.monotonic())
+        if allowed and user_id is not None:
+            allowed = await self.backend.acquire(user_id)
+            # Бэкенд отказал — апдейт не обработан и не должен тратить бюджет политики
+            if not allowed and policy is not None:
+                policy.refund(user_id, chat_id, event_type, cost)
 
-        while q and now - q[0] > self.window:
-            q.popleft()
-
-        if len(q) >= self.limit:
-            if isinstance(event, Message):
-                await event.answer(_("user.limit"))
-            elif isinstance(event, CallbackQuery) and event.message:
-                await event.answer()
+        if not allowed:
+            await self.notify(event, user_id)
             return None
 
-        q.append(now)
         return await handler(event, data)
 
+    async def notify(self, event: TelegramObject, user_id: int | None) -> None:
+        """
+        Уведомление об отказе — одно на эпизод троттлинга, иначе флудер получал бы
+        по исходящему сообщению на каждый отказ и тратил общий лимит Bot API.
+
+        Эпизод длится, пока отказы идут чаще раза в window: каждый отказ продлевает
+        его, остальные отказы эпизода отбрасываются молча и считаются в suppressed.
+        Первый отказ на callback показывается алертом с cache_time на окно — клиент
+        не шлёт повторные нажатия; подавленные callback всё равно получают пустой
+        ответ, иначе у кнопки крутится индикатор загрузки до таймаута.
+        """
+        if isinstance(event, Update):
+            event = event.event
+        now = self.clock.monotonic()
+        if now >= self.next_sweep:
+            self.sweep(now)
+        kind = _EVENT_TYPES.get(type(event), "unknown")
+        if user_id is not None:
+            until = self.episodes.get(user_id)
+            self.episodes[user_id] = now + self.window
+            if until is None or until <= now:
+                if isinstance(event, Message):
+                    await event.answer(_("user.limit"))
+                    return
+                if isinstance(event, CallbackQuery):
+                    await event.answer(
+                        _("user.limit"), show_alert=True, cache_time=math.ceil(self.window)
+                    )
+                    return
+        # Эпизод уже идёт или его не к кому привязать — без текста
+        self.suppressed.labels(kind).inc()
+        if isinstance(event, CallbackQuery):
+            await event.answer()
+
+    def sweep(self, now: float) -> int:
+        """Забывает закончившиеся эпизоды троттлинга; O(len(episodes))."""
+        ended = [uid for uid, until in self.episodes.items() if until <= now]
+        for uid in ended:
+            del self.episodes[uid]
+        self.next_sweep = now + SWEEP_INTERVAL
+        return len(ended)
+
+
+def _policy_context(
+    event: TelegramObject, data: dict
+) -> tuple[str, int | None, str | None, str | None]:
+    """Тип апдейта, id группового чата, текст и callback_data — всё, что нужно политике."""
+    if isinstance(event, Update):
+        event_type, event = event.event_type, event.event
+    else:
+        event_type = _EVENT_TYPES.get(type(event), "unknown")
+    chat: Chat | None = data.get("event_chat")
+    if chat is None and isinstance(event, Message):
+        chat = event.chat
+    return (
+        event_type,
+        chat.id if chat is not None and chat.type in GROUP_CHATS else None,
+        event.text if isinstance(event, Message) else None,
+        event.data if isinstance(event, CallbackQuery) else None,
+    )
+
+
+_EVENT_TYPES: dict[type, str] = {Message: "message", CallbackQuery: "callback_query"}
+
 
 rate_limit_middleware = RateLimitMiddleware
 
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from aiogram import BaseMiddleware
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import Response, TelegramType
+from aiogram.types import TelegramObject
+
+from libs.common.tracing import KIND_CLIENT, Tracer
+
+
+Handler = Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]]
+Middleware = Callable[[Handler, TelegramObject, dict[str, Any]], Awaitable[Any]]
+
+
+class TracingMiddleware(BaseMiddleware):
+    """Outer middleware на dp.update: корневой спан апдейта."""
+
+    def __init__(self, tracer: Tracer) -> None:
+        super().__init__()
+        self.tracer = tracer
+
+    async def __call__(
+        self, handler: Handler, event: TelegramObject, data: dict[str, Any]
+    ) -> Any:  # noqa: ANN401
+        update_type = getattr(event, "event_type", None) or "unknown"
+        with self.tracer.trace(
+            f"update {update_type}",
+            **{"update.id": getattr(event, "update_id", None), "update.type": update_type},
+        ) as root:
+            user = data.get("event_from_user")
+            if user is not None:
+                root.set("user.id", user.id)
+            return await handler(event, data)
+
+
+class TracedMiddleware(BaseMiddleware):
+    """
+    Обёртка над уже зарегистрированным middleware: спан с его именем.
+
+    Спан охватывает и всё, что ниже по цепочке, — собственное время middleware
+    видно как разница с дочерними спанами.
+    """
+
+    def __init__(self, tracer: Tracer, middleware: Middleware, name: str | None = None) -> None:
+        super().__init__()
+        self.tracer = tracer
+        self.middleware = middleware
+        self.name = name or f"middleware {type(middleware).__name__}"
+
+    async def __call__(
+        self, handler: Handler, event: TelegramObject, data: dict[str, Any]
+    ) -> Any:  # noqa: ANN401
+        with self.tracer.span(self.name):
+            return await self.middleware(handler, event, data)
+
+
+class HandlerTracingMiddleware(BaseMiddleware):
+    """Inner middleware, регистрируется последним: спан вокруг самого хэндлера."""
+
+    def __init__(self, tracer: Tracer) -> None:
+        super().__init__()
+        self.tracer = tracer
+
+    async def __call__(
+        self, handler: Handler, event: TelegramObject, data: dict[str, Any]
+    ) -> Any:  # noqa: ANN401
+        callback = getattr(data.get("handler"), "callback", None)
+        name = getattr(callback, "__name__", None) or "unknown"
+        state = data.get("raw_state")
+        with self.tracer.span(f"handler {name}", **{"fsm.state": state}):
+            return await handler(event, data)
+
+
+class ApiTracingMiddleware(BaseRequestMiddleware):
+    """Request middleware сессии Bot: клиентский спан на каждый вызов Bot API."""
+
+    def __init__(self, tracer: Tracer) -> None:
+        self.tracer = tracer
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Any,  # noqa: ANN401
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        name = getattr(method, "__api_method__", type(method).__name__)
+        chat_id = getattr(method, "chat_id", None)
+        with self.tracer.span(f"api {name}", KIND_CLIENT, **{"chat.id": chat_id}):
+            return await make_request(bot, method)
+
+
+__all__ = [
+    "ApiTracingMiddleware",
+    "HandlerTracingMiddleware",
+    "TracedMiddleware",
+    "TracingMiddleware",
+]
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+from libs.common.update_log import UpdateLogWriter
+
+
+class UpdateRecorderMiddleware(BaseMiddleware):
+    """
+    Outer-middleware на dp.update: кладёт каждый входящий апдейт в журнал.
+
+    На горячем пути — только постановка в очередь; сериализация и сжатие
+    в потоке UpdateLogWriter.
+    """
+
+    def __init__(self, writer: UpdateLogWriter) -> None:
+        super().__init__()
+        self.writer = writer
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:  # noqa: ANN401
+        if isinstance(event, Update):
+            self.writer.write(event)
+        return await handler(event, data)
+
+
+update_recorder_middleware = UpdateRecorderMiddleware
+
+__all__ = ["UpdateRecorderMiddleware", "update_recorder_middleware"]
@@ -0,0 +1,365 @@
+"""
+Лёгкий потоковый .po → .mo без polib.
+
+read_po читает файл построчно и сразу складывает переводы в плоский словарь
+(msgctxt, msgid) → msgstr, где для plural-записей msgid и msgstr уже в виде .mo:
+"singular\\0plural" и "form0\\0form1\\0...". build_mo пишет GNU .mo;
+с hash_table=False вывод побайтово совпадает с polib.POFile.save_as_mofile.
+"""
+
+from __future__ import annotations
+
+import array
+import os
+import re
+import struct
+from collections.abc import Iterable, Mapping
+from pathlib import Path
+
+
+MsgKey = tuple[str | None, str]
+
+MO_MAGIC = 0x950412DE
+DEFAULT_LANGUAGE = "en"
+
+# Дефолты для plural-forms
+PLURAL_DEFAULTS = {
+    "en": "nplurals=2; plural=(n != 1);",
+    "ru": "nplurals=3; plural=(n%10==1 && n%100!=11 ? 0 : n%10>=2 && n%10<=4 && (n%100<10 || n%100>=20) ? 1 : 2);",  # noqa: E501
+}
+
+# Порядок заголовков как у polib (остальные — natural sort)
+HEADER_ORDER = (
+    "Project-Id-Version",
+    "Report-Msgid-Bugs-To",
+    "POT-Creation-Date",
+    "PO-Revision-Date",
+    "Last-Translator",
+    "Language-Team",
+    "Language",
+    "MIME-Version",
+    "Content-Type",
+    "Content-Transfer-Encoding",
+    "Plural-Forms",
+)
+
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "v": "\v", "b": "\b", "f": "\f", "\\": "\\"}
+_UNESCAPE_RE = re.compile(r'\\(\\|n|t|r|v|b|f|")')
+_NUM_SPLIT = re.compile(r"([0-9]+)")
+
+
+class PoCatalog:
+    """Метаданные заголовка + переведённые сообщения одного каталога."""
+
+    __slots__ = ("messages", "metadata")
+
+    def __init__(self) -> None:
+        self.metadata: dict[str, str] = {}
+        self.messages: dict[MsgKey, str] = {}
+
+    def __len__(self) -> int:
+        return len(self.messages)
+
+
+def _unescape(value: str) -> str:
+    if "\\" not in value:
+        return value
+    return _UNESCAPE_RE.sub(lambda m: _ESCAPES.get(m.group(1), m.group(1)), value)
+
+
+def _quoted(line: str) -> str:
+    return _unescape(line[line.index('"') + 1 : line.rindex('"')])
+
+
+def _parse_header(msgstr: str, metadata: dict[str, str]) -> None:
+    key: str | None = None
+    for line in msgstr.splitlines():
+        name, sep, value = line.partition(":")
+        if sep:
+            key = name
+            metadata[key] = value.strip()
+        elif key is not None:
+            metadata[key] += "\n" + line.strip()
+
+
+def read_po(path: str | Path, catalog: PoCatalog | None = None) -> PoCatalog:
+    """
+    Потоково читает .po (UTF-8) в catalog: поздние записи перекрывают ранние.
+
+    Как и в polib, в .mo попадают только переведённые записи без флага fuzzy;
+    obsolete (#~) пропускаются. Заголовок (msgid "") разбирается в metadata
+    только если metadata каталога ещё пуст.
+    """
+    catalog = catalog if catalog is not None else PoCatalog()
+    messages = catalog.messages
+    header_seen = bool(catalog.metadata)
+
+    ctx: list[str] | None = None
+    msgid: list[str] | None = None
+    plural: list[str] | None = None
+    msgstr: list[str] | None = None
+    forms: dict[int, list[str]] = {}
+    target: list[str] | None = None
+    fuzzy = False
+
+    def flush() -> None:
+        nonlocal header_seen
+        if msgid is None:
+            return
+        mid = "".join(msgid)
+        mctx = "".join(ctx) if ctx is not None else None
+        if plural is not None:
+            values = ["".join(forms[i]) for i in sorted(forms)]
+            if fuzzy or not values or "" in values:
+                return
+            messages[(mctx, mid + "\0" + "".join(plural))] = "\0".join(values)
+            return
+        text = "".join(msgstr) if msgstr is not None else ""
+        if not mid and mctx is None:
+            if not header_seen:
+                _parse_header(text, catalog.metadata)
+                header_seen = True
+            return
+        if text and not fuzzy:
+            messages[(mctx, mid)] = text
+
+    with open(path, encoding="utf-8") as fp:
+        for raw in fp:
+            line = raw.strip()
+            if not line:
+                continue
+            first = line[0]
+            if first == '"':
+                if target is not None:
+                    target.append(_quoted(line))
+                continue
+            if first == "#":
+                # комментарии относятся к следующей записи
+                if msgid is not None:
+                    flush()
+                    ctx = msgid = plural = msgstr = target = None
+                    forms = {}
+                    fuzzy = False
+                if line.startswith("#,") and "fuzzy" in line:
+                    fuzzy = True
+                continue
+
+            keyword = line[: line.index('"')].rstrip() if '"' in line else line
+            if keyword in ("msgctxt", "msgid") and (msgstr is not None or forms):
+                # новая запись без пустой строки-разделителя
+                flush()
+                ctx = msgid = plural = msgstr = target = None
+                forms = {}
+                fuzzy = False
+            if keyword == "msgctxt":
+                ctx = target = [_quoted(line)]
+            elif keyword == "msgid":
+                msgid = target = [_quoted(line)]
+            elif keyword == "msgid_plural":
+                plural = target = [_quoted(line)]
+            elif keyword == "msgstr":
+                msgstr = target = [_quoted(line)]
+            elif keyword.startswith("msgstr["):
+                target = forms[int(keyword[7:-1])] = [_quoted(line)]
+            else:
+                target = None
+    flush()
+    return catalog
+
+
+def layer_metadata(lang: str, first_hdr: Mapping[str, str] | None) -> dict[str, str]:
+    """Заголовок скомпилированного слоя: поля первого .po + обязательные дефолты."""
+    plural_forms = PLURAL_DEFAULTS.get(lang, PLURAL_DEFAULTS[DEFAULT_LANGUAGE])
+    if first_hdr is None:
+        return {
+            "Project-Id-Version": "i18n",
+            "Language": lang,
+            "MIME-Version": "1.0",
+            "Content-Type": "text/plain; charset=UTF-8",
+            "Content-Transfer-Encoding": "8bit",
+            "Plural-Forms": plural_forms,
+        }
+    return {
+        "Project-Id-Version": first_hdr.get("Project-Id-Version", "i18n"),
+        "Report-Msgid-Bugs-To": first_hdr.get("Report-Msgid-Bugs-To", ""),
+        "POT-Creation-Date": first_hdr.get("POT-Creation-Date", ""),
+        "PO-Revision-Date": first_hdr.get("PO-Revision-Date", ""),
+        "Last-Translator": first_hdr.get("Last-Translator", ""),
+        "Language-Team": first_hdr.get("Language-Team", ""),
+        "Language": lang,
+        "MIME-Version": "1.0",
+        "Content-Type": "text/plain; charset=UTF-8",
+        "Content-Transfer-Encoding": "8bit",
+        "Plural-Forms": first_hdr.get("Plural-Forms") or plural_forms,
+    }
+
+
+def compile_layer(lang: str, po_list: list[Path]) -> bytes:
+    """.po одного слоя → байты .mo (то же, что пишет compile_locales)."""
+    merged = merge_po(po_list)
+    metadata = layer_metadata(lang, merged.metadata if po_list else None)
+    return build_mo(format_header(metadata), merged.messages)
+
+
+def _natural_key(key: str) -> list[int | str]:
+    return [int(c) if c.isdigit() else c.lower() for c in _NUM_SPLIT.split(key)]
+
+
+def format_header(metadata: Mapping[str, str]) -> str:
+    """Собирает msgstr заголовка в том же порядке, что и polib."""
+    rest = dict(metadata)
+    ordered = [(name, rest.pop(name)) for name in HEADER_ORDER if name in rest]
+    ordered += [(name, rest[name]) for name in sorted(rest, key=_natural_key)]
+    if not ordered:
+        return ""
+    return "\n".join(f"{name}: {value}" for name, value in ordered) + "\n"
+
+
+def _hash_string(data: bytes) -> int:
+    """hashpjw из GNU gettext (unsigned long на LP64)."""
+    hval = 0
+    for byte in data:
+        if byte == 0:
+            break
+        hval = ((hval << 4) + byte) & 0xFFFFFFFFFFFFFFFF
+        g = hval & 0xF0000000
+        if g:
+            hval ^= g >> 24
+            hval ^= g
+    return hval
+
+
+def _next_prime(seed: int) -> int:
+    seed |= 1
+    while any(seed % d == 0 for d in range(3, int(seed**0.5) + 1, 2)):
+        seed += 2
+    return seed
+
+
+def _hash_table(keys: list[bytes]) -> list[int]:
+    size = max(_next_prime(len(keys) * 4 // 3), 3)
+    table = [0] * size
+    for i, key in enumerate(keys):
+        hval = _hash_string(key)
+        idx = hval % size
+        if table[idx]:
+            incr = 1 + hval % (size - 2)
+            while table[idx]:
+                idx += incr
+                if idx >= size:
+                    idx -= size
+        table[idx] = i + 1
+    return table
+
+
+def build_mo(header: str, messages: Mapping[MsgKey, str], *, hash_table: bool = False) -> bytes:
+    """
+    Собирает GNU .mo: заголовок, затем записи, отсортированные как в polib.
+
+    hash_table=True добавляет хэш-таблицу GNU gettext (как msgfmt); без неё
+    вывод совпадает с polib байт в байт.
+    """
+
+    def sort_key(key: MsgKey) -> bytes:
+        mctx, mid = key
+        singular = mid.partition("\0")[0]
+        return (f"{mctx}\x04{singular}" if mctx else singular).encode("utf-8")
+
+    ordered = sorted(messages, key=sort_key)
+    keys: list[bytes] = [b""]
+    values: list[bytes] = [header.encode("utf-8")]
+    for key in ordered:
+        mctx, mid = key
+        keys.append((f"{mctx}\x04{mid}" if mctx else mid).encode("utf-8"))
+        values.append(messages[key].encode("utf-8"))
+
+    count = len(keys)
+    table = _hash_table(keys) if hash_table else []
+    keystart = 7 * 4 + 16 * count + 4 * len(table)
+    valuestart = keystart + sum(len(k) + 1 for k in keys)
+
+    koffsets: list[int] = []
+    voffsets: list[int] = []
+    kpos = vpos = 0
+    for k, v in zip(keys, values, strict=True):
+        koffsets += [len(k), kpos + keystart]
+        voffsets += [len(v), vpos + valuestart]
+        kpos += len(k) + 1
+        vpos += len(v) + 1
+
+    out = [
+        struct.pack(
+            "Iiiiiii",
+            MO_MAGIC,
+            0,
+            count,
+            7 * 4,
+            7 * 4 + count * 8,
+            len(table),
+            7 * 4 + 16 * count,
+        ),
+        array.array("i", koffsets + voffsets).tobytes(),
+        array.array("I", table).tobytes(),
+        b"\0".join(keys) + b"\0",
+        b"\0".join(values) + b"\0",
+    ]
+    return b"".join(out)
+
+
+def _po_quote(value: str) -> str:
+    escaped = (
+        value.replace("\\", "\\\\")
+        .replace('"', '\\"')
+        .replace("\t", "\\t")
+        .replace("\r", "\\r")
+        .replace("\n", "\\n")
+    )
+    return f'"{escaped}"'
+
+
+def build_po(header: str, messages: Mapping[MsgKey, str]) -> str:
+    """Минимальный .po (без комментариев) — для отладки содержимого кэша."""
+    chunks: list[str] = [f'msgid ""\nmsgstr {_po_quote(header)}\n']
+    for (mctx, mid), text in messages.items():
+        lines: list[str] = []
+        if mctx is not None:
+            lines.append(f"msgctxt {_po_quote(mctx)}")
+        singular, sep, plural = mid.partition("\0")
+        lines.append(f"msgid {_po_quote(singular)}")
+        if sep:
+            lines.append(f"msgid_plural {_po_quote(plural)}")
+            lines += [f"msgstr[{i}] {_po_quote(s)}" for i, s in enumerate(text.split("\0"))]
+        else:
+            lines.append(f"msgstr {_po_quote(text)}")
+        chunks.append("\n".join(lines) + "\n")
+    return "\n".join(chunks)
+
+
+def merge_po(paths: Iterable[str | Path]) -> PoCatalog:
+    """Читает несколько .po в один каталог; заголовок берётся из первого файла."""
+    catalog = PoCatalog()
+    for path in paths:
+        read_po(path, catalog)
+    return catalog
+
+
+def write_bytes(path: str | Path, data: bytes) -> None:
+    with open(path, "wb") as fp:
+        fp.write(data)
+        fp.flush()
+        os.fsync(fp.fileno())
+
+
+__all__ = [
+    "PLURAL_DEFAULTS",
+    "MsgKey",
+    "PoCatalog",
+    "build_mo",
+    "build_po",
+    "compile_layer",
+    "format_header",
+    "layer_metadata",
+    "merge_po",
+    "read_po",
+    "write_bytes",
+]
@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable
+from pathlib import Path
+from types import FrameType
+from typing import Any
+
+
+FORMATS = ("collapsed", "speedscope")
+
+Frame = tuple[str, str, int]
+Stack = tuple[Frame, ...]
+
+
+def _walk(frame: FrameType | None) -> Stack:
+    """Стек от корня к листу; кадры агрегируются по функции (co_firstlineno), не по строке."""
+    frames: list[Frame] = []
+    while frame is not None:
+        code = frame.f_code
+        frames.append((code.co_qualname, code.co_filename, code.co_firstlineno))
+        frame = frame.f_back
+    frames.reverse()
+    return tuple(frames)
+
+
+def _short(filename: str) -> str:
+    parts = Path(filename).parts
+    return "/".join(parts[-2:]) if len(parts) > 1 else filename
+
+
+class SamplingProfiler:
+    """
+    Статистический профайлер: отдельный поток с частотой hz снимает стеки всех
+    потоков через sys._current_frames() в течение duration секунд.
+
+    В простое ничего не делает — поток живёт только на время сессии.
+    """
+
+    def __init__(
+        self,
+        out_dir: str | Path,
+        name: str,
+        hz: float = 100,
+        duration: float = 10,
+        fmt: str = "speedscope",
+    ) -> None:
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown profile format: {fmt!r}, expected one of {FORMATS}")
+        self.out_dir = Path(out_dir)
+        self.name = name
+        self.hz = hz
+        self.duration = duration
+        self.fmt = fmt
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self.last_path: Path | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self, on_done: Callable[[Path], None] | None = None) -> bool:
+        """Запускает сессию; False — если предыдущая ещё идёт."""
+        with self._lock:
+            if self._thread is not None:
+                return False
+            self._thread = threading.Thread(
+                target=self._run, args=(on_done,), name="sampling-profiler", daemon=True
+            )
+            self._thread.start()
+            return True
+
+    def join(self, timeout: float | None = None) -> None:
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def sample(self) -> tuple[dict[int, Counter[Stack]], int, float]:
+        """Одна сессия семплирования: стеки по потокам, число тиков, фактическая длительность."""
+        me = threading.get_ident()
+        interval = 1 / self.hz
+        stacks: dict[int, Counter[Stack]] = {}
+        ticks = 0
+        started = time.perf_counter()
+        deadline = started + self.duration
+        next_tick = started
+        while True:
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            for tid, frame in sys._current_frames().items():
+                if tid != me:
+                    stacks.setdefault(tid, Counter())[_walk(frame)] += 1
+            ticks += 1
+            next_tick += interval
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_tick = time.perf_counter()
+        return stacks, ticks, time.perf_counter() - started
+
+    def _run(self, on_done: Callable[[Path], None] | None) -> None:
+        try:
+            stacks, _ticks, elapsed = self.sample()
+            self.last_path = self.write(stacks, elapsed)
+            if on_done is not None:
+                on_done(self.last_path)
+        finally:
+            with self._lock:
+                self._thread = None
+
+    def _thread_names(self) -> dict[int, str]:
+        return {t.ident: t.name for t in threading.enumerate() if t.ident is not None}
+
+    def write(self, stacks: dict[int, Counter[Stack]], elapsed: float) -> Path:
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        ext = "collapsed.txt" if self.fmt == "collapsed" else "speedscope.json"
+        path = self.out_dir / f"profile-{self.name}-{stamp}-{os.getpid()}.{ext}"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        names = self._thread_names()
+        if self.fmt == "collapsed":
+            body = render_collapsed(stacks, names)
+        else:
+            body = json.dumps(render_speedscope(stacks, names, self.name, 1 / self.hz, elapsed))
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(body, encoding="utf-8")
+        os.replace(tmp, path)
+        return path
+
+
+def _frame_name(frame: Frame) -> str:
+    func, filename, line = frame
+    return f"{func} ({_short(filename)}:{line})"
+
+
+def render_collapsed(stacks: dict[int, Counter[Stack]], names: dict[int, str]) -> str:
+    """Brendan Gregg collapsed stacks: «поток;корень;...;лист count» — вход для flamegraph.pl."""
+    lines = []
+    for tid, counter in stacks.items():
+        thread = names.get(tid, f"thread-{tid}")
+        for stack, count in counter.most_common():
+            frames = ";".join(_frame_name(f).replace(";", ":") for f in stack)
+            lines.append(f"{thread};{frames} {count}")
+    return "\n".join(lines) + "\n"
+
+
+def render_speedscope(
+    stacks: dict[int, Counter[Stack]],
+    names: dict[int, str],
+    title: str,
+    interval: float,
+    elapsed: float,
+) -> dict[str, Any]:
+    """Формат speedscope (sampled-профиль на поток), открывается на speedscope.app."""
+    frames: list[dict[str, Any]] = []
+    index: dict[Frame, int] = {}
+
+    def frame_id(frame: Frame) -> int:
+        idx = index.get(frame)
+        if idx is None:
+            func, filename, line = frame
+            idx = index[frame] = len(frames)
+            frames.append({"name": func, "file": filename, "line": line})
+        return idx
+
+    profiles = []
+    for tid, counter in stacks.items():
+        samples = []
+        weights = []
+        for stack, count in counter.items():
+            samples.append([frame_id(f) for f in stack])
+            weights.append(count * interval)
+        profiles.append(
+            {
+                "type": "sampled",
+                "name": names.get(tid, f"thread-{tid}"),
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": elapsed,
+                "samples": samples,
+                "weights": weights,
+            }
+        )
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": title,
+        "exporter": __name__,
+        "activeProfileIndex": 0,
+        "shared": {"frames": frames},
+        "profiles": profiles,
+    }
+
+
+__all__ = ["FORMATS", "SamplingProfiler", "render_collapsed", "render_speedscope"]
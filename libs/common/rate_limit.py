@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import logging
+from collections import defaultdict, deque
+from collections.abc import Mapping
+from typing import Any, Protocol
+
+from libs.common.clock import SYSTEM_CLOCK, Clock
+from libs.common.config import get_settings
+from libs.common.count_min import CountMinSketch
+
+
+# Как часто выбрасывать из bucket пользователей, молчащих дольше окна
+SWEEP_INTERVAL = 30.0
+
+
+class RateLimitBackend(Protocol):
+    """Где хранится счёт запросов: в процессе, в общей памяти хоста или на сервере Redis."""
+
+    # Действующий лимит на пользователя; адаптивный контроллер меняет его на лету
+    limit: int
+
+    async def acquire(self, user_id: int) -> bool:
+        """Учитывает запрос пользователя; False — лимит исчерпан."""
+        ...
+
+    def local_state(self) -> Mapping[int, Any]:
+        """Пер-пользовательское состояние в этом процессе — для учёта памяти и soak-теста."""
+        ...
+
+    async def aclose(self) -> None: ...
+
+
+class LocalRateLimiter:
+    """Скользящее окно на deque в памяти процесса; пользователи без запросов в окне вычищаются."""
+
+    def __init__(self, limit: int, window: float, clock: Clock = SYSTEM_CLOCK) -> None:
+        self.limit = limit
+        self.window = window
+        self.clock = clock
+        self.bucket: dict[int, deque[float]] = defaultdict(deque)
+        self.next_sweep = clock.monotonic() + SWEEP_INTERVAL
+
+    def sweep(self, now: float) -> int:
+        """Удаляет очереди пользователей без запросов в текущем окне; O(len(bucket))."""
+        idle = [uid for uid, q in self.bucket.items() if not q or now - q[-1] > self.window]
+        for uid in idle:
+            del self.bucket[uid]
+        self.next_sweep = now + SWEEP_INTERVAL
+        return len(idle)
+
+    def hit(self, user_id: int, now: float | None = None) -> bool:
+        now = self.clock.monotonic() if now is None else now
+        if now >= self.next_sweep:
+            self.sweep(now)
+        q = self.bucket[user_id]
+
+        while q and now - q[0] > self.window:
+            q.popleft()
+
+        if len(q) >= self.limit:
+            return False
+        q.append(now)
+        return True
+
+    async def acquire(self, user_id: int) -> bool:
+        return self.hit(user_id)
+
+    def local_state(self) -> Mapping[int, Any]:
+        return self.bucket
+
+    async def aclose(self) -> None:
+        return None
+
+
+class SketchRateLimiter:
+    """
+    Двухуровневый лимитер для случая «почти все пользователи в лимите, флудят единицы».
+
+    Первый уровень — CountMinSketch с затуханием за окно: фиксированная память
+    на всех пользователей. Пока оценка частоты пользователя не выше limit,
+    запрос пропускается без пер-пользовательского состояния. Превысивший
+    помечается, и его запросы идут в точный LocalRateLimiter, пока очередь
+    не опустеет и не будет вычищена.
+
+    Точная очередь заводится уже после первых запросов флуда и видит только
+    часть истории: в окне, где флуд начался, пропускается до 2 * limit
+    запросов, и ещё одно-два окна решения могут расходиться с точным
+    лимитером. Ложная пометка (коллизия в скетче или плотная, но законная
+    серия) стоит очереди в памяти, пока пользователь активен.
+    """
+
+    def __init__(
+        self,
+        limit: int,
+        window: float,
+        width: int = 2048,
+        depth: int = 4,
+        clock: Clock = SYSTEM_CLOCK,
+    ) -> None:
+        self.clock = clock
+        self.sketch = CountMinSketch(width, depth, horizon=window)
+        self.exact = LocalRateLimiter(limit, window, clock)
+        self.flagged = 0
+
+    @property
+    def limit(self) -> int:
+        return self.exact.limit
+
+    @limit.setter
+    def limit(self, value: int) -> None:
+        self.exact.limit = value
+
+    def hit(self, user_id: int, now: float | None = None) -> bool:
+        now = self.clock.monotonic() if now is None else now
+        exact = self.exact
+        if now >= exact.next_sweep:
+            exact.sweep(now)
+        # Помеченный пользователь — сразу в точную очередь: флуд не тратит время на скетч
+        if user_id in exact.bucket:
+            return exact.hit(user_id, now)
+        if self.sketch.add(user_id, now) <= exact.limit:
+            return True
+        self.flagged += 1
+        return exact.hit(user_id, now)
+
+    async def acquire(self, user_id: int) -> bool:
+        return self.hit(user_id)
+
+    def local_state(self) -> Mapping[int, Any]:
+        return self.exact.bucket
+
+    async def aclose(self) -> None:
+        return None
+
+
+def rate_limit_backend(
+    bot_name: str, clock: Clock = SYSTEM_CLOCK, log: logging.Logger | None = None
+) -> RateLimitBackend:
+    """
+    Бэкенд по настройкам: RATE_LIMIT_REDIS_URL — общий лимит для всех узлов,
+    RATE_LIMIT_SHM_PATH — для воркеров одного хоста, иначе — в процессе:
+    с RATE_LIMIT_SKETCH_WIDTH > 0 точные очереди заводятся только для флудеров.
+    """
+    settings = get_settings(bot_name=bot_name)
+    limit, window = settings.rate_limit_per_user, settings.rate_limit_window_sec
+    if settings.rate_limit_redis_url:
+        from libs.common.redis_rate_limit import RedisRateLimiter
+
+        return RedisRateLimiter(
+            settings.rate_limit_redis_url,
+            limit,
+            window,
+            prefix=f"rl:{bot_name}",
+            lease_max=settings.rate_limit_lease_max,
+            timeout=settings.rate_limit_redis_timeout_ms / 1000,
+            backoff=settings.rate_limit_redis_backoff_ms / 1000,
+            clock=clock,
+            log=log,
+        )
+    if settings.rate_limit_shm_path:
+        from libs.common.shared_rate_limit import SharedRateLimiter
+
+        return SharedRateLimiter(
+            settings.rate_limit_shm_path,
+            limit,
+            window,
+            capacity=settings.rate_limit_shm_slots,
+            clock=clock,
+        )
+    if settings.rate_limit_sketch_width:
+        return SketchRateLimiter(
+            limit,
+            window,
+            width=settings.rate_limit_sketch_width,
+            depth=settings.rate_limit_sketch_depth,
+            clock=clock,
+        )
+    return LocalRateLimiter(limit, window, clock)
+
+
+__all__ = ["LocalRateLimiter", "RateLimitBackend", "SketchRateLimiter", "rate_limit_backend"]
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import re
+from collections import Counter
+from dataclasses import dataclass
+
+from aiogram.types import Update
+
+from libs.common.clock import SYSTEM_CLOCK, Clock
+
+
+# Область лимита → индекс ключа в кортеже, который собирает RateLimitPolicy.allow
+SCOPES = {"user": 0, "chat": 1, "type": 2, "global": 3}
+
+# Лимит scope=chat действует только в групповых чатах: в личке он дублировал бы user
+GROUP_CHATS = frozenset({"group", "supergroup"})
+
+UPDATE_TYPES = frozenset(name for name in Update.model_fields if name != "update_id")
+
+# Как часто выбрасывать ключи, чей бюджет полностью восстановился
+SWEEP_INTERVAL = 30.0
+
+_LIMIT = re.compile(r"^(\w+)\s*=\s*(\d+(?:\.\d+)?)\s*/\s*(\d+(?:\.\d+)?)\s*([smh]?)$")
+_UNITS = {"": 1.0, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+@dataclass(frozen=True, slots=True)
+class Limit:
+    scope: str
+    limit: float
+    window: float
+
+
+def parse_limits(spec: str) -> tuple[Limit, ...]:
+    """
+    «user=3/1s, chat=20/1m, type=200/1s, global=30/1s» → лимиты в порядке проверки.
+
+    limit — бюджет в единицах стоимости (обычный апдейт стоит 1), window — окно
+    в секундах; суффикс m/h — минуты/часы.
+    """
+    limits = []
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        match = _LIMIT.match(item)
+        if match is None:
+            raise ValueError(f"bad rate limit {item!r}: expected scope=limit/window[s|m|h]")
+        scope, limit, window, unit = match.groups()
+        if scope not in SCOPES:
+            raise ValueError(f"bad rate limit scope {scope!r}: expected one of {sorted(SCOPES)}")
+        if float(limit) <= 0 or float(window) <= 0:
+            raise ValueError(f"bad rate limit {item!r}: limit and window must be > 0")
+        limits.append(Limit(scope, float(limit), float(window) * _UNITS[unit]))
+    return tuple(limits)
+
+
+def parse_costs(spec: str) -> dict[str, float]:
+    """«/form=3, q:hint=0.5, callback_query=1» → стоимость по команде, callback_data, типу."""
+    costs = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        key, sep, value = item.rpartition("=")
+        if not sep or not key.strip():
+            raise ValueError(f"bad rate limit cost {item!r}: expected key=cost")
+        cost = float(value)
+        if cost < 0:
+            raise ValueError(f"bad rate limit cost {item!r}: cost must be >= 0")
+        costs[key.strip()] = cost
+    return costs
+
+
+class RateLimitPolicy:
+    """
+    Несколько лимитов за один проход: на пользователя, групповой чат, тип
+    апдейта и на весь бот, со стоимостью апдейта по команде или callback_data.
+
+    Лимиты компилируются в плоский список проверок (таблица, индекс ключа,
+    интервал, окно), поэтому проверка — O(числа лимитов) без разбора настроек.
+    Каждый лимит — GCRA (generic cell rate algorithm): на ключ хранится одно
+    число, «теоретическое время прихода» tat. Апдейт стоимостью c сдвигает его
+    на c * window / limit и проходит, если tat не ушёл дальше now + window —
+    то есть в окне помещается limit единиц стоимости, а бюджет восстанавливается
+    равномерно.
+
+    Апдейт проходит, только если его пропускают все лимиты, и лишь тогда
+    списывается со всех: отказ по глобальному потолку не тратит бюджет
+    пользователя. Отказы считаются по областям в denied. Если апдейт после
+    политики отклонил кто-то ещё (бэкенд лимитера), refund возвращает списанное.
+
+    scale < 1 сжимает все лимиты сразу (стоимость делится на scale) — так их
+    зажимает адаптивный контроллер под нагрузкой.
+    """
+
+    def __init__(
+        self, limits: tuple[Limit, ...], costs: dict[str, float], clock: Clock = SYSTEM_CLOCK
+    ) -> None:
+        self.limits = limits
+        self.clock = clock
+        self.tables: list[dict[int | str, float]] = [{} for _ in limits]
+        self.checks = [
+            (table, SCOPES[lim.scope], lim.window / lim.limit, lim.window, lim.scope)
+            for table, lim in zip(self.tables, limits, strict=True)
+        ]
+        self.commands = {key: cost for key, cost in costs.items() if key.startswith("/")}
+        self.types = {key: cost for key, cost in costs.items() if key in UPDATE_TYPES}
+        # Длинный префикс раньше короткого: q:hint_show точнее q:
+        self.prefixes = sorted(
+            (
+                (key, cost)
+                for key, cost in costs.items()
+                if key not in self.commands and key not in self.types
+            ),
+            key=lambda item: -len(item[0]),
+        )
+        self.denied: Counter[str] = Counter()
+        self.scale = 1.0
+        self._next_sweep = clock.monotonic() + SWEEP_INTERVAL
+
+    def cost(self, event_type: str, text: str | None = None, data: str | None = None) -> float:
+        """Стоимость апдейта: команда, затем префикс callback_data, затем тип; по умолчанию 1."""
+        if text and text[0] == "/" and self.commands:
+            command = text.split(maxsplit=1)[0].split("@", 1)[0]
+            if command in self.commands:
+                return self.commands[command]
+        if data is not None:
+            for prefix, cost in self.prefixes:
+                if data.startswith(prefix):
+                    return cost
+        return self.types.get(event_type, 1.0)
+
+    def allow(
+        self,
+        user_id: int | None,
+        chat_id: int | None,
+        event_type: str,
+        cost: float = 1.0,
+        now: float | None = None,
+    ) -> bool:
+        now = self.clock.monotonic() if now is None else now
+        if now >= self._next_sweep:
+            self.sweep(now)
+        keys = (user_id, chat_id, event_type, 0)
+        cost /= self.scale
+        pending = []
+        for table, index, interval, window, scope in self.checks:
+            key = keys[index]
+            if key is None:
+                continue
+            tat = table.get(key, now)
+            new_tat = (tat if tat > now else now) + cost * interval
+            if new_tat - now > window + 1e-9:
+                self.denied[scope] += 1
+                return False
+            pending.append((table, key, new_tat))
+        for table, key, new_tat in pending:
+            table[key] = new_tat
+        return True
+
+    def refund(
+        self, user_id: int | None, chat_id: int | None, event_type: str, cost: float = 1.0
+    ) -> None:
+        """Отменяет списание allow с теми же аргументами: tat сдвигается обратно."""
+        keys = (user_id, chat_id, event_type, 0)
+        cost /= self.scale
+        for table, index, interval, _window, _scope in self.checks:
+            key = keys[index]
+            tat = table.get(key) if key is not None else None
+            if tat is not None:
+                table[key] = tat - cost * interval
+
+    def sweep(self, now: float) -> int:
+        """Удаляет ключи, у которых бюджет восстановился полностью; O(суммы размеров таблиц)."""
+        removed = 0
+        for table in self.tables:
+            idle = [key for key, tat in table.items() if tat <= now]
+            for key in idle:
+                del table[key]
+            removed += len(idle)
+        self._next_sweep = now + SWEEP_INTERVAL
+        return removed
+
+
+def rate_limit_policy(
+    limits: str, costs: str = "", clock: Clock = SYSTEM_CLOCK
+) -> RateLimitPolicy | None:
+    """Политика из RATE_LIMIT_POLICY / RATE_LIMIT_COSTS; пустая строка — выключено."""
+    parsed = parse_limits(limits)
+    return RateLimitPolicy(parsed, parse_costs(costs), clock) if parsed else None
+
+
+__all__ = [
+    "GROUP_CHATS",
+    "Limit",
+    "RateLimitPolicy",
+    "parse_costs",
+    "parse_limits",
+    "rate_limit_policy",
+]
@@ -0,0 +1,320 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import hashlib
+import logging
+from collections import deque
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Any
+from urllib.parse import urlsplit
+
+from libs.common.clock import SYSTEM_CLOCK, Clock
+
+
+# KEYS[1] — счётчик пользователя в окне; ARGV: сколько токенов просим, лимит, TTL ключа (мс).
+# Выдаёт не больше остатка окна, поэтому сумма выданного всем узлам не превышает лимит
+LEASE_SCRIPT = """\
+local used = tonumber(redis.call('GET', KEYS[1]) or '0')
+local grant = math.min(tonumber(ARGV[1]), tonumber(ARGV[2]) - used)
+if grant <= 0 then
+  return 0
+end
+redis.call('INCRBY', KEYS[1], grant)
+redis.call('PEXPIRE', KEYS[1], ARGV[3])
+return grant
+"""
+LEASE_SHA = hashlib.sha1(LEASE_SCRIPT.encode()).hexdigest()
+
+# Как часто выбрасывать аренды прошедших окон, сек
+SWEEP_INTERVAL = 30.0
+
+
+class RedisError(Exception):
+    """Ответ сервера с ошибкой (-ERR ..., -NOSCRIPT ...)."""
+
+
+def encode_command(*args: str | int | float | bytes) -> bytes:
+    out = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        raw = arg if isinstance(arg, bytes) else str(arg).encode()
+        out.append(b"$%d\r\n%s\r\n" % (len(raw), raw))
+    return b"".join(out)
+
+
+async def read_reply(reader: asyncio.StreamReader) -> Any:  # noqa: ANN401
+    """Один ответ RESP2; ошибка сервера возвращается как RedisError, а не бросается."""
+    line = await reader.readuntil(b"\r\n")
+    kind, body = line[:1], line[1:-2]
+    if kind == b"+":
+        return body.decode()
+    if kind == b"-":
+        return RedisError(body.decode())
+    if kind == b":":
+        return int(body)
+    if kind == b"$":
+        size = int(body)
+        if size < 0:
+            return None
+        return (await reader.readexactly(size + 2))[:-2]
+    if kind == b"*":
+        count = int(body)
+        if count < 0:
+            return None
+        return [await read_reply(reader) for _ in range(count)]
+    raise RedisError(f"protocol error: unexpected reply {line!r}")
+
+
+class RedisClient:
+    """
+    Минимальный асинхронный клиент RESP2 поверх одного соединения.
+
+    Команды конвейеризуются: execute() пишет запрос и ждёт future из очереди,
+    а единственная задача-читатель раскладывает ответы по порядку. Так
+    параллельные проверки разных пользователей идут одним потоком по сокету,
+    без пула соединений и без ожидания друг друга.
+    Соединение открывается лениво и после любой сетевой ошибки переоткрывается.
+    """
+
+    def __init__(self, url: str, timeout: float = 0.05) -> None:
+        parts = urlsplit(url)
+        if parts.scheme not in ("redis", ""):
+            raise ValueError(f"unsupported redis url scheme: {url!r}")
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or 6379
+        self.password = parts.password
+        self.db = int(parts.path.lstrip("/") or 0)
+        self.timeout = timeout
+        self.round_trips = 0
+        self._writer: asyncio.StreamWriter | None = None
+        self._reader_task: asyncio.Task[None] | None = None
+        self._pending: deque[asyncio.Future[Any]] = deque()
+        self._connecting: asyncio.Lock | None = None
+
+    async def _connect(self) -> asyncio.StreamWriter:
+        if self._connecting is None:
+            self._connecting = asyncio.Lock()
+        async with self._connecting:
+            if self._writer is not None:
+                return self._writer
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port), self.timeout
+            )
+            self._writer = writer
+            self._reader_task = asyncio.create_task(self._read_loop(reader, writer))
+            try:
+                if self.password:
+                    await self._send(writer, "AUTH", self.password)
+                if self.db:
+                    await self._send(writer, "SELECT", self.db)
+            except RedisError as exc:
+                # Иначе все следующие команды уйдут в неавторизованное соединение (NOAUTH)
+                self._drop(writer, exc)
+                raise
+            return writer
+
+    async def _read_loop(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        error: BaseException = ConnectionError("redis connection closed")
+        try:
+            while True:
+                reply = await read_reply(reader)
+                fut = self._pending.popleft()
+                if not fut.done():
+                    fut.set_result(reply)
+        except (OSError, EOFError, asyncio.IncompleteReadError, RedisError) as exc:
+            error = exc
+        finally:
+            self._drop(writer, error)
+
+    def _drop(self, writer: asyncio.StreamWriter, error: BaseException) -> None:
+        if self._writer is writer:
+            self._writer = None
+            writer.close()
+        pending, self._pending = self._pending, deque()
+        for fut in pending:
+            if not fut.done():
+                fut.set_exception(ConnectionError(str(error) or type(error).__name__))
+
+    async def _send(
+        self, writer: asyncio.StreamWriter, *args: str | int | float
+    ) -> Any:  # noqa: ANN401
+        fut: asyncio.Future[Any] = asyncio.get_running_loop().create_future()
+        self._pending.append(fut)
+        writer.write(encode_command(*args))
+        self.round_trips += 1
+        try:
+            reply = await asyncio.wait_for(asyncio.shield(fut), self.timeout)
+        except TimeoutError:
+            # Ответ мог прийти позже и сдвинуть очередь: соединение больше не согласовано
+            self._drop(writer, TimeoutError("redis reply timeout"))
+            raise
+        if isinstance(reply, RedisError):
+            raise reply
+        return reply
+
+    async def execute(self, *args: str | int | float) -> Any:  # noqa: ANN401
+        writer = self._writer or await self._connect()
+        return await self._send(writer, *args)
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            self._drop(self._writer, ConnectionError("redis client closed"))
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._reader_task
+            self._reader_task = None
+
+
+@dataclass(slots=True)
+class Lease:
+    window: int
+    tokens: int = 0
+    # Сколько токенов просить следующим запросом: растёт вдвое до lease_max
+    ask: int = 1
+    exhausted: bool = False
+    pending: asyncio.Future[bool] | None = None
+
+
+class RedisRateLimiter:
+    """
+    Лимит «не больше limit запросов за window секунд» на всех узлах сразу:
+    счётчик пользователя живёт на Redis-совместимом сервере, одна проверка —
+    один атомарный скрипт (EVALSHA LEASE_SCRIPT).
+
+    Окно фиксированное, по стенным часам (clock.time() // window) — узлы
+    согласуют окна без обмена сообщениями, ключ окна истекает сам. В отличие
+    от скользящего окна bucket-а, на стыке двух окон пользователь может
+    получить до 2 * limit запросов.
+
+    Чтобы не платить сетевой round trip за каждый апдейт, узел арендует токены
+    пачкой: первая проверка в окне просит 1, следующие — вдвое больше, до
+    lease_max. Отказ сервера кэшируется до конца окна — флудер, упёршийся
+    в лимит, больше не доходит до сети. Арендованный, но не потраченный токен
+    до конца окна недоступен другим узлам: лимит никогда не превышается,
+    но может недодаваться — поэтому lease_max невелик.
+
+    Недоступность сервера не должна останавливать бота: при таймауте или
+    ошибке соединения запрос пропускается и считается в errors. После сбоя
+    следующие backoff секунд запросы пропускаются без обращения к сети — иначе
+    каждый апдейт платил бы timeout за новое соединение; в лог — одна строка
+    на начало и одна на конец сбоя.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        limit: int,
+        window: float,
+        prefix: str = "rl",
+        lease_max: int = 8,
+        timeout: float = 0.05,
+        backoff: float = 1.0,
+        clock: Clock = SYSTEM_CLOCK,
+        log: logging.Logger | None = None,
+        client: RedisClient | None = None,
+    ) -> None:
+        if limit < 1:
+            raise ValueError(f"limit must be >= 1, got {limit}")
+        self.limit = limit
+        self.window = float(window)
+        self.prefix = prefix
+        self.lease_max = max(1, lease_max)
+        self.clock = clock
+        self.log = log or logging.getLogger(__name__)
+        self.client = client or RedisClient(url, timeout)
+        self.backoff = backoff
+        self.leases: dict[int, Lease] = {}
+        self.errors = 0
+        # Сервер недоступен: до этого момента (clock.monotonic) в сеть не ходим
+        self._down_until: float | None = None
+        self._ttl_ms = max(1, int(self.window * 2000))
+        self._script_loaded = False
+        self._next_sweep = 0
+
+    async def acquire(self, user_id: int) -> bool:
+        """Учитывает запрос пользователя; False — лимит исчерпан."""
+        while True:
+            window = int(self.clock.time() // self.window)
+            if window >= self._next_sweep:
+                self.sweep(window)
+            lease = self.leases.get(user_id)
+            if lease is None or lease.window != window:
+                lease = self.leases[user_id] = Lease(window)
+            if lease.tokens:
+                lease.tokens -= 1
+                return True
+            if lease.exhausted:
+                return False
+            if lease.pending is None:
+                if self._down_until is not None:
+                    now = self.clock.monotonic()
+                    if now < self._down_until:
+                        self.errors += 1
+                        return True
+                    # Сервер проверяет один апдейт, остальные пока пропускаются без сети
+                    self._down_until = now + self.backoff
+                return await self._refill(user_id, lease)
+            # Аренду для этого пользователя уже запрашивает другой апдейт — ждём её
+            if not await asyncio.shield(lease.pending):
+                return True
+
+    async def _refill(self, user_id: int, lease: Lease) -> bool:
+        pending = lease.pending = asyncio.get_running_loop().create_future()
+        ok = True
+        try:
+            grant = await self._lease(f"{self.prefix}:{user_id}:{lease.window}", lease.ask)
+        except (OSError, TimeoutError, RedisError) as exc:
+            ok = False
+            self.errors += 1
+            if self._down_until is None:
+                self.log.warning("rate limit backend unavailable, allowing updates: %r", exc)
+            self._down_until = self.clock.monotonic() + self.backoff
+            return True
+        finally:
+            lease.pending = None
+            pending.set_result(ok)
+
+        if self._down_until is not None:
+            self._down_until = None
+            self.log.warning("rate limit backend is back")
+
+        if grant <= 0:
+            lease.exhausted = True
+            return False
+        lease.tokens += grant - 1
+        lease.ask = min(lease.ask * 2, self.lease_max)
+        return True
+
+    async def _lease(self, key: str, ask: int) -> int:
+        args = (1, key, ask, self.limit, self._ttl_ms)
+        if not self._script_loaded:
+            await self.client.execute("SCRIPT", "LOAD", LEASE_SCRIPT)
+            self._script_loaded = True
+        try:
+            return int(await self.client.execute("EVALSHA", LEASE_SHA, *args))
+        except RedisError as exc:
+            if not str(exc).startswith("NOSCRIPT"):
+                raise
+            # Сервер перезапустился или сбросил кэш скриптов
+            return int(await self.client.execute("EVAL", LEASE_SCRIPT, *args))
+
+    def sweep(self, window: int) -> int:
+        """Удаляет аренды прошедших окон; O(len(leases)), не чаще раза в SWEEP_INTERVAL."""
+        stale = [
+            uid for uid, lease in self.leases.items() if lease.window < window and not lease.pending
+        ]
+        for uid in stale:
+            del self.leases[uid]
+        self._next_sweep = window + max(1, int(SWEEP_INTERVAL / self.window))
+        return len(stale)
+
+    def local_state(self) -> Mapping[int, Any]:
+        return self.leases
+
+    async def aclose(self) -> None:
+        await self.client.close()
+
+
+__all__ = ["LEASE_SCRIPT", "RedisClient", "RedisError", "RedisRateLimiter"]
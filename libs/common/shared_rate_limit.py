@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import fcntl
+import mmap
+import os
+import struct
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any
+
+from libs.common.clock import SYSTEM_CLOCK, Clock
+
+
+MAGIC = b"BOTRL001"
+
+# magic, limit, window, capacity, probe
+_HEADER = struct.Struct("<8sIdII")
+HEADER_SIZE = 64
+
+# Сколько соседних слотов просматривается от домашнего; дальше — таблица считается полной
+MAX_PROBE = 16
+
+# Смещения блокировок: 0 — инициализация файла, слот i — байт 1 + i
+_INIT_LOCK = 0
+
+
+def _home(user_id: int, capacity: int) -> int:
+    # Fibonacci hashing: соседние id не попадают в соседние слоты
+    return ((user_id * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF) >> 32 & (capacity - 1)
+
+
+class SharedRateLimiter:
+    """
+    Скользящее окно «не больше limit запросов за window секунд» в общей памяти
+    для всех процессов-воркеров одного бота на хосте.
+
+    Файл (обычно в /dev/shm) отображается через mmap: заголовок и capacity + MAX_PROBE
+    слотов фиксированного размера, открытая адресация с линейным пробингом.
+    Слот — user_id и кольцо из limit последних отметок времени: запрос пропускается,
+    если самая старая отметка вышла из окна, и тогда она заменяется текущей —
+    ровно то же, что deque в RateLimitMiddleware.
+
+    Слот, у которого все отметки вышли из окна, занимается новым пользователем,
+    поэтому память не растёт. Если в окне пробинга нет ни своего, ни свободного
+    слота (активных пользователей больше, чем влезает), запрос пропускается
+    и считается в overflows: лимитер не должен отказывать в обслуживании.
+
+    Взаимоисключение — POSIX-блокировки (fcntl.lockf) на диапазон байт, равный
+    окну пробинга: пересекающиеся окна сериализуются, остальные идут параллельно
+    (lock striping с точностью до слота). Блокировки принадлежат процессу, поэтому
+    один экземпляр нельзя делить между потоками — middleware работает в event loop.
+    Время — clock.monotonic(): на Linux CLOCK_MONOTONIC общий для всех процессов.
+
+    Размер кольца (ring) задаётся при создании файла; limit можно снизить на лету —
+    тогда проверяется limit-я с конца отметка, а не самая старая.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        limit: int,
+        window: float,
+        capacity: int = 65536,
+        clock: Clock = SYSTEM_CLOCK,
+    ) -> None:
+        if limit < 1:
+            raise ValueError(f"limit must be >= 1, got {limit}")
+        if capacity < 1 or capacity & (capacity - 1):
+            raise ValueError(f"capacity must be a power of two, got {capacity}")
+        self.path = Path(path)
+        self.ring = limit
+        self.limit = limit
+        self.window = float(window)
+        self.capacity = capacity
+        self.clock = clock
+        self.overflows = 0
+        self._slot = struct.Struct(f"<qI4x{limit}d")
+        self._key = struct.Struct("<q")
+        self._size = HEADER_SIZE + (capacity + MAX_PROBE) * self._slot.size
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            self._attach()
+            self._map = mmap.mmap(self._fd, self._size)
+        except BaseException:
+            os.close(self._fd)
+            raise
+
+    def _attach(self) -> None:
+        header = _HEADER.pack(MAGIC, self.ring, self.window, self.capacity, MAX_PROBE)
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, _INIT_LOCK)
+        try:
+            if os.fstat(self._fd).st_size == 0:
+                os.ftruncate(self._fd, self._size)
+                os.pwrite(self._fd, header, 0)
+                return
+            existing = os.pread(self._fd, _HEADER.size, 0)
+            if existing != header:
+                magic, limit, window, capacity, probe = _HEADER.unpack(existing)
+                raise ValueError(
+                    f"{self.path}: created with limit={limit} window={window} "
+                    f"capacity={capacity} probe={probe} (magic {magic!r}), "
+                    f"this process wants limit={self.ring} window={self.window} "
+                    f"capacity={self.capacity} probe={MAX_PROBE}"
+                )
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, _INIT_LOCK)
+
+    def _offset(self, index: int) -> int:
+        return HEADER_SIZE + index * self._slot.size
+
+    def hit(self, user_id: int, now: float | None = None) -> bool:
+        """Учитывает запрос пользователя; False — лимит исчерпан."""
+        if user_id == 0:
+            # 0 — признак пустого слота; таких пользователей в Telegram нет
+            return True
+        now = self.clock.monotonic() if now is None else now
+        home = _home(user_id, self.capacity)
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, MAX_PROBE, 1 + home)
+        try:
+            return self._hit_locked(user_id, home, now)
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, MAX_PROBE, 1 + home)
+
+    async def acquire(self, user_id: int) -> bool:
+        return self.hit(user_id)
+
+    def _hit_locked(self, user_id: int, home: int, now: float) -> bool:
+        buf = self._map
+        key = self._key
+        free: int | None = None
+        found: int | None = None
+        for index in range(home, home + MAX_PROBE):
+            offset = self._offset(index)
+            (owner,) = key.unpack_from(buf, offset)
+            if owner == user_id:
+                found = index
+                break
+            if owner == 0:
+                if free is None:
+                    free = index
+                break  # конец цепочки: дальше своего ключа быть не может
+            if free is None and self._expired(offset, now):
+                free = index
+
+        if found is None:
+            if free is None:
+                self.overflows += 1
+                return True
+            stamps = [-self.window - 1.0] * self.ring
+            stamps[0] = now
+            self._slot.pack_into(buf, self._offset(free), user_id, 1 % self.ring, *stamps)
+            return True
+
+        offset = self._offset(found)
+        _owner, head, *stamps = self._slot.unpack_from(buf, offset)
+        # head — самая старая отметка; при сниженном limit — limit-я с конца
+        if now - stamps[(head - min(self.limit, self.ring)) % self.ring] <= self.window:
+            return False
+        stamps[head] = now
+        self._slot.pack_into(buf, offset, user_id, (head + 1) % self.ring, *stamps)
+        return True
+
+    def _expired(self, offset: int, now: float) -> bool:
+        _owner, _head, *stamps = self._slot.unpack_from(self._map, offset)
+        return now - max(stamps) > self.window
+
+    def active(self, now: float | None = None) -> int:
+        """Сколько слотов занято пользователями с запросами в текущем окне (без блокировок)."""
+        now = self.clock.monotonic() if now is None else now
+        count = 0
+        for index in range(self.capacity + MAX_PROBE):
+            offset = self._offset(index)
+            if self._key.unpack_from(self._map, offset)[0] and not self._expired(offset, now):
+                count += 1
+        return count
+
+    def local_state(self) -> Mapping[int, Any]:
+        # Всё состояние — в общем файле фиксированного размера
+        return {}
+
+    def close(self) -> None:
+        if not self._map.closed:
+            self._map.close()
+            os.close(self._fd)
+
+    async def aclose(self) -> None:
+        self.close()
+
+    def unlink(self) -> None:
+        """Удаляет файл таблицы; открывшие его процессы работают с ним до close()."""
+        self.path.unlink(missing_ok=True)
+
+
+__all__ = ["MAX_PROBE", "SharedRateLimiter"]
@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+import json
+import queue
+import random
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any
+
+
+# OTLP SpanKind
+KIND_INTERNAL = 1
+KIND_CLIENT = 3
+
+# OTLP StatusCode
+STATUS_ERROR = 2
+
+# Защита от разрастания трейса: остальные спаны апдейта отбрасываются
+MAX_SPANS_PER_TRACE = 256
+
+
+class Span:
+    __slots__ = (
+        "attributes",
+        "end",
+        "error",
+        "kind",
+        "name",
+        "parent_id",
+        "span_id",
+        "start",
+        "trace",
+    )
+
+    def __init__(
+        self,
+        trace: Trace,
+        name: str,
+        parent_id: int | None,
+        kind: int,
+        attributes: dict[str, Any],
+    ) -> None:
+        self.trace = trace
+        self.name = name
+        self.span_id = random.getrandbits(64) or 1
+        self.parent_id = parent_id
+        self.kind = kind
+        self.attributes = attributes
+        self.start = time.time_ns()
+        self.end = 0
+        self.error: str | None = None
+
+    def set(self, key: str, value: Any) -> None:  # noqa: ANN401
+        self.attributes[key] = value
+
+    @property
+    def duration(self) -> float:
+        return (self.end - self.start) / 1e9
+
+
+class Trace:
+    __slots__ = ("sampled", "spans", "trace_id")
+
+    def __init__(self, sampled: bool) -> None:
+        self.trace_id = random.getrandbits(128) or 1
+        self.sampled = sampled
+        self.spans: list[Span] = []
+
+
+_current: ContextVar[Span | None] = ContextVar("trace_span", default=None)
+
+
+def current_span() -> Span | None:
+    return _current.get()
+
+
+def _attr_value(value: Any) -> dict[str, Any]:  # noqa: ANN401
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _attributes(attrs: dict[str, Any]) -> list[dict[str, Any]]:
+    return [{"key": k, "value": _attr_value(v)} for k, v in attrs.items() if v is not None]
+
+
+def to_otlp(trace: Trace, service: str) -> dict[str, Any]:
+    """Трейс в OTLP/JSON (ExportTraceServiceRequest) — формат file exporter OpenTelemetry."""
+    trace_id = f"{trace.trace_id:032x}"
+    spans = []
+    for s in trace.spans:
+        span: dict[str, Any] = {
+            "traceId": trace_id,
+            "spanId": f"{s.span_id:016x}",
+            "name": s.name,
+            "kind": s.kind,
+            "startTimeUnixNano": str(s.start),
+            "endTimeUnixNano": str(s.end),
+            "attributes": _attributes(s.attributes),
+        }
+        if s.parent_id is not None:
+            span["parentSpanId"] = f"{s.parent_id:016x}"
+        if s.error is not None:
+            span["status"] = {"code": STATUS_ERROR, "message": s.error}
+        spans.append(span)
+    return {
+        "resourceSpans": [
+            {
+                "resource": {"attributes": _attributes({"service.name": service})},
+                "scopeSpans": [{"scope": {"name": __name__}, "spans": spans}],
+            }
+        ]
+    }
+
+
+class FileExporter:
+    """
+    Пишет трейсы JSON Lines (один OTLP-объект на строку) из фонового потока,
+    чтобы запись в файл не блокировала event loop.
+    """
+
+    def __init__(self, path: str | Path, service: str) -> None:
+        self.path = Path(path)
+        self.service = service
+        self._queue: queue.SimpleQueue[Trace | None] = queue.SimpleQueue()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def _run(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a", encoding="utf-8") as f:
+            while True:
+                trace = self._queue.get()
+                if trace is None:
+                    return
+                f.write(json.dumps(to_otlp(trace, self.service), ensure_ascii=False) + "\n")
+                if self._queue.empty():
+                    f.flush()
+
+    def export(self, trace: Trace) -> None:
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._run, name="trace-export", daemon=True
+                    )
+                    self._thread.start()
+        self._queue.put(trace)
+
+    def close(self) -> None:
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+class Tracer:
+    """
+    Спаны на ContextVar: корневой спан открывается на апдейт, дочерние — внутри той же задачи.
+
+    Head sampling решается на корне (sample_rate); не попавший в выборку трейс
+    всё равно собирается и экспортируется, если длился не меньше slow_sec (tail rule).
+    """
+
+    def __init__(
+        self,
+        export: Callable[[Trace], None],
+        sample_rate: float = 0.01,
+        slow_sec: float = 0.5,
+        rand: Callable[[], float] = random.random,
+    ) -> None:
+        self.export = export
+        self.sample_rate = sample_rate
+        self.slow_ns = int(slow_sec * 1e9) if slow_sec > 0 else 0
+        self.rand = rand
+        self.exported = 0
+        self.dropped = 0
+
+    def _keep(self, trace: Trace, root: Span) -> bool:
+        if trace.sampled:
+            return True
+        return self.slow_ns > 0 and root.end - root.start >= self.slow_ns
+
+    @contextmanager
+    def trace(self, name: str, **attributes: Any) -> Iterator[Span]:  # noqa: ANN401
+        trace = Trace(sampled=self.rand() < self.sample_rate)
+        root = Span(trace, name, None, KIND_INTERNAL, attributes)
+        trace.spans.append(root)
+        token = _current.set(root)
+        try:
+            yield root
+        except BaseException as e:
+            root.error = repr(e)
+            raise
+        finally:
+            _current.reset(token)
+            root.end = time.time_ns()
+            if self._keep(trace, root):
+                self.exported += 1
+                self.export(trace)
+            else:
+                self.dropped += 1
+
+    @contextmanager
+    def span(
+        self, name: str, kind: int = KIND_INTERNAL, **attributes: Any  # noqa: ANN401
+    ) -> Iterator[Span | None]:
+        """Дочерний спан текущего трейса; вне трейса — no-op (yield None)."""
+        parent = _current.get()
+        if parent is None or len(parent.trace.spans) >= MAX_SPANS_PER_TRACE:
+            yield None
+            return
+        span = Span(parent.trace, name, parent.span_id, kind, attributes)
+        parent.trace.spans.append(span)
+        token = _current.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = repr(e)
+            raise
+        finally:
+            _current.reset(token)
+            span.end = time.time_ns()
+
+
+__all__ = [
+    "KIND_CLIENT",
+    "KIND_INTERNAL",
+    "FileExporter",
+    "Span",
+    "Trace",
+    "Tracer",
+    "current_span",
+    "to_otlp",
+]
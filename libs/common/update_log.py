@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+import queue
+import threading
+import time
+import zlib
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+from pydantic import BaseModel
+
+
+# Не чаще раза в столько секунд сбрасываем gzip на диск: частый flush портит сжатие
+FLUSH_INTERVAL = 1.0
+
+# Поля с User/Chat внутри; в них ключом подменяется "id". Остальные места, где
+# Bot API кладёт User/Chat, ловятся по форме объекта (_PEER_MARKERS)
+_ID_HOLDERS = frozenset(
+    {
+        "from",
+        "chat",
+        "user",
+        "sender_chat",
+        "sender_user",
+        "sender_business_bot",
+        "forward_from",
+        "forward_from_chat",
+        "via_bot",
+        "new_chat_members",
+        "left_chat_member",
+        "actor_chat",
+        "voter_chat",
+        "winners",
+    }
+)
+# User — is_bot и first_name, Chat — type: рядом с такими полями "id" — id человека или чата
+_PEER_MARKERS = frozenset({"is_bot", "first_name", "type"})
+_ID_FIELDS = frozenset({"chat_id", "user_id"})
+_NAME_FIELDS = frozenset({"first_name", "last_name", "title"})
+_TEXT_FIELDS = frozenset({"text", "caption"})
+_DROP_FIELDS = frozenset(
+    {"username", "phone_number", "email", "contact", "location", "venue", "bio"}
+)
+
+
+def _pseudonym(value: int, salt: bytes) -> int:
+    digest = hashlib.blake2b(str(abs(value)).encode(), key=salt, digest_size=5).digest()
+    alias = int.from_bytes(digest, "big") or 1
+    return -alias if value < 0 else alias
+
+
+def mask_text(text: str) -> str:
+    """
+    Текст той же длины и формы: буквы → x, цифры → 1, остальное как есть.
+
+    Команда в начале («/start», «/form@bot») сохраняется — без неё реплей
+    не попадёт в те же хэндлеры; offsets в entities остаются верными.
+    """
+    head = ""
+    if text.startswith("/"):
+        head, _, rest = text.partition(" ")
+        if rest or text.endswith(" "):
+            head += " "
+        text = rest
+    return head + "".join("x" if c.isalpha() else "1" if c.isdigit() else c for c in text)
+
+
+def anonymize(obj: Any, salt: bytes, parent: str = "") -> Any:  # noqa: ANN401
+    """
+    Копия апдейта без персональных данных: id людей и чатов заменены стабильными
+    (в пределах salt) псевдонимами, имена — заглушкой, тексты замаскированы,
+    username/телефоны/геопозиция удалены. callback_data и структура — как были.
+    """
+    if isinstance(obj, list):
+        return [anonymize(item, salt, parent) for item in obj]
+    if not isinstance(obj, dict):
+        return obj
+    peer = parent in _ID_HOLDERS or not _PEER_MARKERS.isdisjoint(obj)
+    out: dict[str, Any] = {}
+    for key, value in obj.items():
+        if key in _DROP_FIELDS:
+            continue
+        if isinstance(value, int) and (key in _ID_FIELDS or (key == "id" and peer)):
+            out[key] = _pseudonym(value, salt)
+        elif key in _NAME_FIELDS and isinstance(value, str):
+            out[key] = "anon"
+        elif key in _TEXT_FIELDS and isinstance(value, str):
+            out[key] = mask_text(value)
+        else:
+            out[key] = anonymize(value, salt, key)
+    return out
+
+
+class UpdateLogWriter:
+    """
+    Append-only журнал входящих апдейтов: gzip, одна JSON-строка на апдейт
+    ({"t": unix time, "u": апдейт в формате Bot API}).
+
+    Сериализация, анонимизация и сжатие идут в фоновом потоке; каждый запуск
+    дописывает в файл новый gzip-member, и gzip читает их подряд как один поток.
+    """
+
+    def __init__(
+        self, path: str | Path, anonymized: bool = True, salt: bytes | None = None
+    ) -> None:
+        self.path = Path(path)
+        self.anonymized = anonymized
+        # Псевдонимы стабильны в пределах процесса; новая соль — новые id
+        self.salt = salt or os.urandom(16)
+        self.written = 0
+        self._queue: queue.SimpleQueue[tuple[float, BaseModel | dict[str, Any]] | None] = (
+            queue.SimpleQueue()
+        )
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def _encode(self, ts: float, update: BaseModel | dict[str, Any]) -> bytes:
+        raw = (
+            update
+            if isinstance(update, dict)
+            else update.model_dump(mode="json", exclude_none=True, by_alias=True)
+        )
+        if self.anonymized:
+            raw = anonymize(raw, self.salt)
+        line = json.dumps({"t": round(ts, 6), "u": raw}, ensure_ascii=False, separators=(",", ":"))
+        return line.encode("utf-8") + b"\n"
+
+    def _run(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        last_flush = time.monotonic()
+        dirty = False
+        with gzip.open(self.path, "ab") as f:
+            while True:
+                try:
+                    item = self._queue.get(timeout=FLUSH_INTERVAL)
+                except queue.Empty:
+                    # тишина — сбрасываем хвост, чтобы при падении терять минимум
+                    if dirty:
+                        f.flush()
+                        dirty = False
+                    continue
+                if item is None:
+                    return
+                f.write(self._encode(*item))
+                self.written += 1
+                dirty = True
+                now = time.monotonic()
+                if now - last_flush >= FLUSH_INTERVAL:
+                    f.flush()
+                    last_flush = now
+                    dirty = False
+
+    def write(self, update: BaseModel | dict[str, Any], ts: float | None = None) -> None:
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._run, name="update-log", daemon=True
+                    )
+                    self._thread.start()
+        self._queue.put((time.time() if ts is None else ts, update))
+
+    def close(self) -> None:
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+def read_update_log(path: str | Path) -> Iterator[tuple[float, dict[str, Any]]]:
+    """
+    Записи журнала по порядку. Хвост, оборванный падением процесса (незакрытый
+    gzip-member, неполная строка), молча отбрасывается.
+    """
+    with gzip.open(path, "rb") as f:
+        try:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    return
+                yield record["t"], record["u"]
+        except (EOFError, gzip.BadGzipFile, zlib.error):
+            return
+
+
+__all__ = ["UpdateLogWriter", "anonymize", "mask_text", "read_update_log"]
@@ -0,0 +1,81 @@
+# ---- Helpers -----------------------------------------------------------------
+.PHONY: help-bench
+help-bench:
+	@echo "Targets:"
+	@echo "  bench-i18n      - flat vs layered i18n cache: size on disk and loaded memory"
+	@echo "  bench-i18n-compile - full/parallel/no-op/incremental .i18n_cache rebuild timings"
+	@echo "  bench-po        - polib vs streaming .po parser / .mo writer (200k entries)"
+	@echo "  bench-i18n-startup - i18n startup latency: cold (in-memory compile) vs warm cache"
+	@echo "  bench-metrics   - per-update overhead of metrics middlewares"
+	@echo "  bench-e2e       - real Dispatcher + fake Bot API session: throughput, p50/p99, allocs"
+	@echo "  bench-load      - polling bots vs local fake Bot API over HTTP (USERS=100)"
+	@echo "  bench-replay    - replay LOG=<update log> for BOT=<echo|questionnaire> at 1x/10x/max"
+	@echo "  bench-shm-rate-limit - per-process vs shared-memory limiter, PROCS=8 workers contending"
+	@echo "  bench-redis-rate-limit - per-node vs Redis-backed limiter with token leases, NODES=4"
+	@echo "  bench-heavy-hitters - count-min first tier vs exact limiter: memory, false positives [LOG=]"
+	@echo "  bench-priority - priority update queue vs FIFO under overload: wait per class [CONCURRENCY=8]"
+	@echo "  soak            - simulated day of user churn on a virtual clock: memory per active user"
+	@echo "  perf            - perf gate: calls/op, storage/API ops and calibrated time vs baseline"
+	@echo "  perf-baseline   - re-measure and rewrite tests/perf/baseline.json"
+
+# ---- BENCH -------------------------------------------------------------------
+.PHONY: bench-i18n
+bench-i18n:
+	$(PYTHON) -m scripts.bench.i18n_layers
+
+.PHONY: bench-i18n-compile
+bench-i18n-compile:
+	$(PYTHON) -m scripts.bench.i18n_compile
+
+.PHONY: bench-po
+bench-po:
+	$(PYTHON) -m scripts.bench.po_parse
+
+.PHONY: bench-i18n-startup
+bench-i18n-startup:
+	$(PYTHON) -m scripts.bench.i18n_startup
+	$(PYTHON) -m scripts.bench.i18n_startup --repo
+
+.PHONY: bench-metrics
+bench-metrics:
+	$(PYTHON) -m scripts.bench.metrics_overhead
+
+.PHONY: bench-e2e
+bench-e2e:
+	$(PYTHON) -m scripts.bench.e2e
+
+.PHONY: bench-load
+bench-load:
+	$(PYTHON) -m scripts.bench.load --users $(or $(USERS),100)
+
+.PHONY: bench-replay
+bench-replay:
+	$(PYTHON) -m scripts.bench.replay $(LOG) --bot $(BOT)
+
+.PHONY: bench-shm-rate-limit
+bench-shm-rate-limit:
+	$(PYTHON) -m scripts.bench.shm_rate_limit --procs $(or $(PROCS),8)
+
+.PHONY: bench-redis-rate-limit
+bench-redis-rate-limit:
+	$(PYTHON) -m scripts.bench.redis_rate_limit --nodes $(or $(NODES),4)
+
+.PHONY: bench-heavy-hitters
+bench-heavy-hitters:
+	$(PYTHON) -m scripts.bench.heavy_hitters $(if $(LOG),--log $(LOG))
+
+.PHONY: bench-priority
+bench-priority:
+	$(PYTHON) -m scripts.bench.priority --concurrency $(or $(CONCURRENCY),8)
+
+.PHONY: soak
+soak:
+	$(PYTHON) -m scripts.bench.soak
+
+.PHONY: perf
+perf:
+	$(PYTEST) tests/perf -q --perf
+
+.PHONY: perf-baseline
+perf-baseline:
+	$(PYTEST) tests/perf -q --perf-update
@@ -4,6 +4,8 @@ help-i18n:
 	@echo "Targets:"
 	@echo "  compile-locales - compile i18n files for all available bots"
 	@echo "  compile-locale  - compile i18n files for a specific bot: BOT=echo_bot"
+	@echo "  compile-locales-force - rebuild i18n files for all bots ignoring the manifest"
+	@echo "  compile-locales-watch - recompile changed .po on the fly (bots: I18N_RELOAD_SEC>0)"
 
 # ---- I18N --------------------------------------------------------------------
 .PHONY: compile-locales
@@ -13,3 +15,11 @@ compile-locales:
 .PHONY: compile-locale
 compile-locale:
 	$(PYTHON) scripts/compile_locales.py --bot $(BOT)
+
+.PHONY: compile-locales-force
+compile-locales-force:
+	$(PYTHON) scripts/compile_locales.py --all --force
+
+.PHONY: compile-locales-watch
+compile-locales-watch:
+	$(PYTHON) scripts/compile_locales.py --watch
@@ -0,0 +1,268 @@
+"""
+Сквозной бенчмарк ботов: настоящий Dispatcher из build_dispatcher() со всеми
+middleware (метрики, i18n, rate limit, keyboard cleanup, error handler) и
+хэндлерами, Bot с in-memory FakeSession вместо HTTP.
+
+Сценарии:
+    echo           — /start и серия текстов от каждого пользователя
+    questionnaire  — полное прохождение анкеты: подсказки, ошибка ввода,
+                     «назад», пропуск города
+
+Апдейты разных пользователей чередуются, как в живом потоке. Отчёт: апдейты/с,
+p50/p99 латентности, пик аллокаций и прирост живых блоков на апдейт. Результат
+пишется в JSON (по умолчанию .bench/e2e-<commit>.json) для сравнения коммитов.
+
+Usage:
+    python -m scripts.bench.e2e
+    python -m scripts.bench.e2e --users 500 --scenario questionnaire
+    python -m scripts.bench.e2e --compare .bench/e2e-abc1234.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import datetime
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable, Iterator
+from pathlib import Path
+from typing import Any
+
+
+# Лимитер и токен — до импорта ботов: настройки кэшируются при первом чтении
+os.environ.setdefault("BOT_TOKEN", "42:BENCH")
+os.environ.setdefault("RATE_LIMIT_PER_USER", "1000000")
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+
+from bots.echo_bot.app import main as echo_main
+from bots.questionnaire_bot.app import main as questionnaire_main
+from bots.questionnaire_bot.app.keyboards.inline import QCb
+from libs.common.config import PROJECT_ROOT
+from scripts.bench.fake_session import FakeSession
+
+
+RESULTS_DIR = PROJECT_ROOT / ".bench"
+
+Step = dict[str, Any]
+Script = Callable[["UpdateFactory", int], list[Step]]
+
+
+class UpdateFactory:
+    """Сырые апдейты в формате Bot API; update_id и message_id растут монотонно."""
+
+    def __init__(self) -> None:
+        self.update_id = 0
+        self.message_id = 0
+
+    def _user(self, user_id: int) -> dict[str, Any]:
+        return {"id": user_id, "is_bot": False, "first_name": f"u{user_id}", "language_code": "en"}
+
+    def _message(self, user_id: int, text: str) -> dict[str, Any]:
+        self.message_id += 1
+        msg: dict[str, Any] = {
+            "message_id": self.message_id,
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": self._user(user_id),
+            "text": text,
+        }
+        if text.startswith("/"):
+            msg["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text)}]
+        return msg
+
+    def text(self, user_id: int, text: str) -> Step:
+        self.update_id += 1
+        return {"update_id": self.update_id, "message": self._message(user_id, text)}
+
+    def callback(self, user_id: int, data: str) -> Step:
+        self.update_id += 1
+        bot_msg = self._message(user_id, "step")
+        bot_msg["from"] = {"id": 42, "is_bot": True, "first_name": "bench"}
+        return {
+            "update_id": self.update_id,
+            "callback_query": {
+                "id": str(self.update_id),
+                "from": self._user(user_id),
+                "chat_instance": str(user_id),
+                "message": bot_msg,
+                "data": data,
+            },
+        }
+
+
+def echo_script(f: UpdateFactory, user_id: int) -> list[Step]:
+    return [f.text(user_id, "/start")] + [f.text(user_id, f"hello {i}") for i in range(5)]
+
+
+def questionnaire_script(f: UpdateFactory, user_id: int) -> list[Step]:
+    return [
+        f.text(user_id, "/start"),
+        f.callback(user_id, QCb(act="hint_show", hint_key="name").pack()),
+        f.callback(user_id, QCb(act="hint_hide", hint_key="name").pack()),
+        f.text(user_id, "Alice"),
+        f.text(user_id, "not a number"),
+        f.callback(user_id, QCb(act="back").pack()),
+        f.text(user_id, "Alice"),
+        f.text(user_id, "30"),
+        f.callback(user_id, QCb(act="skip").pack()),
+    ]
+
+
+SCENARIOS: dict[str, tuple[Callable[[Bot], Dispatcher], Script]] = {
+    "echo": (echo_main.build_dispatcher, echo_script),
+    "questionnaire": (questionnaire_main.build_dispatcher, questionnaire_script),
+}
+
+
+def interleave(scripts: list[list[Step]]) -> Iterator[Step]:
+    """Шаг 1 всех пользователей, затем шаг 2 и т.д."""
+    for i in range(max(map(len, scripts), default=0)):
+        for script in scripts:
+            if i < len(script):
+                yield script[i]
+
+
+def make_stream(script: Script, users: int, first_user: int, bot: Bot) -> list[Update]:
+    f = UpdateFactory()
+    raw = interleave([script(f, first_user + u) for u in range(users)])
+    return [Update.model_validate(r, context={"bot": bot}) for r in raw]
+
+
+async def _feed(dp: Dispatcher, bot: Bot, updates: list[Update]) -> list[float]:
+    latencies = []
+    for upd in updates:
+        started = time.perf_counter()
+        await dp.feed_update(bot, upd)
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+async def _alloc_pass(dp: Dispatcher, bot: Bot, updates: list[Update]) -> float:
+    """Средний пик памяти, выделяемой за обработку одного апдейта (tracemalloc)."""
+    peaks = []
+    tracemalloc.start()
+    try:
+        for upd in updates:
+            base, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            await dp.feed_update(bot, upd)
+            peaks.append(tracemalloc.get_traced_memory()[1] - base)
+    finally:
+        tracemalloc.stop()
+    return statistics.fmean(peaks) if peaks else 0.0
+
+
+def _quantile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def run_scenario(name: str, users: int) -> dict[str, Any]:
+    build, script = SCENARIOS[name]
+    session = FakeSession()
+    bot = Bot(token=os.environ["BOT_TOKEN"], session=session)
+    dp = build(bot)
+
+    # Отдельные диапазоны user_id: прогрев, замер, аллокации не делят FSM-состояние
+    await _feed(dp, bot, make_stream(script, max(1, users // 10), 10_000_000, bot))
+    timed = make_stream(script, users, 20_000_000, bot)
+    session.calls.clear()
+
+    gc.collect()
+    blocks_before = sys.getallocatedblocks()
+    started = time.perf_counter()
+    latencies = await _feed(dp, bot, timed)
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    retained = (sys.getallocatedblocks() - blocks_before) / len(timed)
+    api_calls = sum(session.calls.values()) / len(timed)
+
+    alloc_stream = make_stream(script, max(1, users // 10), 30_000_000, bot)
+    alloc_bytes = await _alloc_pass(dp, bot, alloc_stream)
+    await bot.session.close()
+
+    return {
+        "updates": len(timed),
+        "seconds": round(elapsed, 4),
+        "updates_per_sec": round(len(timed) / elapsed, 1),
+        "p50_ms": round(_quantile(latencies, 0.5) * 1000, 4),
+        "p99_ms": round(_quantile(latencies, 0.99) * 1000, 4),
+        "api_calls_per_update": round(api_calls, 3),
+        "alloc_peak_bytes_per_update": round(alloc_bytes),
+        "retained_blocks_per_update": round(retained, 2),
+    }
+
+
+def _commit() -> str:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=PROJECT_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _print_compare(current: dict[str, Any], previous: dict[str, Any]) -> None:
+    print(f"[bench] compare with {previous.get('commit')}")
+    for name, res in current["scenarios"].items():
+        prev = previous.get("scenarios", {}).get(name)
+        if not prev:
+            continue
+        for key in ("updates_per_sec", "p50_ms", "p99_ms", "alloc_peak_bytes_per_update"):
+            before, after = prev.get(key), res[key]
+            if before:
+                delta = after / before - 1
+                print(f"  {name:14} {key:28} {before:>12} -> {after:>12} ({delta:+.1%})")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="End-to-end Dispatcher benchmark.")
+    parser.add_argument("--users", type=int, default=200, help="Virtual users per scenario")
+    parser.add_argument(
+        "--scenario", choices=sorted(SCENARIOS), action="append", help="Scenario(s) to run"
+    )
+    parser.add_argument("--out", type=Path, help="Results JSON (default .bench/e2e-<commit>.json)")
+    parser.add_argument("--compare", type=Path, help="Previous results JSON to diff against")
+    args = parser.parse_args()
+
+    commit = _commit()
+    results: dict[str, Any] = {
+        "commit": commit,
+        "timestamp": datetime.datetime.now(tz=datetime.UTC).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "users": args.users,
+        "scenarios": {},
+    }
+    for name in args.scenario or sorted(SCENARIOS):
+        res = asyncio.run(run_scenario(name, args.users))
+        results["scenarios"][name] = res
+        print(f"[bench] e2e {name} ({res['updates']} updates, {args.users} users)")
+        for key, value in res.items():
+            print(f"  {key:28} {value}")
+
+    out = args.out or RESULTS_DIR / f"e2e-{commit}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+    print(f"[bench] results: {out}")
+
+    if args.compare:
+        _print_compare(results, json.loads(args.compare.read_text(encoding="utf-8")))
+
+
+if __name__ == "__main__":
+    main()
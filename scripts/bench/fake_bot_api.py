@@ -0,0 +1,311 @@
+"""
+Локальная замена Telegram Bot API поверх настоящего HTTP (aiohttp) для
+нагрузочных тестов всего стека: polling, HTTP-сессия aiogram, пул соединений,
+обработка 429/400/403.
+
+Сервер отдаёт getUpdates (long polling с offset/timeout/limit), принимает
+sendMessage / editMessageText / editMessageReplyMarkup / answerCallbackQuery и
+пишет каждый вызов в calls. Отказы инжектируются с заданной вероятностью:
+429 с retry_after, 400 «message is not modified», 403 «bot was blocked».
+
+Виртуальные пользователи (VirtualUser) кладут апдейты в очередь getUpdates и
+получают в inbox все действия бота в своём чате.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any
+
+from aiohttp import web
+
+
+BOT_USER = {"id": 42, "is_bot": True, "first_name": "fake", "username": "fake_bot"}
+
+# Методы, которые никогда не получают инжектированных ошибок: иначе бот не стартует
+_RELIABLE = frozenset({"getUpdates", "getMe", "deleteWebhook", "close", "logOut"})
+
+_INT_PARAMS = frozenset({"chat_id", "message_id", "offset", "limit", "timeout"})
+
+
+@dataclass(slots=True)
+class ApiCall:
+    ts: float
+    method: str
+    params: dict[str, Any]
+    status: int
+    chat_id: int | None = None
+    result: Any = None
+
+
+@dataclass(slots=True)
+class Faults:
+    """Вероятности отказов на вызов метода (кроме служебных) и задержка ответа."""
+
+    latency: float = 0.0
+    jitter: float = 0.0
+    p429: float = 0.0
+    retry_after: int = 1
+    p400: float = 0.0
+    p403: float = 0.0
+
+    def pick(self, rand: random.Random) -> tuple[int, dict[str, Any]] | None:
+        roll = rand.random()
+        if roll < self.p429:
+            return 429, {
+                "ok": False,
+                "error_code": 429,
+                "description": f"Too Many Requests: retry after {self.retry_after}",
+                "parameters": {"retry_after": self.retry_after},
+            }
+        roll -= self.p429
+        if roll < self.p400:
+            return 400, {
+                "ok": False,
+                "error_code": 400,
+                "description": "Bad Request: message is not modified",
+            }
+        roll -= self.p400
+        if roll < self.p403:
+            return 403, {
+                "ok": False,
+                "error_code": 403,
+                "description": "Forbidden: bot was blocked by the user",
+            }
+        return None
+
+
+def _decode(params: dict[str, Any]) -> dict[str, Any]:
+    """aiogram шлёт multipart-форму: сложные значения — JSON-строки, числа — строки."""
+    out: dict[str, Any] = {}
+    for key, value in params.items():
+        if isinstance(value, str):
+            if key in _INT_PARAMS and value.lstrip("-").isdigit():
+                value = int(value)
+            elif value[:1] in ("{", "["):
+                with contextlib.suppress(ValueError):
+                    value = json.loads(value)
+        out[key] = value
+    return out
+
+
+def _attach_markup(message: dict[str, Any], markup: Any) -> None:  # noqa: ANN401
+    # В ответах Telegram у сообщения бывает только inline-клавиатура
+    if isinstance(markup, dict) and markup.get("inline_keyboard"):
+        message["reply_markup"] = markup
+
+
+@dataclass
+class VirtualUser:
+    api: FakeBotApi
+    user_id: int
+    language: str = "en"
+    inbox: asyncio.Queue[ApiCall] = field(default_factory=asyncio.Queue)
+    last_message_id: int | None = None
+    last_markup_id: int | None = None
+
+    @property
+    def profile(self) -> dict[str, Any]:
+        return {
+            "id": self.user_id,
+            "is_bot": False,
+            "first_name": f"u{self.user_id}",
+            "language_code": self.language,
+        }
+
+    def send_text(self, text: str) -> int:
+        message = self.api.new_message(self.user_id, text, self.profile)
+        if text.startswith("/"):
+            command = text.split(maxsplit=1)[0]
+            message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(command)}]
+        return self.api.push_update("message", message)
+
+    def press(self, data: str, message_id: int | None = None) -> int:
+        """Нажатие inline-кнопки под сообщением бота (по умолчанию — последним с клавиатурой)."""
+        target = message_id or self.last_markup_id or self.last_message_id
+        message = self.api.messages.get((self.user_id, target or 0))
+        if message is None:
+            message = self.api.new_message(self.user_id, "", BOT_USER)
+        query_id = f"{self.user_id}:{self.api.next_update_id}"
+        self.api.callback_owners[query_id] = self.user_id
+        return self.api.push_update(
+            "callback_query",
+            {
+                "id": query_id,
+                "from": self.profile,
+                "chat_instance": str(self.user_id),
+                "message": message,
+                "data": data,
+            },
+        )
+
+    def deliver(self, call: ApiCall) -> None:
+        result = call.result
+        if isinstance(result, dict) and "message_id" in result:
+            self.last_message_id = result["message_id"]
+            if result.get("reply_markup", {}).get("inline_keyboard"):
+                self.last_markup_id = result["message_id"]
+        self.inbox.put_nowait(call)
+
+    async def response(self, timeout: float) -> ApiCall:
+        """Следующее действие бота в чате; TimeoutError — если его не было."""
+        return await asyncio.wait_for(self.inbox.get(), timeout)
+
+    def drain(self) -> int:
+        count = 0
+        while not self.inbox.empty():
+            self.inbox.get_nowait()
+            count += 1
+        return count
+
+
+class FakeBotApi:
+    def __init__(self, token: str, faults: Faults | None = None, seed: int | None = None) -> None:
+        self.token = token
+        self.faults = faults or Faults()
+        self.rand = random.Random(seed)
+        self.calls: list[ApiCall] = []
+        self.methods: Counter[str] = Counter()
+        self.injected: Counter[int] = Counter()
+        self.messages: dict[tuple[int, int], dict[str, Any]] = {}
+        self.callback_owners: dict[str, int] = {}
+        self.users: dict[int, VirtualUser] = {}
+        self.next_update_id = 1
+        self._message_id = 0
+        self._pending: list[dict[str, Any]] = []
+        self._arrived = asyncio.Event()
+        self._runner: web.AppRunner | None = None
+        self.base_url = ""
+
+    # --- пользователи и апдейты ----------------------------------------------
+
+    def user(self, user_id: int, language: str = "en") -> VirtualUser:
+        vu = self.users.get(user_id)
+        if vu is None:
+            vu = self.users[user_id] = VirtualUser(self, user_id, language)
+        return vu
+
+    def new_message(self, chat_id: int, text: str, sender: dict[str, Any]) -> dict[str, Any]:
+        self._message_id += 1
+        message = {
+            "message_id": self._message_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": sender,
+            "text": text,
+        }
+        self.messages[(chat_id, self._message_id)] = message
+        return message
+
+    def push_update(self, kind: str, payload: dict[str, Any]) -> int:
+        update_id = self.next_update_id
+        self.next_update_id += 1
+        self._pending.append({"update_id": update_id, kind: payload})
+        self._arrived.set()
+        return update_id
+
+    async def _get_updates(self, params: dict[str, Any]) -> list[dict[str, Any]]:
+        offset = params.get("offset")
+        if offset:
+            # offset подтверждает всё, что младше
+            self._pending = [u for u in self._pending if u["update_id"] >= offset]
+        if not self._pending and params.get("timeout"):
+            self._arrived.clear()
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(self._arrived.wait(), params["timeout"])
+        return self._pending[: params.get("limit") or 100]
+
+    # --- методы бота -------------------------------------------------------------
+
+    def _edit(self, params: dict[str, Any]) -> dict[str, Any] | bool:
+        message = self.messages.get((params.get("chat_id", 0), params.get("message_id", 0)))
+        if message is None:
+            return True
+        if "text" in params:
+            message["text"] = params["text"]
+        message.pop("reply_markup", None)
+        _attach_markup(message, params.get("reply_markup"))
+        message["edit_date"] = int(time.time())
+        return message
+
+    def _handle(self, method: str, params: dict[str, Any]) -> tuple[Any, int | None]:
+        """Результат метода и чат, которому он адресован."""
+        chat_id = params.get("chat_id")
+        match method:
+            case "getMe":
+                return BOT_USER, None
+            case "sendMessage":
+                message = self.new_message(chat_id, params.get("text", ""), BOT_USER)
+                _attach_markup(message, params.get("reply_markup"))
+                return message, chat_id
+            case "editMessageText" | "editMessageReplyMarkup":
+                return self._edit(params), chat_id
+            case "answerCallbackQuery":
+                return True, self.callback_owners.pop(params.get("callback_query_id", ""), None)
+            case _:
+                return True, chat_id
+
+    async def _dispatch(self, request: web.Request) -> web.Response:
+        if request.match_info["token"] != self.token:
+            return web.json_response(
+                {"ok": False, "error_code": 401, "description": "Unauthorized"}, status=401
+            )
+        method = request.match_info["method"]
+        if request.content_type == "application/json":
+            raw = await request.json()
+        else:
+            raw = dict(await request.post())
+        params = _decode({**request.query, **raw})
+        self.methods[method] += 1
+
+        if method == "getUpdates":
+            return web.json_response({"ok": True, "result": await self._get_updates(params)})
+
+        if self.faults.latency or self.faults.jitter:
+            await asyncio.sleep(self.faults.latency + self.rand.random() * self.faults.jitter)
+
+        fault = None if method in _RELIABLE else self.faults.pick(self.rand)
+        if fault is not None:
+            status, body = fault
+            self.injected[status] += 1
+            self.calls.append(ApiCall(time.perf_counter(), method, params, status))
+            return web.json_response(body, status=status)
+
+        result, chat_id = self._handle(method, params)
+        call = ApiCall(time.perf_counter(), method, params, 200, chat_id, result)
+        self.calls.append(call)
+        user = self.users.get(chat_id) if isinstance(chat_id, int) else None
+        if user is not None:
+            user.deliver(call)
+        return web.json_response({"ok": True, "result": result})
+
+    # --- жизненный цикл ------------------------------------------------------
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_route("*", "/bot{token}/{method}", self._dispatch)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        self._runner = web.AppRunner(self.app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        # port=0 — порт выбирает ОС, берём фактический
+        bound = self._runner.addresses[0][1] if self._runner.addresses else port
+        self.base_url = f"http://{host}:{bound}"
+        return self.base_url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+__all__ = ["BOT_USER", "ApiCall", "FakeBotApi", "Faults", "VirtualUser"]
@@ -0,0 +1,244 @@
+"""
+Локальная замена Redis-совместимого сервера поверх настоящего TCP (RESP2)
+для тестов и бенчмарков распределённого лимитера без внешнего сервиса.
+
+Поддерживает PING, GET, SET, DEL, INCRBY, PEXPIRE, PTTL, FLUSHALL, SCRIPT LOAD/FLUSH,
+EVAL и EVALSHA. Lua не интерпретируется: известные скрипты (по SHA1 текста)
+исполняются Python-эквивалентом атомарно — между командами одного соединения
+и всех остальных нет await, как и у однопоточного Redis.
+
+Задержка ответа (latency) эмулирует сеть до сервера; ответы в одном
+соединении при этом остаются в порядке запросов.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import hashlib
+import time
+from collections import Counter
+from collections.abc import Callable
+from typing import Any
+
+from libs.common.redis_rate_limit import LEASE_SCRIPT, RedisError, encode_command
+
+
+Script = Callable[["FakeRedis", list[str], list[str]], Any]
+
+
+def _lease(server: FakeRedis, keys: list[str], argv: list[str]) -> int:
+    used = int(server.get(keys[0]) or 0)
+    grant = min(int(argv[0]), int(argv[1]) - used)
+    if grant <= 0:
+        return 0
+    server.incrby(keys[0], grant)
+    server.pexpire(keys[0], int(argv[2]))
+    return grant
+
+
+# Python-эквиваленты Lua-скриптов, которые умеет исполнять сервер
+SCRIPTS: dict[str, Script] = {hashlib.sha1(LEASE_SCRIPT.encode()).hexdigest(): _lease}
+
+
+def encode_reply(value: Any) -> bytes:  # noqa: ANN401
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, RedisError):
+        return f"-{value}\r\n".encode()
+    if isinstance(value, bool):
+        return b":%d\r\n" % int(value)
+    if isinstance(value, int):
+        return b":%d\r\n" % value
+    if isinstance(value, list):
+        return b"*%d\r\n" % len(value) + b"".join(encode_reply(v) for v in value)
+    if value == "OK" or value == "PONG":
+        return f"+{value}\r\n".encode()
+    return encode_command(value)[4:]
+
+
+class FakeRedis:
+    def __init__(self, latency: float = 0.0) -> None:
+        self.latency = latency
+        self.data: dict[str, str] = {}
+        self.expires: dict[str, float] = {}
+        self.scripts: set[str] = set()
+        self.commands: Counter[str] = Counter()
+        self.connections = 0
+        self.url = ""
+        self._server: asyncio.Server | None = None
+        self._clients: set[asyncio.StreamWriter] = set()
+        self._tasks: set[asyncio.Task[Any]] = set()
+
+    # ---- хранилище ---------------------------------------------------------
+
+    def _alive(self, key: str) -> bool:
+        deadline = self.expires.get(key)
+        if deadline is not None and time.monotonic() >= deadline:
+            del self.expires[key]
+            self.data.pop(key, None)
+        return key in self.data
+
+    def get(self, key: str) -> str | None:
+        return self.data[key] if self._alive(key) else None
+
+    def incrby(self, key: str, amount: int) -> int:
+        value = int(self.get(key) or 0) + amount
+        self.data[key] = str(value)
+        return value
+
+    def pexpire(self, key: str, ms: int) -> int:
+        if not self._alive(key):
+            return 0
+        self.expires[key] = time.monotonic() + ms / 1000
+        return 1
+
+    # ---- команды -----------------------------------------------------------
+
+    def execute(self, args: list[str]) -> Any:  # noqa: ANN401
+        name = args[0].upper()
+        self.commands[name] = self.commands[name] + 1
+        handler = getattr(self, f"cmd_{name.lower()}", None)
+        if handler is None:
+            return RedisError(f"ERR unknown command '{args[0]}'")
+        try:
+            return handler(*args[1:])
+        except (TypeError, ValueError) as exc:
+            return RedisError(f"ERR {exc}")
+
+    def cmd_ping(self) -> str:
+        return "PONG"
+
+    def cmd_get(self, key: str) -> str | None:
+        return self.get(key)
+
+    def cmd_set(self, key: str, value: str) -> str:
+        self.data[key] = value
+        self.expires.pop(key, None)
+        return "OK"
+
+    def cmd_del(self, *keys: str) -> int:
+        removed = 0
+        for key in keys:
+            if self._alive(key):
+                del self.data[key]
+                self.expires.pop(key, None)
+                removed += 1
+        return removed
+
+    def cmd_incrby(self, key: str, amount: str) -> int:
+        return self.incrby(key, int(amount))
+
+    def cmd_pexpire(self, key: str, ms: str) -> int:
+        return self.pexpire(key, int(ms))
+
+    def cmd_pttl(self, key: str) -> int:
+        if not self._alive(key):
+            return -2
+        deadline = self.expires.get(key)
+        return -1 if deadline is None else int((deadline - time.monotonic()) * 1000)
+
+    def cmd_flushall(self) -> str:
+        self.data.clear()
+        self.expires.clear()
+        return "OK"
+
+    def cmd_script(self, sub: str, *args: str) -> Any:  # noqa: ANN401
+        if sub.upper() == "LOAD":
+            sha = hashlib.sha1(args[0].encode()).hexdigest()
+            if sha not in SCRIPTS:
+                return RedisError("ERR fake server cannot run this script")
+            self.scripts.add(sha)
+            return sha
+        if sub.upper() == "FLUSH":
+            self.scripts.clear()
+            return "OK"
+        return RedisError(f"ERR unknown SCRIPT subcommand '{sub}'")
+
+    def cmd_eval(self, script: str, numkeys: str, *args: str) -> Any:  # noqa: ANN401
+        sha = hashlib.sha1(script.encode()).hexdigest()
+        if sha not in SCRIPTS:
+            return RedisError("ERR fake server cannot run this script")
+        self.scripts.add(sha)
+        return self._run(sha, int(numkeys), args)
+
+    def cmd_evalsha(self, sha: str, numkeys: str, *args: str) -> Any:  # noqa: ANN401
+        if sha not in self.scripts:
+            return RedisError("NOSCRIPT No matching script. Please use EVAL.")
+        return self._run(sha, int(numkeys), args)
+
+    def _run(self, sha: str, numkeys: int, args: tuple[str, ...]) -> Any:  # noqa: ANN401
+        return SCRIPTS[sha](self, list(args[:numkeys]), list(args[numkeys:]))
+
+    # ---- сеть --------------------------------------------------------------
+
+    async def _read_command(self, reader: asyncio.StreamReader) -> list[str]:
+        header = await reader.readuntil(b"\r\n")
+        if header[:1] != b"*":
+            # inline-команда (redis-cli, telnet)
+            return header.decode().split()
+        args = []
+        for _ in range(int(header[1:-2])):
+            size = int((await reader.readuntil(b"\r\n"))[1:-2])
+            args.append((await reader.readexactly(size + 2))[:-2].decode())
+        return args
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        self._clients.add(writer)
+        task = asyncio.current_task()
+        if task is not None:
+            self._tasks.add(task)
+        replies: asyncio.Queue[tuple[float, bytes] | None] = asyncio.Queue()
+        sender = asyncio.create_task(self._send(writer, replies))
+        try:
+            while True:
+                args = await self._read_command(reader)
+                if args:
+                    reply = encode_reply(self.execute(args))
+                    replies.put_nowait((time.monotonic() + self.latency, reply))
+        except (OSError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            replies.put_nowait(None)
+            with contextlib.suppress(asyncio.CancelledError):
+                await sender
+            self._clients.discard(writer)
+            self._tasks.discard(task)
+            writer.close()
+
+    async def _send(
+        self, writer: asyncio.StreamWriter, replies: asyncio.Queue[tuple[float, bytes] | None]
+    ) -> None:
+        while (item := await replies.get()) is not None:
+            due, reply = item
+            delay = due - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            writer.write(reply)
+            with contextlib.suppress(OSError):
+                await writer.drain()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        self._server = await asyncio.start_server(self._serve, host, port)
+        bound = self._server.sockets[0].getsockname()[1]
+        self.url = f"redis://{host}:{bound}/0"
+        return self.url
+
+    def drop_connections(self) -> None:
+        """Рвёт все клиентские соединения — как рестарт сервера без потери данных."""
+        for writer in list(self._clients):
+            writer.close()
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self.drop_connections()
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        # В 3.11 wait_closed() не ждёт обработчиков соединений, а отменять их нельзя:
+        # asyncio логирует отменённый обработчик как ошибку. Закрытые сокеты завершат их сами
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+__all__ = ["SCRIPTS", "FakeRedis"]
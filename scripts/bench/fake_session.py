@@ -0,0 +1,69 @@
+"""
+In-memory сессия Bot API для бенчмарков: вместо HTTP — готовые ответы.
+
+Методы, возвращающие Message, получают правдоподобное сообщение с растущим
+message_id; остальные — True. Счётчики вызовов по методам — в calls.
+"""
+
+from __future__ import annotations
+
+import datetime
+from collections import Counter
+from collections.abc import AsyncGenerator
+from typing import Any
+
+from aiogram import Bot
+from aiogram.client.session.base import BaseSession
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import Chat, Message, User
+
+
+BOT_USER = User(id=42, is_bot=True, first_name="bench")
+
+
+class FakeSession(BaseSession):
+    def __init__(self) -> None:
+        super().__init__()
+        self.calls: Counter[str] = Counter()
+        self._message_id = 1_000_000
+
+    def next_message_id(self) -> int:
+        self._message_id += 1
+        return self._message_id
+
+    def _message(self, method: TelegramMethod[Any]) -> Message:
+        chat_id = getattr(method, "chat_id", None)
+        message_id = getattr(method, "message_id", None) or self.next_message_id()
+        return Message(
+            message_id=message_id,
+            date=datetime.datetime.now(tz=datetime.UTC),
+            chat=Chat(id=chat_id if isinstance(chat_id, int) else 0, type="private"),
+            from_user=BOT_USER,
+            text=getattr(method, "text", None),
+        )
+
+    async def make_request(
+        self, bot: Bot, method: TelegramMethod[TelegramType], timeout: int | None = None
+    ) -> TelegramType:
+        self.calls[method.__api_method__] += 1
+        returning = getattr(method, "__returning__", None)
+        if returning is Message or Message in getattr(returning, "__args__", ()):
+            return self._message(method)  # type: ignore[return-value]
+        return True  # type: ignore[return-value]
+
+    async def stream_content(
+        self,
+        url: str,
+        headers: dict[str, Any] | None = None,
+        timeout: int = 30,
+        chunk_size: int = 65536,
+        raise_for_status: bool = True,
+    ) -> AsyncGenerator[bytes, None]:
+        yield b""
+
+    async def close(self) -> None:
+        return None
+
+
+__all__ = ["BOT_USER", "FakeSession"]
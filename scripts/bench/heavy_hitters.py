@@ -0,0 +1,155 @@
+"""
+Count-min первый уровень лимитера против точного bucket на одном и том же
+потоке запросов: сколько памяти экономит скетч и чего это стоит.
+
+Поток — журнал апдейтов (UPDATE_LOG_FILE, как у replay) или синтетика:
+много обычных пользователей с короткими сессиями и паузами и несколько
+флудеров, которые шлют запросы с частотой выше лимита.
+
+Для каждого варианта:
+    state    — пиковое число пер-пользовательских записей
+    KiB      — пиковая память лимитера (скетч + очереди)
+    flagged  — пользователей, получивших точную очередь
+    fp       — из них ложных: точный лимитер ни разу им не отказал
+    fp rate  — fp / все пользователи
+    extra    — пропущено сверх точного лимитера
+    wrong    — отказов там, где точный пропустил бы
+
+Usage:
+    python -m scripts.bench.heavy_hitters
+    python -m scripts.bench.heavy_hitters --users 100000 --flooders 20
+    python -m scripts.bench.heavy_hitters --log logs/updates.jsonl.gz
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+from libs.common.clock import VirtualClock
+from libs.common.memory import measure
+from libs.common.rate_limit import LocalRateLimiter, SketchRateLimiter
+from libs.common.update_log import read_update_log
+
+
+Event = tuple[float, int]
+
+
+def user_of(raw: dict[str, Any]) -> int | None:
+    for key, value in raw.items():
+        if key != "update_id" and isinstance(value, dict) and "from" in value:
+            return value["from"]["id"]
+    return None
+
+
+def from_log(path: Path) -> list[Event]:
+    events = []
+    for ts, raw in read_update_log(path):
+        uid = user_of(raw)
+        if uid is not None:
+            events.append((ts, uid))
+    events.sort()
+    return events
+
+
+def synthesize(args: argparse.Namespace) -> list[Event]:
+    rand = random.Random(args.seed)
+    events: list[Event] = []
+    for uid in range(1, args.users + 1):
+        ts = rand.uniform(0, args.duration)
+        for _ in range(rand.randint(1, 12)):
+            events.append((ts, uid))
+            ts += rand.expovariate(1 / args.think)
+    for n in range(args.flooders):
+        uid = 10_000_000 + n
+        ts = rand.uniform(0, args.duration * 0.8)
+        for _ in range(int(args.flood_rate * args.flood_sec)):
+            events.append((ts, uid))
+            ts += rand.expovariate(args.flood_rate)
+    events.sort()
+    return events
+
+
+def replay(
+    limiter: LocalRateLimiter | SketchRateLimiter,
+    events: list[Event],
+    sample_every: float,
+    flagged: set[int] | None = None,
+) -> tuple[list[bool], int, int, float]:
+    """Решения по каждому событию, пик записей, пик байт и время на проверку."""
+    decisions = []
+    peak_entries = peak_bytes = 0
+    next_sample = 0.0
+    base = limiter.sketch.nbytes if isinstance(limiter, SketchRateLimiter) else 0
+    state = limiter.local_state()
+    hit = limiter.hit
+    elapsed = 0.0
+    for ts, uid in events:
+        if ts >= next_sample:
+            peak_entries = max(peak_entries, len(state))
+            peak_bytes = max(peak_bytes, base + measure("state", state).estimated_bytes)
+            next_sample = ts + sample_every
+        started = time.perf_counter()
+        decisions.append(hit(uid, ts))
+        elapsed += time.perf_counter() - started
+        if flagged is not None and uid in state:
+            flagged.add(uid)
+    return decisions, peak_entries, peak_bytes, elapsed / len(decisions)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Count-min sketch vs exact rate limiter.")
+    parser.add_argument("--log", type=Path, help="Update log to replay instead of synthetic load")
+    parser.add_argument("--users", type=int, default=50_000, help="Ordinary users")
+    parser.add_argument("--duration", type=float, default=3600.0, help="Synthetic span, seconds")
+    parser.add_argument("--think", type=float, default=5.0, help="Mean pause in a session, s")
+    parser.add_argument("--flooders", type=int, default=10)
+    parser.add_argument("--flood-rate", type=float, default=10.0, help="Flooder requests/s")
+    parser.add_argument("--flood-sec", type=float, default=120.0, help="Flood length, s")
+    parser.add_argument("--limit", type=int, default=3)
+    parser.add_argument("--window", type=float, default=1.0)
+    parser.add_argument("--width", type=int, action="append", help="Sketch width(s)")
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--sample-sec", type=float, default=60.0, help="Memory sampling period")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    events = from_log(args.log) if args.log else synthesize(args)
+    if not events:
+        sys.exit(f"no user updates in {args.log}")
+    users = len({uid for _, uid in events})
+    print(f"[hh] {len(events)} requests from {users} users, limit {args.limit}/{args.window:g}s")
+
+    clock = VirtualClock()
+    exact, peak_n, peak_b, cost = replay(
+        LocalRateLimiter(args.limit, args.window, clock), events, args.sample_sec
+    )
+    denied_users = {uid for (_, uid), ok in zip(events, exact, strict=True) if not ok}
+    print(
+        f"  {'variant':<12} {'state':>7} {'KiB':>8} {'ns/chk':>7} {'flagged':>8} {'fp':>6} "
+        f"{'fp rate':>8} {'extra':>6} {'wrong':>6}"
+    )
+    print(
+        f"  {'exact':<12} {peak_n:>7} {peak_b / 1024:>8.0f} {cost * 1e9:>7.0f} {'-':>8} "
+        f"{'-':>6} {'-':>8} {0:>6} {0:>6}"
+    )
+    for width in args.width or [1024, 4096, 16384]:
+        limiter = SketchRateLimiter(args.limit, args.window, width, args.depth, VirtualClock())
+        flagged: set[int] = set()
+        decisions, peak_n, peak_b, cost = replay(limiter, events, args.sample_sec, flagged)
+        extra = sum(ok and not ref for ok, ref in zip(decisions, exact, strict=True))
+        wrong = sum(ref and not ok for ok, ref in zip(decisions, exact, strict=True))
+        fp = len(flagged - denied_users)
+        print(
+            f"  {f'cms w={width}':<12} {peak_n:>7} {peak_b / 1024:>8.0f} {cost * 1e9:>7.0f} "
+            f"{len(flagged):>8} {fp:>6} {fp / users:>8.2%} {extra:>6} {wrong:>6}"
+        )
+    print(f"  users throttled by exact limiter: {len(denied_users)}")
+
+
+if __name__ == "__main__":
+    main()
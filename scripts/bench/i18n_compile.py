@@ -0,0 +1,80 @@
+"""
+Время пересборки .i18n_cache на большом дереве каталогов.
+
+Сравнивает полную последовательную сборку (поведение до манифеста и пула)
+с параллельной, с no-op пересборкой и с пересборкой после правки одного .po.
+
+Usage:
+    python -m scripts.bench.i18n_compile
+    python -m scripts.bench.i18n_compile --bots 20 --shared 5000 --overrides 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+import polib
+
+import scripts.compile_locales as cl
+from scripts.bench.i18n_layers import make_project
+
+
+def _timed(fn: Callable[[], None]) -> float:
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        fn()
+    return time.perf_counter() - started
+
+
+def _touch_one(root: Path) -> None:
+    po_path = root / "bots" / "bot_0" / cl.LOCALES_DIR / "en" / cl.LC_MESSAGES / "messages.po"
+    cat = polib.pofile(str(po_path))
+    cat.append(polib.POEntry(msgid="bench.touched", msgstr="touched"))
+    cat.save(str(po_path))
+
+
+def run(bots: int, shared: int, overrides: int, jobs: int | None) -> dict[str, float]:
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        make_project(root, bots, shared, overrides)
+        cl.PROJECT_ROOT = root
+        cl.BOTS_DIR = root / "bots"
+
+        cl.FORCE = True
+        serial = _timed(lambda: cl._compile_all_bots(jobs=1))
+        parallel = _timed(lambda: cl._compile_all_bots(jobs=jobs))
+        cl.FORCE = False
+        noop = _timed(lambda: cl._compile_all_bots(jobs=jobs))
+        _touch_one(root)
+        one = _timed(lambda: cl._compile_all_bots(jobs=jobs))
+
+    return {
+        "full_serial": serial,
+        "full_parallel": parallel,
+        "noop": noop,
+        "one_changed": one,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Time .i18n_cache rebuilds.")
+    parser.add_argument("--bots", type=int, default=10, help="Number of synthetic bots")
+    parser.add_argument("--shared", type=int, default=5000, help="Entries in the global catalog")
+    parser.add_argument("--overrides", type=int, default=500, help="Bot-specific entries")
+    parser.add_argument("--jobs", type=int, default=None, help="Worker processes (default: CPUs)")
+    args = parser.parse_args()
+
+    res = run(args.bots, args.shared, args.overrides, args.jobs)
+    print(f"[bench] bots={args.bots} shared={args.shared} overrides={args.overrides}")
+    for name, secs in res.items():
+        print(f"  {name:<14}: {secs * 1000:>10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Flat vs layered i18n cache: размер .mo на диске и память при загрузке N ботов.
+
+Usage:
+    python -m scripts.bench.i18n_layers
+    python -m scripts.bench.i18n_layers --bots 10 --shared 5000 --overrides 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import gettext
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+import polib
+
+import scripts.compile_locales as cl
+
+
+LANGS = ("en", "ru")
+
+
+def write_po(path: Path, lang: str, entries: dict[str, str]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    po = polib.POFile()
+    po.metadata = {"Content-Type": "text/plain; charset=UTF-8", "Language": lang}
+    for msgid, msgstr in entries.items():
+        po.append(polib.POEntry(msgid=msgid, msgstr=msgstr))
+    po.save(str(path))
+
+
+def make_project(root: Path, bots: int, shared: int, overrides: int) -> None:
+    for lang in LANGS:
+        po = root / cl.LOCALES_DIR / lang / cl.LC_MESSAGES / f"{cl.DOMAIN}.po"
+        write_po(po, lang, {f"shared.{i}": f"{lang} shared text #{i}" for i in range(shared)})
+        for b in range(bots):
+            bot_po = root / "bots" / f"bot_{b}" / cl.LOCALES_DIR / lang / cl.LC_MESSAGES
+            entries = {f"shared.{i}": f"{lang} bot {b} text #{i}" for i in range(overrides)}
+            entries |= {f"bot_{b}.{i}": f"{lang} own text #{i}" for i in range(overrides)}
+            write_po(bot_po / f"{cl.DOMAIN}.po", lang, entries)
+
+
+def _compile_flat(root: Path, bots: int) -> Path:
+    """Старое поведение: каждый бот получает полную копию общих строк."""
+    out = root / "flat"
+    for b in range(bots):
+        for lang in LANGS:
+            files = [
+                root / cl.LOCALES_DIR / lang / cl.LC_MESSAGES / f"{cl.DOMAIN}.po",
+                root / "bots" / f"bot_{b}" / cl.LOCALES_DIR / lang / cl.LC_MESSAGES / "messages.po",
+            ]
+            lang_dir = out / f"bot_{b}" / cl.LOCALES_DIR / lang / cl.LC_MESSAGES
+            cl._emit_files(lang_dir, cl._merge_entries(lang, files))
+    return out
+
+
+def _dir_size(path: Path) -> int:
+    return sum(p.stat().st_size for p in path.rglob("*.mo"))
+
+
+def _mo(base: Path, layer: str, lang: str) -> Path:
+    return base / layer / cl.LOCALES_DIR / lang / cl.LC_MESSAGES / f"{cl.DOMAIN}.mo"
+
+
+def _load(mo: Path) -> gettext.GNUTranslations:
+    with mo.open("rb") as fp:
+        return gettext.GNUTranslations(fp)
+
+
+def _measure_flat(out: Path, bots: int) -> tuple[int, list[object]]:
+    tracemalloc.start()
+    keep: list[object] = []
+    for b in range(bots):
+        for lang in LANGS:
+            keep.append(_load(_mo(out, f"bot_{b}", lang)))
+    size, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, keep
+
+
+def _measure_layered(cache: Path, bots: int) -> tuple[int, list[object]]:
+    tracemalloc.start()
+    keep: list[object] = []
+    shared = {lang: _load(_mo(cache, cl.SHARED_LAYER, lang)) for lang in LANGS}
+    keep.append(shared)
+    for b in range(bots):
+        for lang in LANGS:
+            overlay = _load(_mo(cache, f"bot_{b}", lang))
+            overlay.add_fallback(shared[lang])
+            keep.append(overlay)
+    size, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, keep
+
+
+def run(bots: int, shared: int, overrides: int) -> dict[str, int]:
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        make_project(root, bots, shared, overrides)
+
+        cl.PROJECT_ROOT = root
+        cl.BOTS_DIR = root / "bots"
+        cl._compile_all_bots()
+        layered_dir = root / cl.CACHE_DIR
+        flat_dir = _compile_flat(root, bots)
+
+        flat_mem, _ = _measure_flat(flat_dir, bots)
+        layered_mem, _ = _measure_layered(layered_dir, bots)
+        return {
+            "flat_bytes": _dir_size(flat_dir),
+            "layered_bytes": _dir_size(layered_dir),
+            "flat_mem": flat_mem,
+            "layered_mem": layered_mem,
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure flat vs layered i18n cache.")
+    parser.add_argument("--bots", type=int, default=10, help="Number of synthetic bots")
+    parser.add_argument("--shared", type=int, default=2000, help="Entries in the global catalog")
+    parser.add_argument("--overrides", type=int, default=20, help="Bot-specific entries")
+    args = parser.parse_args()
+
+    res = run(args.bots, args.shared, args.overrides)
+    print(f"[bench] bots={args.bots} shared={args.shared} overrides={args.overrides}")
+    print(f"  .mo on disk : flat={res['flat_bytes']:>12,} B  layered={res['layered_bytes']:>12,} B")
+    print(f"  loaded (tm) : flat={res['flat_mem']:>12,} B  layered={res['layered_mem']:>12,} B")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Латентность старта i18n: тёплый .i18n_cache против сборки .po в памяти.
+
+cold — кэша нет: create_i18n возвращается сразу, каталоги готовы после фоновой
+сборки (первый апдейт ждёт ready). warm — готовый кэш читается синхронно.
+
+Usage:
+    python -m scripts.bench.i18n_startup
+    python -m scripts.bench.i18n_startup --shared 5000 --overrides 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import logging
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import scripts.compile_locales as cl
+from libs.common.aiogram.i18n import LayeredI18n, _load_shared, _shared_locales_dir
+from scripts.bench.i18n_layers import make_project
+
+
+def _cold(root: Path, bot: str) -> tuple[float, float]:
+    started = time.perf_counter()
+    i18n = LayeredI18n(path=root / cl.CACHE_DIR / bot / cl.LOCALES_DIR, sources=(root, bot))
+    threading.Thread(target=i18n.compile_sources, args=(logging.getLogger("bench"),)).start()
+    returned = time.perf_counter() - started
+    i18n.ready.wait()
+    return returned, time.perf_counter() - started
+
+
+def _warm(root: Path, bot: str) -> float:
+    _load_shared.cache_clear()
+    started = time.perf_counter()
+    LayeredI18n(
+        path=root / cl.CACHE_DIR / bot / cl.LOCALES_DIR, shared_path=_shared_locales_dir(root)
+    )
+    return time.perf_counter() - started
+
+
+def run(root: Path | None, shared: int, overrides: int) -> dict[str, float]:
+    with tempfile.TemporaryDirectory() as tmp:
+        work = Path(tmp)
+        if root is None:
+            make_project(work, 1, shared, overrides)
+            bot = "bot_0"
+        else:
+            shutil.copytree(root / cl.LOCALES_DIR, work / cl.LOCALES_DIR)
+            shutil.copytree(root / "bots", work / "bots")
+            bot = "questionnaire_bot"
+
+        returned, ready = _cold(work, bot)
+
+        cl.PROJECT_ROOT = work
+        cl.BOTS_DIR = work / "bots"
+        with contextlib.redirect_stdout(io.StringIO()):
+            cl._compile_all_bots(jobs=1)
+        warm = _warm(work, bot)
+
+    return {"cold_returned": returned, "cold_ready": ready, "warm_ready": warm}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure cold vs warm i18n startup.")
+    parser.add_argument("--repo", action="store_true", help="Use this repo's real locales")
+    parser.add_argument("--shared", type=int, default=2000, help="Entries in the global catalog")
+    parser.add_argument("--overrides", type=int, default=200, help="Bot-specific entries")
+    args = parser.parse_args()
+
+    root = cl.PROJECT_ROOT if args.repo else None
+    res = run(root, args.shared, args.overrides)
+    source = "repo locales" if args.repo else f"shared={args.shared} overrides={args.overrides}"
+    print(f"[bench] i18n startup ({source})")
+    for name, secs in res.items():
+        print(f"  {name:<14}: {secs * 1000:>9.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Нагрузочный тест полного стека: бот поднимается как в проде (start_polling,
+AiohttpSession, обработка ошибок), но Bot API подменён локальным FakeBotApi.
+
+Каждый виртуальный пользователь проходит сценарий: отправляет апдейт, ждёт
+первое действие бота в своём чате (время ответа), «думает» think-ms и идёт
+дальше. Отказы Bot API (задержка, 429, 400, 403) настраиваются флагами.
+
+Usage:
+    python -m scripts.bench.load
+    python -m scripts.bench.load --bot questionnaire --users 300
+    python -m scripts.bench.load --latency-ms 50 --p429 0.01 --p403 0.005
+    RATE_LIMIT_ADAPTIVE=true python -m scripts.bench.load --p429 0.05
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+
+# Токен и лимитер — до импорта ботов: настройки кэшируются при первом чтении
+os.environ.setdefault("BOT_TOKEN", "42:LOAD")
+os.environ.setdefault("RATE_LIMIT_PER_USER", "1000000")
+
+from aiogram import Bot, Dispatcher
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+
+from bots.echo_bot.app import main as echo_main
+from bots.questionnaire_bot.app import main as questionnaire_main
+from bots.questionnaire_bot.app.keyboards.inline import QCb
+from scripts.bench.fake_bot_api import FakeBotApi, Faults, VirtualUser
+
+
+# Шаг сценария: ("text", "привет") или ("press", callback_data)
+Step = tuple[str, str]
+
+ECHO: list[Step] = [("text", "/start")] + [("text", f"hello {i}") for i in range(5)]
+
+QUESTIONNAIRE: list[Step] = [
+    ("text", "/start"),
+    ("press", QCb(act="hint_show", hint_key="name").pack()),
+    ("press", QCb(act="hint_hide", hint_key="name").pack()),
+    ("text", "Alice"),
+    ("text", "not a number"),
+    ("press", QCb(act="back").pack()),
+    ("text", "Alice"),
+    ("text", "30"),
+    ("press", QCb(act="skip").pack()),
+]
+
+BOTS: dict[str, tuple[Callable[[Bot], Dispatcher], list[Step]]] = {
+    "echo": (echo_main.build_dispatcher, ECHO),
+    "questionnaire": (questionnaire_main.build_dispatcher, QUESTIONNAIRE),
+}
+
+
+class Stats:
+    def __init__(self) -> None:
+        self.latencies: list[float] = []
+        self.timeouts = 0
+
+    def quantile(self, q: float) -> float:
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+async def run_user(
+    vu: VirtualUser, script: list[Step], stats: Stats, think: float, timeout: float
+) -> None:
+    for kind, payload in script:
+        vu.drain()
+        started = time.perf_counter()
+        if kind == "text":
+            vu.send_text(payload)
+        else:
+            vu.press(payload)
+        try:
+            await vu.response(timeout)
+        except TimeoutError:
+            stats.timeouts += 1
+        else:
+            stats.latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(think)
+
+
+async def run_bot(name: str, args: argparse.Namespace) -> dict[str, Any]:
+    build, script = BOTS[name]
+    token = os.environ["BOT_TOKEN"]
+    faults = Faults(
+        latency=args.latency_ms / 1000,
+        jitter=args.jitter_ms / 1000,
+        p429=args.p429,
+        retry_after=args.retry_after,
+        p400=args.p400,
+        p403=args.p403,
+    )
+    api = FakeBotApi(token, faults, seed=args.seed)
+    base_url = await api.start()
+
+    session = AiohttpSession(api=TelegramAPIServer.from_base(base_url))
+    bot = Bot(token=token, session=session)
+    dp = build(bot)
+    polling = asyncio.create_task(
+        dp.start_polling(
+            bot,
+            polling_timeout=1,
+            handle_signals=False,
+            allowed_updates=dp.resolve_used_update_types(),
+        )
+    )
+
+    stats = Stats()
+    started = time.perf_counter()
+    try:
+        users = [api.user(1_000_000 + i) for i in range(args.users)]
+        await asyncio.gather(
+            *(run_user(vu, script, stats, args.think_ms / 1000, args.timeout) for vu in users)
+        )
+    finally:
+        elapsed = time.perf_counter() - started
+        await dp.stop_polling()
+        await polling
+        await api.stop()
+
+    steps = len(stats.latencies) + stats.timeouts
+    adaptive = dp.get("rate_limit_adaptive")
+    return {
+        "users": args.users,
+        "steps": steps,
+        "seconds": round(elapsed, 3),
+        "updates_per_sec": round(steps / elapsed, 1),
+        "p50_ms": round(stats.quantile(0.5) * 1000, 2),
+        "p95_ms": round(stats.quantile(0.95) * 1000, 2),
+        "p99_ms": round(stats.quantile(0.99) * 1000, 2),
+        "timeouts": stats.timeouts,
+        "api_requests": dict(api.methods.most_common()),
+        "injected": {str(code): n for code, n in sorted(api.injected.items())},
+        "rate_limit": adaptive.state() if adaptive is not None else None,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Full-stack load test against a fake Bot API.")
+    parser.add_argument("--bot", choices=sorted(BOTS), action="append", help="Bot(s) to load")
+    parser.add_argument("--users", type=int, default=100, help="Virtual users")
+    parser.add_argument("--think-ms", type=float, default=100, help="Pause between user steps")
+    parser.add_argument("--timeout", type=float, default=5, help="Seconds to wait for a reply")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Fake API response latency")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="Random extra latency")
+    parser.add_argument("--p429", type=float, default=0, help="Share of 429 replies")
+    parser.add_argument("--retry-after", type=int, default=1, help="retry_after for 429")
+    parser.add_argument("--p400", type=float, default=0, help="Share of 400 replies")
+    parser.add_argument("--p403", type=float, default=0, help="Share of 403 replies")
+    parser.add_argument("--seed", type=int, default=None, help="Fault injection RNG seed")
+    parser.add_argument("--out", type=Path, help="Write results JSON here")
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.bot or sorted(BOTS):
+        res = asyncio.run(run_bot(name, args))
+        results[name] = res
+        print(f"[load] {name}")
+        for key, value in res.items():
+            print(f"  {key:16} {value}")
+
+    if args.out:
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        args.out.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+        print(f"[load] results: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
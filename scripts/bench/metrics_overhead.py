@@ -0,0 +1,91 @@
+"""
+Накладные расходы метрик на апдейт: Dispatcher.feed_update с и без
+UpdateMetricsMiddleware/HandlerMetricsMiddleware, хэндлер без сетевых вызовов.
+
+Usage:
+    python -m scripts.bench.metrics_overhead
+    python -m scripts.bench.metrics_overhead --updates 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import datetime
+import time
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Chat, Message, Update, User
+
+from libs.common.metrics import Registry
+from libs.common.middleware.metrics_middleware import (
+    HandlerMetricsMiddleware,
+    UpdateMetricsMiddleware,
+)
+
+
+def _dispatcher(with_metrics: bool) -> Dispatcher:
+    dp = Dispatcher()
+    if with_metrics:
+        reg = Registry()
+        dp.update.outer_middleware(UpdateMetricsMiddleware(reg))
+        dp.message.middleware(HandlerMetricsMiddleware())
+
+    @dp.message()
+    async def noop(message: Message) -> None:
+        return None
+
+    return dp
+
+
+def _updates(n: int) -> list[Update]:
+    chat = Chat(id=1, type="private")
+    user = User(id=2, is_bot=False, first_name="u")
+    now = datetime.datetime.now(tz=datetime.UTC)
+    return [
+        Update(
+            update_id=i,
+            message=Message(message_id=i, date=now, chat=chat, from_user=user, text="hi"),
+        )
+        for i in range(n)
+    ]
+
+
+async def _run(dp: Dispatcher, bot: Bot, updates: list[Update]) -> float:
+    started = time.perf_counter()
+    for upd in updates:
+        await dp.feed_update(bot, upd)
+    return (time.perf_counter() - started) / len(updates)
+
+
+async def _measure(n: int, rounds: int) -> dict[str, float]:
+    bot = Bot(token="42:BENCH")
+    updates = _updates(n)
+    plain, metered = _dispatcher(False), _dispatcher(True)
+    # Прогрев и чередование раундов — чтобы не мерить дрейф частоты CPU
+    await _run(plain, bot, updates[: n // 10 or 1])
+    await _run(metered, bot, updates[: n // 10 or 1])
+    best_plain = best_metered = float("inf")
+    for _ in range(rounds):
+        best_plain = min(best_plain, await _run(plain, bot, updates))
+        best_metered = min(best_metered, await _run(metered, bot, updates))
+    await bot.session.close()
+    return {"plain": best_plain, "metered": best_metered}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure per-update metrics overhead.")
+    parser.add_argument("--updates", type=int, default=20000, help="Updates per round")
+    parser.add_argument("--rounds", type=int, default=5, help="Rounds (best is reported)")
+    args = parser.parse_args()
+
+    res = asyncio.run(_measure(args.updates, args.rounds))
+    overhead = res["metered"] - res["plain"]
+    print(f"[bench] metrics overhead ({args.updates} updates x {args.rounds} rounds, best)")
+    print(f"  plain    {res['plain'] * 1e6:8.2f} us/update")
+    print(f"  metered  {res['metered'] * 1e6:8.2f} us/update")
+    print(f"  overhead {overhead * 1e6:8.2f} us/update")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+polib vs потоковый read_po + build_mo на синтетическом большом каталоге.
+
+Usage:
+    python -m scripts.bench.po_parse
+    python -m scripts.bench.po_parse --entries 200000
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+
+import polib
+
+from libs.common.po_catalog import build_mo, format_header, read_po
+
+
+def _write_catalog(path: Path, entries: int) -> None:
+    with path.open("w", encoding="utf-8") as fp:
+        fp.write('msgid ""\nmsgstr ""\n"Language: en\\n"\n')
+        fp.write('"Content-Type: text/plain; charset=UTF-8\\n"\n\n')
+        for i in range(entries):
+            if i % 10 == 0:
+                fp.write(f'msgctxt "ctx.{i % 7}"\n')
+            fp.write(f'#: app/module_{i % 50}.py:{i}\nmsgid "key.{i}"\n')
+            fp.write(f'msgstr "Translated value number {i} with \\"quotes\\"\\n"\n\n')
+
+
+def _polib_path(path: Path) -> bytes:
+    """Прежний путь compile_locales: pofile → копия POEntry → to_binary."""
+    src = polib.pofile(str(path))
+    merged = polib.POFile()
+    merged.metadata = dict(src.metadata)
+    for e in src:
+        merged.append(
+            polib.POEntry(
+                msgid=e.msgid,
+                msgstr=e.msgstr,
+                msgctxt=e.msgctxt,
+                msgid_plural=e.msgid_plural,
+                msgstr_plural=dict(e.msgstr_plural) if e.msgid_plural else {},
+                occurrences=list(e.occurrences),
+                comment=e.comment,
+                tcomment=e.tcomment,
+                flags=list(e.flags),
+            )
+        )
+    return merged.to_binary()
+
+
+def _stream_path(path: Path, hash_table: bool = False) -> bytes:
+    cat = read_po(path)
+    return build_mo(format_header(cat.metadata), cat.messages, hash_table=hash_table)
+
+
+def _measure(fn: Callable[[], bytes]) -> tuple[float, int, bytes]:
+    started = time.perf_counter()
+    out = fn()
+    elapsed = time.perf_counter() - started
+    tracemalloc.start()
+    fn()
+    _size, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark .po parsing and .mo writing.")
+    parser.add_argument("--entries", type=int, default=200_000, help="Synthetic catalog size")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "messages.po"
+        _write_catalog(path, args.entries)
+
+        results = {
+            "polib": _measure(lambda: _polib_path(path)),
+            "stream": _measure(lambda: _stream_path(path)),
+            "stream+hash": _measure(lambda: _stream_path(path, hash_table=True)),
+        }
+
+    print(f"[bench] entries={args.entries}")
+    for name, (secs, peak, _out) in results.items():
+        print(f"  {name:<12}: {secs:>8.2f} s  peak={peak / 2**20:>8.1f} MiB")
+    same = results["polib"][2] == results["stream"][2]
+    print(f"  byte-identical to polib: {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Очередь апдейтов с приоритетом под перегрузкой: поток текста идёт быстрее,
+чем бот успевает его обработать, а между ним — нажатия кнопок.
+
+Обработка апдейта эмулируется ожиданием handler-ms (запрос к Bot API),
+одновременно в обработке не больше concurrency апдейтов. Сравниваются:
+    fifo      — aging=0, все апдейты в порядке прихода
+    priority  — callback и команды раньше текста, старение aging-ms
+
+Для каждого класса — медиана и p99 ожидания слота (то, что пользователь
+видит как крутящийся спиннер до начала обработки).
+
+Usage:
+    python -m scripts.bench.priority
+    python -m scripts.bench.priority --text-rate 300 --callback-rate 20 --aging-ms 250
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import datetime
+import random
+import time
+from typing import Any
+
+from aiogram.types import CallbackQuery, Chat, Message, TelegramObject, Update, User
+
+from libs.common.metrics import Registry
+from libs.common.middleware.priority_middleware import CLASSES, PriorityMiddleware
+
+
+DATE = datetime.datetime(2026, 1, 1, tzinfo=datetime.UTC)
+
+
+def _update(update_id: int, kind: str) -> Update:
+    user = User(id=update_id, is_bot=False, first_name="U")
+    if kind == "callback":
+        press = CallbackQuery(id=str(update_id), from_user=user, chat_instance="c", data="q:back")
+        return Update(update_id=update_id, callback_query=press)
+    chat = Chat(id=update_id, type="private")
+    text = "/start" if kind == "command" else "hello"
+    message = Message(message_id=update_id, date=DATE, chat=chat, from_user=user, text=text)
+    return Update(update_id=update_id, message=message)
+
+
+def _quantile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+async def run(args: argparse.Namespace, aging: float) -> dict[str, list[float]]:
+    mw = PriorityMiddleware(args.concurrency, aging=aging, registry=Registry())
+    rand = random.Random(args.seed)
+    waits: dict[str, list[float]] = {name: [] for name in CLASSES}
+    work = args.handler_ms / 1000
+
+    async def handler(event: TelegramObject, data: dict[str, Any]) -> None:
+        waits[data["kind"]].append(time.perf_counter() - data["arrived"])
+        await asyncio.sleep(work)
+
+    rates = {
+        "text": args.text_rate,
+        "callback": args.callback_rate,
+        "command": args.command_rate,
+    }
+    total = sum(rates.values())
+    kinds, weights = list(rates), [rates[k] / total for k in rates]
+    tasks = []
+    deadline = time.perf_counter() + args.seconds
+    update_id = 0
+    while time.perf_counter() < deadline:
+        update_id += 1
+        kind = rand.choices(kinds, weights)[0]
+        data = {"kind": kind, "arrived": time.perf_counter()}
+        tasks.append(asyncio.create_task(mw(handler, _update(update_id, kind), data)))
+        await asyncio.sleep(rand.expovariate(total))
+    await asyncio.gather(*tasks)
+    return waits
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Priority update queue under overload.")
+    parser.add_argument("--seconds", type=float, default=3.0, help="Arrival period")
+    parser.add_argument("--concurrency", type=int, default=8, help="Updates in processing")
+    parser.add_argument("--handler-ms", type=float, default=50, help="Simulated handler time")
+    parser.add_argument("--text-rate", type=float, default=200, help="Text updates/s")
+    parser.add_argument("--callback-rate", type=float, default=10, help="Callback queries/s")
+    parser.add_argument("--command-rate", type=float, default=5, help="Commands/s")
+    parser.add_argument("--aging-ms", type=float, default=500)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    capacity = args.concurrency / (args.handler_ms / 1000)
+    offered = args.text_rate + args.callback_rate + args.command_rate
+    print(f"[priority] offered {offered:g}/s, capacity {capacity:g}/s")
+    print(f"  {'mode':<9} {'class':<9} {'count':>6} {'p50 ms':>9} {'p99 ms':>9}")
+    for mode, aging in (("fifo", 0.0), ("priority", args.aging_ms / 1000)):
+        waits = asyncio.run(run(args, aging))
+        for kind in CLASSES:
+            values = waits[kind]
+            print(
+                f"  {mode:<9} {kind:<9} {len(values):>6} "
+                f"{_quantile(values, 0.5) * 1000:>9.1f} {_quantile(values, 0.99) * 1000:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
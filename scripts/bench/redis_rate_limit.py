@@ -0,0 +1,139 @@
+"""
+Распределённый лимитер против локального FakeRedis с сетевой задержкой:
+несколько узлов (у каждого своё соединение) одновременно проверяют лимит
+для общего набора пользователей.
+
+Сравниваются:
+    local    — bucket в каждом узле, как без RATE_LIMIT_REDIS_URL
+    lease=1  — каждый токен — отдельный round trip (кэшируется только отказ)
+    lease=N  — аренда токенов пачками до N
+
+rt/check — сетевых запросов на проверку; max/user — сколько максимум
+запросов одного пользователя пропущено всеми узлами за одно окно: для
+распределённого лимитера не больше limit, для local — до limit * nodes.
+
+Usage:
+    python -m scripts.bench.redis_rate_limit
+    python -m scripts.bench.redis_rate_limit --nodes 4 --per-window 5000 --latency-ms 1
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from collections import Counter
+
+from libs.common.clock import VirtualClock
+from libs.common.rate_limit import LocalRateLimiter, RateLimitBackend
+from libs.common.redis_rate_limit import RedisRateLimiter
+from scripts.bench.fake_redis import FakeRedis
+
+
+async def _node(
+    backend: RateLimitBackend,
+    users: list[int],
+    window: int,
+    concurrency: int,
+    allowed: Counter[tuple[int, int]],
+    latencies: list[float],
+) -> None:
+    it = iter(users)
+
+    async def worker() -> None:
+        for uid in it:
+            started = time.perf_counter()
+            ok = await backend.acquire(uid)
+            latencies.append(time.perf_counter() - started)
+            if ok:
+                allowed[uid, window] += 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+async def run(args: argparse.Namespace, mode: str, lease_max: int) -> dict[str, float]:
+    server = FakeRedis(latency=args.latency_ms / 1000)
+    url = await server.start()
+    clock = VirtualClock(wall=0.0)
+    backends: list[RateLimitBackend] = [
+        (
+            LocalRateLimiter(args.limit, args.window, clock)
+            if mode == "local"
+            else RedisRateLimiter(
+                url, args.limit, args.window, prefix="bench", lease_max=lease_max, clock=clock
+            )
+        )
+        for _ in range(args.nodes)
+    ]
+    rands = [random.Random(args.seed + n) for n in range(args.nodes)]
+    allowed: Counter[tuple[int, int]] = Counter()
+    latencies: list[float] = []
+
+    started = time.perf_counter()
+    # Окно лимитера идёт по виртуальным часам и сдвигается, только когда все проверки
+    # окна завершены, — так каждый пропуск точно относится к своему окну
+    for window in range(args.windows):
+        batches = [
+            # Zipf-подобно: горстка пользователей пишет намного чаще остальных
+            [1 + int(args.users * rand.random() ** 3) for _ in range(args.per_window)]
+            for rand in rands
+        ]
+        await asyncio.gather(
+            *(
+                _node(backend, users, window, args.concurrency, allowed, latencies)
+                for backend, users in zip(backends, batches, strict=True)
+            )
+        )
+        clock.advance(args.window)
+    elapsed = time.perf_counter() - started
+
+    round_trips = sum(b.client.round_trips for b in backends if isinstance(b, RedisRateLimiter))
+    errors = sum(b.errors for b in backends if isinstance(b, RedisRateLimiter))
+    for backend in backends:
+        await backend.aclose()
+    await server.stop()
+    checks = len(latencies)
+    return {
+        "checks_per_sec": round(checks / elapsed),
+        "rt_per_check": round(round_trips / checks, 3),
+        "p50_ms": round(statistics.median(latencies) * 1000, 3),
+        "p99_ms": round(statistics.quantiles(latencies, n=100)[98] * 1000, 3),
+        "max_allowed_per_user": max(allowed.values(), default=0),
+        "errors": errors,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Distributed rate limiter over a fake Redis.")
+    parser.add_argument("--nodes", type=int, default=4, help="Bot nodes, one connection each")
+    parser.add_argument("--windows", type=int, default=10, help="Limiter windows to run")
+    parser.add_argument("--per-window", type=int, default=1_000, help="Checks per node per window")
+    parser.add_argument("--users", type=int, default=2_000, help="Distinct users")
+    parser.add_argument("--limit", type=int, default=3, help="Requests per user per window")
+    parser.add_argument("--window", type=int, default=1, help="Window, seconds")
+    parser.add_argument("--concurrency", type=int, default=16, help="In-flight updates per node")
+    parser.add_argument("--latency-ms", type=float, default=0.5, help="Fake server latency")
+    parser.add_argument("--lease-max", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(
+        f"  {'mode':<9} {'checks/s':>9} {'rt/check':>9} {'p50 ms':>8} {'p99 ms':>8} "
+        f"{'max/user':>9} {'errors':>7}"
+    )
+    for mode, lease in (("local", 0), ("lease=1", 1), (f"lease={args.lease_max}", args.lease_max)):
+        res = asyncio.run(run(args, "local" if lease == 0 else "redis", lease))
+        print(
+            f"  {mode:<9} {res['checks_per_sec']:>9} {res['rt_per_check']:>9} "
+            f"{res['p50_ms']:>8} {res['p99_ms']:>8} {res['max_allowed_per_user']:>9} "
+            f"{res['errors']:>7}"
+        )
+    print(
+        f"  nodes={args.nodes} limit={args.limit}/{args.window:g}s " f"latency={args.latency_ms} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
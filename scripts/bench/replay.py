@@ -0,0 +1,158 @@
+"""
+Реплей журнала апдейтов (UPDATE_LOG_FILE) в настоящий Dispatcher бота с
+FakeSession вместо Bot API.
+
+Интервалы между апдейтами берутся из журнала и делятся на коэффициент
+ускорения: 1 — как в проде, 10 — в десять раз плотнее, max — без пауз.
+Апдейты запускаются задачами, как при polling, поэтому перегрузка видна
+как рост латентности (от запланированного момента до конца обработки) и
+доли ошибок.
+
+Для проверки без живого журнала --synthesize пишет журнал из сценариев
+e2e-бенчмарка со случайными паузами пользователей.
+
+Usage:
+    python -m scripts.bench.replay logs/updates.jsonl.gz --bot echo
+    python -m scripts.bench.replay LOG --bot questionnaire --speed 1 --speed 10 --speed max
+    python -m scripts.bench.replay /tmp/q.jsonl.gz --bot questionnaire --synthesize 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import math
+import os
+import random
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+
+from libs.common.metrics import REGISTRY
+from libs.common.update_log import UpdateLogWriter, read_update_log
+from scripts.bench.e2e import SCENARIOS, UpdateFactory
+from scripts.bench.fake_session import FakeSession
+
+
+def _outcomes() -> dict[str, float]:
+    """Сумма bot_updates_total по outcome — до и после прогона даёт разницу."""
+    metric = REGISTRY.get("bot_updates")
+    totals: dict[str, float] = {}
+    if metric is None:
+        return totals
+    for (_type, _handler, outcome), child in metric.series():
+        totals[outcome] = totals.get(outcome, 0.0) + child.value
+    return totals
+
+
+def _parse_speed(value: str) -> float:
+    return math.inf if value == "max" else float(value)
+
+
+def synthesize(path: Path, bot: str, users: int, think: float, seed: int) -> int:
+    """Журнал из сценариев e2e: пользователи стартуют вразброс, паузы — экспонента."""
+    _build, script = SCENARIOS[bot]
+    rand = random.Random(seed)
+    factory = UpdateFactory()
+    events: list[tuple[float, dict[str, Any]]] = []
+    start = time.time()
+    for user in range(users):
+        ts = start + rand.uniform(0, think * 10)
+        for step in script(factory, 50_000_000 + user):
+            events.append((ts, step))
+            ts += rand.expovariate(1 / think)
+    events.sort(key=lambda e: e[0])
+    writer = UpdateLogWriter(path, anonymized=False)
+    for ts, raw in events:
+        writer.write(raw, ts=ts)
+    writer.close()
+    return len(events)
+
+
+async def replay(
+    build: Callable[[Bot], Dispatcher], records: list[tuple[float, dict[str, Any]]], speed: float
+) -> dict[str, Any]:
+    bot = Bot(token=os.environ["BOT_TOKEN"], session=FakeSession())
+    dp = build(bot)
+    updates = [Update.model_validate(raw, context={"bot": bot}) for _, raw in records]
+    t0 = records[0][0]
+    latencies: list[float] = []
+    before = _outcomes()
+
+    async def one(update: Update, due: float) -> None:
+        await dp.feed_update(bot, update)
+        latencies.append(time.perf_counter() - due)
+
+    tasks = []
+    started = time.perf_counter()
+    for (ts, _), update in zip(records, updates, strict=True):
+        due = started + (0.0 if math.isinf(speed) else (ts - t0) / speed)
+        delay = due - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(one(update, due)))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+    await bot.session.close()
+
+    after = _outcomes()
+    delta = {k: after.get(k, 0.0) - before.get(k, 0.0) for k in after}
+    latencies.sort()
+    count = len(latencies)
+    return {
+        "speed": "max" if math.isinf(speed) else speed,
+        "updates": count,
+        "seconds": round(elapsed, 3),
+        "updates_per_sec": round(count / elapsed, 1),
+        "p50_ms": round(latencies[count // 2] * 1000, 3),
+        "p99_ms": round(latencies[min(count - 1, int(count * 0.99))] * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3),
+        "error_rate": round(delta.get("error", 0.0) / count, 4),
+        "unhandled_rate": round(delta.get("unhandled", 0.0) / count, 4),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay a recorded update log at scaled speed.")
+    parser.add_argument("log", type=Path, help="UPDATE_LOG_FILE (gzip JSON Lines)")
+    parser.add_argument("--bot", choices=sorted(SCENARIOS), required=True)
+    parser.add_argument(
+        "--speed", type=_parse_speed, action="append", help="Speed-up factor or 'max' (repeatable)"
+    )
+    parser.add_argument("--limit", type=int, default=0, help="Replay only the first N updates")
+    parser.add_argument(
+        "--synthesize", type=int, default=0, metavar="USERS", help="Write a synthetic log first"
+    )
+    parser.add_argument("--think", type=float, default=2.0, help="Mean user pause (synthesize)")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    if args.synthesize:
+        args.log.unlink(missing_ok=True)
+        count = synthesize(args.log, args.bot, args.synthesize, args.think, args.seed)
+        print(f"[replay] synthesized {count} updates -> {args.log}")
+
+    records = list(read_update_log(args.log))
+    if args.limit:
+        records = records[: args.limit]
+    if not records:
+        raise SystemExit(f"[replay] no updates in {args.log}")
+    span = records[-1][0] - records[0][0]
+    print(f"[replay] {len(records)} updates over {span:.1f} s from {args.log}")
+
+    build = SCENARIOS[args.bot][0]
+    print(f"  {'speed':>6} {'upd/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9} {'errors':>7}")
+    for speed in args.speed or [1.0, 10.0, math.inf]:
+        res = asyncio.run(replay(build, records, speed))
+        print(
+            f"  {res['speed']!s:>6} {res['updates_per_sec']:>9} {res['p50_ms']:>9} "
+            f"{res['p99_ms']:>9} {res['max_ms']:>9} {res['error_rate']:>7.2%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
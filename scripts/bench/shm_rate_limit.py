@@ -0,0 +1,120 @@
+"""
+Лимитер в общей памяти под конкуренцией процессов: N воркеров одновременно
+проверяют лимит для общего набора пользователей.
+
+Сравниваются:
+    local  — bucket в каждом процессе, как RateLimitMiddleware без RATE_LIMIT_SHM_PATH
+    shm    — одна SharedRateLimiter-таблица на все процессы
+
+Окно большое (час), поэтому «разрешено на пользователя» показывает фактический
+лимит: у local он умножается на число процессов, у shm должен быть ровно limit.
+Сценарий hot — все процессы бьют в одного пользователя (одно окно блокировки).
+
+Usage:
+    python -m scripts.bench.shm_rate_limit
+    python -m scripts.bench.shm_rate_limit --procs 8 --hits 200000 --users 10000
+"""
+
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import random
+import tempfile
+import time
+from collections import Counter
+from multiprocessing.synchronize import Barrier
+from pathlib import Path
+
+from libs.common.rate_limit import LocalRateLimiter
+from libs.common.shared_rate_limit import SharedRateLimiter
+
+
+WINDOW = 3600.0
+
+
+def _worker(
+    mode: str,
+    path: str,
+    limit: int,
+    users: list[int],
+    barrier: Barrier,
+    queue: multiprocessing.Queue,
+) -> None:
+    limiter = (
+        SharedRateLimiter(path, limit, WINDOW, capacity=65536)
+        if mode == "shm"
+        else LocalRateLimiter(limit, WINDOW)
+    )
+    allowed: Counter[int] = Counter()
+    hit = limiter.hit
+    barrier.wait()
+    started = time.perf_counter()
+    for uid in users:
+        if hit(uid):
+            allowed[uid] += 1
+    elapsed = time.perf_counter() - started
+    queue.put((elapsed, len(users), dict(allowed)))
+
+
+def run(mode: str, procs: int, hits: int, users: int, limit: int, hot: bool, seed: int) -> dict:
+    ctx = multiprocessing.get_context("fork")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "rate-limit")
+        if mode == "shm":
+            SharedRateLimiter(path, limit, WINDOW, capacity=65536).close()
+        barrier = ctx.Barrier(procs)
+        queue: multiprocessing.Queue = ctx.Queue()
+        workers = []
+        for n in range(procs):
+            rand = random.Random(seed + n)
+            # Zipf-подобно: часть пользователей пишет намного чаще остальных
+            ids = [1] * hits if hot else [1 + int(users * rand.random() ** 3) for _ in range(hits)]
+            workers.append(
+                ctx.Process(target=_worker, args=(mode, path, limit, ids, barrier, queue))
+            )
+        for proc in workers:
+            proc.start()
+        results = [queue.get(timeout=600) for _ in workers]
+        for proc in workers:
+            proc.join()
+
+    total: Counter[int] = Counter()
+    for _elapsed, _count, allowed in results:
+        total.update(allowed)
+    slowest = max(elapsed for elapsed, _, _ in results)
+    checks = sum(count for _, count, _ in results)
+    return {
+        "mode": mode,
+        "procs": procs,
+        "checks_per_sec": round(checks / slowest),
+        "ns_per_check": round(slowest / (checks / procs) * 1e9),
+        "max_allowed_per_user": max(total.values(), default=0),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Shared-memory rate limiter under contention.")
+    parser.add_argument("--procs", type=int, default=8, help="Worker processes")
+    parser.add_argument("--hits", type=int, default=100_000, help="Checks per process")
+    parser.add_argument("--users", type=int, default=10_000, help="Distinct users")
+    parser.add_argument("--limit", type=int, default=3, help="Requests per user per window")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    header = f"{'scenario':<8} {'mode':<6} {'procs':>5} {'checks/s':>11} {'ns/chk':>9}"
+    print(f"  {header} {'max/user':>9}")
+    for hot in (False, True):
+        for procs in sorted({1, args.procs}):
+            for mode in ("local", "shm"):
+                res = run(mode, procs, args.hits, args.users, args.limit, hot, args.seed)
+                print(
+                    f"  {'hot' if hot else 'zipf':<8} {mode:<6} {procs:>5} "
+                    f"{res['checks_per_sec']:>11} {res['ns_per_check']:>9} "
+                    f"{res['max_allowed_per_user']:>9}"
+                )
+    print(f"  limit per user: {args.limit}")
+
+
+if __name__ == "__main__":
+    main()
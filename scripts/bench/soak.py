@@ -0,0 +1,210 @@
+"""
+Soak-тест на виртуальных часах: сутки трафика с текучкой пользователей за
+минуты. Окна rate limiter и TTL FSM storage идут по VirtualClock, который
+переводится на время каждого апдейта, поэтому паузы не ждутся.
+
+Модель: пользователи приходят равномерно по всему периоду, проходят
+сценарий e2e-бенчмарка с паузами (экспонента), часть бросает на середине,
+часть возвращается позже. Каждые --sample-min симулированных минут пишутся
+RSS, число записей в bucket лимитера и FSM storage, число активных
+пользователей (были за последний час) и оценка байт на активного.
+
+Прогон падает (exit 1), если после прогрева записи или байты на активного
+пользователя во второй половине заметно выше, чем в первой, или RSS вырос
+больше допустимого — то есть память растёт с числом когда-либо виденных
+пользователей, а не активных.
+
+Usage:
+    python -m scripts.bench.soak
+    python -m scripts.bench.soak --bot questionnaire --days 2 --users-per-day 20000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import os
+import random
+import resource
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+
+# До импорта ботов: настройки кэшируются. Лимитер — боевой; TTL FSM короче
+# прода, чтобы за сутки прошло много циклов истечения
+os.environ.setdefault("BOT_TOKEN", "42:SOAK")
+os.environ.setdefault("RATE_LIMIT_PER_USER", "3")
+os.environ.setdefault("FSM_TTL_SEC", "3600")
+
+from aiogram import Bot
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.types import Update
+
+from libs.common.clock import VirtualClock
+from libs.common.memory import measure
+from libs.common.middleware.rate_limit_middleware import RateLimitMiddleware
+from scripts.bench.e2e import SCENARIOS, UpdateFactory
+from scripts.bench.fake_session import FakeSession
+
+
+DAY = 86400.0
+
+# Активный пользователь — был хотя бы раз за последний час
+ACTIVE_WINDOW = 3600.0
+
+Event = tuple[float, int, dict[str, Any]]
+
+
+def rss_mb() -> float:
+    """Текущий RSS; где нет /proc — пиковый (ru_maxrss)."""
+    try:
+        pages = int(Path("/proc/self/statm").read_text().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def make_events(
+    bot: str, days: float, users_per_day: int, think: float, abandon: float, seed: int
+) -> list[Event]:
+    _build, script = SCENARIOS[bot]
+    rand = random.Random(seed)
+    factory = UpdateFactory()
+    horizon = days * DAY
+    events: list[Event] = []
+    seen: list[int] = []
+    for n in range(int(days * users_per_day)):
+        returning = seen and rand.random() < 0.2
+        uid = rand.choice(seen) if returning else 70_000_000 + n
+        if not returning:
+            seen.append(uid)
+        steps = script(factory, uid)
+        if rand.random() < abandon:
+            steps = steps[: rand.randint(1, max(1, len(steps) - 1))]
+        ts = rand.uniform(0, horizon)
+        for raw in steps:
+            events.append((ts, uid, raw))
+            ts += rand.expovariate(1 / think)
+    events.sort(key=lambda e: e[0])
+    return events
+
+
+async def run(args: argparse.Namespace, bot_name: str) -> list[dict[str, float]]:
+    build, _script = SCENARIOS[bot_name]
+    clock = VirtualClock()
+    bot = Bot(token=os.environ["BOT_TOKEN"], session=FakeSession())
+    dp = build(bot, clock)  # type: ignore[call-arg]
+    limiter = next(mw for mw in dp.update.middleware if isinstance(mw, RateLimitMiddleware))
+    storage = dp.fsm.storage
+    records = storage.storage if isinstance(storage, MemoryStorage) else {}
+
+    events = make_events(
+        bot_name, args.days, args.users_per_day, args.think, args.abandon, args.seed
+    )
+    last_seen: dict[int, float] = {}
+    samples: list[dict[str, float]] = []
+    every = args.sample_min * 60
+    next_sample = every
+
+    def sample(now: float) -> None:
+        gc.collect()
+        active = sum(1 for ts in last_seen.values() if now - ts <= ACTIVE_WINDOW)
+        size = (
+            measure("fsm", records).estimated_bytes
+            + measure("bucket", limiter.bucket).estimated_bytes
+        )
+        entries = len(records) + len(limiter.bucket)
+        samples.append(
+            {
+                "hours": round(now / 3600, 2),
+                "rss_mb": round(rss_mb(), 1),
+                "bucket": len(limiter.bucket),
+                "fsm": len(records),
+                "active": active,
+                "seen": len(last_seen),
+                "entries_per_active": round(entries / max(active, 1), 3),
+                "bytes_per_active": round(size / max(active, 1), 1),
+            }
+        )
+
+    started = time.perf_counter()
+    for ts, uid, raw in events:
+        while next_sample <= ts:
+            clock.set(next_sample)
+            sample(next_sample)
+            next_sample += every
+        clock.set(ts)
+        await dp.feed_update(bot, Update.model_validate(raw, context={"bot": bot}))
+        last_seen[uid] = ts
+    await bot.session.close()
+    print(
+        f"[soak] {bot_name}: {len(events)} updates, {args.days} simulated day(s) "
+        f"in {time.perf_counter() - started:.1f} s"
+    )
+    return samples
+
+
+def verdict(
+    samples: list[dict[str, float]], warmup_h: float, tolerance: float, rss_slack: float
+) -> list[str]:
+    """Сравнение второй половины после прогрева с первой; пустой список — ок."""
+    steady = [s for s in samples if s["hours"] >= warmup_h]
+    if len(steady) < 4:
+        return [f"too few samples after {warmup_h} h warmup: {len(steady)}"]
+    half = len(steady) // 2
+    first, second = steady[:half], steady[half:]
+    failures = []
+    for key in ("entries_per_active", "bytes_per_active"):
+        before = statistics.fmean(s[key] for s in first)
+        after = statistics.fmean(s[key] for s in second)
+        if after > before * tolerance + 1e-9:
+            failures.append(f"{key} grows: {before:.2f} -> {after:.2f} (> x{tolerance})")
+    rss_growth = steady[-1]["rss_mb"] - steady[0]["rss_mb"]
+    if rss_growth > rss_slack:
+        failures.append(f"RSS grew {rss_growth:.1f} MB after warmup (> {rss_slack} MB)")
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Virtual-clock soak test for memory growth.")
+    parser.add_argument("--bot", choices=sorted(SCENARIOS), action="append", help="Bot(s) to soak")
+    parser.add_argument("--days", type=float, default=1.0, help="Simulated days")
+    parser.add_argument("--users-per-day", type=int, default=5000, help="Sessions per day")
+    parser.add_argument("--think", type=float, default=20.0, help="Mean pause between steps, s")
+    parser.add_argument("--abandon", type=float, default=0.3, help="Share of abandoned sessions")
+    parser.add_argument("--sample-min", type=float, default=30.0, help="Simulated sampling period")
+    parser.add_argument("--warmup-h", type=float, default=3.0, help="Ignore the first N hours")
+    parser.add_argument("--tolerance", type=float, default=1.25, help="Allowed growth factor")
+    parser.add_argument("--rss-slack-mb", type=float, default=32.0, help="Allowed RSS growth")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    failed = False
+    for name in args.bot or sorted(SCENARIOS):
+        samples = asyncio.run(run(args, name))
+        print(
+            f"  {'hours':>6} {'rss_mb':>7} {'bucket':>7} {'fsm':>7} {'active':>7} {'seen':>7} "
+            f"{'ent/act':>8} {'B/act':>8}"
+        )
+        for s in samples[:: max(1, len(samples) // 12)]:
+            print(
+                f"  {s['hours']:>6} {s['rss_mb']:>7} {s['bucket']:>7} {s['fsm']:>7} "
+                f"{s['active']:>7} {s['seen']:>7} {s['entries_per_active']:>8} "
+                f"{s['bytes_per_active']:>8}"
+            )
+        failures = verdict(samples, args.warmup_h, args.tolerance, args.rss_slack_mb)
+        for failure in failures:
+            print(f"[soak] FAIL {name}: {failure}")
+        if not failures:
+            print(f"[soak] OK {name}: memory per active user is bounded")
+        failed = failed or bool(failures)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,38 +1,74 @@
 """
-Compile merged locales (.po → .mo) into .i18n_cache.
+Compile layered locales (.po → .mo) into .i18n_cache.
+
+Layout:
+    .i18n_cache/global/locales/<lang>/LC_MESSAGES/messages.mo  — общий слой (locales/*.po)
+    .i18n_cache/<bot>/locales/<lang>/LC_MESSAGES/messages.mo   — оверлей бота (только его .po)
+
+В рантайме общий слой грузится один раз и подключается оверлеям как fallback.
+
+Сборка инкрементальная: в .i18n_cache/<layer>/manifest.json хранятся хэши входных
+.po по языкам, неизменившиеся (layer, lang) пропускаются. Боты собираются в пуле
+процессов, .mo пишутся через временный файл + os.replace (атомарно для читателей).
+
+--watch опрашивает mtime всех .po (без inotify) и пересобирает только изменившиеся
+слои; запущенные боты с I18N_RELOAD_SEC > 0 подхватывают их по манифесту.
 
 Usage:
     python scripts/compile_locales.py --all
     python scripts/compile_locales.py --bot echo_bot
     python scripts/compile_locales.py --all --keep-po
+    python scripts/compile_locales.py --all --force --jobs 4
+    python scripts/compile_locales.py --watch --interval 1
 """
 
 from __future__ import annotations
 
 import argparse
+import hashlib
+import json
+import os
 import shutil
+import sys
+import time
 from collections import defaultdict
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import suppress
 from pathlib import Path
 
-import polib
-
 
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
 BOTS_DIR = PROJECT_ROOT / "bots"
+# При запуске как `python scripts/compile_locales.py` корня проекта нет в sys.path
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from libs.common.po_catalog import (  # noqa: E402
+    PoCatalog,
+    build_mo,
+    build_po,
+    format_header,
+    layer_metadata,
+    merge_po,
+    write_bytes,
+)
+
+
 DOMAIN = "messages"
 CACHE_DIR = ".i18n_cache"
 LOCALES_DIR = "locales"
 DEFAULT_LANGUAGE = "en"
 LC_MESSAGES = "LC_MESSAGES"
-
-# Дефолты для plural-forms
-PLURAL_DEFAULTS = {
-    "en": "nplurals=2; plural=(n != 1);",
-    "ru": "nplurals=3; plural=(n%10==1 && n%100!=11 ? 0 : n%10>=2 && n%10<=4 && (n%100<10 || n%100>=20) ? 1 : 2);",  # noqa: E501
-}
+SHARED_LAYER = "global"
+MANIFEST = "manifest.json"
+# Меняем при изменении формата вывода — старые манифесты станут невалидными
+MANIFEST_VERSION = 1
 
 # Глобальный переключатель: сохранять ли .po вместе с .mo
 KEEP_PO = False
+# Принудительная пересборка без учёта манифеста
+FORCE = False
 
 
 def _lang_from_po(po_path: Path) -> str:
@@ -45,115 +81,135 @@ def _lang_from_po(po_path: Path) -> str:
 
 
 def _scan_po(bot_name: str) -> dict[str, list[Path]]:
-    """Группировка всех .po по языку (global → bot)."""
+    """Группировка .po слоя по языку: global → только общие, иначе → только бота."""
     by_lang: dict[str, list[Path]] = defaultdict(list)
 
-    def add_dir(loc_dir: Path) -> None:
-        if loc_dir.is_dir():
-            for po in sorted(loc_dir.rglob("*.po")):
-                lang = _lang_from_po(po)
-                by_lang[lang].append(po)
+    if bot_name == SHARED_LAYER:
+        loc_dir = PROJECT_ROOT / LOCALES_DIR
+    else:
+        loc_dir = PROJECT_ROOT / "bots" / bot_name / LOCALES_DIR
 
-    add_dir(PROJECT_ROOT / LOCALES_DIR)
-    if bot_name != "global":
-        add_dir(PROJECT_ROOT / "bots" / bot_name / LOCALES_DIR)
+    if loc_dir.is_dir():
+        for po in sorted(loc_dir.rglob("*.po")):
+            lang = _lang_from_po(po)
+            by_lang[lang].append(po)
     return by_lang
 
 
-def _merge_entries(lang: str, po_list: list[Path]) -> polib.POFile:
-    """Мержим global+bot в один POFile (бот перекрывает)."""
-    merged = polib.POFile()
-
-    if po_list:
-        first_hdr = polib.pofile(str(po_list[0])).metadata
-        merged.metadata = {
-            "Project-Id-Version": first_hdr.get("Project-Id-Version", "i18n"),
-            "Report-Msgid-Bugs-To": first_hdr.get("Report-Msgid-Bugs-To", ""),
-            "POT-Creation-Date": first_hdr.get("POT-Creation-Date", ""),
-            "PO-Revision-Date": first_hdr.get("PO-Revision-Date", ""),
-            "Last-Translator": first_hdr.get("Last-Translator", ""),
-            "Language-Team": first_hdr.get("Language-Team", ""),
-            "Language": lang,
-            "MIME-Version": "1.0",
-            "Content-Type": "text/plain; charset=UTF-8",
-            "Content-Transfer-Encoding": "8bit",
-            "Plural-Forms": first_hdr.get("Plural-Forms")
-            or PLURAL_DEFAULTS.get(lang, PLURAL_DEFAULTS[DEFAULT_LANGUAGE]),
-        }
-    else:
-        merged.metadata = {
-            "Project-Id-Version": "i18n",
-            "Language": lang,
-            "MIME-Version": "1.0",
-            "Content-Type": "text/plain; charset=UTF-8",
-            "Content-Transfer-Encoding": "8bit",
-            "Plural-Forms": PLURAL_DEFAULTS.get(lang, PLURAL_DEFAULTS[DEFAULT_LANGUAGE]),
-        }
-
-    def key(entry: polib.POEntry) -> tuple[str | None, str, bool]:
-        return entry.msgctxt, entry.msgid, bool(entry.msgid_plural)
-
-    index: dict[tuple[str | None, str, bool], polib.POEntry] = {}
-    for po_path in po_list:
-        cat = polib.pofile(str(po_path))
-        for e in cat:
-            new_e = polib.POEntry(
-                msgid=e.msgid,
-                msgstr=e.msgstr,
-                msgctxt=e.msgctxt,
-                msgid_plural=e.msgid_plural,
-                msgstr_plural=dict(e.msgstr_plural) if e.msgid_plural else {},
-                occurrences=list(e.occurrences),
-                comment=e.comment,
-                tcomment=e.tcomment,
-                flags=list(e.flags),
-            )
-            index[key(e)] = new_e
-
-    for e in index.values():
-        merged.append(e)
-
+def _merge_entries(lang: str, po_list: list[Path]) -> PoCatalog:
+    """Мержим .po одного слоя в один каталог (последующие файлы перекрывают)."""
+    merged = merge_po(po_list)
+    merged.metadata = layer_metadata(lang, merged.metadata if po_list else None)
     return merged
 
 
-def _emit_files(lang_dir: Path, merged: polib.POFile) -> Path:
+def _atomic_write(target: Path, write: Callable[[str], object]) -> None:
+    """Пишем во временный файл рядом и подменяем через os.replace."""
+    tmp = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+    try:
+        write(str(tmp))
+        os.replace(tmp, target)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def _emit_files(lang_dir: Path, merged: PoCatalog) -> Path:
     """Сохраняем .mo (+ опционально .po)."""
     lang_dir.mkdir(parents=True, exist_ok=True)
     po_path = lang_dir / f"{DOMAIN}.po"
     mo_path = lang_dir / f"{DOMAIN}.mo"
+    header = format_header(merged.metadata)
 
     if KEEP_PO:
-        merged.save(str(po_path))
-    merged.save_as_mofile(str(mo_path))
+        po_text = build_po(header, merged.messages).encode("utf-8")
+        _atomic_write(po_path, lambda tmp: write_bytes(tmp, po_text))
+    mo_data = build_mo(header, merged.messages)
+    _atomic_write(mo_path, lambda tmp: write_bytes(tmp, mo_data))
     return mo_path
 
 
-def _compile_locales(bot_name: str) -> None:
-    cache_base = PROJECT_ROOT / CACHE_DIR / bot_name / LOCALES_DIR
+def _inputs_hash(po_files: list[Path]) -> str:
+    """Хэш содержимого входов (layer, lang) + параметров, влияющих на вывод."""
+    h = hashlib.sha256(f"v{MANIFEST_VERSION};keep_po={KEEP_PO}".encode())
+    for po in po_files:
+        h.update(b"\0" + str(po.relative_to(PROJECT_ROOT)).encode() + b"\0")
+        h.update(po.read_bytes())
+    return h.hexdigest()
+
+
+def _read_manifest(path: Path) -> dict[str, str]:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _write_manifest(path: Path, manifest: dict[str, str]) -> None:
+    text = json.dumps(manifest, indent=2, sort_keys=True)
+    _atomic_write(path, lambda tmp: Path(tmp).write_text(text, encoding="utf-8"))
+
+
+def _compile_locales(bot_name: str) -> int:
+    """
+    Компилирует один слой: общий (bot_name == "global") или оверлей бота.
+
+    Оверлей содержит только строки бота; для языков, которые есть лишь в общем
+    слое, пишется пустой каталог с заголовком, чтобы бот видел все языки.
+    Языки, чьи входы не изменились с прошлой сборки, пропускаются.
+    Возвращает число пересобранных .mo.
+    """
     bot_cache_root = PROJECT_ROOT / CACHE_DIR / bot_name
-    if bot_cache_root.exists():
-        shutil.rmtree(bot_cache_root)
+    cache_base = bot_cache_root / LOCALES_DIR
     cache_base.mkdir(parents=True, exist_ok=True)
+    manifest_path = bot_cache_root / MANIFEST
+    old_manifest = {} if FORCE else _read_manifest(manifest_path)
 
     by_lang = _scan_po(bot_name)
+    if bot_name != SHARED_LAYER:
+        for lang in _scan_po(SHARED_LAYER):
+            by_lang.setdefault(lang, [])
+
+    manifest: dict[str, str] = {}
     compiled = 0
     for lang, po_files in by_lang.items():
         lang_dir = cache_base / lang / LC_MESSAGES
+        digest = _inputs_hash(po_files)
+        manifest[lang] = digest
+        if old_manifest.get(lang) == digest and (lang_dir / f"{DOMAIN}.mo").exists():
+            continue
         merged = _merge_entries(lang, po_files)
         _emit_files(lang_dir, merged)
         compiled += 1
 
+    # языки, которых больше нет во входах, убираем из кэша
+    for stale in cache_base.iterdir():
+        if stale.is_dir() and stale.name not in by_lang:
+            shutil.rmtree(stale)
+
+    _write_manifest(manifest_path, manifest)
+
+    layer = "shared" if bot_name == SHARED_LAYER else "overlay"
     print(
-        f"[i18n] bot={bot_name} merged {len(by_lang)} "
-        f"lang(s) into {bot_cache_root} (compiled {compiled} .mo)"
+        f"[i18n] bot={bot_name} {layer} layer: {len(by_lang)} "
+        f"lang(s) into {bot_cache_root} (compiled {compiled} .mo, "
+        f"{len(by_lang) - compiled} up to date)"
     )
+    return compiled
+
+
+def _compile_job(job: tuple[Path, str, bool, bool]) -> int:
+    """Точка входа воркера пула: переносим настройки родителя и собираем оверлей."""
+    global PROJECT_ROOT, KEEP_PO, FORCE
+    PROJECT_ROOT, bot_name, KEEP_PO, FORCE = job
+    return _compile_locales(bot_name)
 
 
 def _available_bots() -> list[str]:
     return sorted([p.name for p in BOTS_DIR.iterdir() if p.is_dir() and p.name != "__pycache__"])
 
 
-def _compile_all_bots(skip_global: bool = True) -> None:
+def _compile_all_bots(skip_global: bool = True, jobs: int | None = None) -> None:
     if not BOTS_DIR.exists():
         print("⚠️  No ./bots directory found — nothing to compile.")
         return
@@ -161,32 +217,105 @@ def _compile_all_bots(skip_global: bool = True) -> None:
     if not bots:
         print("⚠️  No bots found under ./bots — nothing to compile.")
         return
-    for bot in bots:
-        if skip_global and bot == "global":
+    # Общий слой собирается всегда и один раз; skip_global оставлен для совместимости CLI
+    _compile_locales(SHARED_LAYER)
+    bots = [bot for bot in bots if bot != SHARED_LAYER]
+
+    workers = min(jobs or os.cpu_count() or 1, len(bots))
+    if workers <= 1:
+        for bot in bots:
+            _compile_locales(bot)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(_compile_job, [(PROJECT_ROOT, bot, KEEP_PO, FORCE) for bot in bots]))
+
+
+def _po_snapshot() -> dict[Path, tuple[int, int]]:
+    """(mtime_ns, size) всех .po — только stat, содержимое не читаем."""
+    dirs = [PROJECT_ROOT / LOCALES_DIR]
+    if BOTS_DIR.is_dir():
+        dirs += sorted(BOTS_DIR.glob(f"*/{LOCALES_DIR}"))
+    snapshot: dict[Path, tuple[int, int]] = {}
+    for loc_dir in dirs:
+        for po in loc_dir.rglob("*.po"):
+            try:
+                st = po.stat()
+            except FileNotFoundError:
+                continue  # атомарное сохранение редактором: файл подменяют прямо сейчас
+            snapshot[po] = (st.st_mtime_ns, st.st_size)
+    return snapshot
+
+
+def _layer_of(po_path: Path) -> str:
+    rel = po_path.relative_to(PROJECT_ROOT).parts
+    return rel[1] if rel[0] == BOTS_DIR.name else SHARED_LAYER
+
+
+def _watch(interval: float, jobs: int | None = None, cycles: int | None = None) -> None:
+    """
+    Цикл --watch: полная (инкрементальная) сборка, затем опрос mtime раз в interval.
+
+    Изменившиеся слои пересобираются через _compile_locales — манифест
+    пропускает языки, чьи .po не менялись. Если поменялся общий слой,
+    перепроверяются и оверлеи: у них мог появиться/пропасть язык.
+    """
+    _compile_all_bots(jobs=jobs)
+    previous = _po_snapshot()
+    print(f"[i18n] watching {len(previous)} .po file(s) every {interval}s")
+
+    done = 0
+    while cycles is None or done < cycles:
+        done += 1
+        time.sleep(interval)
+        current = _po_snapshot()
+        changed = {p for p in previous.keys() | current.keys() if previous.get(p) != current.get(p)}
+        previous = current
+        if not changed:
             continue
-        _compile_locales(bot)
+
+        layers = {_layer_of(p) for p in changed}
+        if SHARED_LAYER in layers:
+            _compile_locales(SHARED_LAYER)
+            layers = set(_available_bots()) - {SHARED_LAYER}
+        for layer in sorted(layers):
+            if (BOTS_DIR / layer).is_dir():
+                _compile_locales(layer)
 
 
 def main() -> None:
-    parser = argparse.ArgumentParser(description="Compile merged locales into .i18n_cache.")
+    parser = argparse.ArgumentParser(description="Compile layered locales into .i18n_cache.")
     g = parser.add_mutually_exclusive_group()
     g.add_argument("--all", action="store_true", help="Compile locales for all bots under ./bots")
     g.add_argument("--bot", type=str, help="Compile locales for a single bot (e.g. --bot echo_bot)")
-    parser.add_argument("--include-global", action="store_true", help="Also compile for 'global'")
+    parser.add_argument(
+        "--include-global",
+        action="store_true",
+        help="Deprecated: the shared 'global' layer is always compiled",
+    )
     parser.add_argument("--keep-po", action="store_true", help="Also write merged .po into cache")
+    parser.add_argument("--force", action="store_true", help="Ignore manifest, rebuild everything")
+    parser.add_argument("--jobs", type=int, default=None, help="Worker processes (default: CPUs)")
+    parser.add_argument("--watch", action="store_true", help="Poll .po files and recompile changes")
+    parser.add_argument("--interval", type=float, default=1.0, help="Polling period for --watch")
     args = parser.parse_args()
 
-    global KEEP_PO
+    global KEEP_PO, FORCE
     KEEP_PO = args.keep_po
+    FORCE = args.force
 
-    if args.bot:
+    if args.watch:
+        with suppress(KeyboardInterrupt):
+            _watch(args.interval, jobs=args.jobs)
+    elif args.bot:
         available_bots = _available_bots()
         if args.bot not in available_bots:
             print(f"❌ Unknown bot: {args.bot}. Available bots: {', '.join(available_bots)}")
             exit(1)
+        _compile_locales(SHARED_LAYER)
         _compile_locales(args.bot)
     else:
-        _compile_all_bots(skip_global=not args.include_global)
+        _compile_all_bots(skip_global=not args.include_global, jobs=args.jobs)
 
 
 if __name__ == "__main__":
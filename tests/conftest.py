@@ -13,6 +13,7 @@ class MockLogger:
         self.debug_calls: list[tuple[tuple[Any, ...], dict[str, Any]]] = []
         self.warning_calls: list[tuple[tuple[Any, ...], dict[str, Any]]] = []
         self.exception_calls: list[tuple[tuple[Any, ...], dict[str, Any]]] = []
+        self.error_calls: list[tuple[tuple[Any, ...], dict[str, Any]]] = []
 
     def debug(self, *a: Any, **k: Any) -> None:  # noqa: ANN401
         self.debug_calls.append((a, k))
@@ -23,6 +24,9 @@ class MockLogger:
     def exception(self, *a: Any, **k: Any) -> None:  # noqa: ANN401
         self.exception_calls.append((a, k))
 
+    def error(self, *a: Any, **k: Any) -> None:  # noqa: ANN401
+        self.error_calls.append((a, k))
+
 
 @pytest.fixture(autouse=True)
 def setup_logging() -> MockLogger:
@@ -104,8 +108,9 @@ class FakeUpdate:
 
 
 class FakeErrorEvent:
-    def __init__(self, update: FakeUpdate | None) -> None:
+    def __init__(self, update: FakeUpdate | None, exception: Exception | None = None) -> None:
         self.update: FakeUpdate | None = update
+        self.exception: Exception | None = exception
 
 
 HandlerType = Callable[[FakeErrorEvent, Exception], "Any"]
@@ -157,3 +162,13 @@ def stub_aiogram(monkeypatch: MonkeyPatch) -> None:
     monkeypatch.setitem(sys.modules, "aiogram", aio_mod)
     monkeypatch.setitem(sys.modules, "aiogram.exceptions", exc_mod)
     monkeypatch.setitem(sys.modules, "aiogram.types", types_mod)
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    group = parser.getgroup("perf", "perf regression gate (tests/perf)")
+    group.addoption(
+        "--perf", action="store_true", help="measure calibrated time and compare it to baseline"
+    )
+    group.addoption(
+        "--perf-update", action="store_true", help="rewrite perf baseline (implies --perf)"
+    )
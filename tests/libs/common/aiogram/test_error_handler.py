@@ -3,11 +3,13 @@ from __future__ import annotations
 import asyncio
 import importlib
 from collections.abc import Awaitable, Callable
+from pathlib import Path
 from types import ModuleType
 from typing import Any
 
 import pytest
 
+from libs.common.flight_recorder import FlightRecorder
 from tests.conftest import (
     FakeCallbackQuery,
     FakeDispatcher,
@@ -25,13 +27,17 @@ ErrorHandler = Callable[[], tuple[ModuleType, FakeDispatcher, HandlerType, Any]]
 
 
 @pytest.fixture
-def import_module(monkeypatch: pytest.MonkeyPatch, setup_logging: MockLogger) -> ErrorHandler:
+def import_module(
+    monkeypatch: pytest.MonkeyPatch, setup_logging: MockLogger, tmp_path: Path
+) -> ErrorHandler:
 
     def _import() -> tuple[ModuleType, FakeDispatcher, HandlerType, Any]:
         module = importlib.import_module("libs.common.aiogram.error_handler")
 
         monkeypatch.setattr(module, "setup_logging", lambda _: setup_logging, raising=True)
         monkeypatch.setattr(module, "_", lambda s, *a, **kw: s, raising=True)
+        recorder = FlightRecorder("bot", size=8, dump_dir=tmp_path)
+        monkeypatch.setattr(module, "get_flight_recorder", lambda _: recorder, raising=True)
 
         from aiogram import Dispatcher
 
@@ -126,6 +132,16 @@ async def test_forbidden_blocked_no_fallback(
     assert event_with_message.update.message.answered == []
 
 
+@pytest.mark.asyncio
+async def test_exception_taken_from_event(import_module: ErrorHandler) -> None:
+    # так зовёт aiogram: исключение приходит только внутри ErrorEvent
+    _, __, handler, logger = import_module()
+    event = FakeErrorEvent(FakeUpdate(message=FakeMessage()), RuntimeError("boom"))
+    ok: bool = await handler(event)  # type: ignore[call-arg]
+    assert ok is True
+    assert any("Unhandled error" in str(args[0]) for args, _ in logger.exception_calls)
+
+
 @pytest.mark.asyncio
 async def test_unhandled_with_message_fallback_sent(
     import_module: ErrorHandler, event_with_message: FakeErrorEvent
@@ -247,3 +263,31 @@ async def test_unhandled_fallback_answer_raises_is_suppressed(
     ok: bool = await handler(event_with_message, RuntimeError("normal error"))
     assert ok is True
     assert any("Unhandled error" in str(args[0]) for args, _ in logger.exception_calls)
+
+
+@pytest.mark.asyncio
+async def test_unhandled_error_dumps_flight_recorder(
+    import_module: ErrorHandler, event_with_message: FakeErrorEvent, tmp_path: Path
+) -> None:
+    module, __, handler, logger = import_module()
+    recorder = module.get_flight_recorder("bot")
+    recorder.record_update(10, "message", "cmd_start", 0.002, "error")
+    recorder.dump(reason="signal")
+
+    await handler(event_with_message, RuntimeError("boom"))
+    await handler(event_with_message, RuntimeError("boom again"))
+
+    dumps = list(tmp_path.glob("flight-bot-*-error-*.json"))
+    assert len(dumps) == 1, "Повторная ошибка в пределах интервала не пишет новый снимок"
+    assert '"cmd_start"' in dumps[0].read_text(encoding="utf-8")
+    assert len(logger.error_calls) == 1, "Пропущенный снимок не логируется старым путём"
+    assert any("snapshot skipped" in str(args[0]) for args, _ in logger.warning_calls)
+
+
+@pytest.mark.asyncio
+async def test_handled_errors_do_not_dump(
+    import_module: ErrorHandler, event_with_message: FakeErrorEvent, tmp_path: Path
+) -> None:
+    module, __, handler, ___ = import_module()
+    await handler(event_with_message, module.TelegramBadRequest("bad"))
+    assert list(tmp_path.glob("flight-*.json")) == []
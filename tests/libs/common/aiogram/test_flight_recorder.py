@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+from pathlib import Path
+
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+from aiogram import Dispatcher
+
+from libs.common.aiogram import flight_recorder as afr
+from libs.common.flight_recorder import FlightRecorder
+from tests.conftest import MockLogger
+
+
+@pytest.mark.skipif(afr.DUMP_SIGNAL is None, reason="no SIGUSR1 on this platform")
+async def test_signal_dump_runs_off_the_loop(
+    monkeypatch: MonkeyPatch, setup_logging: MockLogger, tmp_path: Path
+) -> None:
+    recorder = FlightRecorder("bot", size=4, dump_dir=tmp_path)
+    threads: list[threading.Thread] = []
+    real_dump = recorder.dump
+
+    def dump(reason: str, min_interval: float = 0.0) -> Path | None:
+        threads.append(threading.current_thread())
+        return real_dump(reason, min_interval)
+
+    monkeypatch.setattr(recorder, "dump", dump)
+    monkeypatch.setattr(afr, "get_flight_recorder", lambda _: recorder)
+    monkeypatch.setattr(afr, "setup_logging", lambda _: setup_logging)
+    monkeypatch.setattr(afr, "_install_crash_hooks", lambda _: None)
+    dp = Dispatcher()
+    afr.setup_flight_recorder("bot", dp)
+
+    await dp.emit_startup()
+    try:
+        assert afr.DUMP_SIGNAL is not None
+        os.kill(os.getpid(), afr.DUMP_SIGNAL)
+        for _ in range(100):
+            if setup_logging.warning_calls:
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        await dp.emit_shutdown()
+
+    assert threads
+    assert threads[0] is not threading.main_thread()
+    assert len(list(tmp_path.glob("flight-bot-*-signal-*.json"))) == 1
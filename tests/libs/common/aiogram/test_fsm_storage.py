@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+from aiogram.fsm.storage.base import StorageKey
+
+from libs.common.aiogram.fsm_storage import ExpiringMemoryStorage
+from libs.common.clock import VirtualClock
+
+
+def _key(user_id: int) -> StorageKey:
+    return StorageKey(bot_id=42, chat_id=user_id, user_id=user_id)
+
+
+async def test_reads_do_not_create_records() -> None:
+    storage = ExpiringMemoryStorage(ttl=60, clock=VirtualClock())
+    assert await storage.get_state(_key(1)) is None
+    assert await storage.get_data(_key(1)) == {}
+    assert await storage.get_value(_key(1), "name", "-") == "-"
+    assert len(storage.storage) == 0
+
+
+async def test_clear_removes_record() -> None:
+    storage = ExpiringMemoryStorage(ttl=60, clock=VirtualClock())
+    await storage.set_state(_key(1), "Form:name")
+    await storage.set_data(_key(1), {"name": "Bob"})
+    assert await storage.get_value(_key(1), "name") == "Bob"
+
+    await storage.set_state(_key(1), None)
+    await storage.set_data(_key(1), {})
+    assert len(storage.storage) == 0
+
+
+async def test_record_expires_after_ttl_since_last_access() -> None:
+    clock = VirtualClock()
+    storage = ExpiringMemoryStorage(ttl=60, clock=clock)
+    await storage.set_state(_key(1), "Form:age")
+
+    clock.advance(50)
+    assert await storage.get_state(_key(1)) == "Form:age"  # обращение продлевает
+    clock.advance(50)
+    assert await storage.get_state(_key(1)) == "Form:age"
+    clock.advance(61)
+    assert await storage.get_state(_key(1)) is None
+    assert len(storage.storage) == 0
+
+
+async def test_sweep_drops_abandoned_records() -> None:
+    clock = VirtualClock()
+    storage = ExpiringMemoryStorage(ttl=60, clock=clock)
+    for user_id in range(10):
+        await storage.set_state(_key(user_id), "Form:name")
+    clock.advance(30)
+    await storage.set_state(_key(0), "Form:age")
+
+    clock.advance(40)
+    assert storage.sweep() == 9
+    assert list(storage.storage) == [_key(0)]
@@ -8,9 +8,19 @@ from pathlib import Path
 from typing import Any
 
 import pytest
+from _pytest.monkeypatch import MonkeyPatch
 from mypy.moduleinspect import ModuleType
 
 
+# Настоящие модули до подмен install_fake_*: фикстура ниже восстанавливает
+# sys.modules на входе в тест, а не на выходе, и фейки переживают тест
+_REAL_MODULES = {
+    name: module
+    for name, module in sys.modules.items()
+    if name.split(".")[0] in ("aiogram", "libs")
+}
+
+
 class DummyI18n:
     def __init__(self, *, path: str, default_locale: str, domain: str) -> None:
         self.path = path
@@ -178,3 +188,169 @@ def test___all___exports() -> None:
     assert set(i18n.__all__) == expected
     for name in expected:
         assert hasattr(i18n, name)
+
+
+def _write_mo(root: Path, lang: str, entries: dict[str, str]) -> None:
+    import polib
+
+    po = polib.POFile()
+    po.metadata = {"Content-Type": "text/plain; charset=UTF-8", "Language": lang}
+    for msgid, msgstr in entries.items():
+        po.append(polib.POEntry(msgid=msgid, msgstr=msgstr))
+    lang_dir = root / lang / "LC_MESSAGES"
+    lang_dir.mkdir(parents=True, exist_ok=True)
+    po.save_as_mofile(str(lang_dir / "messages.mo"))
+
+
+def test_layered_i18n_overlay_falls_back_to_shared(tmp_path: Path) -> None:
+    install_fake_aiogram()
+    install_fake_libs_config(tmp_path)
+    i18n = fresh_import_i18n()
+
+    shared = tmp_path / ".i18n_cache" / "global" / "locales"
+    _write_mo(shared, "en", {"hello": "Global hello", "bye": "Global bye"})
+    _write_mo(shared, "ru", {"hello": "Привет"})
+    bot_a = tmp_path / ".i18n_cache" / "a" / "locales"
+    bot_b = tmp_path / ".i18n_cache" / "b" / "locales"
+    _write_mo(bot_a, "en", {"hello": "A hello"})
+    _write_mo(bot_b, "en", {})
+
+    a = i18n.LayeredI18n(path=bot_a, shared_path=shared).find_locales()
+    b = i18n.LayeredI18n(path=bot_b, shared_path=shared).find_locales()
+
+    assert a["en"].gettext("hello") == "A hello"
+    assert a["en"].gettext("bye") == "Global bye"
+    assert b["en"].gettext("hello") == "Global hello"
+    # язык только из общего слоя тоже доступен
+    assert a["ru"].gettext("hello") == "Привет"
+    # общий слой загружен один раз и разделяется ботами
+    assert a["ru"] is b["ru"]
+    assert i18n._load_shared.cache_info().currsize == 1
+
+
+def test_create_i18n_wires_shared_layer(tmp_path: Path) -> None:
+    install_fake_aiogram()
+    install_fake_libs_config(tmp_path)
+    i18n = fresh_import_i18n()
+
+    shared = tmp_path / ".i18n_cache" / "global" / "locales"
+    shared.mkdir(parents=True)
+    (tmp_path / ".i18n_cache" / "eta" / "locales").mkdir(parents=True)
+
+    mw = i18n.create_i18n(bot_name="eta", project_root=tmp_path)
+    assert isinstance(mw.i18n, i18n.LayeredI18n)
+    assert mw.i18n.shared_path == shared.resolve()
+
+
+async def test_gettext_works_inside_middleware(monkeypatch: MonkeyPatch, tmp_path: Path) -> None:
+    # настоящий aiogram: _() читает I18n.get_current(), а не ContextVar подкласса
+    for name, module in _REAL_MODULES.items():
+        monkeypatch.setitem(sys.modules, name, module)
+    for name, module in list(sys.modules.items()):
+        if name.split(".")[0] == "aiogram" and getattr(module, "__file__", None) is None:
+            monkeypatch.delitem(sys.modules, name)
+    i18n = fresh_import_i18n()
+    from aiogram.types import User
+
+    shared = tmp_path / "global"
+    bot = tmp_path / "bot"
+    _write_mo(shared, "ru", {"hello": "Привет"})
+    _write_mo(bot, "ru", {})
+    mw = i18n.SimpleI18nMiddleware(i18n.LayeredI18n(path=bot, shared_path=shared))
+
+    async def handler(event: object, data: dict[str, Any]) -> str:
+        return i18n._("hello")
+
+    user = User(id=1, is_bot=False, first_name="U", language_code="ru")
+    assert await mw(handler, None, {"event_from_user": user}) == "Привет"
+
+
+def test_layered_i18n_hot_reload_swaps_catalogs(tmp_path: Path) -> None:
+    import os
+
+    install_fake_aiogram()
+    install_fake_libs_config(tmp_path)
+    i18n = fresh_import_i18n()
+
+    shared = tmp_path / ".i18n_cache" / "global" / "locales"
+    overlay = tmp_path / ".i18n_cache" / "bot" / "locales"
+    _write_mo(shared, "en", {"hello": "Global hello"})
+    _write_mo(overlay, "en", {"bye": "Bye v1"})
+    for layer in (shared, overlay):
+        (layer.parent / "manifest.json").write_text("{}", encoding="utf-8")
+
+    layered = i18n.LayeredI18n(path=overlay, shared_path=shared)
+    layered.locales = layered.find_locales()
+    before = layered.locales
+    assert layered.gettext("bye", locale="en") == "Bye v1"
+    assert layered.reload_if_changed() is False
+
+    _write_mo(overlay, "en", {"bye": "Bye v2"})
+    manifest = overlay.parent / "manifest.json"
+    st = manifest.stat()
+    os.utime(manifest, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+    assert layered.reload_if_changed() is True
+    assert layered.locales is not before
+    assert layered.gettext("bye", locale="en") == "Bye v2"
+    assert layered.gettext("hello", locale="en") == "Global hello"
+    # неизвестный язык — исходная строка, plural — по n
+    assert layered.gettext("x", locale="de") == "x"
+    assert layered.gettext("apple", "apples", 2, locale="de") == "apples"
+
+
+def _write_po(root: Path, lang: str, entries: dict[str, str]) -> Path:
+    import polib
+
+    po = polib.POFile()
+    po.metadata = {"Content-Type": "text/plain; charset=UTF-8", "Language": lang}
+    for msgid, msgstr in entries.items():
+        po.append(polib.POEntry(msgid=msgid, msgstr=msgstr))
+    lang_dir = root / lang / "LC_MESSAGES"
+    lang_dir.mkdir(parents=True, exist_ok=True)
+    po.save(str(lang_dir / "messages.po"))
+    return lang_dir / "messages.po"
+
+
+def test_cache_is_stale_by_mtime(tmp_path: Path) -> None:
+    import os
+
+    install_fake_aiogram()
+    install_fake_libs_config(tmp_path)
+    i18n = fresh_import_i18n()
+
+    assert i18n._cache_is_stale(tmp_path, "bot") is False
+
+    bot_po = _write_po(tmp_path / "bots" / "bot" / "locales", "en", {"a": "A"})
+    assert i18n._cache_is_stale(tmp_path, "bot") is True
+
+    manifest = tmp_path / ".i18n_cache" / "bot" / "manifest.json"
+    manifest.parent.mkdir(parents=True)
+    manifest.write_text("{}", encoding="utf-8")
+    po_mtime = bot_po.stat().st_mtime_ns
+    os.utime(manifest, ns=(po_mtime, po_mtime + 1_000_000))
+    assert i18n._cache_is_stale(tmp_path, "bot") is False
+
+    os.utime(bot_po, ns=(po_mtime, po_mtime + 2_000_000))
+    assert i18n._cache_is_stale(tmp_path, "bot") is True
+
+
+def test_create_i18n_compiles_po_in_memory_when_cache_missing(tmp_path: Path) -> None:
+    install_fake_aiogram()
+    install_fake_libs_config(tmp_path)
+    i18n = fresh_import_i18n()
+
+    _write_po(tmp_path / "locales", "en", {"hello": "Global hello", "bye": "Global bye"})
+    _write_po(tmp_path / "locales", "ru", {"hello": "Привет"})
+    _write_po(tmp_path / "bots" / "theta" / "locales", "en", {"hello": "Bot hello"})
+
+    mw = i18n.create_i18n(bot_name="theta", project_root=tmp_path)
+    layered = mw.i18n
+    assert isinstance(layered, i18n.LayeredI18n)
+    assert layered.ready.wait(timeout=5)
+
+    assert layered.gettext("hello", locale="en") == "Bot hello"
+    assert layered.gettext("bye", locale="en") == "Global bye"
+    assert layered.gettext("hello", locale="ru") == "Привет"
+    # в .i18n_cache ничего не пишется
+    assert not (tmp_path / ".i18n_cache").exists()
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import json
+import threading
+import types
+from typing import Any
+
+from _pytest.monkeypatch import MonkeyPatch
+from aiogram import Dispatcher
+
+from libs.common.aiogram import memory as amem
+from libs.common.metrics import MetricsServer, Registry
+
+
+async def test_debug_routes_run_off_the_loop(monkeypatch: MonkeyPatch) -> None:
+    settings = types.SimpleNamespace(memory_sample=8)
+    monkeypatch.setattr(amem, "get_settings", lambda bot_name: settings)
+    monkeypatch.setattr(amem.MemoryInspector, "export_metrics", lambda self: None)
+    threads: list[threading.Thread] = []
+
+    def users() -> dict[int, Any]:
+        threads.append(threading.current_thread())
+        return {1: {"state": "q:age"}, 2: {"state": "q:name"}}
+
+    server = MetricsServer("127.0.0.1", 0, Registry())
+    amem.setup_memory_accounting("bot", Dispatcher(), server, user_structures={"users": users})
+
+    content_type, body = await server.routes["/debug/memory"]()  # type: ignore[misc]
+    assert content_type == "application/json"
+    assert [s["entries"] for s in json.loads(body)["structures"]] == [0, 2]
+    assert threads
+    assert threads[0] is not threading.main_thread()
+
+    await server.routes["/debug/tracemalloc/start"]()  # type: ignore[misc]
+    try:
+        _, diff = await server.routes["/debug/tracemalloc/diff"]()  # type: ignore[misc]
+    finally:
+        await server.routes["/debug/tracemalloc/stop"]()  # type: ignore[misc]
+    assert isinstance(json.loads(diff), list)
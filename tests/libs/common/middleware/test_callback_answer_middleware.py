@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+from aiogram.dispatcher.event.handler import HandlerObject
+from aiogram.methods import AnswerCallbackQuery, TelegramMethod
+from aiogram.types import CallbackQuery, TelegramObject, User
+
+from libs.common.metrics import Registry
+from libs.common.middleware.callback_answer_middleware import CallbackAnswerMiddleware
+
+
+USER = User(id=1, is_bot=False, first_name="U")
+
+
+class _Bot:
+    """Bot API с задержкой: запросы идут через request middleware, как в сессии."""
+
+    def __init__(self, answers: CallbackAnswerMiddleware, latency: float = 0.0) -> None:
+        self.answers = answers
+        self.latency = latency
+        self.sent: list[AnswerCallbackQuery] = []
+
+    async def __call__(self, method: TelegramMethod[Any]) -> Any:  # noqa: ANN401
+        async def make_request(bot: Any, method: Any) -> bool:  # noqa: ANN401
+            await asyncio.sleep(self.latency)
+            self.sent.append(method)
+            return True
+
+        return await self.answers.requests(make_request, self, method)
+
+
+def _setup(deadline: float = 0.01) -> tuple[CallbackAnswerMiddleware, _Bot, Registry]:
+    reg = Registry()
+    answers = CallbackAnswerMiddleware(deadline=deadline, registry=reg)
+    return answers, _Bot(answers), reg
+
+
+async def _press(
+    answers: CallbackAnswerMiddleware,
+    bot: _Bot,
+    work: float,
+    text: str | None,
+    flags: dict[str, Any] | None = None,
+) -> None:
+    press = CallbackQuery(id="42", from_user=USER, chat_instance="c", data="q:back")
+
+    async def handler(event: TelegramObject, data: dict[str, Any]) -> None:
+        await asyncio.sleep(work)
+        if text is not None:
+            await data["bot"](AnswerCallbackQuery(callback_query_id="42", text=text))
+
+    data = {"bot": bot, "handler": HandlerObject(callback=handler, flags=flags or {})}
+    await answers(handler, press, data)
+    assert answers.pending == {}
+
+
+def _counts(reg: Registry) -> dict[str, float]:
+    metric = reg.get("bot_callback_answers")
+    assert metric is not None
+    return {values[0]: child.value for values, child in metric.series() if child.value}
+
+
+async def test_slow_handler_is_acknowledged_early_and_late_answer_suppressed() -> None:
+    answers, bot, reg = _setup()
+    await _press(answers, bot, work=0.05, text="done")
+
+    assert [m.text for m in bot.sent] == [None]
+    assert _counts(reg) == {"early": 1, "suppressed": 1}
+
+
+async def test_handler_answer_before_deadline_keeps_its_text() -> None:
+    answers, bot, reg = _setup(deadline=0.05)
+    await _press(answers, bot, work=0.0, text="alert")
+
+    assert [m.text for m in bot.sent] == ["alert"]
+    assert _counts(reg) == {}
+
+
+async def test_silent_handler_is_answered_after_it_returns() -> None:
+    answers, bot, reg = _setup(deadline=1.0)
+    await _press(answers, bot, work=0.0, text=None)
+
+    assert [m.text for m in bot.sent] == [None]
+    assert _counts(reg) == {"after_handler": 1}
+
+
+async def test_flag_disables_early_answer() -> None:
+    answers, bot, reg = _setup()
+    await _press(answers, bot, work=0.05, text="alert", flags={"early_answer": False})
+
+    assert [m.text for m in bot.sent] == ["alert"]
+    assert _counts(reg) == {}
+
+
+async def test_early_answer_in_flight_suppresses_concurrent_handler_answer() -> None:
+    answers, bot, reg = _setup(deadline=0.0)
+    bot.latency = 0.05
+    await _press(answers, bot, work=0.01, text="done")
+
+    assert [m.text for m in bot.sent] == [None]
+    assert _counts(reg) == {"early": 1, "suppressed": 1}
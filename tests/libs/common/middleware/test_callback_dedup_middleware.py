@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import asyncio
+import datetime
+from typing import Any
+
+from _pytest.monkeypatch import MonkeyPatch
+from aiogram.methods import AnswerCallbackQuery, TelegramMethod
+from aiogram.types import CallbackQuery, Chat, Message, TelegramObject, User
+
+from libs.common.clock import VirtualClock
+from libs.common.metrics import Registry
+from libs.common.middleware import callback_dedup_middleware as cdm
+
+
+DATE = datetime.datetime(2026, 1, 1, tzinfo=datetime.UTC)
+CHAT = Chat(id=1, type="private")
+
+
+class _Bot:
+    def __init__(self) -> None:
+        self.answered: list[str] = []
+
+    async def __call__(self, method: TelegramMethod[Any]) -> bool:
+        assert isinstance(method, AnswerCallbackQuery)
+        self.answered.append(method.callback_query_id)
+        return True
+
+
+def _press(
+    query_id: str, data: str = "q:back", user_id: int = 1, message_id: int = 10
+) -> Any:  # noqa: ANN401
+    user = User(id=user_id, is_bot=False, first_name="U")
+    message = Message(message_id=message_id, date=DATE, chat=CHAT, text="?")
+    return CallbackQuery(id=query_id, from_user=user, chat_instance="c", data=data, message=message)
+
+
+async def test_double_tap_is_answered_and_dropped() -> None:
+    clock = VirtualClock()
+    reg = Registry()
+    dedup = cdm.CallbackDedupMiddleware(ttl=1.0, clock=clock, registry=reg)
+    bot = _Bot()
+    release = asyncio.Event()
+    handled: list[str] = []
+
+    async def handler(event: TelegramObject, data: dict[str, Any]) -> None:
+        assert isinstance(event, CallbackQuery)
+        handled.append(event.id)
+        await release.wait()
+
+    first = asyncio.create_task(dedup(handler, _press("1"), {"bot": bot}))
+    await asyncio.sleep(0)
+    await dedup(handler, _press("2"), {"bot": bot})
+    release.set()
+    # Другая кнопка, другое сообщение или другой пользователь — не дубль
+    for press in (_press("3", data="q:skip"), _press("4", message_id=11), _press("5", user_id=2)):
+        await dedup(handler, press, {"bot": bot})
+    await first
+
+    clock.advance(0.5)
+    await dedup(handler, _press("6"), {"bot": bot})
+    clock.advance(0.6)
+    await dedup(handler, _press("7"), {"bot": bot})
+
+    assert handled == ["1", "3", "4", "5", "7"]
+    assert bot.answered == ["2", "6"]
+    text = reg.render()
+    assert 'bot_callback_duplicates_total{state="in_flight"} 1' in text
+    assert 'bot_callback_duplicates_total{state="recent"} 1' in text
+
+
+async def test_recent_presses_are_bounded(monkeypatch: MonkeyPatch) -> None:
+    monkeypatch.setattr(cdm, "MAX_RECENT", 3)
+    dedup = cdm.CallbackDedupMiddleware(ttl=60, clock=VirtualClock(), registry=Registry())
+
+    async def handler(event: TelegramObject, data: dict[str, Any]) -> None:
+        return None
+
+    for i in range(5):
+        await dedup(handler, _press(str(i), message_id=i), {"bot": _Bot()})
+
+    assert [key[2] for key in dedup.recent] == [2, 3, 4]  # type: ignore[index]
+    assert not dedup.in_flight
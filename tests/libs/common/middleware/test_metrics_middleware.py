@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import asyncio
+import datetime
+from typing import Any
+
+import pytest
+from aiogram import Bot, Dispatcher, F
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.methods import SendMessage
+from aiogram.types import Chat, Message, Update, User
+
+from libs.common.metrics import Registry
+from libs.common.middleware.metrics_middleware import (
+    ApiMetricsMiddleware,
+    HandlerMetricsMiddleware,
+    UpdateMetricsMiddleware,
+)
+
+
+def _update(text: str) -> Update:
+    msg = Message(
+        message_id=1,
+        date=datetime.datetime.now(tz=datetime.UTC),
+        chat=Chat(id=1, type="private"),
+        from_user=User(id=2, is_bot=False, first_name="u"),
+        text=text,
+    )
+    return Update(update_id=1, message=msg)
+
+
+def _dispatcher(reg: Registry) -> Dispatcher:
+    dp = Dispatcher()
+    dp.update.outer_middleware(UpdateMetricsMiddleware(reg))
+    dp.message.middleware(HandlerMetricsMiddleware())
+
+    @dp.message(F.text == "ok")
+    async def say_ok(message: Message) -> None:
+        return None
+
+    @dp.message(F.text == "boom")
+    async def explode(message: Message) -> None:
+        raise RuntimeError("boom")
+
+    @dp.errors()
+    async def on_error(*_: Any) -> bool:  # noqa: ANN401
+        return True
+
+    return dp
+
+
+def test_update_labeled_by_type_handler_and_outcome() -> None:
+    reg = Registry()
+    dp = _dispatcher(reg)
+    bot = Bot(token="42:TEST")
+
+    async def scenario() -> None:
+        for text in ("ok", "boom", "other"):
+            await dp.feed_update(bot, _update(text))
+
+    asyncio.run(scenario())
+    text = reg.render()
+
+    assert 'bot_updates_total{type="message",handler="say_ok",outcome="ok"} 1' in text
+    assert 'bot_updates_total{type="message",handler="explode",outcome="error"} 1' in text
+    assert 'bot_updates_total{type="message",handler="unhandled",outcome="unhandled"} 1' in text
+    assert 'bot_update_duration_seconds_count{type="message",handler="say_ok"} 1' in text
+    assert "bot_updates_in_flight 0" in text
+
+
+def test_api_middleware_times_methods_and_counts_errors() -> None:
+    reg = Registry()
+    mw = ApiMetricsMiddleware(reg)
+    method = SendMessage(chat_id=1, text="hi")
+
+    async def ok(_bot: Any, _method: Any) -> str:  # noqa: ANN401
+        return "done"
+
+    async def fail(_bot: Any, m: Any) -> str:  # noqa: ANN401
+        raise TelegramBadRequest(method=m, message="bad")
+
+    async def scenario() -> None:
+        assert await mw(ok, None, method) == "done"
+        with pytest.raises(TelegramBadRequest):
+            await mw(fail, None, method)
+
+    asyncio.run(scenario())
+    text = reg.render()
+
+    assert 'bot_api_request_duration_seconds_count{method="sendMessage"} 2' in text
+    assert 'bot_api_errors_total{method="sendMessage",error="TelegramBadRequest"} 1' in text
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import asyncio
+import datetime
+from typing import Any
+
+import pytest
+from aiogram.types import CallbackQuery, Chat, Message, TelegramObject, Update, User
+
+from libs.common.clock import VirtualClock
+from libs.common.metrics import Registry
+from libs.common.middleware.priority_middleware import PriorityMiddleware, priority_class
+
+
+DATE = datetime.datetime(2026, 1, 1, tzinfo=datetime.UTC)
+USER = User(id=1, is_bot=False, first_name="U")
+CHAT = Chat(id=1, type="private")
+
+
+def _text(update_id: int, text: str) -> Update:
+    message = Message(message_id=update_id, date=DATE, chat=CHAT, from_user=USER, text=text)
+    return Update(update_id=update_id, message=message)
+
+
+def _press(update_id: int) -> Update:
+    press = CallbackQuery(id=str(update_id), from_user=USER, chat_instance="c", data="q:back")
+    return Update(update_id=update_id, callback_query=press)
+
+
+def test_classes() -> None:
+    assert [priority_class(u) for u in (_press(1), _text(2, "/start"), _text(3, "hi"))] == [
+        "callback",
+        "command",
+        "text",
+    ]
+
+
+class _Scenario:
+    """Первый апдейт держит единственный слот, пока тест не отпустит gate."""
+
+    def __init__(self, mw: PriorityMiddleware) -> None:
+        self.mw = mw
+        self.gate = asyncio.Event()
+        self.order: list[int] = []
+
+    async def handler(self, event: TelegramObject, data: dict[str, Any]) -> None:
+        assert isinstance(event, Update)
+        if not self.order:
+            self.order.append(event.update_id)
+            await self.gate.wait()
+            return
+        self.order.append(event.update_id)
+
+    def feed(self, update: Update) -> asyncio.Task[Any]:
+        return asyncio.create_task(self.mw(self.handler, update, {}))
+
+
+async def test_callbacks_and_commands_overtake_text() -> None:
+    mw = PriorityMiddleware(1, aging=0.5, clock=VirtualClock(), registry=Registry())
+    s = _Scenario(mw)
+    tasks = [s.feed(_text(1, "hi"))]
+    await asyncio.sleep(0)
+    for update in (_text(2, "a"), _text(3, "b"), _press(4), _text(5, "/start")):
+        tasks.append(s.feed(update))
+    await asyncio.sleep(0)
+
+    s.gate.set()
+    await asyncio.gather(*tasks)
+
+    assert s.order == [1, 4, 5, 2, 3]
+    assert mw.active == 0
+
+
+async def test_text_that_waited_longer_than_aging_goes_first() -> None:
+    clock = VirtualClock()
+    reg = Registry()
+    mw = PriorityMiddleware(1, aging=0.5, clock=clock, registry=reg)
+    s = _Scenario(mw)
+    tasks = [s.feed(_text(1, "hi")), s.feed(_text(2, "old"))]
+    await asyncio.sleep(0)
+    clock.advance(0.6)
+    tasks.append(s.feed(_press(3)))
+    await asyncio.sleep(0)
+
+    s.gate.set()
+    await asyncio.gather(*tasks)
+
+    assert s.order == [1, 2, 3]
+    text = reg.render()
+    assert 'bot_update_queue_wait_seconds_count{class="text"} 2' in text
+    assert 'bot_update_queue_wait_seconds_sum{class="text"} 0.6' in text
+    assert 'bot_update_queue_wait_seconds_count{class="callback"} 1' in text
+
+
+async def test_cancelled_waiter_does_not_leak_slot() -> None:
+    mw = PriorityMiddleware(1, clock=VirtualClock(), registry=Registry())
+    s = _Scenario(mw)
+    first = s.feed(_text(1, "hi"))
+    waiting = s.feed(_press(2))
+    await asyncio.sleep(0)
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+
+    s.gate.set()
+    await first
+    await s.feed(_text(3, "next"))
+
+    assert s.order == [1, 3]
+    assert (mw.active, mw.queue) == (0, [])
@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import datetime
+import types
+from pathlib import Path
+from typing import Any
+
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+from aiogram.types import CallbackQuery, Chat, Message, TelegramObject, Update, User
+
+from libs.common import rate_limit
+from libs.common.adaptive_limit import STEP, AimdController
+from libs.common.clock import VirtualClock
+from libs.common.metrics import Registry
+from libs.common.middleware import rate_limit_middleware as rlm
+from libs.common.middleware.api_pressure_middleware import ApiPressureMiddleware
+from libs.common.rate_limit import LocalRateLimiter, SketchRateLimiter
+from libs.common.shared_rate_limit import SharedRateLimiter
+
+
+DATE = datetime.datetime(2026, 1, 1, tzinfo=datetime.UTC)
+
+
+@pytest.fixture(autouse=True)
+def sent(monkeypatch: MonkeyPatch) -> list[tuple[str | None, dict[str, Any]]]:
+    """Уведомления об отказе вместо вызовов Bot API."""
+    calls: list[tuple[str | None, dict[str, Any]]] = []
+
+    async def answer(
+        self: TelegramObject, text: str | None = None, **kwargs: Any  # noqa: ANN401
+    ) -> None:
+        calls.append((text, kwargs))
+
+    monkeypatch.setattr(rlm, "_", lambda text: text)
+    monkeypatch.setattr(Message, "answer", answer)
+    monkeypatch.setattr(CallbackQuery, "answer", answer)
+    return calls
+
+
+def _limiter(
+    monkeypatch: MonkeyPatch,
+    shm_path: str = "",
+    clock: VirtualClock | None = None,
+    sketch_width: int = 0,
+    policy: str = "",
+    costs: str = "",
+) -> rlm.RateLimitMiddleware:
+    settings = types.SimpleNamespace(
+        rate_limit_per_user=3,
+        rate_limit_window_sec=1.0,
+        rate_limit_shm_path=shm_path,
+        rate_limit_shm_slots=64,
+        rate_limit_redis_url="",
+        rate_limit_sketch_width=sketch_width,
+        rate_limit_sketch_depth=4,
+        rate_limit_policy=policy,
+        rate_limit_costs=costs,
+    )
+    monkeypatch.setattr(rlm, "get_settings", lambda bot_name: settings)
+    monkeypatch.setattr(rate_limit, "get_settings", lambda bot_name: settings)
+    monkeypatch.setattr(rlm, "setup_logging", lambda bot_name: None)
+    return rlm.RateLimitMiddleware("echo", clock=clock or VirtualClock(), registry=Registry())
+
+
+def test_local_backend_by_default(monkeypatch: MonkeyPatch) -> None:
+    limiter = _limiter(monkeypatch)
+
+    assert isinstance(limiter.backend, LocalRateLimiter)
+    assert limiter.bucket is limiter.backend.bucket
+
+
+def test_sketch_backend_when_width_is_set(monkeypatch: MonkeyPatch) -> None:
+    limiter = _limiter(monkeypatch, sketch_width=256)
+
+    assert isinstance(limiter.backend, SketchRateLimiter)
+    assert limiter.backend.sketch.width == 256
+
+
+async def test_workers_share_limit_through_shm(monkeypatch: MonkeyPatch, tmp_path: Path) -> None:
+    path = str(tmp_path / "rl")
+    clock = VirtualClock()
+    workers = [_limiter(monkeypatch, path, clock) for _ in range(2)]
+    assert isinstance(workers[0].backend, SharedRateLimiter)
+
+    allowed = []
+    for i in range(5):
+        clock.set(0.1 * i)
+        allowed.append(await workers[i % 2].backend.acquire(7))
+
+    assert allowed == [True, True, True, False, False]
+    assert not workers[0].bucket
+
+
+async def test_policy_limits_group_chat_and_weighs_commands(monkeypatch: MonkeyPatch) -> None:
+    limiter = _limiter(monkeypatch, policy="chat=4/1m", costs="/form=3")
+    group = Chat(id=-100, type="supergroup")
+    handled = []
+
+    async def handler(event: TelegramObject, data: dict[str, Any]) -> None:
+        handled.append(event)
+
+    for uid, text in ((1, "/form"), (2, "/form"), (3, "hi"), (4, "hi")):
+        sender = User(id=uid, is_bot=False, first_name="U")
+        message = Message(message_id=uid, date=DATE, chat=group, from_user=sender, text=text)
+        data = {"event_from_user": sender, "event_chat": group}
+        await limiter(handler, Update(update_id=uid, message=message), data)
+
+    assert [u.message.text for u in handled] == ["/form", "hi"]  # type: ignore[attr-defined]
+    assert limiter.policy is not None
+    assert limiter.policy.denied == {"chat": 2}
+
+
+async def test_backend_denial_refunds_policy_budget(monkeypatch: MonkeyPatch) -> None:
+    limiter = _limiter(monkeypatch, policy="chat=4/1m")
+    group = Chat(id=-100, type="supergroup")
+    handled = []
+
+    async def handler(event: TelegramObject, data: dict[str, Any]) -> None:
+        handled.append(event)
+
+    # Флудер упирается в свой лимит бэкенда (3/с) — бюджет чата на это не тратится
+    for uid in (1, 1, 1, 1, 1, 2):
+        sender = User(id=uid, is_bot=False, first_name="U")
+        message = Message(message_id=uid, date=DATE, chat=group, from_user=sender, text="hi")
+        data = {"event_from_user": sender, "event_chat": group}
+        await limiter(handler, Update(update_id=uid, message=message), data)
+
+    assert [u.message.from_user.id for u in handled] == [1, 1, 1, 2]  # type: ignore[attr-defined]
+    assert limiter.policy is not None
+    assert limiter.policy.denied == {}
+
+
+async def test_adaptive_controller_tightens_backend_and_policy(monkeypatch: MonkeyPatch) -> None:
+    clock = VirtualClock()
+    limiter = _limiter(monkeypatch, clock=clock, policy="global=10/1s")
+    pressure = ApiPressureMiddleware()
+    limiter.adaptive = AimdController(3, pressure, clock=clock, registry=Registry())
+    sender = User(id=1, is_bot=False, first_name="U")
+    chat = Chat(id=1, type="private")
+    handled = []
+
+    async def handler(event: TelegramObject, data: dict[str, Any]) -> None:
+        handled.append(event)
+
+    pressure.retry_after = 1
+    clock.advance(STEP)
+    for i in range(3):
+        message = Message(message_id=i, date=DATE, chat=chat, from_user=sender, text="hi")
+        await limiter(handler, Update(update_id=i, message=message), {"event_from_user": sender})
+
+    assert limiter.backend.limit == 2
+    assert limiter.policy is not None
+    assert limiter.policy.scale == 0.5
+    assert len(handled) == 2
+
+
+async def test_one_notice_per_throttle_episode(
+    monkeypatch: MonkeyPatch, sent: list[tuple[str | None, dict[str, Any]]]
+) -> None:
+    clock = VirtualClock()
+    limiter = _limiter(monkeypatch, clock=clock)
+    sender = User(id=1, is_bot=False, first_name="U")
+    chat = Chat(id=1, type="private")
+    data = {"event_from_user": sender}
+
+    async def handler(event: TelegramObject, data: dict[str, Any]) -> None:
+        return None
+
+    async def flood(updates: int) -> None:
+        for i in range(updates):
+            message = Message(message_id=i, date=DATE, chat=chat, from_user=sender, text="hi")
+            await limiter(handler, Update(update_id=i, message=message), data)
+            clock.advance(0.1)
+
+    # 3 проходят, 7 отказов; отказ каждые 0.1 с продлевает эпизод — уведомление одно
+    await flood(10)
+    clock.advance(0.1)
+    await flood(10)
+    assert sent == [("user.limit", {})]
+    # Тишина дольше окна — следующий отказ открывает новый эпизод
+    clock.advance(2.0)
+    await flood(3)
+    press = CallbackQuery(id="1", from_user=sender, chat_instance="c", data="x")
+    await limiter(handler, Update(update_id=99, callback_query=press), data)
+    await limiter(handler, Update(update_id=100, callback_query=press), data)
+
+    # Первое нажатие — алерт, повторное в том же эпизоде — пустой ответ без текста
+    assert sent == [
+        ("user.limit", {}),
+        ("user.limit", {"show_alert": True, "cache_time": 1}),
+        (None, {}),
+    ]
+    series = dict(limiter.suppressed.series())
+    assert series[("message",)].value == 13
+    assert series[("callback_query",)].value == 1
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import asyncio
+import datetime
+from typing import Any
+
+from aiogram import BaseMiddleware, Bot, Dispatcher
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.methods import SendMessage
+from aiogram.types import Chat, Message, TelegramObject, Update, User
+
+from libs.common.aiogram.tracing import TracedStorage
+from libs.common.middleware.tracing_middleware import (
+    ApiTracingMiddleware,
+    HandlerTracingMiddleware,
+    TracedMiddleware,
+    TracingMiddleware,
+)
+from libs.common.tracing import Trace, Tracer
+
+
+class PassMiddleware(BaseMiddleware):
+    async def __call__(
+        self, handler: Any, event: TelegramObject, data: dict[str, Any]  # noqa: ANN401
+    ) -> Any:  # noqa: ANN401
+        return await handler(event, data)
+
+
+def _update() -> Update:
+    msg = Message(
+        message_id=1,
+        date=datetime.datetime.now(tz=datetime.UTC),
+        chat=Chat(id=1, type="private"),
+        from_user=User(id=2, is_bot=False, first_name="u"),
+        text="hi",
+    )
+    return Update(update_id=5, message=msg)
+
+
+def test_update_trace_covers_middleware_handler_and_storage() -> None:
+    out: list[Trace] = []
+    tracer = Tracer(out.append, sample_rate=1.0)
+    dp = Dispatcher()
+    dp.fsm.storage = TracedStorage(tracer, MemoryStorage())
+    dp.update.outer_middleware(TracingMiddleware(tracer))
+    dp.message.middleware(TracedMiddleware(tracer, PassMiddleware()))
+    dp.message.middleware(HandlerTracingMiddleware(tracer))
+
+    @dp.message()
+    async def step(message: Message, state: FSMContext) -> None:
+        await state.set_state("Form:name")
+        await state.update_data(name="x")
+
+    asyncio.run(dp.feed_update(Bot(token="42:TEST"), _update()))
+
+    (trace,) = out
+    names = [s.name for s in trace.spans]
+    assert names[0] == "update message"
+    assert "middleware PassMiddleware" in names
+    assert "handler step" in names
+    assert "storage set_state" in names
+    assert "storage update_data" in names
+    by_name = {s.name: s for s in trace.spans}
+    assert by_name["handler step"].parent_id == by_name["middleware PassMiddleware"].span_id
+    assert by_name["storage set_state"].parent_id == by_name["handler step"].span_id
+    assert by_name["update message"].attributes["user.id"] == 2
+
+
+def test_api_span_is_client_kind_with_chat() -> None:
+    out: list[Trace] = []
+    tracer = Tracer(out.append, sample_rate=1.0)
+    mw = ApiTracingMiddleware(tracer)
+
+    async def ok(_bot: Any, _method: Any) -> str:  # noqa: ANN401
+        return "done"
+
+    async def scenario() -> None:
+        with tracer.trace("update"):
+            await mw(ok, None, SendMessage(chat_id=42, text="hi"))
+
+    asyncio.run(scenario())
+
+    api = out[0].spans[1]
+    assert api.name == "api sendMessage"
+    assert api.kind == 3
+    assert api.attributes["chat.id"] == 42
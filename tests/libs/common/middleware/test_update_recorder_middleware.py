@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import asyncio
+import datetime
+from pathlib import Path
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Chat, Message, Update, User
+
+from libs.common.middleware.update_recorder_middleware import UpdateRecorderMiddleware
+from libs.common.update_log import UpdateLogWriter, read_update_log
+
+
+def test_records_every_update_anonymized(tmp_path: Path) -> None:
+    path = tmp_path / "updates.jsonl.gz"
+    writer = UpdateLogWriter(path)
+    dp = Dispatcher()
+    dp.update.outer_middleware(UpdateRecorderMiddleware(writer))
+    seen: list[str] = []
+
+    @dp.message()
+    async def handle(message: Message) -> None:
+        seen.append(message.text or "")
+
+    bot = Bot(token="42:TEST")
+    msg = Message(
+        message_id=5,
+        date=datetime.datetime.now(tz=datetime.UTC),
+        chat=Chat(id=1001, type="private"),
+        from_user=User(id=1001, is_bot=False, first_name="Bob", username="bob"),
+        text="/start now",
+    )
+    asyncio.run(dp.feed_update(bot, Update(update_id=7, message=msg)))
+    writer.close()
+
+    assert seen == ["/start now"]
+    [(_, raw)] = list(read_update_log(path))
+    assert raw["update_id"] == 7
+    assert raw["message"]["text"] == "/start xxx"
+    assert raw["message"]["from"]["id"] != 1001
+    assert "username" not in raw["message"]["from"]
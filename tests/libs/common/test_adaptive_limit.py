@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+from typing import Any
+
+import pytest
+from aiogram import Bot
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import SendMessage, TelegramMethod
+from aiogram.methods.base import Response
+from aiogram.types import Message
+
+from libs.common.adaptive_limit import STEP, AimdController
+from libs.common.clock import VirtualClock
+from libs.common.metrics import Registry
+from libs.common.middleware.api_pressure_middleware import ApiPressureMiddleware
+
+
+def _controller(lag: float = 0.0, **kwargs: Any) -> AimdController:  # noqa: ANN401
+    return AimdController(
+        10,
+        ApiPressureMiddleware(),
+        lambda _seconds: lag,
+        clock=VirtualClock(),
+        registry=Registry(),
+        **kwargs,
+    )
+
+
+def test_overload_halves_limit_and_calm_steps_restore_it() -> None:
+    ctl = _controller(backlog=5)
+    now = 0.0
+
+    for _ in range(3):
+        ctl.pressure.peak = 7
+        now += STEP
+        ctl.update(now)
+    assert (ctl.factor, ctl.limit, ctl.reasons) == (0.25, 2, ["backlog"])
+
+    limits = []
+    for _ in range(8):
+        now += STEP
+        ctl.update(now)
+        limits.append(ctl.limit)
+    # По 0.1 базового за шаг: отпускаем постепенно, а зажимали сразу
+    assert limits == sorted(limits)
+    assert (limits[0], limits[-1]) == (4, 10)
+    assert ctl.factor == 1.0
+    assert ctl.lowest == 0.25
+
+
+def test_factor_stops_at_floor_and_zero_threshold_disables_signal() -> None:
+    ctl = _controller(lag=0.5, lag_threshold=0.1, min_factor=0.3, retry_after=0)
+    for step in range(1, 6):
+        ctl.pressure.retry_after = 10
+        ctl.update(step * STEP)
+
+    assert ctl.factor == 0.3
+    assert ctl.reasons == ["lag"]
+    assert ctl.state()["signals"] == {"backlog": 0, "retry_after": 10, "lag_ms": 500.0}
+
+
+def test_min_factor_is_validated() -> None:
+    with pytest.raises(ValueError, match="min_factor"):
+        _controller(min_factor=0)
+
+
+async def test_pressure_tracks_peak_in_flight_and_429() -> None:
+    mw = ApiPressureMiddleware()
+    method = SendMessage(chat_id=1, text="hi")
+    seen = []
+
+    async def ok(bot: Bot, method: TelegramMethod[Message]) -> Response[Message]:
+        seen.append(mw.in_flight)
+        return Response[Message](ok=True)
+
+    async def flood(bot: Bot, method: TelegramMethod[Message]) -> Response[Message]:
+        raise TelegramRetryAfter(method=method, message="flood", retry_after=1)
+
+    assert (await mw(ok, None, method)).ok
+    with pytest.raises(TelegramRetryAfter):
+        await mw(flood, None, method)
+
+    assert seen == [1]
+    assert mw.take() == (1, 1)
+    assert mw.take() == (0, 0)
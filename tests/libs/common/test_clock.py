@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+import pytest
+
+from libs.common.clock import VirtualClock
+
+
+def test_virtual_clock_moves_only_on_request() -> None:
+    clock = VirtualClock(start=10.0, wall=1_000.0)
+    assert clock.monotonic() == 10.0
+    assert clock.time() == 1_000.0
+
+    clock.advance(5)
+    clock.set(20.0)
+    assert clock.monotonic() == 20.0
+    assert clock.time() == 1_010.0
+
+
+def test_virtual_clock_refuses_to_go_backwards() -> None:
+    clock = VirtualClock(start=5.0)
+    with pytest.raises(ValueError, match="backwards"):
+        clock.set(4.0)
+    assert clock.monotonic() == 5.0
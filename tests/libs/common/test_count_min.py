@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import math
+import random
+
+import pytest
+
+from libs.common.count_min import CountMinSketch
+
+
+def test_estimate_never_below_true_count() -> None:
+    sketch = CountMinSketch(width=64, depth=4, horizon=1e9)
+    rand = random.Random(1)
+    counts: dict[int, int] = {}
+    for _ in range(5000):
+        key = rand.randrange(1, 2000)
+        counts[key] = counts.get(key, 0) + 1
+        sketch.add(key, now=0.0)
+
+    assert all(sketch.estimate(k, now=0.0) >= n - 1e-9 for k, n in counts.items())
+
+
+def test_heavy_key_stands_out_in_small_table() -> None:
+    sketch = CountMinSketch(width=256, depth=4, horizon=1e9)
+    for uid in range(1, 1001):
+        sketch.add(uid, now=0.0)
+    for _ in range(50):
+        sketch.add(777_777, now=0.0)
+
+    assert sketch.estimate(777_777, now=0.0) >= 50
+    assert sum(sketch.estimate(uid, now=0.0) > 3 for uid in range(1, 1001)) < 10
+
+
+def test_counts_decay_with_horizon() -> None:
+    sketch = CountMinSketch(width=64, depth=2, horizon=2.0)
+    assert sketch.add(5, now=10.0, amount=8) == pytest.approx(8)
+
+    assert sketch.estimate(5, now=12.0) == pytest.approx(8 / math.e)
+    assert sketch.add(5, now=14.0) == pytest.approx(8 / math.e**2 + 1)
+
+
+def test_rescale_keeps_estimates() -> None:
+    sketch = CountMinSketch(width=64, depth=2, horizon=1.0)
+    sketch.add(5, now=0.0, amount=1e6)
+
+    assert sketch.add(5, now=35.0) == pytest.approx(1e6 * math.exp(-35) + 1)
+    assert sketch.estimate(5, now=36.0) == pytest.approx((1e6 * math.exp(-35) + 1) / math.e)
+
+
+def test_rejects_width_not_power_of_two() -> None:
+    with pytest.raises(ValueError, match="power of two"):
+        CountMinSketch(width=1000)
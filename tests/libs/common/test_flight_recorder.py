@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from libs.common.flight_recorder import FlightRecorder, Ring
+
+
+def test_ring_keeps_last_n_in_order() -> None:
+    ring = Ring(3, (("n", "q"), ("name", "s")))
+    for i in range(5):
+        ring.record(i, f"h{i % 2}")
+
+    assert len(ring) == 3
+    assert ring.snapshot() == [
+        {"n": 2, "name": "h0"},
+        {"n": 3, "name": "h1"},
+        {"n": 4, "name": "h0"},
+    ]
+
+
+def test_ring_interns_strings() -> None:
+    ring = Ring(4, (("name", "s"),))
+    for _ in range(100):
+        ring.record("same")
+    assert ring._table == ["same"]
+
+
+def test_recorder_dump_contains_updates_and_api_calls(tmp_path: Path) -> None:
+    rec = FlightRecorder("echo_bot", size=4, dump_dir=tmp_path)
+    rec.record_update(1, "message", "echo_text", 0.0125, "ok")
+    rec.record_api_call("sendMessage", 42, "TelegramBadRequest", 0.2)
+
+    path = rec.dump(reason="demand")
+
+    data = json.loads(path.read_text(encoding="utf-8"))
+    assert data["reason"] == "demand"
+    (upd,) = data["updates"]
+    assert upd["update_id"] == 1
+    assert upd["handler"] == "echo_text"
+    assert abs(upd["latency_ms"] - 12.5) < 1e-3
+    (call,) = data["api_calls"]
+    assert call["method"] == "sendMessage"
+    assert call["chat_id"] == 42
+    assert call["status"] == "TelegramBadRequest"
+    assert list(tmp_path.glob("*.tmp")) == []
+
+
+def test_dump_min_interval_skips_snapshot(tmp_path: Path) -> None:
+    rec = FlightRecorder("bot", size=2, dump_dir=tmp_path)
+    first = rec.dump(reason="error", min_interval=60)
+    assert first is not None
+    assert rec.dump(reason="error", min_interval=60) is None
+    assert rec.dump(reason="signal") not in (None, first)
+
+
+def test_dump_interval_is_per_reason(tmp_path: Path) -> None:
+    rec = FlightRecorder("bot", size=2, dump_dir=tmp_path)
+    assert rec.dump(reason="signal", min_interval=60) is not None
+    # Ручной дамп не глушит снимок первой ошибки
+    assert rec.dump(reason="error", min_interval=60) is not None
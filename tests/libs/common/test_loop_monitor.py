@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+
+import pytest
+
+from libs.common.loop_monitor import LoopMonitor
+from libs.common.metrics import Registry
+
+
+class _Log(logging.Logger):
+    def __init__(self) -> None:
+        super().__init__("test")
+        self.warnings: list[str] = []
+
+    def warning(self, msg: object, *args: object, **_: object) -> None:
+        self.warnings.append(str(msg) % args)
+
+
+def _blocking_call() -> None:
+    time.sleep(0.3)
+
+
+def test_blocking_call_is_reported_with_stack() -> None:
+    log = _Log()
+    reg = Registry()
+    monitor = LoopMonitor(log, interval=0.01, threshold=0.1, registry=reg)
+
+    async def scenario() -> None:
+        await monitor.start()
+        await asyncio.sleep(0.05)
+        _blocking_call()
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+
+    asyncio.run(scenario())
+
+    assert monitor.stalls == 1
+    assert len(log.warnings) == 1
+    assert "_blocking_call" in log.warnings[0]
+    assert monitor.quantile(1.0) >= 0.25
+    text = reg.render()
+    assert "event_loop_slow_callbacks_total 1" in text
+    assert 'event_loop_lag_quantile_seconds{quantile="0.99"}' in text
+
+
+def test_idle_loop_is_healthy() -> None:
+    log = _Log()
+    monitor = LoopMonitor(log, interval=0.01, threshold=0.2, registry=Registry())
+
+    async def scenario() -> None:
+        await monitor.start()
+        await asyncio.sleep(0.15)
+        await monitor.stop()
+
+    asyncio.run(scenario())
+
+    health = monitor.health()
+    assert health["status"] == "ok"
+    assert health["stalls"] == 0
+    assert log.warnings == []
+    assert len(monitor.samples) > 0
+
+
+@pytest.mark.parametrize(("q", "expected"), [(0.5, 0.5), (0.99, 0.99), (1.0, 0.99)])
+def test_quantiles_over_window(q: float, expected: float) -> None:
+    monitor = LoopMonitor(_Log(), registry=Registry())
+    monitor.samples.extend(i / 100 for i in range(100))
+    assert monitor.quantile(q) == pytest.approx(expected)
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import sys
+from collections import defaultdict, deque
+
+import pytest
+
+from libs.common.memory import MemoryInspector, deep_sizeof, measure
+from libs.common.metrics import Registry
+
+
+class _Slotted:
+    __slots__ = ("payload",)
+
+    def __init__(self) -> None:
+        self.payload = "x" * 1000
+
+
+def test_deep_sizeof_counts_nested_containers() -> None:
+    inner = [b"a" * 100, b"b" * 100]
+    outer = {"k": inner}
+    assert deep_sizeof(outer) >= sys.getsizeof(outer) + sys.getsizeof(inner) + 200
+
+
+def test_deep_sizeof_follows_slots_and_deque() -> None:
+    assert deep_sizeof(_Slotted()) > 1000
+    assert deep_sizeof(deque([1.0] * 10)) > sys.getsizeof(deque([1.0] * 10))
+
+
+def test_deep_sizeof_handles_cycles() -> None:
+    a: list[object] = []
+    a.append(a)
+    assert deep_sizeof(a) == sys.getsizeof(a)
+
+
+def test_measure_extrapolates_from_sample() -> None:
+    bucket: dict[int, deque[float]] = defaultdict(deque)
+    for user in range(5000):
+        bucket[user].extend([1.0, 2.0, 3.0])
+
+    report = measure("bucket", bucket, sample=32)
+
+    assert report.entries == 5000
+    assert report.sampled == 32
+    per_entry = deep_sizeof(0) + deep_sizeof(deque([1.0, 2.0, 3.0]))
+    assert report.bytes_per_entry == pytest.approx(per_entry, rel=0.2)
+    assert report.estimated_bytes >= per_entry * 5000
+
+
+def test_inspector_summary_and_metrics() -> None:
+    bucket = {1: deque([1.0]), 2: deque([1.0, 2.0])}
+    cache = {"ru": object()}
+    inspector = MemoryInspector(sample=8)
+    inspector.register("rate_limit.bucket", lambda: bucket)
+    inspector.register("i18n.locales", lambda: cache, per_user=False)
+
+    summary = inspector.summary()
+    names = [s["name"] for s in summary["structures"]]
+    assert names == ["rate_limit.bucket", "i18n.locales"]
+    assert summary["bytes_per_active_user"] == summary["structures"][0]["bytes_per_entry"]
+
+    reg = Registry()
+    inspector.export_metrics(reg)
+    bucket[3] = deque()
+    assert 'memory_structure_entries{name="rate_limit.bucket"} 3' in reg.render()
+
+
+def test_tracemalloc_diff_shows_growth() -> None:
+    inspector = MemoryInspector()
+    with pytest.raises(RuntimeError, match="baseline"):
+        inspector.tracemalloc_diff()
+
+    inspector.tracemalloc_start()
+    try:
+        hog = [bytearray(1024) for _ in range(2000)]
+        diff = inspector.tracemalloc_diff(top=5)
+    finally:
+        inspector.tracemalloc_stop()
+
+    assert hog
+    assert any("test_memory.py" in d["site"] and d["size_diff"] > 1_000_000 for d in diff)
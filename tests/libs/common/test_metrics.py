@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from libs.common.metrics import CONTENT_TYPE, MetricsServer, Registry
+
+
+def test_counter_and_gauge_render() -> None:
+    reg = Registry()
+    c = reg.counter("requests", "Requests", ("method",))
+    c.labels("get").inc()
+    c.labels("get").inc(2)
+    g = reg.gauge("queue", "Queue depth")
+    g.set(5)
+    reg.gauge("lag", "Loop lag").set_function(lambda: 0.25)
+
+    text = reg.render()
+
+    assert "# TYPE requests counter" in text
+    assert 'requests_total{method="get"} 3' in text
+    assert "queue 5" in text
+    assert "lag 0.25" in text
+    assert text.endswith("# EOF\n")
+
+
+def test_histogram_buckets_are_cumulative() -> None:
+    reg = Registry()
+    h = reg.histogram("latency", "Latency", buckets=(0.1, 1.0))
+    for v in (0.05, 0.1, 0.5, 3.0):
+        h.observe(v)
+
+    text = reg.render()
+
+    assert 'latency_bucket{le="0.1"} 2' in text
+    assert 'latency_bucket{le="1"} 3' in text
+    assert 'latency_bucket{le="+Inf"} 4' in text
+    assert "latency_count 4" in text
+    assert "latency_sum 3.65" in text
+    assert h.labels().quantile(0.5) == 0.1
+
+
+def test_same_name_returns_same_metric_and_type_conflict_raises() -> None:
+    reg = Registry()
+    assert reg.counter("x", "X") is reg.counter("x", "X")
+    with pytest.raises(ValueError, match="already registered"):
+        reg.gauge("x", "X")
+
+
+def test_label_count_mismatch_raises() -> None:
+    reg = Registry()
+    with pytest.raises(ValueError, match="expected labels"):
+        reg.counter("x", "X", ("a", "b")).labels("only-one")
+
+
+def test_label_values_are_escaped() -> None:
+    reg = Registry()
+    reg.counter("x", "X", ("v",)).labels('a"b\\c').inc()
+    assert 'x_total{v="a\\"b\\\\c"} 1' in reg.render()
+
+
+def test_server_serves_metrics_and_404() -> None:
+    reg = Registry()
+    reg.counter("hits", "Hits").inc()
+
+    async def fetch(port: int, path: str) -> bytes:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(f"GET {path} HTTP/1.0\r\n\r\n".encode())
+        await writer.drain()
+        body = await reader.read()
+        writer.close()
+        return body
+
+    async def scenario() -> tuple[bytes, bytes]:
+        server = MetricsServer("127.0.0.1", 0, reg)
+        await server.start()
+        try:
+            return await fetch(server.port, "/metrics"), await fetch(server.port, "/nope")
+        finally:
+            await server.stop()
+
+    ok, missing = asyncio.run(scenario())
+
+    assert ok.startswith(b"HTTP/1.0 200 OK")
+    assert CONTENT_TYPE.encode() in ok
+    assert b"hits_total 1" in ok
+    assert missing.startswith(b"HTTP/1.0 404")
+
+
+def test_server_awaits_async_routes() -> None:
+    async def slow() -> tuple[str, str]:
+        await asyncio.sleep(0)
+        return "text/plain", "done\n"
+
+    async def scenario() -> bytes:
+        server = MetricsServer("127.0.0.1", 0, Registry())
+        server.routes["/slow"] = slow
+        await server.start()
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+            writer.write(b"GET /slow HTTP/1.0\r\n\r\n")
+            await writer.drain()
+            body = await reader.read()
+            writer.close()
+            return body
+        finally:
+            await server.stop()
+
+    body = asyncio.run(scenario())
+
+    assert body.startswith(b"HTTP/1.0 200 OK")
+    assert body.endswith(b"done\n")
@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import gettext
+import io
+import struct
+from pathlib import Path
+
+import polib
+import pytest
+
+import scripts.compile_locales as cl
+from libs.common.po_catalog import (
+    _hash_string,
+    build_mo,
+    build_po,
+    format_header,
+    merge_po,
+    read_po,
+)
+
+
+ROOT = Path(__file__).resolve().parents[3]
+
+TRICKY_PO = r"""# translator comment
+msgid ""
+msgstr ""
+"Project-Id-Version: tricky\n"
+"Language: ru\n"
+"Content-Type: text/plain; charset=UTF-8\n"
+"X-Custom: a\n"
+"Plural-Forms: nplurals=3; plural=(n%10==1 && n%100!=11 ? 0 : n%10>=2 && "
+"n%10<=4 && (n%100<10 || n%100>=20) ? 1 : 2);\n"
+
+#: app.py:1
+msgid "plain"
+msgstr "простой"
+
+msgctxt "menu"
+msgid "plain"
+msgstr "в меню"
+
+msgid "escaped"
+msgstr "line1\nline2 \"q\" \\ tab\t"
+
+msgid ""
+"multi"
+"line"
+msgstr ""
+"много"
+"строк"
+msgid "no.blank.line"
+msgstr "без пустой строки"
+
+msgid "apple"
+msgid_plural "apples"
+msgstr[0] "яблоко"
+msgstr[1] "яблока"
+msgstr[2] "яблок"
+
+msgid "partial"
+msgid_plural "partials"
+msgstr[0] "частично"
+msgstr[1] ""
+msgstr[2] ""
+
+#, fuzzy
+msgid "fuzzy"
+msgstr "неточно"
+
+msgid "untranslated"
+msgstr ""
+
+#~ msgid "obsolete"
+#~ msgstr "устарело"
+"""
+
+
+def _layers() -> list[tuple[str, list[Path]]]:
+    layers: list[tuple[str, list[Path]]] = []
+    for loc_dir in [ROOT / "locales", *sorted((ROOT / "bots").glob("*/locales"))]:
+        for lang_dir in sorted(p for p in loc_dir.iterdir() if p.is_dir()):
+            layers.append((lang_dir.name, sorted(lang_dir.rglob("*.po"))))
+    return layers
+
+
+def _polib_merged(metadata: dict[str, str], po_list: list[Path]) -> bytes:
+    """Прежний путь компиляции через polib — эталон для сравнения."""
+    merged = polib.POFile()
+    merged.metadata = dict(metadata)
+    index: dict[tuple[str | None, str, bool], polib.POEntry] = {}
+    for po_path in po_list:
+        for e in polib.pofile(str(po_path)):
+            index[(e.msgctxt, e.msgid, bool(e.msgid_plural))] = e
+    for e in index.values():
+        merged.append(e)
+    return merged.to_binary()
+
+
+@pytest.mark.parametrize(("lang", "po_list"), _layers())
+def test_build_mo_matches_polib_on_repo_locales(lang: str, po_list: list[Path]) -> None:
+    merged = cl._merge_entries(lang, po_list)
+    ours = build_mo(format_header(merged.metadata), merged.messages)
+    assert ours == _polib_merged(merged.metadata, po_list)
+
+
+def test_read_po_handles_plurals_context_escapes_and_flags(tmp_path: Path) -> None:
+    po_path = tmp_path / "tricky.po"
+    po_path.write_text(TRICKY_PO, encoding="utf-8")
+
+    cat = read_po(po_path)
+
+    assert cat.metadata["Language"] == "ru"
+    assert cat.metadata["X-Custom"] == "a"
+    assert cat.metadata["Plural-Forms"].endswith("? 1 : 2);")
+    assert cat.messages == {
+        (None, "plain"): "простой",
+        ("menu", "plain"): "в меню",
+        (None, "escaped"): 'line1\nline2 "q" \\ tab\t',
+        (None, "multiline"): "многострок",
+        (None, "no.blank.line"): "без пустой строки",
+        (None, "apple\0apples"): "яблоко\0яблока\0яблок",
+    }
+
+    pofile = polib.pofile(str(po_path))
+    assert build_mo(format_header(cat.metadata), cat.messages) == pofile.to_binary()
+
+
+def test_merge_po_later_files_override(tmp_path: Path) -> None:
+    first = tmp_path / "a.po"
+    second = tmp_path / "b.po"
+    first.write_text(
+        'msgid ""\nmsgstr "Language: en\\n"\n\nmsgid "a"\nmsgstr "A"\n\nmsgid "b"\nmsgstr "B"\n',
+        encoding="utf-8",
+    )
+    second.write_text(
+        'msgid ""\nmsgstr "Language: xx\\n"\n\nmsgid "a"\nmsgstr "A2"\n', encoding="utf-8"
+    )
+
+    cat = merge_po([first, second])
+
+    assert cat.metadata == {"Language": "en"}
+    assert list(cat.messages.items()) == [((None, "a"), "A2"), ((None, "b"), "B")]
+    assert len(cat) == 2
+
+
+def test_build_po_round_trips(tmp_path: Path) -> None:
+    src = tmp_path / "tricky.po"
+    src.write_text(TRICKY_PO, encoding="utf-8")
+    cat = read_po(src)
+
+    dst = tmp_path / "out.po"
+    dst.write_text(build_po(format_header(cat.metadata), cat.messages), encoding="utf-8")
+
+    again = read_po(dst)
+    assert again.messages == cat.messages
+    assert again.metadata == cat.metadata
+
+
+def _gnu_lookup(mo: bytes, key: bytes) -> int | None:
+    """Поиск по хэш-таблице так, как это делает GNU gettext."""
+    _, _, _count, orig_off, _, size, hash_off = struct.unpack_from("Iiiiiii", mo)
+    hval = _hash_string(key)
+    idx = hval % size
+    incr = 1 + hval % (size - 2)
+    while True:
+        (slot,) = struct.unpack_from("I", mo, hash_off + 4 * idx)
+        if slot == 0:
+            return None
+        length, offset = struct.unpack_from("ii", mo, orig_off + 8 * (slot - 1))
+        if mo[offset : offset + length].split(b"\0")[0] == key:
+            return slot - 1
+        idx = idx + incr - size if idx + incr >= size else idx + incr
+
+
+def test_build_mo_hash_table_is_valid(tmp_path: Path) -> None:
+    messages = {(None, f"key.{i}"): f"value {i}" for i in range(500)}
+    messages[("ctx", "key.1")] = "contextual"
+    messages[(None, "apple\0apples")] = "a\0b"
+
+    mo = build_mo("Language: en\n", messages, hash_table=True)
+
+    for mctx, mid in [(None, ""), *messages]:
+        singular = mid.partition("\0")[0]
+        key = (f"{mctx}\x04{singular}" if mctx else singular).encode()
+        assert _gnu_lookup(mo, key) is not None
+    assert _gnu_lookup(mo, b"missing") is None
+
+    tr = gettext.GNUTranslations(io.BytesIO(mo))
+    assert tr.gettext("key.42") == "value 42"
+    assert tr.pgettext("ctx", "key.1") == "contextual"
+    assert tr.ngettext("apple", "apples", 5) == "b"
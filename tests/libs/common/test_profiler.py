@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from libs.common.profiler import SamplingProfiler
+
+
+def _busy_worker(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(i * i for i in range(1000))
+
+
+@pytest.fixture
+def busy_thread() -> Iterator[threading.Thread]:
+    stop = threading.Event()
+    t = threading.Thread(target=_busy_worker, args=(stop,), name="busy")
+    t.start()
+    yield t
+    stop.set()
+    t.join()
+
+
+@pytest.mark.usefixtures("busy_thread")
+def test_speedscope_profile_contains_busy_thread(tmp_path: Path) -> None:
+    prof = SamplingProfiler(tmp_path, "bot", hz=200, duration=0.2)
+    done: list[Path] = []
+
+    assert prof.start(on_done=done.append) is True
+    assert prof.start() is False, "Вторая сессия не стартует, пока идёт первая"
+    prof.join(5)
+
+    (path,) = done
+    assert path.name.endswith(".speedscope.json")
+    data = json.loads(path.read_text(encoding="utf-8"))
+    frames = [f["name"] for f in data["shared"]["frames"]]
+    assert "_busy_worker" in frames
+    busy = next(p for p in data["profiles"] if p["name"] == "busy")
+    assert len(busy["samples"]) == len(busy["weights"])
+    assert sum(busy["weights"]) > 0
+    assert not prof.running
+
+
+@pytest.mark.usefixtures("busy_thread")
+def test_collapsed_profile_lines(tmp_path: Path) -> None:
+    prof = SamplingProfiler(tmp_path, "bot", hz=200, duration=0.1, fmt="collapsed")
+    prof.start()
+    prof.join(5)
+
+    assert prof.last_path is not None
+    lines = prof.last_path.read_text(encoding="utf-8").splitlines()
+    busy = [line for line in lines if line.startswith("busy;")]
+    assert busy
+    stack, count = busy[0].rsplit(" ", 1)
+    assert int(count) > 0
+    assert "_busy_worker (" in stack
+
+
+def test_sample_rate_is_bounded() -> None:
+    prof = SamplingProfiler(".", "bot", hz=50, duration=0.2)
+    started = time.perf_counter()
+    _stacks, ticks, elapsed = prof.sample()
+    assert time.perf_counter() - started < 1
+    assert 5 <= ticks <= 12
+    assert elapsed >= 0.2
+
+
+def test_unknown_format_rejected() -> None:
+    with pytest.raises(ValueError, match="Unknown profile format"):
+        SamplingProfiler(".", "bot", fmt="pprof")
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from libs.common.clock import VirtualClock
+from libs.common.rate_limit import LocalRateLimiter, SketchRateLimiter
+
+
+def test_sliding_window_per_user() -> None:
+    clock = VirtualClock()
+    limiter = LocalRateLimiter(limit=2, window=1.0, clock=clock)
+
+    assert [limiter.hit(1) for _ in range(3)] == [True, True, False]
+    assert limiter.hit(2)
+    clock.advance(1.1)
+    assert limiter.hit(1)
+
+
+def test_sweep_drops_users_idle_longer_than_window() -> None:
+    limiter = LocalRateLimiter(limit=3, window=1.0, clock=VirtualClock())
+
+    limiter.bucket[1].append(0.0)
+    limiter.bucket[2].append(5.0)
+    limiter.bucket[3]  # пустая очередь после выхода из окна
+
+    assert limiter.sweep(now=5.5) == 2
+    assert list(limiter.local_state()) == [2]
+
+
+def test_sketch_keeps_no_state_for_users_within_limit() -> None:
+    clock = VirtualClock()
+    limiter = SketchRateLimiter(limit=3, window=1.0, width=1024, clock=clock)
+
+    for uid in range(1, 501):
+        assert limiter.hit(uid)
+        clock.advance(0.01)
+
+    assert limiter.flagged == 0
+    assert not limiter.local_state()
+
+
+def test_sketch_flags_flooder_and_enforces_exact_limit() -> None:
+    clock = VirtualClock()
+    limiter = SketchRateLimiter(limit=3, window=1.0, width=1024, clock=clock)
+
+    allowed = [limiter.hit(7) for _ in range(10)]
+
+    # 3 проходят до пометки, ещё 3 — по точной очереди, дальше отказ
+    assert allowed == [True] * 6 + [False] * 4
+    assert limiter.flagged == 1
+    assert list(limiter.local_state()) == [7]
+    clock.advance(40.0)
+    assert limiter.hit(8)
+    assert not limiter.local_state()
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import pytest
+
+from libs.common.clock import VirtualClock
+from libs.common.rate_limit_policy import (
+    Limit,
+    RateLimitPolicy,
+    parse_costs,
+    parse_limits,
+    rate_limit_policy,
+)
+
+
+def _policy(limits: str, costs: str = "") -> RateLimitPolicy:
+    policy = rate_limit_policy(limits, costs, clock=VirtualClock())
+    assert policy is not None
+    return policy
+
+
+def test_parse_limits_and_costs() -> None:
+    assert parse_limits("user=3/1s, chat=20/1m,global=30/0.5") == (
+        Limit("user", 3, 1.0),
+        Limit("chat", 20, 60.0),
+        Limit("global", 30, 0.5),
+    )
+    assert parse_costs("/form=3, q:hint=0.5") == {"/form": 3.0, "q:hint": 0.5}
+    assert rate_limit_policy("") is None
+
+
+@pytest.mark.parametrize("spec", ["user=3", "planet=1/1s", "user=0/1s", "user=3/1d"])
+def test_bad_limits_are_rejected(spec: str) -> None:
+    with pytest.raises(ValueError, match="bad rate limit"):
+        parse_limits(spec)
+
+
+def test_cost_by_command_callback_prefix_and_type() -> None:
+    policy = _policy("user=3/1s", "/form=3, q:=0.5, q:hint=0.25, callback_query=2, message=1.5")
+
+    assert policy.cost("message", text="/form@quiz_bot now") == 3
+    assert policy.cost("message", text="/start") == 1.5
+    assert policy.cost("callback_query", data="q:hint_show:age") == 0.25
+    assert policy.cost("callback_query", data="q:back:") == 0.5
+    assert policy.cost("callback_query", data="other") == 2
+    assert policy.cost("inline_query") == 1
+
+
+def test_weighted_user_limit_refills_evenly() -> None:
+    policy = _policy("user=4/1s")
+
+    assert policy.allow(1, None, "message", cost=3, now=0.0)
+    assert not policy.allow(1, None, "message", cost=2, now=0.0)
+    assert policy.allow(1, None, "message", cost=1, now=0.0)
+    assert not policy.allow(1, None, "message", cost=1, now=0.1)
+    assert policy.allow(1, None, "message", cost=1, now=0.25)
+
+
+def test_global_ceiling_does_not_spend_user_budget() -> None:
+    policy = _policy("user=2/1s, global=3/1s")
+
+    assert [policy.allow(uid, None, "message", now=0.0) for uid in (1, 2, 3, 1)] == [
+        True,
+        True,
+        True,
+        False,
+    ]
+    assert policy.denied == {"global": 1}
+    # отказ по global не списал бюджет пользователя 1
+    assert policy.tables[0][1] == pytest.approx(0.5)
+
+
+def test_chat_limit_applies_to_group_chats_only() -> None:
+    policy = _policy("chat=2/1s")
+
+    assert [policy.allow(uid, -100, "message", now=0.0) for uid in (1, 2, 3)] == [
+        True,
+        True,
+        False,
+    ]
+    assert all(policy.allow(uid, None, "message", now=0.0) for uid in (1, 2, 3))
+    assert policy.denied == {"chat": 1}
+
+
+def test_sweep_drops_fully_refilled_keys() -> None:
+    policy = _policy("user=3/1s, type=10/1s")
+    for uid in range(5):
+        policy.allow(uid, None, "message", now=0.0)
+
+    assert policy.sweep(now=0.2) == 0
+    assert policy.sweep(now=1.0) == 6
+    assert policy.tables == [{}, {}]
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator
+
+import pytest
+
+from libs.common.clock import VirtualClock
+from libs.common.redis_rate_limit import RedisClient, RedisError, RedisRateLimiter
+from scripts.bench.fake_redis import FakeRedis
+
+
+@pytest.fixture
+async def server() -> AsyncIterator[FakeRedis]:
+    fake = FakeRedis()
+    await fake.start()
+    yield fake
+    await fake.stop()
+
+
+def _node(server: FakeRedis, clock: VirtualClock, lease_max: int = 8) -> RedisRateLimiter:
+    return RedisRateLimiter(server.url, limit=3, window=1.0, lease_max=lease_max, clock=clock)
+
+
+async def test_client_pipelines_commands(server: FakeRedis) -> None:
+    client = RedisClient(server.url)
+
+    replies = await asyncio.gather(*(client.execute("INCRBY", "k", 1) for _ in range(20)))
+
+    assert sorted(replies) == list(range(1, 21))
+    assert await client.execute("GET", "k") == b"20"
+    with pytest.raises(RedisError, match="unknown command"):
+        await client.execute("NOPE")
+    assert server.connections == 1
+    await client.close()
+
+
+async def test_limit_is_global_across_nodes(server: FakeRedis) -> None:
+    clock = VirtualClock(wall=1000.5)
+    nodes = [_node(server, clock) for _ in range(3)]
+
+    allowed = [await nodes[i % 3].acquire(7) for i in range(9)]
+
+    assert allowed.count(True) == 3
+    clock.advance(1.0)
+    assert await nodes[0].acquire(7)
+    for node in nodes:
+        await node.aclose()
+
+
+async def test_leases_and_cached_denial_save_round_trips(server: FakeRedis) -> None:
+    node = _node(server, VirtualClock(wall=1000.5))
+
+    allowed = [await node.acquire(7) for _ in range(20)]
+
+    assert allowed == [True] * 3 + [False] * 17
+    # 1 + 2 токена арендой, затем один отказ — дальше до конца окна без сети
+    assert server.commands["EVALSHA"] == 3
+    await node.aclose()
+
+
+async def test_concurrent_checks_share_one_refill(server: FakeRedis) -> None:
+    node = _node(server, VirtualClock(wall=1000.5))
+
+    allowed = await asyncio.gather(*(node.acquire(7) for _ in range(5)))
+
+    assert sorted(allowed) == [False, False, True, True, True]
+    assert server.commands["EVALSHA"] == 3
+    await node.aclose()
+
+
+async def test_reloads_script_after_flush(server: FakeRedis) -> None:
+    clock = VirtualClock(wall=1000.5)
+    node = _node(server, clock, lease_max=1)
+    assert await node.acquire(7)
+
+    server.scripts.clear()
+    clock.advance(1.0)
+
+    assert await node.acquire(7)
+    assert server.commands["EVAL"] == 1
+    await node.aclose()
+
+
+async def test_unavailable_server_fails_open_with_backoff(
+    server: FakeRedis, caplog: pytest.LogCaptureFixture
+) -> None:
+    url = server.url
+    port = int(url.rsplit(":", 1)[1].split("/")[0])
+    await server.stop()
+    clock = VirtualClock(wall=1000.5)
+    node = RedisRateLimiter(url, limit=1, window=1.0, timeout=0.2, backoff=5.0, clock=clock)
+    connects = 0
+    real_connect = node.client._connect
+
+    async def connect() -> asyncio.StreamWriter:
+        nonlocal connects
+        connects += 1
+        return await real_connect()
+
+    node.client._connect = connect  # type: ignore[method-assign]
+
+    # Сбой: в сеть ходит только первый апдейт, остальные пропускаются сразу
+    assert [await node.acquire(uid) for uid in range(3)] == [True, True, True]
+    assert (node.errors, connects) == (3, 1)
+    clock.advance(5.0)
+    assert await node.acquire(3)
+    assert connects == 2
+
+    await server.start(port=port)
+    clock.advance(5.0)
+    assert await node.acquire(4)
+    assert await node.acquire(4) is False
+    assert (node.errors, connects) == (4, 3)
+    messages = [r.getMessage() for r in caplog.records]
+    assert sum("unavailable" in m for m in messages) == 1
+    assert sum("is back" in m for m in messages) == 1
+    await node.aclose()
+
+
+async def test_failed_auth_drops_connection(server: FakeRedis) -> None:
+    client = RedisClient(server.url.replace("//", "//:secret@"))
+
+    for _ in range(2):
+        with pytest.raises(RedisError, match="AUTH"):
+            await client.execute("PING")
+        assert client._writer is None
+    # Каждая попытка — новое соединение, а не команды в неавторизованное
+    assert server.connections == 2
+    await client.close()
+
+
+async def test_reconnects_after_connection_loss(server: FakeRedis) -> None:
+    clock = VirtualClock(wall=1000.5)
+    node = _node(server, clock, lease_max=1)
+    assert await node.acquire(7)
+
+    server.drop_connections()
+    await asyncio.sleep(0.05)  # клиент замечает закрытие сокета
+    clock.advance(1.0)
+
+    assert await node.acquire(7)
+    assert server.connections == 2
+    await node.aclose()
+
+
+async def test_old_windows_are_swept(server: FakeRedis) -> None:
+    clock = VirtualClock(wall=1000.5)
+    node = _node(server, clock)
+    for uid in range(1, 6):
+        await node.acquire(uid)
+
+    clock.advance(60.0)
+    await node.acquire(100)
+
+    assert list(node.local_state()) == [100]
+    await node.aclose()
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import multiprocessing
+from pathlib import Path
+
+import pytest
+
+from libs.common.clock import VirtualClock
+from libs.common.shared_rate_limit import MAX_PROBE, SharedRateLimiter
+
+
+def test_sliding_window_matches_per_user_limit(tmp_path: Path) -> None:
+    clock = VirtualClock()
+    limiter = SharedRateLimiter(tmp_path / "rl", limit=2, window=1.0, capacity=64, clock=clock)
+
+    assert [limiter.hit(1) for _ in range(3)] == [True, True, False]
+    assert limiter.hit(2)  # у другого пользователя своё окно
+    clock.advance(0.5)
+    assert not limiter.hit(1)
+    clock.advance(0.6)
+    assert limiter.hit(1)
+
+
+def test_instances_on_same_file_share_state(tmp_path: Path) -> None:
+    a = SharedRateLimiter(tmp_path / "rl", limit=3, window=10, capacity=64)
+    b = SharedRateLimiter(tmp_path / "rl", limit=3, window=10, capacity=64)
+
+    assert [a.hit(5, now=1.0), b.hit(5, now=1.1), a.hit(5, now=1.2)] == [True, True, True]
+    assert not b.hit(5, now=1.3)
+
+
+def test_mismatched_settings_are_rejected(tmp_path: Path) -> None:
+    SharedRateLimiter(tmp_path / "rl", limit=3, window=1, capacity=64)
+    with pytest.raises(ValueError, match="limit=3"):
+        SharedRateLimiter(tmp_path / "rl", limit=5, window=1, capacity=64)
+
+
+def test_expired_slots_are_reused_and_full_table_fails_open(tmp_path: Path) -> None:
+    limiter = SharedRateLimiter(tmp_path / "rl", limit=1, window=1.0, capacity=1)
+    users = range(1, MAX_PROBE + 2)
+
+    assert all(limiter.hit(uid, now=0.0) for uid in users)
+    assert limiter.overflows == 1
+    assert limiter.active(now=0.0) == MAX_PROBE
+
+    # через окно старые слоты свободны для новых пользователей
+    assert limiter.hit(1000, now=5.0)
+    assert limiter.overflows == 1
+    assert limiter.active(now=5.0) == 1
+
+
+def _worker(path: str, hits: int, queue: multiprocessing.Queue) -> None:
+    limiter = SharedRateLimiter(path, limit=10, window=3600, capacity=64)
+    queue.put(sum(limiter.hit(42) for _ in range(hits)))
+
+
+def test_processes_enforce_one_limit(tmp_path: Path) -> None:
+    path = str(tmp_path / "rl")
+    SharedRateLimiter(path, limit=10, window=3600, capacity=64)
+    ctx = multiprocessing.get_context("fork")
+    queue: multiprocessing.Queue = ctx.Queue()
+    procs = [ctx.Process(target=_worker, args=(path, 50, queue)) for _ in range(4)]
+    for proc in procs:
+        proc.start()
+    allowed = sum(queue.get(timeout=30) for _ in procs)
+    for proc in procs:
+        proc.join(timeout=30)
+
+    assert allowed == 10
+
+
+def test_limit_can_be_lowered_below_ring(tmp_path: Path) -> None:
+    clock = VirtualClock()
+    limiter = SharedRateLimiter(tmp_path / "rl", limit=4, window=1.0, capacity=64, clock=clock)
+    limiter.limit = 2
+
+    assert [limiter.hit(1) for _ in range(3)] == [True, True, False]
+    limiter.limit = 4
+    assert [limiter.hit(1) for _ in range(3)] == [True, True, False]
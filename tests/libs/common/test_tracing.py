@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import json
+import time
+from pathlib import Path
+
+import pytest
+
+from libs.common.tracing import FileExporter, Trace, Tracer, current_span, to_otlp
+
+
+def _tracer(sampled: bool, slow_sec: float = 0.0) -> tuple[Tracer, list[Trace]]:
+    out: list[Trace] = []
+    return (
+        Tracer(
+            out.append, sample_rate=0.5, slow_sec=slow_sec, rand=lambda: 0.0 if sampled else 0.9
+        ),
+        out,
+    )
+
+
+def test_spans_nest_under_root() -> None:
+    tracer, out = _tracer(sampled=True)
+
+    with tracer.trace("update", **{"update.id": 7}) as root:
+        with tracer.span("middleware") as mw, tracer.span("handler") as h:
+            assert current_span() is h
+        assert current_span() is root
+    assert current_span() is None
+
+    (trace,) = out
+    assert [s.name for s in trace.spans] == ["update", "middleware", "handler"]
+    assert mw is not None
+    assert h is not None
+    assert mw.parent_id == root.span_id
+    assert h.parent_id == mw.span_id
+    assert all(s.end >= s.start for s in trace.spans)
+
+
+def test_span_outside_trace_is_noop() -> None:
+    tracer, out = _tracer(sampled=True)
+    with tracer.span("orphan") as s:
+        assert s is None
+    assert out == []
+
+
+def test_head_sampling_drops_fast_unsampled_traces() -> None:
+    tracer, out = _tracer(sampled=False, slow_sec=10)
+    with tracer.trace("update"):
+        pass
+    assert out == []
+    assert tracer.dropped == 1
+
+
+def test_tail_rule_keeps_slow_unsampled_traces() -> None:
+    tracer, out = _tracer(sampled=False, slow_sec=0.001)
+    with tracer.trace("update"):
+        time.sleep(0.005)
+    assert len(out) == 1
+    assert tracer.exported == 1
+
+
+def test_error_marks_span_status() -> None:
+    tracer, out = _tracer(sampled=True)
+    with pytest.raises(RuntimeError), tracer.trace("update"), tracer.span("handler"):
+        raise RuntimeError("boom")
+
+    spans = to_otlp(out[0], "bot")["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    assert all(s["status"]["code"] == 2 for s in spans)
+    assert "boom" in spans[1]["status"]["message"]
+
+
+def test_otlp_shape() -> None:
+    tracer, out = _tracer(sampled=True)
+    with tracer.trace("update", **{"update.id": 7, "skip": None}), tracer.span("api"):
+        pass
+
+    doc = to_otlp(out[0], "echo_bot")
+    rs = doc["resourceSpans"][0]
+    assert rs["resource"]["attributes"] == [
+        {"key": "service.name", "value": {"stringValue": "echo_bot"}}
+    ]
+    root, child = rs["scopeSpans"][0]["spans"]
+    assert len(root["traceId"]) == 32
+    assert root["traceId"] == child["traceId"]
+    assert len(root["spanId"]) == 16
+    assert "parentSpanId" not in root
+    assert child["parentSpanId"] == root["spanId"]
+    assert root["attributes"] == [{"key": "update.id", "value": {"intValue": "7"}}]
+    assert int(root["endTimeUnixNano"]) >= int(root["startTimeUnixNano"])
+
+
+def test_file_exporter_writes_json_lines(tmp_path: Path) -> None:
+    path = tmp_path / "traces" / "bot.jsonl"
+    exporter = FileExporter(path, service="bot")
+    tracer = Tracer(exporter.export, sample_rate=1.0)
+
+    for _ in range(3):
+        with tracer.trace("update"):
+            pass
+    exporter.close()
+
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 3
+    assert all("resourceSpans" in json.loads(line) for line in lines)
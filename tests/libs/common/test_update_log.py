@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import gzip
+from pathlib import Path
+
+from libs.common.update_log import UpdateLogWriter, anonymize, mask_text, read_update_log
+
+
+SALT = b"0123456789abcdef"
+
+
+def _update(update_id: int, user_id: int, text: str) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": 1,
+            "date": 0,
+            "chat": {"id": user_id, "type": "private", "username": "alice"},
+            "from": {"id": user_id, "is_bot": False, "first_name": "Alice", "username": "alice"},
+            "text": text,
+        },
+    }
+
+
+def test_mask_text_keeps_command_and_shape() -> None:
+    assert mask_text("/start") == "/start"
+    assert mask_text("/form@bot Иван 30") == "/form@bot xxxx 11"
+    assert mask_text("Hello, 42!") == "xxxxx, 11!"
+
+
+def test_anonymize_is_stable_and_drops_pii() -> None:
+    a = anonymize(_update(1, 777, "my phone 555"), SALT)
+    b = anonymize(_update(2, 777, "hi"), SALT)
+    msg = a["message"]
+
+    assert msg["from"]["id"] == msg["chat"]["id"] == b["message"]["from"]["id"]
+    assert msg["from"]["id"] != 777
+    assert msg["from"]["first_name"] == "anon"
+    assert "username" not in msg["from"]
+    assert "username" not in msg["chat"]
+    assert msg["text"] == "xx xxxxx 111"
+    # не-персональные поля без изменений
+    assert a["update_id"] == 1
+    assert msg["message_id"] == 1
+    other = anonymize(_update(1, 777, "x"), b"other-salt-00000")
+    assert other["message"]["from"]["id"] != msg["from"]["id"]
+
+
+def test_group_chat_id_keeps_sign() -> None:
+    out = anonymize({"chat": {"id": -100123, "type": "supergroup", "title": "Team"}}, SALT)
+    assert out["chat"]["id"] < 0
+    assert out["chat"]["title"] == "anon"
+
+
+def test_nested_users_and_chats_are_pseudonymized() -> None:
+    def user(user_id: int) -> dict:
+        return {"id": user_id, "is_bot": False, "first_name": "Bob"}
+
+    update = {
+        "update_id": 1,
+        "message": {
+            "message_id": 1,
+            "date": 0,
+            "chat": {"id": -100123, "type": "supergroup"},
+            "new_chat_members": [user(501), user(502)],
+            "left_chat_member": user(503),
+            "forward_origin": {"type": "user", "date": 0, "sender_user": user(504)},
+            "reply_to_message": {"message_id": 2, "sender_business_bot": {"id": 505}},
+            "some_future_field": {"peer": user(506)},
+        },
+    }
+    msg = anonymize(update, SALT)["message"]
+
+    ids = [m["id"] for m in msg["new_chat_members"]] + [
+        msg["left_chat_member"]["id"],
+        msg["forward_origin"]["sender_user"]["id"],
+        msg["reply_to_message"]["sender_business_bot"]["id"],
+        msg["some_future_field"]["peer"]["id"],
+    ]
+    assert ids == [anonymize(user(i), SALT)["id"] for i in range(501, 507)]
+    assert not set(ids) & set(range(501, 507))
+    assert msg["message_id"] == 1
+    assert msg["reply_to_message"]["message_id"] == 2
+
+
+def test_roundtrip_appends_members(tmp_path: Path) -> None:
+    path = tmp_path / "updates.jsonl.gz"
+    for run in range(2):
+        writer = UpdateLogWriter(path, anonymized=False)
+        writer.write(_update(run, 1, f"run {run}"), ts=100.0 + run)
+        writer.close()
+
+    records = list(read_update_log(path))
+    assert [ts for ts, _ in records] == [100.0, 101.0]
+    assert records[1][1]["message"]["text"] == "run 1"
+
+
+def test_truncated_tail_is_ignored(tmp_path: Path) -> None:
+    path = tmp_path / "updates.jsonl.gz"
+    writer = UpdateLogWriter(path, anonymized=False)
+    for i in range(3):
+        writer.write(_update(i, 1, "x"), ts=float(i))
+    writer.close()
+    # оборванный второй member — как после kill -9
+    tail = gzip.compress(b'{"t":9,"u":{"update_id":9}}\n{"t":10,')
+    path.write_bytes(path.read_bytes() + tail[: len(tail) // 2])
+
+    assert [ts for ts, _ in read_update_log(path)] == [0.0, 1.0, 2.0]
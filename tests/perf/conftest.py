@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import sys
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+from _pytest.terminal import TerminalReporter
+
+from tests.perf.gate import (
+    PerfGate,
+    Result,
+    environment,
+    load_baseline,
+    report_lines,
+    save_baseline,
+)
+
+
+_results: list[Result] = []
+
+# Часть тестов подменяет aiogram и libs в sys.modules насовсем; модули, импортированные
+# при сборке, запоминаются и возвращаются на место на время каждого бенчмарка
+_PACKAGES = ("aiogram", "libs", "bots", "scripts")
+_real_modules: dict[str, object] = {}
+
+
+def pytest_collection_finish(session: pytest.Session) -> None:
+    _real_modules.update((name, module) for name, module in sys.modules.items() if _ours(name))
+
+
+def _ours(name: str) -> bool:
+    return name.partition(".")[0] in _PACKAGES
+
+
+@pytest.fixture(autouse=True)
+def real_modules(monkeypatch: pytest.MonkeyPatch) -> Iterator[None]:
+    for name in list(sys.modules):
+        if _ours(name) and name not in _real_modules:
+            monkeypatch.delitem(sys.modules, name)
+    for name, module in _real_modules.items():
+        monkeypatch.setitem(sys.modules, name, module)
+    yield
+    # Импортированное бенчмарком (боты, e2e) не должно достаться тестам, ждущим заглушек
+    for name in list(sys.modules):
+        if _ours(name) and name not in _real_modules:
+            del sys.modules[name]
+
+
+# Бенчмарки меряют настоящий код: заглушки aiogram и gettext из корневого conftest
+# здесь отключены переопределением одноимённых фикстур
+@pytest.fixture(autouse=True)
+def stub_aiogram() -> None:
+    return None
+
+
+@pytest.fixture(autouse=True)
+def noop_gettext() -> None:
+    return None
+
+
+@pytest.fixture(scope="session")
+def perf_baseline() -> dict:
+    return load_baseline()
+
+
+@pytest.fixture
+def perf(request: pytest.FixtureRequest, perf_baseline: dict) -> PerfGate:
+    config = request.config
+    update = config.getoption("--perf-update")
+    timing = config.getoption("--perf") or update
+    # При обновлении baseline дельты показываются, но прогон не падает
+    return PerfGate(perf_baseline, timing=bool(timing), results=_results, enforce=not update)
+
+
+def pytest_sessionfinish(session: pytest.Session) -> None:
+    if session.config.getoption("--perf-update") and _results:
+        save_baseline(_results)
+
+
+def pytest_terminal_summary(terminalreporter: TerminalReporter) -> None:
+    if not _results:
+        return
+    baseline = load_baseline()
+    same_env = baseline.get("environment") == environment()
+    terminalreporter.section("perf gate")
+    if not same_env:
+        terminalreporter.write_line(
+            f"baseline environment {baseline.get('environment')!r} != {environment()!r}: "
+            "calls/op reported, not enforced"
+        )
+    for line in report_lines(_results, same_env):
+        terminalreporter.write_line(line)
+
+
+@pytest.fixture
+def bench_env(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Iterator[None]:
+    """Окружение ботов для бенчмарков: лимитер не режет, журналы — во временную папку."""
+    from libs.common.config import get_settings
+
+    monkeypatch.setenv("BOT_TOKEN", "42:PERF")
+    monkeypatch.setenv("RATE_LIMIT_PER_USER", "1000000")
+    monkeypatch.setenv("FSM_TTL_SEC", "86400")
+    monkeypatch.setenv("UPDATE_LOG_FILE", "")
+    monkeypatch.setenv("LOG_FILE", str(tmp_path / "bot.log"))
+    get_settings.cache_clear()
+    yield
+    get_settings.cache_clear()
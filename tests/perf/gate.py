@@ -0,0 +1,314 @@
+"""
+Движок perf-гейта: счётчики операций и калиброванное время против baseline.json.
+
+На каждый бенчмарк снимается:
+- calls/op — число вызовов функций (Python и C) на операцию через
+  sys.setprofile. Детерминировано при одних версиях Python и aiogram,
+  поэтому проверяется в каждом прогоне pytest;
+- счётчики бенчмарка на операцию (обращения к FSM storage, запросы к Bot API) —
+  сравниваются точно: лишний get_data виден как +1, а не как шум;
+- время (только с --perf): число повторов подбирается, пока один замер не
+  займёт CALIBRATE_SEC, из REPEAT замеров берётся минимальный, и результат
+  делится на время эталонного цикла на этой же машине — в baseline лежит
+  относительная цена, переносимая между машинами.
+"""
+
+from __future__ import annotations
+
+import gc
+import json
+import platform
+import sys
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import FrameType
+from typing import Any
+
+import aiogram
+import pytest
+
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+
+# Допуски по умолчанию; в baseline.json можно переопределить глобально и на бенчмарк
+CALLS_TOLERANCE = 1.10
+TIME_TOLERANCE = 1.5
+
+WARMUP_OPS = 3
+COUNT_OPS = 20
+CALIBRATE_SEC = 0.02
+REPEAT = 5
+
+Counters = Callable[[], dict[str, float]]
+
+
+def environment() -> str:
+    """Ключ окружения: calls/op сравнимы только при совпадающих версиях."""
+    return f"py{sys.version_info.major}.{sys.version_info.minor}-aiogram{aiogram.__version__}"
+
+
+def _reference_loop(n: int) -> None:
+    # Эталон: вызовы, dict lookup и арифметика — то же, из чего состоит горячий путь
+    table = {i: i for i in range(64)}
+
+    def step(x: int) -> int:
+        return table.get(x & 63, 0) + 1
+
+    acc = 0
+    for i in range(n):
+        acc += step(i)
+
+
+_reference_ns: float | None = None
+
+
+def reference_ns() -> float:
+    """ns на итерацию эталонного цикла; считается один раз за сессию."""
+    global _reference_ns
+    if _reference_ns is None:
+        n = 20_000
+        best = min(_timed(lambda: _reference_loop(n)) for _ in range(REPEAT))
+        _reference_ns = best / n
+    return _reference_ns
+
+
+def _timed(fn: Callable[[], None]) -> float:
+    started = time.perf_counter_ns()
+    fn()
+    return time.perf_counter_ns() - started
+
+
+class _CallCounter:
+    __slots__ = ("calls",)
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def __call__(self, frame: FrameType, event: str, arg: Any) -> None:  # noqa: ANN401
+        if event == "call" or event == "c_call":
+            self.calls += 1
+
+
+@dataclass
+class Result:
+    name: str
+    ops: int
+    calls_per_op: float
+    counters: dict[str, float]
+    ns_per_op: float | None = None
+    rel_cost: float | None = None
+    baseline: dict[str, Any] | None = None
+    failures: list[str] = field(default_factory=list)
+
+    def as_baseline(self) -> dict[str, Any]:
+        entry: dict[str, Any] = {"calls_per_op": self.calls_per_op, "counters": self.counters}
+        if self.rel_cost is not None:
+            entry["rel_cost"] = self.rel_cost
+            entry["ns_per_op"] = self.ns_per_op
+        old = self.baseline or {}
+        for key in ("calls_tolerance", "time_tolerance"):
+            if key in old:
+                entry[key] = old[key]
+        return entry
+
+
+def load_baseline(path: Path = BASELINE_PATH) -> dict[str, Any]:
+    if not path.exists():
+        return {"environment": "", "benchmarks": {}}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def save_baseline(results: list[Result], path: Path = BASELINE_PATH) -> None:
+    data = load_baseline(path)
+    data["environment"] = environment()
+    data["machine"] = f"{platform.machine()} {platform.python_implementation()}"
+    data["reference_ns"] = round(reference_ns(), 3)
+    benchmarks = data.setdefault("benchmarks", {})
+    for result in results:
+        benchmarks[result.name] = result.as_baseline()
+    data["benchmarks"] = dict(sorted(benchmarks.items()))
+    path.write_text(json.dumps(data, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+
+
+def _delta(current: float, base: float) -> str:
+    return f"{(current / base - 1) * 100:+.1f}%" if base else "n/a"
+
+
+class PerfGate:
+    """
+    Фикстура perf: bench() для синхронного кода, abench() — для корутин.
+
+    fn выполняет ops операций за вызов; counters — снимок накопительных
+    счётчиков бенчмарка, в отчёт попадает их прирост на операцию.
+    """
+
+    def __init__(
+        self, baseline: dict[str, Any], timing: bool, results: list[Result], enforce: bool = True
+    ) -> None:
+        self.baseline = baseline
+        self.timing = timing
+        self.results = results
+        self.enforce = enforce
+        self.same_env = baseline.get("environment") == environment()
+        tolerance = baseline.get("tolerance", {})
+        self.calls_tolerance = tolerance.get("calls", CALLS_TOLERANCE)
+        self.time_tolerance = tolerance.get("time", TIME_TOLERANCE)
+
+    def bench(
+        self, name: str, fn: Callable[[], object], ops: int = 1, counters: Counters | None = None
+    ) -> Result:
+        for _ in range(WARMUP_OPS):
+            fn()
+        snapshot = counters() if counters else {}
+        counter = _CallCounter()
+        # Сборщик мусора в произвольный момент вызывает финализаторы — это шум в счётчике
+        gc.collect()
+        gc.disable()
+        sys.setprofile(counter)
+        try:
+            for _ in range(COUNT_OPS):
+                fn()
+        finally:
+            sys.setprofile(None)
+            gc.enable()
+        result = self._result(name, ops, counter.calls, snapshot, counters)
+
+        if self.timing:
+
+            def run(number: int) -> float:
+                started = time.perf_counter_ns()
+                for _ in range(number):
+                    fn()
+                return time.perf_counter_ns() - started
+
+            number = self._calibrate(run)
+            result.ns_per_op = min(run(number) for _ in range(REPEAT)) / (number * ops)
+        return self._check(result)
+
+    async def abench(
+        self,
+        name: str,
+        fn: Callable[[], Awaitable[object]],
+        ops: int = 1,
+        counters: Counters | None = None,
+    ) -> Result:
+        for _ in range(WARMUP_OPS):
+            await fn()
+        snapshot = counters() if counters else {}
+        counter = _CallCounter()
+        # Сборщик мусора в произвольный момент вызывает финализаторы — это шум в счётчике
+        gc.collect()
+        gc.disable()
+        sys.setprofile(counter)
+        try:
+            for _ in range(COUNT_OPS):
+                await fn()
+        finally:
+            sys.setprofile(None)
+            gc.enable()
+        result = self._result(name, ops, counter.calls, snapshot, counters)
+
+        if self.timing:
+
+            async def run(number: int) -> float:
+                started = time.perf_counter_ns()
+                for _ in range(number):
+                    await fn()
+                return time.perf_counter_ns() - started
+
+            number = 1
+            while await run(number) < CALIBRATE_SEC * 1e9:
+                number *= 2
+            best = min([await run(number) for _ in range(REPEAT)])
+            result.ns_per_op = best / (number * ops)
+        return self._check(result)
+
+    @staticmethod
+    def _calibrate(run: Callable[[int], float]) -> int:
+        number = 1
+        while run(number) < CALIBRATE_SEC * 1e9:
+            number *= 2
+        return number
+
+    def _result(
+        self,
+        name: str,
+        ops: int,
+        calls: int,
+        snapshot: dict[str, float],
+        counters: Counters | None,
+    ) -> Result:
+        total = COUNT_OPS * ops
+        after = counters() if counters else {}
+        per_op = {key: round((after[key] - snapshot.get(key, 0)) / total, 3) for key in after}
+        return Result(name, ops, round(calls / total, 1), per_op)
+
+    def _check(self, result: Result) -> Result:
+        base = self.baseline.get("benchmarks", {}).get(result.name)
+        result.baseline = base
+        if result.ns_per_op is not None:
+            result.ns_per_op = round(result.ns_per_op, 1)
+            result.rel_cost = round(result.ns_per_op / reference_ns(), 2)
+        self.results.append(result)
+        if base is None:
+            return result
+
+        # Счётчики — точные: любая лишняя операция на апдейт это регрессия
+        for key, value in result.counters.items():
+            was = base.get("counters", {}).get(key, 0.0)
+            if value > was + 1e-9:
+                result.failures.append(f"{key}/op {was} -> {value}")
+
+        calls_tol = base.get("calls_tolerance", self.calls_tolerance)
+        if self.same_env and result.calls_per_op > base["calls_per_op"] * calls_tol:
+            result.failures.append(
+                f"calls/op {base['calls_per_op']} -> {result.calls_per_op} "
+                f"({_delta(result.calls_per_op, base['calls_per_op'])}, limit x{calls_tol})"
+            )
+
+        time_tol = base.get("time_tolerance", self.time_tolerance)
+        was_rel = base.get("rel_cost")
+        if result.rel_cost is not None and was_rel and result.rel_cost > was_rel * time_tol:
+            result.failures.append(
+                f"relative cost {was_rel} -> {result.rel_cost} "
+                f"({_delta(result.rel_cost, was_rel)}, limit x{time_tol})"
+            )
+
+        if result.failures and self.enforce:
+            pytest.fail(f"{result.name} regressed: " + "; ".join(result.failures), pytrace=False)
+        return result
+
+
+def report_lines(results: list[Result], same_env: bool) -> list[str]:
+    lines = [
+        f"{'benchmark':<40} {'calls/op':>9} {'Δ':>8} {'rel':>7} {'Δ':>8} {'ns/op':>10}  counters"
+    ]
+    for r in sorted(results, key=lambda r: r.name):
+        base = r.baseline or {}
+        calls_delta = _delta(r.calls_per_op, base["calls_per_op"]) if base else "new"
+        if not same_env and base:
+            calls_delta = "env≠"
+        rel = f"{r.rel_cost}" if r.rel_cost is not None else "-"
+        rel_delta = (
+            _delta(r.rel_cost, base["rel_cost"])
+            if r.rel_cost is not None and base.get("rel_cost")
+            else "-"
+        )
+        ns = f"{r.ns_per_op:.0f}" if r.ns_per_op is not None else "-"
+        was = base.get("counters", {})
+        counters = " ".join(
+            f"{k}={v:g}" + (f"(was {was.get(k, 0):g})" if base and v != was.get(k, 0) else "")
+            for k, v in sorted(r.counters.items())
+            if v or was.get(k)
+        )
+        mark = "  FAIL" if r.failures else ""
+        lines.append(
+            f"{r.name:<40} {r.calls_per_op:>9} {calls_delta:>8} {rel:>7} {rel_delta:>8} {ns:>10}  "
+            f"{counters}{mark}"
+        )
+    return lines
+
+
+__all__ = ["PerfGate", "Result", "environment", "load_baseline", "report_lines", "save_baseline"]
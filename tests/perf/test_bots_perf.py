@@ -0,0 +1,138 @@
+"""
+Горячие пути ботов целиком: Dispatcher из build_dispatcher() со всеми middleware,
+FakeSession вместо Bot API, VirtualClock — окна лимитера не зависят от скорости машины.
+"""
+
+from __future__ import annotations
+
+import itertools
+from collections import Counter
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+import pytest
+from aiogram import Bot, Dispatcher
+from aiogram.fsm.storage.base import BaseStorage
+from aiogram.types import Message, Update
+
+from libs.common.clock import VirtualClock
+from scripts.bench.fake_session import FakeSession
+from tests.perf.gate import PerfGate
+
+
+USER_ID = 90_000_001
+
+# Update.event_type кэшируется lru_cache по hash(update_id): совпадение id с апдейтами
+# других тестов и бенчмарков добавляет сравнения в каждый вызов — у каждого свой диапазон
+UPDATE_ID_BLOCKS = itertools.count(900_000_000, 1_000_000)
+
+STORAGE_METHODS = ("get_state", "set_state", "get_data", "set_data")
+
+
+def count_storage(storage: BaseStorage) -> Counter[str]:
+    """Подменяет методы storage обёртками со счётчиком; update_data идёт через них же."""
+    calls: Counter[str] = Counter()
+    for name in STORAGE_METHODS:
+        method = getattr(storage, name)
+
+        def wrapper(
+            *args: Any, _name: str = name, _method: Any = method, **kwargs: Any  # noqa: ANN401
+        ) -> Any:  # noqa: ANN401
+            calls[_name] += 1
+            return _method(*args, **kwargs)
+
+        setattr(storage, name, wrapper)
+    return calls
+
+
+class BotBench:
+    def __init__(self, build: Callable[..., Dispatcher]) -> None:
+        from scripts.bench.e2e import UpdateFactory
+
+        self.session = FakeSession()
+        self.bot = Bot(token="42:PERF", session=self.session)
+        self.dp = build(self.bot, VirtualClock())
+        self.storage_calls = count_storage(self.dp.fsm.storage)
+        self.factory = UpdateFactory()
+        self.factory.update_id = next(UPDATE_ID_BLOCKS)
+
+    def counters(self) -> dict[str, float]:
+        counters = {f"storage.{k}": float(self.storage_calls[k]) for k in STORAGE_METHODS}
+        counters["api_calls"] = float(sum(self.session.calls.values()))
+        return counters
+
+    def feeder(self, steps: Callable[[], list[dict[str, Any]]]) -> Callable[[], Awaitable[None]]:
+        async def feed() -> None:
+            for raw in steps():
+                update = Update.model_validate(raw, context={"bot": self.bot})
+                await self.dp.feed_update(self.bot, update)
+
+        return feed
+
+
+@pytest.fixture
+def echo(bench_env: None) -> BotBench:
+    from bots.echo_bot.app.main import build_dispatcher
+
+    return BotBench(build_dispatcher)
+
+
+@pytest.fixture
+def questionnaire(bench_env: None) -> BotBench:
+    from bots.questionnaire_bot.app.main import build_dispatcher
+
+    return BotBench(build_dispatcher)
+
+
+async def test_echo_text(perf: PerfGate, echo: BotBench) -> None:
+    feed = echo.feeder(lambda: [echo.factory.text(USER_ID, "hello")])
+    await perf.abench("echo.text", feed, counters=echo.counters)
+
+
+async def test_echo_start(perf: PerfGate, echo: BotBench) -> None:
+    feed = echo.feeder(lambda: [echo.factory.text(USER_ID, "/start")])
+    await perf.abench("echo.start", feed, counters=echo.counters)
+
+
+async def test_questionnaire_form_start(perf: PerfGate, questionnaire: BotBench) -> None:
+    f = questionnaire.factory
+    feed = questionnaire.feeder(lambda: [f.text(USER_ID, "/form")])
+    await perf.abench("questionnaire.form_start", feed, counters=questionnaire.counters)
+
+
+async def test_questionnaire_ask_name(perf: PerfGate, questionnaire: BotBench) -> None:
+    # /form + имя: из разницы с form_start видна цена шага анкеты
+    f = questionnaire.factory
+    feed = questionnaire.feeder(lambda: [f.text(USER_ID, "/form"), f.text(USER_ID, "Alice")])
+    await perf.abench("questionnaire.form_start+name", feed, ops=2, counters=questionnaire.counters)
+
+
+async def test_questionnaire_full_form(perf: PerfGate, questionnaire: BotBench) -> None:
+    from scripts.bench.e2e import questionnaire_script
+
+    steps = len(questionnaire_script(questionnaire.factory, USER_ID))
+    feed = questionnaire.feeder(lambda: questionnaire_script(questionnaire.factory, USER_ID))
+    await perf.abench("questionnaire.full_form", feed, ops=steps, counters=questionnaire.counters)
+
+
+async def test_questionnaire_cancel_button(perf: PerfGate, questionnaire: BotBench) -> None:
+    # Текст reply-кнопки проходит через I18nTextEquals
+    f = questionnaire.factory
+    feed = questionnaire.feeder(lambda: [f.text(USER_ID, "❌ Cancel")])
+    await perf.abench("questionnaire.cancel_text", feed, counters=questionnaire.counters)
+
+
+async def test_i18n_text_equals(perf: PerfGate, questionnaire: BotBench) -> None:
+    from bots.questionnaire_bot.app.filters.i18n_text import I18nTextEquals
+    from libs.common.aiogram.i18n import create_i18n
+
+    i18n = create_i18n(bot_name="questionnaire_bot").i18n
+    flt = I18nTextEquals("action.cancel")
+    raw = questionnaire.factory.text(USER_ID, "something else")["message"]
+    message = Message.model_validate(raw, context={"bot": questionnaire.bot})
+
+    async def check() -> None:
+        with i18n.context(), i18n.use_locale("en"):
+            await flt(message)
+
+    await perf.abench("questionnaire.I18nTextEquals", check)
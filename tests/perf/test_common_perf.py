@@ -0,0 +1,246 @@
+"""Компоненты libs/common по отдельности — то, что выполняется на каждый апдейт."""
+
+from __future__ import annotations
+
+import datetime
+import itertools
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from typing import Any
+
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.types import CallbackQuery, Chat, Message, TelegramObject, Update, User
+
+from libs.common.aiogram.fsm_storage import ExpiringMemoryStorage
+from libs.common.aiogram.i18n import _, create_i18n
+from libs.common.clock import VirtualClock
+from libs.common.flight_recorder import FlightRecorder
+from libs.common.metrics import Registry
+from libs.common.middleware.keyboard_cleanup_middleware import KeyboardCleanupMiddleware
+from libs.common.middleware.metrics_middleware import UpdateMetricsMiddleware
+from libs.common.middleware.rate_limit_middleware import RateLimitMiddleware
+from libs.common.middleware.tracing_middleware import TracingMiddleware
+from libs.common.po_catalog import read_po
+from libs.common.rate_limit import SketchRateLimiter
+from libs.common.rate_limit_policy import RateLimitPolicy, parse_costs, parse_limits
+from libs.common.tracing import Trace, Tracer
+from libs.common.update_log import anonymize, mask_text
+from tests.perf.gate import PerfGate
+from tests.perf.test_bots_perf import STORAGE_METHODS, count_storage
+
+
+LOCALES = Path(__file__).resolve().parents[2] / "locales"
+
+USER = User(id=1001, is_bot=False, first_name="Bob", language_code="en")
+CHAT = Chat(id=1001, type="private")
+
+# Вне диапазона id других тестов: см. UPDATE_ID_BLOCKS в test_bots_perf
+UPDATE_ID = 800_000_001
+
+
+def _message(text: str = "hello") -> Message:
+    return Message(
+        message_id=7,
+        date=datetime.datetime(2026, 1, 1, tzinfo=datetime.UTC),
+        chat=CHAT,
+        from_user=USER,
+        text=text,
+    )
+
+
+async def _handler(event: TelegramObject, data: dict[str, Any]) -> None:
+    return None
+
+
+class FakeBot:
+    """Только то, что трогает KeyboardCleanupMiddleware; вызовы считаются."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def edit_message_reply_markup(self, **kwargs: Any) -> bool:  # noqa: ANN401
+        self.calls += 1
+        return True
+
+
+def test_metrics_counter_labels_inc(perf: PerfGate) -> None:
+    counter = Registry().counter("c", "doc", ("type", "handler", "outcome"))
+    perf.bench(
+        "metrics.counter.labels_inc",
+        lambda: counter.labels("message", "echo", "ok").inc(),
+    )
+
+
+def test_metrics_histogram_observe(perf: PerfGate) -> None:
+    histogram = Registry().histogram("h", "doc", ("type", "handler")).labels("message", "echo")
+    perf.bench("metrics.histogram.observe", lambda: histogram.observe(0.0042))
+
+
+def test_metrics_render(perf: PerfGate) -> None:
+    registry = Registry()
+    counter = registry.counter("c", "doc", ("type", "handler", "outcome"))
+    histogram = registry.histogram("h", "doc", ("type", "handler"))
+    for i in range(10):
+        counter.labels("message", f"h{i}", "ok").inc()
+        histogram.labels("message", f"h{i}").observe(0.01)
+    perf.bench("metrics.registry.render", registry.render)
+
+
+def test_tracing_unsampled_trace(perf: PerfGate) -> None:
+    exported: list[Trace] = []
+    tracer = Tracer(exported.append, sample_rate=0.0, slow_sec=0)
+
+    def run() -> None:
+        with tracer.trace("update message"), tracer.span("handler echo"):
+            pass
+
+    perf.bench("tracing.trace+span.unsampled", run)
+
+
+def test_flight_recorder_record_update(perf: PerfGate, tmp_path: Path) -> None:
+    recorder = FlightRecorder("perf", 1024, tmp_path)
+    perf.bench(
+        "flight_recorder.record_update",
+        lambda: recorder.record_update(1, "message", "echo", 0.0031, "ok"),
+    )
+
+
+def test_update_log_anonymize(perf: PerfGate) -> None:
+    raw = Update(update_id=UPDATE_ID, message=_message("my name is Bob, 30")).model_dump(
+        mode="json", exclude_none=True, by_alias=True
+    )
+    salt = b"perf-salt-16byte"
+    perf.bench("update_log.anonymize", lambda: anonymize(raw, salt))
+
+
+def test_update_log_mask_text(perf: PerfGate) -> None:
+    perf.bench("update_log.mask_text", lambda: mask_text("/form@bot Alice from Berlin, 30"))
+
+
+def test_po_catalog_read_po(perf: PerfGate) -> None:
+    path = LOCALES / "en" / "LC_MESSAGES" / "messages.po"
+    perf.bench("po_catalog.read_po", lambda: read_po(path))
+
+
+async def test_fsm_storage_step(perf: PerfGate) -> None:
+    storage = ExpiringMemoryStorage(ttl=3600, clock=VirtualClock())
+    key = StorageKey(bot_id=42, chat_id=1001, user_id=1001)
+
+    async def step() -> None:
+        await storage.set_state(key, "Form:age")
+        await storage.update_data(key, {"name": "Alice"})
+        await storage.get_state(key)
+
+    await perf.abench("fsm_storage.expiring.step", step)
+
+
+async def test_rate_limit_middleware(perf: PerfGate, bench_env: None) -> None:
+    clock = VirtualClock()
+    limiter = RateLimitMiddleware("perf", clock=clock)
+    message = _message()
+
+    async def call() -> None:
+        clock.advance(0.001)
+        await limiter(_handler, message, {})
+
+    await perf.abench("middleware.rate_limit", call)
+
+
+def test_rate_limit_sketch_hit(perf: PerfGate) -> None:
+    limiter = SketchRateLimiter(limit=3, window=1.0, width=4096)
+    users = itertools.cycle(range(1, 1001))
+    now = itertools.count(0.0, 0.001)
+
+    perf.bench("rate_limit.sketch.hit", lambda: limiter.hit(next(users), next(now)))
+
+
+def test_rate_limit_policy_allow(perf: PerfGate) -> None:
+    policy = RateLimitPolicy(
+        parse_limits("user=5/1s, chat=20/1m, type=100/1s, global=30/1s"),
+        parse_costs("/form=3, q:hint=0.5"),
+        VirtualClock(),
+    )
+    users = itertools.cycle(range(1, 1001))
+    now = itertools.count(0.0, 0.05)
+
+    def check() -> None:
+        cost = policy.cost("callback_query", data="q:hint_show:age")
+        policy.allow(next(users), -100, "callback_query", cost, next(now))
+
+    perf.bench("rate_limit.policy.allow", check)
+
+
+async def _cleanup_bench(
+    perf: PerfGate,
+    name: str,
+    event: TelegramObject,
+    before: Callable[[FSMContext], Awaitable[None]],
+) -> None:
+    storage = ExpiringMemoryStorage(ttl=3600, clock=VirtualClock())
+    calls = count_storage(storage)
+    state = FSMContext(storage, StorageKey(bot_id=42, chat_id=1001, user_id=1001))
+    bot = FakeBot()
+    middleware = KeyboardCleanupMiddleware(bot_name="perf")
+
+    async def call() -> None:
+        await before(state)
+        await middleware(_handler, event, {"state": state, "bot": bot})
+
+    def counters() -> dict[str, float]:
+        out = {f"storage.{k}": float(calls[k]) for k in STORAGE_METHODS}
+        out["api_calls"] = float(bot.calls)
+        return out
+
+    await perf.abench(name, call, counters=counters)
+
+
+async def test_keyboard_cleanup_message(perf: PerfGate, bench_env: None) -> None:
+    async def nothing(state: FSMContext) -> None:
+        return None
+
+    # Ни одной клавиатуры не запомнено — самый частый случай
+    await _cleanup_bench(perf, "middleware.keyboard_cleanup.message", _message(), nothing)
+
+
+async def test_keyboard_cleanup_message_with_keyboard(perf: PerfGate, bench_env: None) -> None:
+    async def remember(state: FSMContext) -> None:
+        await state.set_data({"last_inline_msg_id": 5})
+
+    await _cleanup_bench(perf, "middleware.keyboard_cleanup.message_kb", _message(), remember)
+
+
+async def test_keyboard_cleanup_callback(perf: PerfGate, bench_env: None) -> None:
+    async def nothing(state: FSMContext) -> None:
+        return None
+
+    callback = CallbackQuery(
+        id="1", from_user=USER, chat_instance="1", message=_message(), data="q:skip"
+    )
+    await _cleanup_bench(perf, "middleware.keyboard_cleanup.callback", callback, nothing)
+
+
+async def test_update_metrics_middleware(perf: PerfGate) -> None:
+    middleware = UpdateMetricsMiddleware(registry=Registry())
+    update = Update(update_id=UPDATE_ID, message=_message())
+    await perf.abench(
+        "middleware.update_metrics", lambda: middleware(_handler, update, {"event_from_user": USER})
+    )
+
+
+async def test_tracing_middleware(perf: PerfGate) -> None:
+    middleware = TracingMiddleware(Tracer(lambda trace: None, sample_rate=0.0, slow_sec=0))
+    update = Update(update_id=UPDATE_ID, message=_message())
+    await perf.abench(
+        "middleware.tracing", lambda: middleware(_handler, update, {"event_from_user": USER})
+    )
+
+
+async def test_i18n_gettext(perf: PerfGate, bench_env: None) -> None:
+    i18n = create_i18n(bot_name="questionnaire_bot").i18n
+
+    def lookup() -> None:
+        with i18n.context(), i18n.use_locale("ru"):
+            _("form.ask.name")
+
+    perf.bench("i18n.gettext", lookup)
@@ -78,11 +78,22 @@ def _load_mo(mo_path: Path) -> gettext.GNUTranslations:
         return gettext.GNUTranslations(fp)
 
 
+def _load_layered(root: Path, bot: str, lang: str) -> gettext.GNUTranslations:
+    """Оверлей бота с общим слоем в качестве fallback — как в рантайме."""
+    rel = Path("locales") / lang / "LC_MESSAGES" / "messages.mo"
+    overlay = _load_mo(root / ".i18n_cache" / bot / rel)
+    shared = root / ".i18n_cache" / "global" / rel
+    if shared.exists():
+        overlay.add_fallback(_load_mo(shared))
+    return overlay
+
+
 def test_compile_single_bot_merges_global_and_bot(
     monkeypatch: MonkeyPatch, tmp_project: Path
 ) -> None:
     monkeypatch.setattr(cl, "PROJECT_ROOT", tmp_project)
 
+    cl._compile_locales("global")
     cl._compile_locales("test_bot")
 
     en_mo = (
@@ -95,13 +106,13 @@ def test_compile_single_bot_merges_global_and_bot(
     assert en_mo.exists()
     assert ru_mo.exists()
 
-    tr_en = _load_mo(en_mo)
+    tr_en = _load_layered(tmp_project, "test_bot", "en")
     # bot перекрывает global
     assert tr_en.gettext("hello") == "Bot hello"
     # новая строка из бота
     assert tr_en.gettext("bye") == "Goodbye"
 
-    tr_ru = _load_mo(ru_mo)
+    tr_ru = _load_layered(tmp_project, "test_bot", "ru")
     assert tr_ru.ngettext("apple", "apples", 1) == "яблоко"
     assert tr_ru.ngettext("apple", "apples", 3) == "яблока"
     assert tr_ru.ngettext("apple", "apples", 7) == "яблок"
@@ -123,19 +134,39 @@ def test_compile_all_bots_includes_empty_bot_with_globals(
         tmp_project / ".i18n_cache" / "test_bot" / "locales" / "en" / "LC_MESSAGES" / "messages.mo"
     )
     assert en_mo.exists()
-    tr_en = _load_mo(en_mo)
+    tr_en = _load_layered(tmp_project, "test_bot", "en")
     assert tr_en.gettext("hello") == "Bot hello"
 
     empty_en_mo = (
         tmp_project / ".i18n_cache" / "empty_bot" / "locales" / "en" / "LC_MESSAGES" / "messages.mo"
     )
     assert empty_en_mo.exists()
-    tr_empty = _load_mo(empty_en_mo)
+    tr_empty = _load_layered(tmp_project, "empty_bot", "en")
     assert tr_empty.gettext("hello") == "Global hello"
     # "bye" там быть не должно
     assert tr_empty.gettext("bye") == "bye"
 
 
+def test_overlay_keeps_only_bot_entries(monkeypatch: MonkeyPatch, tmp_project: Path) -> None:
+    (tmp_project / "bots" / "empty_bot").mkdir(parents=True, exist_ok=True)
+    monkeypatch.setattr(cl, "PROJECT_ROOT", tmp_project)
+    monkeypatch.setattr(cl, "BOTS_DIR", tmp_project / "bots")
+
+    cl._compile_all_bots()
+
+    rel = Path("locales") / "en" / "LC_MESSAGES" / "messages.mo"
+    shared = polib.mofile(str(tmp_project / ".i18n_cache" / "global" / rel))
+    overlay = polib.mofile(str(tmp_project / ".i18n_cache" / "test_bot" / rel))
+
+    assert {e.msgid for e in shared} == {"hello"}
+    assert {e.msgid: e.msgstr for e in overlay} == {"hello": "Bot hello", "bye": "Goodbye"}
+
+    # общих строк в оверлее "пустого" бота нет, но язык присутствует
+    empty = polib.mofile(str(tmp_project / ".i18n_cache" / "empty_bot" / rel))
+    assert len(empty) == 0
+    assert empty.metadata["Language"] == "en"
+
+
 def test_merge_entries_empty_list_uses_defaults_and_no_entries() -> None:
     # po_list пустой → берутся дефолтные метаданные (в т.ч. Plural-Forms)
     merged = cl._merge_entries(lang="en", po_list=[])
@@ -224,3 +255,111 @@ def test_lang_by_po(tmp_project: Path) -> None:
     assert cl._lang_from_po(tmp_project) == "en"
     assert cl._lang_from_po(tmp_project / "locales") == "en"
     assert cl._lang_from_po(tmp_project / "locales" / "ru") == "ru"
+
+
+def test_compile_is_incremental_by_content_hash(
+    monkeypatch: MonkeyPatch, tmp_project: Path
+) -> None:
+    monkeypatch.setattr(cl, "PROJECT_ROOT", tmp_project)
+
+    assert cl._compile_locales("test_bot") == 2
+    # входы не менялись — ничего не пересобираем
+    assert cl._compile_locales("test_bot") == 0
+
+    ru_po = tmp_project / "bots" / "test_bot" / "locales" / "ru" / "LC_MESSAGES" / "messages.po"
+    cat = polib.pofile(str(ru_po))
+    cat.append(polib.POEntry(msgid="pear", msgstr="груша"))
+    cat.save(str(ru_po))
+
+    # пересобран только ru
+    assert cl._compile_locales("test_bot") == 1
+    tr_ru = _load_layered(tmp_project, "test_bot", "ru")
+    assert tr_ru.gettext("pear") == "груша"
+
+    monkeypatch.setattr(cl, "FORCE", True)
+    assert cl._compile_locales("test_bot") == 2
+
+    cache = tmp_project / ".i18n_cache" / "test_bot"
+    assert set(cl._read_manifest(cache / "manifest.json")) == {"en", "ru"}
+    # временных файлов после атомарной записи не остаётся
+    assert not list(cache.rglob("*.tmp"))
+
+
+def test_compile_removes_stale_languages(monkeypatch: MonkeyPatch, tmp_project: Path) -> None:
+    monkeypatch.setattr(cl, "PROJECT_ROOT", tmp_project)
+
+    cl._compile_locales("test_bot")
+    shutil.rmtree(tmp_project / "bots" / "test_bot" / "locales" / "ru")
+    cl._compile_locales("test_bot")
+
+    locales = tmp_project / ".i18n_cache" / "test_bot" / "locales"
+    assert sorted(p.name for p in locales.iterdir()) == ["en"]
+
+
+def test_compile_all_bots_in_process_pool(monkeypatch: MonkeyPatch, tmp_project: Path) -> None:
+    for name in ("bot_a", "bot_b"):
+        shutil.copytree(tmp_project / "bots" / "test_bot", tmp_project / "bots" / name)
+
+    monkeypatch.setattr(cl, "PROJECT_ROOT", tmp_project)
+    monkeypatch.setattr(cl, "BOTS_DIR", tmp_project / "bots")
+
+    cl._compile_all_bots(jobs=2)
+
+    for name in ("bot_a", "bot_b", "test_bot"):
+        assert _load_layered(tmp_project, name, "en").gettext("bye") == "Goodbye"
+        assert _load_layered(tmp_project, name, "en").gettext("hello") == "Bot hello"
+
+
+def test_watch_recompiles_only_changed_layer(monkeypatch: MonkeyPatch, tmp_project: Path) -> None:
+    monkeypatch.setattr(cl, "PROJECT_ROOT", tmp_project)
+    monkeypatch.setattr(cl, "BOTS_DIR", tmp_project / "bots")
+
+    real_compile = cl._compile_locales
+    compiled: list[tuple[str, int]] = []
+
+    def spy(bot_name: str) -> int:
+        n = real_compile(bot_name)
+        compiled.append((bot_name, n))
+        return n
+
+    def edit_on_first_sleep(_interval: float) -> None:
+        if compiled and len(compiled) == 2:
+            po_path = tmp_project / "bots" / "test_bot" / "locales" / "en" / "LC_MESSAGES"
+            cat = polib.pofile(str(po_path / "messages.po"))
+            cat.append(polib.POEntry(msgid="new", msgstr="Fresh"))
+            cat.save(str(po_path / "messages.po"))
+
+    monkeypatch.setattr(cl, "_compile_locales", spy)
+    monkeypatch.setattr(cl.time, "sleep", edit_on_first_sleep)
+
+    cl._watch(0.0, jobs=1, cycles=3)
+
+    # стартовая сборка обоих слоёв, затем только оверлей test_bot и только en
+    assert compiled == [("global", 1), ("test_bot", 2), ("test_bot", 1)]
+    assert _load_layered(tmp_project, "test_bot", "en").gettext("new") == "Fresh"
+
+
+def test_layer_of(monkeypatch: MonkeyPatch, tmp_project: Path) -> None:
+    monkeypatch.setattr(cl, "PROJECT_ROOT", tmp_project)
+    monkeypatch.setattr(cl, "BOTS_DIR", tmp_project / "bots")
+
+    assert cl._layer_of(tmp_project / "locales" / "en" / "messages.po") == "global"
+    assert cl._layer_of(tmp_project / "bots" / "x" / "locales" / "en" / "m.po") == "x"
+
+
+def test_po_snapshot_skips_file_replaced_mid_scan(
+    monkeypatch: MonkeyPatch, tmp_project: Path
+) -> None:
+    monkeypatch.setattr(cl, "PROJECT_ROOT", tmp_project)
+    monkeypatch.setattr(cl, "BOTS_DIR", tmp_project / "bots")
+    gone = tmp_project / "locales" / "en" / "LC_MESSAGES" / "messages.po"
+    real_stat = Path.stat
+
+    def stat(self: Path, **kwargs: bool) -> object:
+        if self == gone:
+            raise FileNotFoundError(self)
+        return real_stat(self, **kwargs)
+
+    monkeypatch.setattr(Path, "stat", stat)
+
+    assert sorted(p.parent.parent.name for p in cl._po_snapshot()) == ["en", "ru"]
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import json
+from collections.abc import AsyncIterator
+from typing import Any
+
+import aiohttp
+import pytest
+
+from scripts.bench.fake_bot_api import FakeBotApi, Faults
+
+
+TOKEN = "42:TEST"
+
+
+@pytest.fixture
+async def api() -> AsyncIterator[FakeBotApi]:
+    server = FakeBotApi(TOKEN, seed=1)
+    await server.start()
+    yield server
+    await server.stop()
+
+
+async def call(
+    api: FakeBotApi, method: str, **params: Any  # noqa: ANN401
+) -> tuple[int, dict[str, Any]]:
+    # как aiogram: multipart-форма, сложные значения — JSON-строками
+    form = aiohttp.FormData()
+    for key, value in params.items():
+        form.add_field(key, value if isinstance(value, str) else json.dumps(value))
+    async with (
+        aiohttp.ClientSession() as session,
+        session.post(f"{api.base_url}/bot{TOKEN}/{method}", data=form) as resp,
+    ):
+        return resp.status, await resp.json()
+
+
+async def test_get_updates_and_offset(api: FakeBotApi) -> None:
+    vu = api.user(7)
+    first = vu.send_text("/start")
+    vu.send_text("hi")
+
+    _, body = await call(api, "getUpdates", offset=0, timeout=0)
+    assert [u["update_id"] for u in body["result"]] == [first, first + 1]
+    assert body["result"][0]["message"]["entities"][0]["type"] == "bot_command"
+
+    _, body = await call(api, "getUpdates", offset=first + 2, timeout=0)
+    assert body["result"] == []
+
+
+async def test_send_message_delivered_to_user(api: FakeBotApi) -> None:
+    vu = api.user(7)
+    markup = {"inline_keyboard": [[{"text": "x", "callback_data": "q:skip"}]]}
+    status, body = await call(api, "sendMessage", chat_id=7, text="hello", reply_markup=markup)
+
+    assert status == 200
+    assert body["result"]["text"] == "hello"
+    got = await vu.response(timeout=1)
+    assert got.method == "sendMessage"
+    assert vu.last_markup_id == body["result"]["message_id"]
+    assert api.methods["sendMessage"] == 1
+
+
+async def test_callback_answer_routed_to_owner(api: FakeBotApi) -> None:
+    vu = api.user(7)
+    await call(api, "sendMessage", chat_id=7, text="step")
+    await vu.response(timeout=1)
+    vu.press("q:skip")
+
+    _, body = await call(api, "getUpdates", timeout=0)
+    query = body["result"][-1]["callback_query"]
+    assert query["message"]["message_id"] == vu.last_message_id
+
+    await call(api, "answerCallbackQuery", callback_query_id=query["id"])
+    got = await vu.response(timeout=1)
+    assert got.method == "answerCallbackQuery"
+
+
+async def test_injected_429(api: FakeBotApi) -> None:
+    api.faults = Faults(p429=1.0, retry_after=3)
+    status, body = await call(api, "sendMessage", chat_id=7, text="x")
+
+    assert status == 429
+    assert body["parameters"]["retry_after"] == 3
+    assert api.injected[429] == 1
+    # служебные методы отказам не подвержены
+    status, _ = await call(api, "getMe")
+    assert status == 200
+
+
+async def test_wrong_token_unauthorized(api: FakeBotApi) -> None:
+    async with (
+        aiohttp.ClientSession() as session,
+        session.post(f"{api.base_url}/bot1:other/getMe") as resp,
+    ):
+        assert resp.status == 401